@@ -76,28 +76,41 @@ class ASTProcessor:
                 except Exception as e:
                     print(f"⚠️  [ASTProcessor] No parser for {lang}: {e}")
 
-    def get_structure_sequence(self, file_path: str) -> str:
+    def get_structure_sequence(self, file_path: str, source_bytes: Optional[bytes] = None) -> str:
+        """
+        Control-flow skeleton of a file. Pass source_bytes when the caller
+        already read the file so it is not read a second time.
+        """
         abs_path = os.path.abspath(file_path)
-        if not os.path.exists(abs_path):
+        if source_bytes is None and not os.path.exists(abs_path):
             return ""
         ext = os.path.splitext(abs_path)[1].lower()
         lang = self.ext_map.get(ext, "cpp")
         if lang in self.parsers:
             try:
-                return self._ts_structure(abs_path, lang)
+                return self._ts_structure(abs_path, lang, source_bytes)
             except Exception:
                 pass
-        return " ".join(_keyword_sequence(_read_source(abs_path), lang))
+        if source_bytes is not None:
+            source = source_bytes.decode("utf-8", errors="ignore")
+        else:
+            source = _read_source(abs_path)
+        return " ".join(_keyword_sequence(source, lang))
 
-    def calculate_similarity(self, file_a: str, file_b: str) -> float:
-        seq_a = self.get_structure_sequence(file_a)
-        seq_b = self.get_structure_sequence(file_b)
+    @staticmethod
+    def sequence_similarity(seq_a: str, seq_b: str) -> float:
+        """Similarity of two structure sequences from get_structure_sequence()."""
         if not seq_a or not seq_b:
             return 0.0
         return round(difflib.SequenceMatcher(
             None, seq_a.split(), seq_b.split(), autojunk=False
         ).ratio(), 4)
 
+    def calculate_similarity(self, file_a: str, file_b: str) -> float:
+        seq_a = self.get_structure_sequence(file_a)
+        seq_b = self.get_structure_sequence(file_b)
+        return self.sequence_similarity(seq_a, seq_b)
+
     def parse_file(self, file_path: str) -> Dict[str, Any]:
         abs_path = os.path.abspath(file_path)
         if not os.path.exists(abs_path):
@@ -115,9 +128,10 @@ class ASTProcessor:
                 pass
         return result
 
-    def _ts_structure(self, abs_path: str, lang: str) -> str:
-        with open(abs_path, "rb") as f:
-            code = f.read()
+    def _ts_structure(self, abs_path: str, lang: str, code: Optional[bytes] = None) -> str:
+        if code is None:
+            with open(abs_path, "rb") as f:
+                code = f.read()
         tree = self.parsers[lang].parse(code)
         cursor = tree.walk()
         structure = []
@@ -8,7 +8,12 @@ class CodeTokenizer:
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 code = f.read()
-            
+            return self.tokenize_source(code, file_path)
+        except: return []
+
+    def tokenize_source(self, code, file_path):
+        """Same as tokenize_file, for callers that already hold the source text."""
+        try:
             # ADAPTIVE LOGIC: Only hide IDs if file is large enough to have structure
             hide_identifiers = len(code.splitlines()) > 15 
 
@@ -29,4 +34,4 @@ class CodeTokenizer:
                 else:
                     normalized_tokens.append(value.strip())
             return normalized_tokens
-        except: return []
\ No newline at end of file
+        except: return []
@@ -31,13 +31,24 @@ Threshold justification:
   report 0.95 when only a few short identifiers differ.
   0.98 is tight enough to ensure only whitespace/comment
   differences produce a match.
+
+Batch mode:
+  group_identical() buckets a whole job by normalized SHA-256 in O(n) and
+  returns the identical-file groups directly. detect_pair(bounded=True)
+  only runs the near-exact SequenceMatcher when it can still reach 0.98:
+    real_quick_ratio  2·min(la, lb) / (la + lb) — i.e. the normalized
+                      lengths differ by at most ~2% of the pair's total
+    quick_ratio       character-multiset upper bound, O(n)
+  Pairs that fail either bound are reported as score 0.0 with the bound
+  that ruled them out, instead of paying for a quadratic ratio().
 """
 
 import difflib
 import hashlib
 import re
 from pathlib import Path
-from typing import Any, Dict
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
 
 
 class Type1Detector:
@@ -49,6 +60,8 @@ class Type1Detector:
     Score < 0.98 = NOT a Type-1 clone
     """
 
+    NEAR_EXACT = 0.98
+
     # ── Normalization ─────────────────────────────────────────────────────
 
     @staticmethod
@@ -100,6 +113,14 @@ class Type1Detector:
         code = self._normalize_whitespace(code)
         return code
 
+    def build_view(self, code: str) -> Tuple[str, str]:
+        """
+        Per-file Type-1 view: (normalized text, SHA-256 of that text).
+        Computed once per file by the artifact layer and reused for every pair.
+        """
+        norm = self._normalize(code)
+        return norm, hashlib.sha256(norm.encode('utf-8')).hexdigest()
+
     # ── Detection ─────────────────────────────────────────────────────────
 
     def detect(self, file_a: str, file_b: str) -> Dict[str, Any]:
@@ -123,9 +144,43 @@ class Type1Detector:
                 "confidence": "ERROR", "error": str(e), "method": "none",
             }
 
-        norm_a = self._normalize(code_a)
-        norm_b = self._normalize(code_b)
+        norm_a, hash_a = self.build_view(code_a)
+        norm_b, hash_b = self.build_view(code_b)
+        return self._compare(norm_a, hash_a, norm_b, hash_b)
+
+    def detect_pair(self, art_a: Any, art_b: Any, bounded: bool = False) -> Dict[str, Any]:
+        """
+        Same as detect(), but on precomputed FileArtifacts
+        (engine/file_artifacts.py) — only the comparison step runs here.
+        bounded=True skips the near-exact ratio when it cannot reach 0.98.
+        """
+        if art_a.error or art_b.error:
+            return {
+                "type1_score": 0.0, "is_clone": False,
+                "confidence": "ERROR", "error": art_a.error or art_b.error,
+                "method": "none",
+            }
+        return self._compare(art_a.type1_text, art_a.type1_hash,
+                             art_b.type1_text, art_b.type1_hash, bounded=bounded)
 
+    @staticmethod
+    def group_identical(hashes: Dict[str, str]) -> List[List[str]]:
+        """
+        Bucket files by normalized SHA-256 (path → type1 hash) and return
+        every bucket with two or more files, largest first. Empty or
+        unreadable files (no hash, or the hash of empty text) are skipped.
+        """
+        empty = hashlib.sha256(b"").hexdigest()
+        buckets: Dict[str, List[str]] = defaultdict(list)
+        for path, h in hashes.items():
+            if h and h != empty:
+                buckets[h].append(path)
+        groups = [files for files in buckets.values() if len(files) > 1]
+        groups.sort(key=len, reverse=True)
+        return groups
+
+    def _compare(self, norm_a: str, hash_a: str, norm_b: str, hash_b: str,
+                 bounded: bool = False) -> Dict[str, Any]:
         if not norm_a or not norm_b:
             return {
                 "type1_score": 0.0, "is_clone": False,
@@ -133,9 +188,6 @@ class Type1Detector:
             }
 
         # ── Fast path: exact hash match ───────────────────────────────────
-        hash_a = hashlib.sha256(norm_a.encode('utf-8')).hexdigest()
-        hash_b = hashlib.sha256(norm_b.encode('utf-8')).hexdigest()
-
         if hash_a == hash_b:
             return {
                 "type1_score": 1.0, "is_clone": True,
@@ -145,9 +197,20 @@ class Type1Detector:
         # ── Slow path: sequence similarity for near-exact matches ─────────
         #    (catches minor differences that hash can't tolerate,
         #     e.g., trailing semicolon on last line vs not)
-        ratio = round(
-            difflib.SequenceMatcher(None, norm_a, norm_b).ratio(), 4
-        )
+        if bounded:
+            # real_quick_ratio() without building the matcher's index
+            la, lb = len(norm_a), len(norm_b)
+            upper = 2.0 * min(la, lb) / (la + lb)
+            if round(upper, 4) < self.NEAR_EXACT:
+                return self._bounded_result("real_quick_ratio", upper)
+
+        matcher = difflib.SequenceMatcher(None, norm_a, norm_b)
+        if bounded:
+            upper = matcher.quick_ratio()
+            if round(upper, 4) < self.NEAR_EXACT:
+                return self._bounded_result("quick_ratio", upper)
+
+        ratio = round(matcher.ratio(), 4)
 
         is_clone = ratio >= 0.98
 
@@ -165,4 +228,16 @@ class Type1Detector:
             "is_clone":    is_clone,
             "confidence":  confidence,
             "method":      "sequence",
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _bounded_result(method: str, upper: float) -> Dict[str, Any]:
+        """
+        Near-exact check skipped: the upper bound already rules out 0.98.
+        The score is the bound (≥ the real ratio), flagged with bounded=True.
+        """
+        return {
+            "type1_score": round(upper, 4), "is_clone": False,
+            "confidence": "UNLIKELY", "method": method,
+            "upper_bound": round(upper, 4), "bounded": True,
+        }
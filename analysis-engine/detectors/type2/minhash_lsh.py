@@ -0,0 +1,147 @@
+"""
+analysis-engine/detectors/type2/minhash_lsh.py
+
+MinHash / LSH over Type-2 Token Shingles
+========================================
+
+Type2Detector._tokenize() maps every identifier to ID and every literal to
+NUM/STR, so renamed-variable clones become (near-)identical token streams.
+Pairwise SequenceMatcher over those streams is exact but O(n²) in the
+number of files — fine for one section, hopeless across sections or
+semesters.
+
+MinHasher turns each stream into a fixed-size signature:
+  1. k-shingles of the normalized tokens, each hashed to 32 bits
+  2. num_perm universal hash permutations  h(x) = (a·x + b) mod p
+  3. signature[i] = min over shingles of permutation i
+
+The fraction of equal signature slots is an unbiased estimate of the
+Jaccard similarity of the two shingle sets (Broder, 1997).
+
+LSHIndex splits signatures into `bands` bands of `rows` slots and buckets
+files by band. Two files become a candidate pair when any band matches,
+which happens with probability 1 - (1 - J^rows)^bands — with the default
+32×4 that is ~50% at J≈0.38, ~64% at J=0.42 and >99% at J=0.70. Candidate generation is
+linear in the number of files plus the size of the buckets.
+"""
+
+import hashlib
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH       = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    """MinHash signatures over k-shingles of a token stream."""
+
+    def __init__(self, num_perm: int = 128, shingle_k: int = 5, seed: int = 1):
+        self.num_perm  = num_perm
+        self.shingle_k = shingle_k
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+
+    def shingles(self, tokens: List[str]) -> Set[int]:
+        k = self.shingle_k
+        out = set()
+        for i in range(len(tokens) - k + 1):
+            gram = " ".join(tokens[i:i + k]).encode("utf-8")
+            out.add(int.from_bytes(hashlib.blake2b(gram, digest_size=4).digest(), "little"))
+        return out
+
+    def signature(self, tokens: List[str]) -> np.ndarray:
+        """
+        uint64[num_perm] signature. Streams shorter than one shingle get an
+        all-max signature, which never collides in LSH and estimates 0.
+        """
+        sh = self.shingles(tokens)
+        if not sh:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hv = np.fromiter(sh, dtype=np.uint64, count=len(sh))
+        # (a·x + b) wraps mod 2^64 before the mod p — the usual MinHash trick
+        with np.errstate(over="ignore"):
+            phv = ((hv[:, None] * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return phv.min(axis=0)
+
+    @staticmethod
+    def is_empty(sig: np.ndarray) -> bool:
+        return bool(sig[0] == _MAX_HASH and (sig == _MAX_HASH).all())
+
+    @staticmethod
+    def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        if MinHasher.is_empty(sig_a) or MinHasher.is_empty(sig_b):
+            return 0.0
+        return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures. Keys are any hashable file id
+    (paths in the analyzer, submission ids for cross-semester lookups).
+    """
+
+    def __init__(self, bands: int = 32, rows: int = 4):
+        self.bands = bands
+        self.rows  = rows
+        self._sigs:    Dict[Hashable, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[Hashable]] = defaultdict(list)
+
+    @property
+    def num_perm(self) -> int:
+        return self.bands * self.rows
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def _band_keys(self, sig: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        r = self.rows
+        for b in range(self.bands):
+            yield b, sig[b * r:(b + 1) * r].tobytes()
+
+    def add(self, key: Hashable, sig: np.ndarray) -> None:
+        if len(sig) < self.num_perm:
+            raise ValueError(f"signature has {len(sig)} slots, index needs {self.num_perm}")
+        self._sigs[key] = sig
+        if MinHasher.is_empty(sig):
+            return
+        for band_key in self._band_keys(sig):
+            self._buckets[band_key].append(key)
+
+    def query(self, sig: np.ndarray) -> Set[Hashable]:
+        """Keys whose signature shares at least one band with sig."""
+        if MinHasher.is_empty(sig):
+            return set()
+        hits: Set[Hashable] = set()
+        for band_key in self._band_keys(sig):
+            hits.update(self._buckets.get(band_key, ()))
+        return hits
+
+    def candidate_pairs(self) -> Set[Tuple[Hashable, Hashable]]:
+        """All indexed pairs sharing a band, each as (earlier-added, later-added)."""
+        order = {k: i for i, k in enumerate(self._sigs)}
+        pairs: Set[Tuple[Hashable, Hashable]] = set()
+        for members in self._buckets.values():
+            if len(members) > 1:
+                for a, b in combinations(members, 2):
+                    pairs.add((a, b) if order[a] < order[b] else (b, a))
+        return pairs
+
+    def estimate(self, key_a: Hashable, key_b: Hashable) -> float:
+        """Estimated Jaccard of two indexed files — a cheap Type-2 pre-score."""
+        return MinHasher.estimate_jaccard(self._sigs[key_a], self._sigs[key_b])
+
+    def diagnostics(self) -> Dict:
+        sizes = [len(m) for m in self._buckets.values()]
+        return {
+            "index":           "minhash_lsh",
+            "files":           len(self._sigs),
+            "bands":           self.bands,
+            "rows":            self.rows,
+            "buckets":         len(sizes),
+            "max_bucket_size": max(sizes, default=0),
+        }
@@ -19,6 +19,10 @@ Detection approach:
      - Operators / punctuation → kept as-is
   3. Compare normalized token streams with SequenceMatcher
 
+For candidate generation across large batches, build_signature() turns
+the same stream into a MinHash signature (see minhash_lsh.py) whose
+banded LSH index finds renamed-variable clones without pairwise sweeps.
+
 Threshold justification:
   Type-2 means "structurally identical, only names differ."
   After normalization, a true Type-2 pair should have ratio ≥ 0.90.
@@ -37,6 +41,10 @@ import difflib
 from pathlib import Path
 from typing import Any, Dict, List
 
+import numpy as np
+
+from detectors.type2.minhash_lsh import MinHasher
+
 
 class Type2Detector:
     """
@@ -75,6 +83,9 @@ class Type2Detector:
         'of', 'null',
     }
 
+    def __init__(self, minhash_perm: int = 128, shingle_k: int = 5):
+        self.minhasher = MinHasher(num_perm=minhash_perm, shingle_k=shingle_k)
+
     # ── Tokenization ──────────────────────────────────────────────────────
 
     def _tokenize(self, code: str) -> List[str]:
@@ -123,6 +134,14 @@ class Type2Detector:
                 tokens.append(tok)
         return tokens
 
+    def build_view(self, code: str) -> List[str]:
+        """Per-file Type-2 view: the normalized token stream of _tokenize()."""
+        return self._tokenize(code)
+
+    def build_signature(self, tokens: List[str]) -> np.ndarray:
+        """MinHash signature of the normalized stream's k-shingles."""
+        return self.minhasher.signature(tokens)
+
     # ── Detection ─────────────────────────────────────────────────────────
 
     def detect(self, file_a: str, file_b: str) -> Dict[str, Any]:
@@ -147,9 +166,21 @@ class Type2Detector:
                 "confidence": "ERROR", "error": str(e),
             }
 
-        tokens_a = self._tokenize(code_a)
-        tokens_b = self._tokenize(code_b)
+        return self._compare(self._tokenize(code_a), self._tokenize(code_b))
+
+    def detect_pair(self, art_a: Any, art_b: Any) -> Dict[str, Any]:
+        """
+        Same as detect(), but on precomputed FileArtifacts — the token
+        streams come from art.type2_tokens instead of re-tokenizing.
+        """
+        if art_a.error or art_b.error:
+            return {
+                "type2_score": 0.0, "is_clone": False,
+                "confidence": "ERROR", "error": art_a.error or art_b.error,
+            }
+        return self._compare(art_a.type2_tokens, art_b.type2_tokens)
 
+    def _compare(self, tokens_a: List[str], tokens_b: List[str]) -> Dict[str, Any]:
         if not tokens_a or not tokens_b:
             return {
                 "type2_score": 0.0, "is_clone": False,
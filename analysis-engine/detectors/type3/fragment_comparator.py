@@ -33,10 +33,9 @@ Research basis:
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 from detectors.type3.fragment_extractor import Fragment
-from detectors.type3.normalizer import normalize_tokens, structurally_normalize_tokens
 from detectors.type3.lcs_comparator import lcs_similarity
 
 
@@ -83,6 +82,33 @@ class FragmentComparisonResult:
     confidence:      str
 
 
+# ─── Pruning bounds ───────────────────────────────────────────────────────────
+# Both LCS backends score 2·M / (|a| + |b|) with M ≤ LCS length, and
+#   LCS ≤ min(|a|, |b|)                    (length bound)
+#   LCS ≤ |bag(a) ∩ bag(b)|  (multiset)    (bag-of-tokens bound)
+# A pair whose normalized bound is under TYPE3_MT_THRESHOLD and whose raw
+# bound is under TYPE1_RAW_THRESHOLD can only classify as "none".
+
+def _bag_overlap(bag_a: Dict[int, int], bag_b: Dict[int, int]) -> int:
+    if len(bag_a) > len(bag_b):
+        bag_a, bag_b = bag_b, bag_a
+    return sum(min(c, bag_b.get(t, 0)) for t, c in bag_a.items())
+
+
+def prune_reason(frag_a: Fragment, frag_b: Fragment) -> Optional[str]:
+    """
+    "length" or "bag" when compare_fragments(frag_a, frag_b) is certain to
+    return clone_type "none"; None when the pair has to be compared.
+    """
+    total = frag_a.token_count + frag_b.token_count
+    if total == 0 or round(2.0 * min(frag_a.token_count, frag_b.token_count) / total, 4) < TYPE3_MT_THRESHOLD:
+        return "length"
+    if round(2.0 * _bag_overlap(frag_a.norm_bag, frag_b.norm_bag) / total, 4) < TYPE3_MT_THRESHOLD \
+            and round(2.0 * _bag_overlap(frag_a.raw_bag, frag_b.raw_bag) / total, 4) < TYPE1_RAW_THRESHOLD:
+        return "bag"
+    return None
+
+
 def compare_fragments(frag_a: Fragment, frag_b: Fragment) -> FragmentComparisonResult:
     """
     Compare two code fragments using the multi-tier dual-similarity approach.
@@ -91,17 +117,12 @@ def compare_fragments(frag_a: Fragment, frag_b: Fragment) -> FragmentComparisonR
       1. raw_sim   — original tokens (detects Type-1: exact copies)
       2. norm_sim  — blind-normalized tokens (detects Type-2: renames, Type-3: structural)
       3. deep_sim  — structurally-normalized (used for MT3 confirmation)
+
+    All three views are interned id arrays built once at extraction.
     """
-    raw_tokens_a  = frag_a.tokens
-    raw_tokens_b  = frag_b.tokens
-    norm_tokens_a = normalize_tokens(raw_tokens_a)
-    norm_tokens_b = normalize_tokens(raw_tokens_b)
-    deep_tokens_a = structurally_normalize_tokens(norm_tokens_a)
-    deep_tokens_b = structurally_normalize_tokens(norm_tokens_b)
-
-    raw_sim   = lcs_similarity(raw_tokens_a,  raw_tokens_b)
-    norm_sim  = lcs_similarity(norm_tokens_a, norm_tokens_b)
-    deep_sim  = lcs_similarity(deep_tokens_a, deep_tokens_b)
+    raw_sim   = lcs_similarity(frag_a.raw_ids,  frag_b.raw_ids)
+    norm_sim  = lcs_similarity(frag_a.norm_ids, frag_b.norm_ids)
+    deep_sim  = lcs_similarity(frag_a.deep_ids, frag_b.deep_ids)
     gap_ratio = round(norm_sim - raw_sim, 4)
 
     clone_type, clone_band, is_type3, type3_score, confidence = _classify(
@@ -170,4 +191,4 @@ def _classify(
 
 def compare_fragments_raw_only(frag_a: Fragment, frag_b: Fragment) -> float:
     """Quick raw-only comparison (no normalization)."""
-    return lcs_similarity(frag_a.tokens, frag_b.tokens)
+    return lcs_similarity(frag_a.raw_ids, frag_b.raw_ids)
@@ -8,23 +8,101 @@ regex-based parsing (no tree-sitter dependency).
 from __future__ import annotations
 import re
 import logging
-from dataclasses import dataclass
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from detectors.type3.normalizer import (
+    intern_tokens,
+    normalize_tokens,
+    structurally_normalize_tokens,
+    token_texts,
+)
 
 logger = logging.getLogger(__name__)
 
-@dataclass
 class Fragment:
-    """A single code fragment extracted from a file."""
-    file_path:    str
-    name:         str
-    start_line:   int
-    end_line:     int
-    source_lines: List[str]
-    tokens:       List[str]
-    student_id:   Optional[str] = None
-    student_name: Optional[str] = None
+    """
+    A single code fragment extracted from a file.
+
+    Built once per file and compared against hundreds of other fragments
+    per job, so it is kept compact and every per-fragment view is
+    precomputed here rather than inside compare_fragments():
+
+      raw_ids / norm_ids / deep_ids   array('i') of interned token ids for
+                                      the raw, blind-normalized and
+                                      structurally-normalized token streams
+      buffer + span                   the file's source text (one string
+                                      shared by all its fragments) and the
+                                      (start, end) character offsets of the
+                                      fragment in it
+      raw_bag / norm_bag              token-id multisets, built on first use
+                                      by the comparison pruning bounds
+
+    tokens and source_lines are still available as properties for callers
+    that want strings (diff view, result export).
+    """
+
+    __slots__ = (
+        "file_path", "name", "start_line", "end_line",
+        "buffer", "span", "raw_ids", "norm_ids", "deep_ids",
+        "student_id", "student_name", "minhash", "_bags",
+    )
+
+    def __init__(
+        self,
+        file_path:    str,
+        name:         str,
+        start_line:   int,
+        end_line:     int,
+        buffer:       str,
+        span:         Tuple[int, int],
+        tokens:       List[str],
+        student_id:   Optional[str] = None,
+        student_name: Optional[str] = None,
+    ):
+        self.file_path    = file_path
+        self.name         = name
+        self.start_line   = start_line
+        self.end_line     = end_line
+        self.buffer       = buffer
+        self.span         = span
+        self.student_id   = student_id
+        self.student_name = student_name
+        self._set_tokens(tokens)
+
+    def _set_tokens(self, tokens: List[str]) -> None:
+        self.minhash = None
+        self._bags   = None
+        norm = normalize_tokens(tokens)
+        self.raw_ids  = intern_tokens(tokens)
+        self.norm_ids = intern_tokens(norm)
+        self.deep_ids = intern_tokens(structurally_normalize_tokens(norm))
+
+    @property
+    def tokens(self) -> List[str]:
+        return token_texts(self.raw_ids)
+
+    @property
+    def raw_bag(self) -> Dict[int, int]:
+        return self._token_bags()[0]
+
+    @property
+    def norm_bag(self) -> Dict[int, int]:
+        return self._token_bags()[1]
+
+    def _token_bags(self) -> Tuple[Dict[int, int], Dict[int, int]]:
+        if self._bags is None:
+            self._bags = (Counter(self.raw_ids), Counter(self.norm_ids))
+        return self._bags
+
+    @property
+    def source(self) -> str:
+        return self.buffer[self.span[0]:self.span[1]]
+
+    @property
+    def source_lines(self) -> List[str]:
+        return self.source.splitlines()
 
     @property
     def line_count(self) -> int:
@@ -32,7 +110,28 @@ class Fragment:
 
     @property
     def token_count(self) -> int:
-        return len(self.tokens)
+        return len(self.raw_ids)
+
+    def __repr__(self) -> str:
+        return (f"Fragment(file_path={self.file_path!r}, name={self.name!r}, "
+                f"start_line={self.start_line}, end_line={self.end_line})")
+
+    # Token ids are process-local: pickle the tokens and only the
+    # fragment's own source text, and re-intern on load.
+    def __getstate__(self):
+        return {
+            "file_path": self.file_path, "name": self.name,
+            "start_line": self.start_line, "end_line": self.end_line,
+            "source": self.source, "tokens": self.tokens,
+            "student_id": self.student_id, "student_name": self.student_name,
+        }
+
+    def __setstate__(self, state):
+        for key in ("file_path", "name", "start_line", "end_line", "student_id", "student_name"):
+            setattr(self, key, state[key])
+        self.buffer = state["source"]
+        self.span   = (0, len(self.buffer))
+        self._set_tokens(state["tokens"])
 
 
 # ── Language patterns ─────────────────────────────────────────────────────────
@@ -72,10 +171,13 @@ class FragmentExtractor:
         self.min_tokens = min_tokens
         self.exclude_headers = exclude_headers
 
-    def extract(self, file_path: str) -> List[Fragment]:
-        """Extract fragments, skipping header files and macOS files"""
+    def extract(self, file_path: str, source: Optional[str] = None) -> List[Fragment]:
+        """
+        Extract fragments, skipping header files and macOS files.
+        Pass source when the file has already been read.
+        """
         path = Path(file_path)
-        if not path.exists():
+        if source is None and not path.exists():
             return []
 
         # 1. macOS files
@@ -94,10 +196,11 @@ class FragmentExtractor:
             return []
 
         lang = _EXT_LANG.get(path.suffix.lower(), "cpp")
-        try:
-            source = path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            return []
+        if source is None:
+            try:
+                source = path.read_text(encoding="utf-8", errors="ignore")
+            except Exception:
+                return []
 
         if lang == "python":
             fragments = self._extract_python(source, file_path)
@@ -132,8 +235,17 @@ class FragmentExtractor:
             result.extend(self.extract(fp))
         return result
 
+    @staticmethod
+    def _line_offsets(source: str) -> List[int]:
+        """offsets[i] = character offset of line i (splitlines numbering)."""
+        offsets = [0]
+        for line in source.splitlines(True):
+            offsets.append(offsets[-1] + len(line))
+        return offsets
+
     def _extract_braced(self, source: str, file_path: str, lang: str) -> List[Fragment]:
         lines = source.splitlines()
+        offsets = self._line_offsets(source)
         fragments: List[Fragment] = []
         used_starts: set = set()
 
@@ -173,7 +285,8 @@ class FragmentExtractor:
                 name=name,
                 start_line=start_line + 1,
                 end_line=end_line + 1,
-                source_lines=frag_lines,
+                buffer=source,
+                span=self._span(offsets, start_line, end_line),
                 tokens=tokens,
             ))
             used_starts.add(start_line)
@@ -182,6 +295,7 @@ class FragmentExtractor:
 
     def _extract_python(self, source: str, file_path: str) -> List[Fragment]:
         lines = source.splitlines()
+        offsets = self._line_offsets(source)
         n = len(lines)
         frags: List[Fragment] = []
 
@@ -208,12 +322,18 @@ class FragmentExtractor:
                 name=name,
                 start_line=start_line + 1,
                 end_line=end_line + 1,
-                source_lines=frag_lines,
+                buffer=source,
+                span=self._span(offsets, start_line, end_line),
                 tokens=tokens,
             ))
 
         return frags
 
+    @staticmethod
+    def _span(offsets: List[int], start_line: int, end_line: int) -> Tuple[int, int]:
+        last = len(offsets) - 1
+        return offsets[min(start_line, last)], offsets[min(end_line + 1, last)]
+
     @staticmethod
     def _tokenize_lines(lines: List[str]) -> List[str]:
         tokens = []
@@ -0,0 +1,264 @@
+# detectors/type3/fragment_index.py
+"""
+Batch Fragment Clone Index
+==========================
+Fragment clones used to be found only through file-pair loops: every
+fragment of file A against every fragment of file B, repeated for every
+file pair. A fragment was therefore compared with all F fragments of the
+class, and clone classes cost O(F²) compare_fragments calls.
+
+FragmentIndex works on all F fragments of a batch at once (NiCad-style):
+
+  1. Exact buckets   fragments with identical normalized token ids are
+                     Type-1/Type-2 clones of each other. They are bucketed
+                     by hash in O(F), and each member is compared once,
+                     against the bucket representative.
+
+  2. Near-miss LSH   one representative per exact bucket is placed in a
+                     size band (⌊log₃ token_count⌋, so lengths within the
+                     1:3 ratio that TYPE3_MT_THRESHOLD allows are at most
+                     one band apart). Representatives are then LSH-banded
+                     with a MinHash of their normalized 3-gram shingles.
+                     Only representatives that share a (size band, LSH
+                     band) bucket become Type-3 candidates. Each candidate
+                     goes through prune_reason() and then compare_fragments().
+
+Fragments of the same group (file, or student) are never paired, which
+matches the file-pair loops; neither are fragments of different
+partitions (partition_of, e.g. the source language) when one is given. The resulting pairs feed
+CloneClusterer.cluster() directly, and file_pair_scores() summarizes them
+per group pair as a by-product.
+
+The exact buckets are lossless. The LSH stage is lossy by design: a
+near-miss pair whose shingle sets share little can be missed even though
+its LCS ratio reaches 0.50. With the defaults (32 bands × 2 rows) the
+sample uploads keep every fragment pair ≥ 0.70 (the clustering
+threshold) and about three quarters of the MT3 pairs in 0.50–0.70, while
+comparing roughly a tenth of the cartesian product. diagnostics() reports
+the counts. Callers that need pairs below LSH_MIN_SIMILARITY (0.70) pass
+exhaustive=True: every cross-group pair of bucket representatives then
+goes through prune_reason() and compare_fragments(), which is exact.
+
+Only Type-3 pairs are clustered, as in the file-pair loops; Type-1/2
+fragment clones stay in `pairs` and in file_pair_scores().
+
+Every compare_fragments() result of the build is kept by fragment
+identity, so per-pair scoring over the same Fragment objects can look a
+comparison up with comparison() instead of running the LCS again.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from itertools import combinations
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from detectors.type2.minhash_lsh import MinHasher
+from detectors.type3.clone_clusterer import CloneClass, CloneClusterer
+from detectors.type3.fragment_comparator import (
+    FragmentComparisonResult,
+    compare_fragments,
+    prune_reason,
+)
+from detectors.type3.fragment_extractor import Fragment
+from detectors.type3.normalizer import token_texts
+
+
+# Lowest similarity the LSH stage was measured to keep every pair for;
+# below it callers should build with exhaustive=True
+LSH_MIN_SIMILARITY = 0.70
+
+
+def _size_band(token_count: int) -> int:
+    return int(math.log(max(token_count, 1), 3))
+
+
+class FragmentIndex:
+    def __init__(self, bands: int = 32, rows: int = 2, shingle_k: int = 3,
+                 group_of: Optional[Callable[[Fragment], str]] = None,
+                 exhaustive: bool = False,
+                 partition_of: Optional[Callable[[Fragment], str]] = None):
+        self.bands     = bands
+        self.rows      = rows
+        self.exhaustive = exhaustive
+        self._hasher   = MinHasher(num_perm=bands * rows, shingle_k=shingle_k)
+        self._group_of = group_of or (lambda f: f.file_path)
+        self._partition_of = partition_of or (lambda f: "")
+
+        self.fragments: List[Fragment] = []
+        self.pairs:     List[Dict]     = []
+        self._exact_groups: List[List[str]] = []
+        self._rank:     Dict[str, int] = {}
+        self._stats:    Dict[str, int] = {}
+        self._results:  Dict[Tuple[int, int], FragmentComparisonResult] = {}
+
+    # ── Build ────────────────────────────────────────────────────────────────
+
+    def build(self, fragments: List[Fragment]) -> "FragmentIndex":
+        self.fragments = list(fragments)
+        self.pairs = []
+        self._exact_groups = []
+        self._results = {}
+        groups = [self._group_of(f) for f in self.fragments]
+        partitions = [self._partition_of(f) for f in self.fragments]
+        # compare_fragments is not symmetric: pairs are compared in group
+        # order (first appearance), as the file/student pair loops did
+        self._rank: Dict[str, int] = {}
+        for g in groups:
+            self._rank.setdefault(g, len(self._rank))
+
+        # 1. Exact buckets — identical normalized token streams
+        exact: Dict[Tuple[str, bytes], List[int]] = defaultdict(list)
+        for i, frag in enumerate(self.fragments):
+            exact[(self._partition_of(frag), frag.norm_ids.tobytes())].append(i)
+        buckets = list(exact.values())
+
+        exact_compared = 0
+        for members in buckets:
+            member_groups = sorted({groups[m] for m in members})
+            if len(member_groups) > 1:
+                self._exact_groups.append(member_groups)
+            rep = members[0]
+            for m in members[1:]:
+                partner = rep if groups[m] != groups[rep] else next(
+                    (x for x in members if groups[x] != groups[m]), None)
+                if partner is not None:
+                    exact_compared += 1
+                    self._add(partner, m, groups)
+
+        # 2. Near-miss candidates among bucket representatives
+        candidates: Set[Tuple[int, int]] = (
+            self._exhaustive_candidates(buckets, groups, partitions) if self.exhaustive
+            else self._lsh_candidates(buckets)
+        )
+
+        compared = pruned = 0
+        for ba, bb in candidates:
+            ra, rb = self.fragments[buckets[ba][0]], self.fragments[buckets[bb][0]]
+            if prune_reason(ra, rb):
+                pruned += 1
+                continue
+            for ia in buckets[ba]:
+                for ib in buckets[bb]:
+                    if groups[ia] != groups[ib]:
+                        compared += 1
+                        self._add(ia, ib, groups)
+
+        n = len(self.fragments)
+        per_group = defaultdict(int)
+        for g in groups:
+            per_group[g] += 1
+        self._stats = {
+            "fragments":        n,
+            "groups":           len(per_group),
+            "exact_buckets":    len(buckets),
+            "exact_compared":   exact_compared,
+            "exhaustive":       int(self.exhaustive),
+            "lsh_candidates":   len(candidates),
+            "lsh_pruned":       pruned,
+            "near_compared":    compared,
+            "cartesian_pairs":  (n * n - sum(c * c for c in per_group.values())) // 2,
+            "clone_pairs":      len(self.pairs),
+        }
+        return self
+
+    def _lsh_candidates(self, buckets: List[List[int]]) -> Set[Tuple[int, int]]:
+        lsh: Dict[Tuple[str, int, int, bytes], List[int]] = defaultdict(list)
+        for b, members in enumerate(buckets):
+            frag = self.fragments[members[0]]
+            sig  = self._hasher.signature(token_texts(frag.norm_ids))
+            if MinHasher.is_empty(sig):
+                continue
+            part = self._partition_of(frag)
+            size = _size_band(frag.token_count)
+            for band in range(self.bands):
+                key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+                # Registered in its own size band and the next one up, so
+                # neighbours across a band boundary still meet
+                lsh[(part, size, band, key)].append(b)
+                lsh[(part, size + 1, band, key)].append(b)
+
+        candidates: Set[Tuple[int, int]] = set()
+        for bucket in lsh.values():
+            if len(bucket) > 1:
+                candidates.update(combinations(sorted(set(bucket)), 2))
+        return candidates
+
+    @staticmethod
+    def _exhaustive_candidates(buckets: List[List[int]], groups: List[str],
+                               partitions: List[str]) -> Set[Tuple[int, int]]:
+        """Every same-partition pair of buckets with a cross-group member pair."""
+        bucket_groups = [{groups[m] for m in members} for members in buckets]
+        bucket_part   = [partitions[members[0]] for members in buckets]
+        return {
+            (ba, bb) for ba, bb in combinations(range(len(buckets)), 2)
+            if bucket_part[ba] == bucket_part[bb]
+            and len(bucket_groups[ba] | bucket_groups[bb]) > 1
+        }
+
+    def _add(self, ia: int, ib: int, groups: List[str]) -> None:
+        if (self._rank[groups[ia]], ia) > (self._rank[groups[ib]], ib):
+            ia, ib = ib, ia
+        fa, fb = self.fragments[ia], self.fragments[ib]
+        result = compare_fragments(fa, fb)
+        self._results[(id(fa), id(fb))] = result
+        if result.clone_type == "none":
+            return
+        self.pairs.append({
+            "frag_a":          fa,
+            "frag_b":          fb,
+            "group_a":         groups[ia],
+            "group_b":         groups[ib],
+            "similarity":      result.type3_score if result.is_type3 else result.norm_similarity,
+            "norm_similarity": result.norm_similarity,
+            "raw_similarity":  result.raw_similarity,
+            "clone_type":      result.clone_type,
+            "clone_band":      result.clone_band,
+        })
+
+    # ── Outputs ──────────────────────────────────────────────────────────────
+
+    def comparison(self, fa: Fragment, fb: Fragment) -> Optional[FragmentComparisonResult]:
+        """compare_fragments(fa, fb) if the build already ran it, else None."""
+        return self._results.get((id(fa), id(fb)))
+
+    def clone_classes(self, clusterer: Optional[CloneClusterer] = None,
+                      min_similarity: float = 0.70) -> List[CloneClass]:
+        # Only genuine Type-3 pairs are clustered, as in the file-pair loops
+        return (clusterer or CloneClusterer()).cluster(self.type3_pairs(), min_similarity=min_similarity)
+
+    def type3_pairs(self) -> List[Dict]:
+        return [p for p in self.pairs if p["clone_type"] == "type3"]
+
+    def file_pair_scores(self) -> Dict[Tuple[str, str], Dict]:
+        """
+        Per group pair: best Type-3 fragment similarity, best similarity of
+        any fragment clone (Type-1/2 count as their normalized similarity)
+        and the number of clone fragment pairs.
+        """
+        scores: Dict[Tuple[str, str], Dict] = {}
+
+        def _entry(ga: str, gb: str) -> Dict:
+            key = (ga, gb) if ga <= gb else (gb, ga)
+            return scores.setdefault(key, {"best_type3_sim": 0.0, "best_sim": 0.0, "clone_fragment_pairs": 0})
+
+        # Exact buckets were only compared as a star; every group pair in a
+        # bucket shares an identical normalized fragment
+        for member_groups in self._exact_groups:
+            for ga, gb in combinations(member_groups, 2):
+                entry = _entry(ga, gb)
+                entry["clone_fragment_pairs"] += 1
+                entry["best_sim"] = 1.0
+
+        for p in self.pairs:
+            if p["clone_type"] != "type3":
+                continue
+            entry = _entry(p["group_a"], p["group_b"])
+            entry["clone_fragment_pairs"] += 1
+            entry["best_sim"] = max(entry["best_sim"], p["similarity"])
+            entry["best_type3_sim"] = max(entry["best_type3_sim"], p["similarity"])
+        return scores
+
+    def diagnostics(self) -> Dict[str, int]:
+        return dict(self._stats)
@@ -27,7 +27,9 @@ Improvements over v2.x:
 Detection pipeline:
   Stage 1 — Fragment extraction (function/method level)
   Stage 2 — Dual-similarity comparison per fragment pair
-             raw LCS + blind-norm LCS + structural-norm LCS
+             raw LCS + blind-norm LCS + structural-norm LCS, after
+             length / bag-of-tokens bounds prune the pairs that cannot
+             reach TYPE3_MT_THRESHOLD (optionally a fragment MinHash too)
   Stage 3 — Multi-tier classification (Type-1/2/3 ST/MT, none)
   Stage 4 — Aggregate coverage computation
   Stage 5 — File-level heuristics (winnowing, AST, metrics)
@@ -44,13 +46,14 @@ Score weights:
 
 from __future__ import annotations
 
+import hashlib
 import json
 import sys
 import time
 import warnings
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import joblib
 import numpy as np
@@ -68,18 +71,20 @@ from core.ast_ml_adapter import ASTMLAdapter
 from utils.metrics_calculator import MetricsCalculator
 from utils.frequency_filter import BatchFrequencyFilter
 
+from detectors.type2.minhash_lsh import MinHasher
 from detectors.type3.winnowing import WinnowingDetector, WINNOWING_K
 from detectors.type3.config.extension_weights import get_pair_weight
 from detectors.type3.config.thresholds import get_thresholds, get_confidence
 from detectors.type3.fragment_extractor import FragmentExtractor, Fragment
 from detectors.type3.fragment_comparator import (
     compare_fragments,
+    prune_reason,
     FragmentComparisonResult,
     TYPE3_ST_THRESHOLD,
     TYPE3_MT_THRESHOLD,
 )
-from detectors.type3.normalizer import normalize_tokens
 from detectors.type3.lcs_comparator import get_matching_blocks
+from detectors.type3.normalizer import token_generation, token_texts
 from detectors.type3.clone_clusterer import CloneClusterer
 
 
@@ -104,6 +109,7 @@ class Type3HybridDetector:
         self,
         hybrid_threshold: float = 0.70,
         ml_threshold:     float = 0.70,
+        fragment_minhash_min: Optional[float] = None,
     ):
         self.tokenizer    = CodeTokenizer()
         self.ast_proc     = ASTProcessor()
@@ -113,7 +119,23 @@ class Type3HybridDetector:
 
         self._extractor = FragmentExtractor(min_lines=5, min_tokens=15)
         self._clusterer = CloneClusterer()
-        self._frag_cache: Dict[str, List[Fragment]] = {}
+        # Path-keyed LRU over the legacy path-based entry points; backed by
+        # the content-addressed ArtifactStore once attach_store() is called
+        self._frag_cache: "OrderedDict[str, List[Fragment]]" = OrderedDict()
+        self._frag_generation = token_generation()
+        self._store = None
+
+        # Optional, lossy fragment pre-filter: skip pairs whose estimated
+        # normalized-shingle Jaccard is below fragment_minhash_min
+        self.fragment_minhash_min = fragment_minhash_min
+        self._frag_minhasher = MinHasher(num_perm=64, shingle_k=4) if fragment_minhash_min else None
+
+        # Job-wide pairwise signal matrices (index_artifacts)
+        self._batch_rows: Dict[str, int] = {}
+        self._metric_sim: Optional[np.ndarray] = None
+        self._winnow_sim: Any = None
+        # Batch-wide FragmentIndex whose comparisons _fragment_score reuses
+        self._fragment_index: Any = None
 
         self._adapter = ASTMLAdapter(
             cache_dir=str(_REPO_ROOT / "analysis-engine" / "feature_cache")
@@ -195,19 +217,165 @@ class Type3HybridDetector:
     def _detect_language(self, path: Path) -> str:
         return self._EXT_LANG.get(path.suffix.lower(), "cpp")
 
+    FRAG_CACHE_FILES = 512
+
+    def attach_store(self, store: Any) -> None:
+        """Persist extracted fragments in an ArtifactStore, keyed by file content."""
+        self._store = store
+
     def _get_fragments(self, file_path: str) -> List[Fragment]:
-        if file_path not in self._frag_cache:
-            self._frag_cache[file_path] = self._extractor.extract(file_path)
-        return self._frag_cache[file_path]
+        if self._frag_generation != token_generation():
+            # Token ids were reset since these fragments were built
+            self._frag_cache.clear()
+            self._frag_generation = token_generation()
+        frags = self._frag_cache.get(file_path)
+        if frags is not None:
+            self._frag_cache.move_to_end(file_path)
+            return frags
+        frags = self._load_fragments(file_path)
+        self._frag_cache[file_path] = frags
+        if len(self._frag_cache) > self.FRAG_CACHE_FILES:
+            self._frag_cache.popitem(last=False)
+        return frags
+
+    def _load_fragments(self, file_path: str) -> List[Fragment]:
+        if self._store is None:
+            return self._extractor.extract(file_path)
+        try:
+            raw = Path(file_path).read_bytes()
+        except OSError:
+            return self._extractor.extract(file_path)
+        # Extraction depends on the extension too (headers are skipped)
+        digest = hashlib.sha256(raw).hexdigest()
+        kind   = f"fragments{Path(file_path).suffix.lower()}"
+        frags  = self._store.get(digest, kind)
+        if frags is None:
+            frags = self._extractor.extract(file_path, raw.decode("utf-8", errors="ignore"))
+            self._store.put(digest, kind, frags)
+        for frag in frags:
+            frag.file_path = file_path
+        return frags
 
     def prepare_batch(self, all_file_paths: List[Path]) -> None:
-        all_tokens = [self.tokenizer.tokenize_file(str(p)) for p in all_file_paths]
-        self.freq_filter.train_on_batch(all_tokens, k=WINNOWING_K)
+        self.freq_filter.train_on_hashes(
+            set(self.winnowing._get_hashes(self.tokenizer.tokenize_file(str(p))))
+            for p in all_file_paths
+        )
         for p in all_file_paths:
             self._get_fragments(str(p))
 
+    def prepare_artifacts(self, artifacts: List[Any]) -> None:
+        """
+        prepare_batch() for callers that already hold FileArtifacts:
+        trains the frequency filter from the cached k-gram hashes instead
+        of re-lexing and re-hashing every file. Fragments live on the
+        artifacts, so the path-keyed fragment cache is not touched.
+        """
+        self.freq_filter.train_on_hashes(a.kgram_hashes for a in artifacts)
+        self.index_artifacts(artifacts)
+
+    def index_artifacts(self, artifacts: List[Any], max_files: int = 2000) -> None:
+        """
+        Precompute the two file-level signals that need no per-pair
+        structure, for every pair of artifacts at once:
+
+          metrics    n×8 metric matrix → dense n×n similarity (one broadcast)
+          winnowing  frequency-filtered fingerprint sets → CSR rows; X·Xᵀ
+                     gives every intersection count, Jaccard follows from
+                     the row sums (sparse n×n)
+
+        The frequency filter must already be trained. Pairs whose files
+        are not both indexed — or jobs above max_files, where n×n floats
+        would not be worth holding — fall back to the per-pair calls.
+        """
+        self._batch_rows  = {}
+        self._metric_sim  = None
+        self._winnow_sim  = None
+        self._fragment_index = None
+        if not artifacts or len(artifacts) > max_files:
+            return
+        matrix = np.array([a.metrics for a in artifacts], dtype=np.float64)
+        self._metric_sim  = self.metrics_calc.similarity_matrix(matrix)
+        self._winnow_sim  = self.winnowing.jaccard_matrix(
+            [self._filtered_fingerprint(a.fingerprint) for a in artifacts]
+        )
+        self._batch_rows  = {a.path: i for i, a in enumerate(artifacts)}
+
+    def use_fragment_index(self, index: Any) -> None:
+        """
+        Reuse the compare_fragments() results of a FragmentIndex built over
+        the indexed artifacts' fragments. Reset by index_artifacts(), since
+        the index keys comparisons by fragment identity.
+        """
+        self._fragment_index = index
+
+    def _batch_index(self, art_a: Any, art_b: Any) -> Optional[Tuple[int, int]]:
+        i = self._batch_rows.get(art_a.path)
+        j = self._batch_rows.get(art_b.path)
+        return None if i is None or j is None else (i, j)
+
+    def _metric_score(self, art_a: Any, art_b: Any) -> float:
+        ij = self._batch_index(art_a, art_b)
+        if ij is None:
+            return float(self.metrics_calc.calculate_similarity(art_a.metrics, art_b.metrics))
+        return round(float(self._metric_sim[ij]), 4)
+
+    def _winnowing_pair_score(self, art_a: Any, art_b: Any) -> float:
+        ij = self._batch_index(art_a, art_b)
+        if ij is None or self._winnow_sim is None:
+            return self._winnowing_score(art_a.fingerprint, art_b.fingerprint)
+        # CSR row lookup without scipy's per-element indexing overhead
+        m = self._winnow_sim
+        lo, hi = m.indptr[ij[0]], m.indptr[ij[0] + 1]
+        k = lo + int(np.searchsorted(m.indices[lo:hi], ij[1]))
+        return float(m.data[k]) if k < hi and m.indices[k] == ij[1] else 0.0
+
+    def prepare_streaming(self, sources: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, set]:
+        """
+        Train the frequency filter over the whole job while lexing one file
+        at a time, for callers (the tile scheduler) that never hold every
+        file's artifacts at once. sources yields (path, source text), with
+        None for unreadable files. Returns each file's raw winnowing
+        fingerprint — small enough to keep for the whole job.
+        """
+        fingerprints: Dict[str, set] = {}
+
+        def _hashes():
+            for path, source in sources:
+                tokens = self.tokenizer.tokenize_source(source, path) if source is not None else []
+                hashes = self.winnowing._get_hashes(tokens)
+                fingerprints[str(path)] = self.winnowing.fingerprint_from_hashes(hashes)
+                yield set(hashes)
+
+        self.freq_filter.train_on_hashes(_hashes())
+        return fingerprints
+
+    def build_view(self, file_path: str, source: str, source_bytes: bytes) -> Dict[str, Any]:
+        """
+        Everything Type-3 needs from a single file, computed once:
+        lexer tokens, their k-gram hashes (frequency filter training),
+        raw winnowing fingerprint (before the batch frequency filter,
+        winnowed from the same hashes), AST structure sequence, metric vector,
+        fragments and — when the model is loaded — the prepared ML unit.
+        """
+        tokens = self.tokenizer.tokenize_source(source, file_path)
+        hashes = self.winnowing._get_hashes(tokens)
+        return {
+            "lexer_tokens": tokens,
+            "kgram_hashes": set(hashes),
+            "fingerprint":  self.winnowing.fingerprint_from_hashes(hashes),
+            "structure":    self.ast_proc.get_structure_sequence(file_path, source_bytes),
+            "metrics":      self.metrics_calc.calculate_file_metrics(file_path, source),
+            "fragments":    self._extractor.extract(file_path, source),
+            "ml_unit":      self._prepare_ml_unit(file_path) if self.ml_enabled else None,
+        }
+
     def clear_cache(self) -> None:
         self._frag_cache.clear()
+        self._batch_rows = {}
+        self._metric_sim = None
+        self._winnow_sim = None
+        self._fragment_index = None
 
     # ─────────────────────────────────────────────────────────────────────
     # Stage 2–4: Fragment-level analysis with aggregate coverage
@@ -237,26 +405,26 @@ class Type3HybridDetector:
             "discrimination":   dict,   # per-band counts
           }
         """
-        frags_a = self._get_fragments(file_a)
-        frags_b = self._get_fragments(file_b)
-
-        empty = {
-            "type3_score":       0.0,
-            "best_fragment_sim": 0.0,
-            "clone_coverage_a":  0.0,
-            "clone_coverage_b":  0.0,
-            "is_clone":          False,
-            "all_type3_pairs":   [],
-            "discrimination": {
-                "type1_pairs": 0, "type2_pairs": 0,
-                "vst3_pairs":  0, "st3_pairs":   0,
-                "mt3_pairs":   0, "none_pairs":  0,
-            },
-        }
-
-        if not frags_a or not frags_b:
-            return empty
+        return self._fragment_score(self._get_fragments(file_a), self._get_fragments(file_b))
 
+    def _minhash_prune(self, fa: Fragment, fb: Fragment) -> Optional[str]:
+        if self._frag_minhasher is None:
+            return None
+        for frag in (fa, fb):
+            if frag.minhash is None:
+                frag.minhash = self._frag_minhasher.signature(token_texts(frag.norm_ids))
+        if MinHasher.estimate_jaccard(fa.minhash, fb.minhash) < self.fragment_minhash_min:
+            return "minhash"
+        return None
+
+    def _fragment_score(
+        self, frags_a: List[Fragment], frags_b: List[Fragment]
+    ) -> Dict[str, Any]:
+        """
+        _structural_fragment_score() on already-extracted fragments. With
+        no fragments on a side every score and count comes out 0, in the
+        same shape as any other result.
+        """
         best_score    = 0.0
         all_t3_pairs: List[Dict] = []
         counts        = defaultdict(int)
@@ -265,7 +433,16 @@ class Type3HybridDetector:
 
         for fa in frags_a:
             for fb in frags_b:
-                result = compare_fragments(fa, fb)
+                reason = prune_reason(fa, fb) or self._minhash_prune(fa, fb)
+                if reason:
+                    counts["none_pairs"] += 1
+                    counts[f"pruned_{reason}"] += 1
+                    continue
+                result = None
+                if self._fragment_index is not None:
+                    result = self._fragment_index.comparison(fa, fb)
+                if result is None:
+                    result = compare_fragments(fa, fb)
 
                 if result.clone_type == "type1":
                     counts["type1_pairs"] += 1
@@ -326,6 +503,11 @@ class Type3HybridDetector:
                 "st3_pairs":   counts["st3_pairs"],
                 "mt3_pairs":   counts["mt3_pairs"],
                 "none_pairs":  counts["none_pairs"],
+                # pruned pairs are included in none_pairs
+                "pruned_pairs":   counts["pruned_length"] + counts["pruned_bag"] + counts["pruned_minhash"],
+                "pruned_length":  counts["pruned_length"],
+                "pruned_bag":     counts["pruned_bag"],
+                "pruned_minhash": counts["pruned_minhash"],
                 "type3_pairs_detected": counts["vst3_pairs"] + counts["st3_pairs"] + counts["mt3_pairs"],
                 "type1_pairs_filtered": counts["type1_pairs"],
                 "type2_pairs_filtered": counts["type2_pairs"],
@@ -341,16 +523,11 @@ class Type3HybridDetector:
         tokens_b = self.tokenizer.tokenize_file(str(file_b))
 
         if not tokens_a or not tokens_b:
-            return {
-                "winnowing": 0.0, "ast": 0.0, "metrics": 0.0,
-                "structural": 0.0, "structural_result": {},
-            }
+            return self._empty_hybrid()
 
         fp_a = self.winnowing.get_fingerprint(tokens_a)
         fp_b = self.winnowing.get_fingerprint(tokens_b)
-        fp_a = {h for h in fp_a if h not in self.freq_filter.common_hashes}
-        fp_b = {h for h in fp_b if h not in self.freq_filter.common_hashes}
-        w_score = float(self.winnowing.calculate_similarity(fp_a, fp_b))
+        w_score = self._winnowing_score(fp_a, fp_b)
 
         a_score = float(self.ast_proc.calculate_similarity(str(file_a), str(file_b)))
 
@@ -359,7 +536,38 @@ class Type3HybridDetector:
         m_score = float(self.metrics_calc.calculate_similarity(ma, mb))
 
         structural_result = self._structural_fragment_score(str(file_a), str(file_b))
+        return self._pack_hybrid(w_score, a_score, m_score, structural_result)
 
+    def _hybrid_scores_from_artifacts(self, art_a: Any, art_b: Any) -> Dict[str, Any]:
+        """_hybrid_scores() on precomputed per-file views."""
+        if not art_a.lexer_tokens or not art_b.lexer_tokens:
+            return self._empty_hybrid()
+
+        w_score = self._winnowing_pair_score(art_a, art_b)
+        a_score = float(self.ast_proc.sequence_similarity(art_a.structure, art_b.structure))
+        m_score = self._metric_score(art_a, art_b)
+        structural_result = self._fragment_score(art_a.fragments, art_b.fragments)
+        return self._pack_hybrid(w_score, a_score, m_score, structural_result)
+
+    def _filtered_fingerprint(self, fp: set) -> set:
+        common = self.freq_filter.common_hashes
+        return {h for h in fp if h not in common}
+
+    def _winnowing_score(self, fp_a: set, fp_b: set) -> float:
+        return float(self.winnowing.calculate_similarity(
+            self._filtered_fingerprint(fp_a), self._filtered_fingerprint(fp_b)))
+
+    @staticmethod
+    def _empty_hybrid() -> Dict[str, Any]:
+        return {
+            "winnowing": 0.0, "ast": 0.0, "metrics": 0.0,
+            "structural": 0.0, "structural_result": {},
+        }
+
+    @staticmethod
+    def _pack_hybrid(
+        w_score: float, a_score: float, m_score: float, structural_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
         return {
             "winnowing":         w_score,
             "ast":               a_score,
@@ -381,25 +589,47 @@ class Type3HybridDetector:
         pool.sort(key=lambda x: (x.features or {}).get("token_count", 0), reverse=True)
         return pool[0]
 
+    def _prepare_ml_unit(self, file_path: str) -> Optional[Any]:
+        """
+        Build, select and featurize the primary ML unit of one file.
+        Every step here depends on that file alone, so the result is
+        computed once per file and reused for every pair it appears in.
+        """
+        try:
+            units = self._adapter.build_units_from_file(str(file_path))
+            if not units:
+                return None
+            unit = self._select_primary_unit(units)
+            if unit is None:
+                return None
+            self._adapter.normalize_unit(unit)
+            self._adapter.compute_subtree_hashes(unit)
+            self._adapter.extract_ast_paths(unit)
+            self._adapter.compute_ast_counts(unit)
+            self._adapter.vectorize_units([unit], method="tfidf")
+            # The tree-sitter node is not needed past this point and keeps
+            # the whole parse tree alive for as long as the unit is cached.
+            unit.ast = None
+            return unit
+        except Exception as e:
+            print(f"⚠️  [Type3] ML error: {e}")
+            return None
+
     def _ml_score(self, file_a: Path, file_b: Path) -> Optional[float]:
         if not self.ml_enabled or self.clf is None:
             return None
+        ua = self._prepare_ml_unit(str(file_a))
+        if ua is None:
+            return None
+        ub = self._prepare_ml_unit(str(file_b))
+        return self._ml_score_units(ua, ub)
+
+    def _ml_score_units(self, ua: Any, ub: Any) -> Optional[float]:
+        if not self.ml_enabled or self.clf is None:
+            return None
+        if ua is None or ub is None:
+            return None
         try:
-            units_a = self._adapter.build_units_from_file(str(file_a))
-            units_b = self._adapter.build_units_from_file(str(file_b))
-            if not units_a or not units_b:
-                return None
-            ua = self._select_primary_unit(units_a)
-            ub = self._select_primary_unit(units_b)
-            if ua is None or ub is None:
-                return None
-            for u in (ua, ub):
-                self._adapter.normalize_unit(u)
-                self._adapter.compute_subtree_hashes(u)
-                self._adapter.extract_ast_paths(u)
-                self._adapter.compute_ast_counts(u)
-            self._adapter.vectorize_units([ua], method="tfidf")
-            self._adapter.vectorize_units([ub], method="tfidf")
             feats = self._adapter.make_pair_features(ua, ub)
             fa_f  = ua.features or {}
             fb_f  = ub.features or {}
@@ -439,9 +669,7 @@ class Type3HybridDetector:
         best = max(sr["all_type3_pairs"], key=lambda p: p["similarity"])
         fa   = best["frag_a"]
         fb   = best["frag_b"]
-        norm_a = normalize_tokens(fa.tokens)
-        norm_b = normalize_tokens(fb.tokens)
-        blocks = get_matching_blocks(norm_a, norm_b)
+        blocks = get_matching_blocks(fa.norm_ids, fb.norm_ids)
         return [{"i": i, "j": j, "n": n} for i, j, n in blocks if n > 0]
 
     # ─────────────────────────────────────────────────────────────────────
@@ -464,12 +692,42 @@ class Type3HybridDetector:
         """
         fa = Path(file_path_a)
         fb = Path(file_path_b)
+        h  = self._hybrid_scores(fa, fb)
+        return self._build_result(fa, fb, h, self._ml_score(fa, fb))
 
+    def detect_pair(self, art_a: Any, art_b: Any) -> Dict[str, Any]:
+        """
+        detect() on precomputed FileArtifacts: tokens, fingerprints,
+        structure sequences, metrics, fragments and ML units all come from
+        the per-file cache, so only the pairwise comparisons run here.
+        """
+        h = self.hybrid_pair(art_a, art_b)
+        return self.build_pair_result(art_a, art_b, h, self.ml_pair(art_a, art_b))
+
+    # detect_pair() in its three steps, so a scheduler can stop between the
+    # cheap hybrid part and the RF model (see engine/cascade.py)
+
+    def hybrid_pair(self, art_a: Any, art_b: Any) -> Dict[str, Any]:
+        return self._hybrid_scores_from_artifacts(art_a, art_b)
+
+    def ml_pair(self, art_a: Any, art_b: Any) -> Optional[float]:
+        return self._ml_score_units(art_a.ml_unit, art_b.ml_unit)
+
+    def build_pair_result(self, art_a: Any, art_b: Any, h: Dict[str, Any],
+                          raw_ml: Optional[float]) -> Dict[str, Any]:
+        return self._build_result(Path(art_a.path), Path(art_b.path), h, raw_ml)
+
+    def _build_result(
+        self,
+        fa: Path,
+        fb: Path,
+        h: Dict[str, Any],
+        raw_ml: Optional[float],
+    ) -> Dict[str, Any]:
         language   = self._detect_language(fa)
         thresholds = get_thresholds(language)
         ext_weight = get_pair_weight(str(fa), str(fb))
 
-        h  = self._hybrid_scores(fa, fb)
         sr = h["structural_result"]
 
         raw_hybrid = (
@@ -501,7 +759,6 @@ class Type3HybridDetector:
             },
         }
 
-        raw_ml = self._ml_score(fa, fb)
         if raw_ml is not None:
             ml_score = raw_ml * ext_weight
             ml = {
@@ -542,6 +799,7 @@ class Type3HybridDetector:
                 "st3_pairs":            disc.get("st3_pairs",  0),
                 "mt3_pairs":            disc.get("mt3_pairs",  0),
                 "none_pairs":           disc.get("none_pairs", 0),
+                "pruned_pairs":         disc.get("pruned_pairs", 0),
                 "best_fragment_sim":    sr.get("best_fragment_sim", 0.0),
                 "clone_coverage_a":     sr.get("clone_coverage_a",  0.0),
                 "clone_coverage_b":     sr.get("clone_coverage_b",  0.0),
@@ -5,19 +5,137 @@ LCS-Based Token Sequence Comparator
 Computes similarity between two token sequences using the
 Longest Common Subsequence (LCS) algorithm.
 
-Uses Python's difflib.SequenceMatcher which implements the
-Ratcliff/Obershelp algorithm — functionally equivalent to LCS
-for our purposes and runs in O(n) amortized on real code.
-
 Formula:
   similarity = 2 * matching_tokens / total_tokens
   This gives a value in [0, 1] where 1.0 = identical sequences.
+
+Two interchangeable backends sit behind the same API:
+
+  "difflib"      (default) Python's difflib.SequenceMatcher, i.e. the
+                 Ratcliff/Obershelp algorithm. This is what every threshold
+                 in fragment_comparator was tuned on. Its matching count is
+                 a lower bound on the LCS length, not the LCS itself.
+
+  "bitparallel"  Exact LCS length, computed with the bit-parallel
+                 recurrence of Allison–Dix / Hyyrö (2004):
+
+                     U = V & Match[b];   V = (V + U) | (V - U)
+
+                 The recurrence runs once per token of b, and V holds one
+                 bit per token of a. LCS = |a| − popcount(V). Python ints
+                 are used as the bit vectors: they are already multi-word
+                 unsigned arrays with the carry done in C, so the cost
+                 is O(|b| · ⌈|a|/64⌉) word operations. Matching blocks
+                 are read back by walking the stored V rows.
+
+Select a backend with set_backend() (AnalyzerConfig.lcs_backend, or the
+LCS_BACKEND environment variable). Both give 1.0 for identical sequences
+and 0.0 when nothing is shared. In between, "bitparallel" is ≥ "difflib"
+(an exact LCS can only find more). tests/bench_lcs_backends.py reports
+the speed and how often each backend agrees with difflib on the sample
+corpus.
 """
 
 from __future__ import annotations
 import difflib
-from typing import List, Tuple
+import os
+from typing import Dict, Hashable, List, NamedTuple, Sequence, Tuple
+
+BACKENDS = ("difflib", "bitparallel")
+
+_backend = os.getenv("LCS_BACKEND", "difflib")
+
+
+class Match(NamedTuple):
+    a: int
+    b: int
+    size: int
+
+
+def set_backend(name: str) -> None:
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LCS backend {name!r} (choose from {', '.join(BACKENDS)})")
+    _backend = name
+
+
+def get_backend() -> str:
+    return _backend
+
 
+# ─── Bit-parallel LCS ─────────────────────────────────────────────────────────
+
+def _match_masks(tokens_a: Sequence[Hashable]) -> Dict[Hashable, int]:
+    """Per symbol, the bitmask of positions where it occurs in tokens_a."""
+    masks: Dict[Hashable, int] = {}
+    for i, t in enumerate(tokens_a):
+        masks[t] = masks.get(t, 0) | (1 << i)
+    return masks
+
+
+def _bitparallel_rows(tokens_a: Sequence[Hashable], tokens_b: Sequence[Hashable],
+                      keep_rows: bool) -> Tuple[int, List[int]]:
+    """
+    Run the Hyyrö recurrence. Returns the final V and, when keep_rows is set,
+    V after each token of b. A 0 bit in V is a position of a where the LCS
+    grows.
+    """
+    masks = _match_masks(tokens_a)
+    full  = (1 << len(tokens_a)) - 1
+    v     = full
+    rows  = [v] if keep_rows else []
+    for t in tokens_b:
+        u = v & masks.get(t, 0)
+        v = ((v + u) | (v - u)) & full
+        if keep_rows:
+            rows.append(v)
+    return v, rows
+
+
+def lcs_length(tokens_a: Sequence[Hashable], tokens_b: Sequence[Hashable]) -> int:
+    """Exact LCS length (bit-parallel)."""
+    if not tokens_a or not tokens_b:
+        return 0
+    if len(tokens_b) > len(tokens_a):     # fewer, wider words
+        tokens_a, tokens_b = tokens_b, tokens_a
+    v, _ = _bitparallel_rows(tokens_a, tokens_b, keep_rows=False)
+    return len(tokens_a) - v.bit_count()
+
+
+def _bitparallel_blocks(tokens_a: Sequence[Hashable], tokens_b: Sequence[Hashable]) -> List[Match]:
+    """One LCS alignment as difflib-style matching blocks (with the end sentinel)."""
+    la, lb = len(tokens_a), len(tokens_b)
+    if not la or not lb:
+        return [Match(la, lb, 0)]
+    _, rows = _bitparallel_rows(tokens_a, tokens_b, keep_rows=True)
+
+    def lcs(i: int, j: int) -> int:          # LCS of tokens_a[:i], tokens_b[:j]
+        return i - (rows[j] & ((1 << i) - 1)).bit_count()
+
+    pairs: List[Tuple[int, int]] = []
+    i, j = la, lb
+    cur = lcs(i, j)
+    while i > 0 and j > 0:
+        if tokens_a[i - 1] == tokens_b[j - 1] and lcs(i - 1, j - 1) == cur - 1:
+            pairs.append((i - 1, j - 1))
+            i, j, cur = i - 1, j - 1, cur - 1
+        elif lcs(i - 1, j) == cur:
+            i -= 1
+        else:
+            j -= 1
+    pairs.reverse()
+
+    blocks: List[Match] = []
+    for ia, jb in pairs:
+        if blocks and blocks[-1].a + blocks[-1].size == ia and blocks[-1].b + blocks[-1].size == jb:
+            blocks[-1] = Match(blocks[-1].a, blocks[-1].b, blocks[-1].size + 1)
+        else:
+            blocks.append(Match(ia, jb, 1))
+    blocks.append(Match(la, lb, 0))
+    return blocks
+
+
+# ─── Public API ───────────────────────────────────────────────────────────────
 
 def lcs_similarity(tokens_a: List[str], tokens_b: List[str]) -> float:
     """
@@ -27,6 +145,9 @@ def lcs_similarity(tokens_a: List[str], tokens_b: List[str]) -> float:
     if not tokens_a or not tokens_b:
         return 0.0
 
+    if _backend == "bitparallel":
+        return round(2.0 * lcs_length(tokens_a, tokens_b) / (len(tokens_a) + len(tokens_b)), 4)
+
     matcher = difflib.SequenceMatcher(None, tokens_a, tokens_b, autojunk=False)
     return round(matcher.ratio(), 4)
 
@@ -46,5 +167,7 @@ def get_matching_blocks(
     tokens_a[i:i+n] == tokens_b[j:j+n].
     Useful for diff highlighting in the frontend.
     """
+    if _backend == "bitparallel":
+        return _bitparallel_blocks(tokens_a, tokens_b)
     matcher = difflib.SequenceMatcher(None, tokens_a, tokens_b, autojunk=False)
-    return matcher.get_matching_blocks()
\ No newline at end of file
+    return matcher.get_matching_blocks()
@@ -26,6 +26,14 @@ Research basis:
   - Walker et al. (2019) show MT3 recall improves significantly with
     structural token normalization
 
+Token ids:
+  intern_tokens() maps token strings to small integers from one process-wide
+  table, so a fragment can hold each view as a compact array('i') and every
+  comparator works on ints. Equal strings ↔ equal ids, so LCS scores on ids
+  are identical to scores on the strings. The table is job-scoped:
+  CloneAnalyzer.prepare_job() calls reset_token_ids(), which drops it once
+  it has grown past TOKEN_TABLE_CAP.
+
 Why two levels?
   Level 1 (blind) alone conflates Type-2 and structural Type-3.
   Level 2 (structural) alone loses the distinction between different
@@ -35,7 +43,8 @@ Why two levels?
 
 from __future__ import annotations
 import re
-from typing import List, Dict
+from array import array
+from typing import Dict, Iterable, List
 
 # ─── Level 1: keyword set (not renamed) ────────────────────────────────────────
 
@@ -161,3 +170,52 @@ def structurally_normalize_tokens(tokens: List[str]) -> List[str]:
         else:
             normalized.append(tok)
     return normalized
+
+
+# ─── Token ids ────────────────────────────────────────────────────────────────
+# Ids are handed out in first-seen order. A forked pair worker inherits the
+# table, so ids it assigns to new tokens stay consistent with the fragments it
+# compares; they are never shared back (see Fragment.__getstate__ for pickling).
+#
+# Every new identifier and literal of every job adds an entry, so a long-lived
+# server would grow the table without bound. reset_token_ids() drops it at a
+# job boundary once it holds more than TOKEN_TABLE_CAP tokens; fragments built
+# before the reset must not be compared with fragments built after it, so
+# holders of fragments across jobs check token_generation().
+
+TOKEN_TABLE_CAP = 200_000
+
+_TOKEN_IDS:   Dict[str, int] = {}
+_TOKEN_TEXTS: List[str]      = []
+_GENERATION = 0
+
+
+def reset_token_ids(cap: int = TOKEN_TABLE_CAP) -> bool:
+    """Drop the table if it holds more than `cap` tokens; True if it did."""
+    global _GENERATION
+    if len(_TOKEN_TEXTS) <= cap:
+        return False
+    _TOKEN_IDS.clear()
+    _TOKEN_TEXTS.clear()
+    _GENERATION += 1
+    return True
+
+
+def token_generation() -> int:
+    return _GENERATION
+
+
+def intern_tokens(tokens: Iterable[str]) -> array:
+    ids = array("i")
+    table = _TOKEN_IDS
+    for tok in tokens:
+        tid = table.get(tok)
+        if tid is None:
+            tid = table[tok] = len(_TOKEN_TEXTS)
+            _TOKEN_TEXTS.append(tok)
+        ids.append(tid)
+    return ids
+
+
+def token_texts(ids: Iterable[int]) -> List[str]:
+    return [_TOKEN_TEXTS[i] for i in ids]
@@ -12,6 +12,12 @@ Pipeline:
             Filters OUT Type-1 and Type-2 matches.
   Step 3 — Clone clustering        (CloneClusterer)
 
+Batch entry points (detect_batch, detect_batch_with_students) do not loop
+over file pairs: a FragmentIndex buckets every fragment of the batch once
+and only compares fragments that share an exact or LSH bucket (every
+fragment pair when similarity_threshold is below 0.70, where the LSH stage
+is lossy).
+
 Key difference from the old approach:
   The old detector normalized all tokens and ran LCS on normalized
   sequences only. This meant Type-2 clones (just renamed variables)
@@ -30,18 +36,16 @@ Public API:
 
 from __future__ import annotations
 import time
-from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from detectors.type3.fragment_extractor import FragmentExtractor, Fragment
 from detectors.type3.fragment_comparator import (
     compare_fragments,
     FragmentComparisonResult,
-    TYPE3_NORM_THRESHOLD,
 )
-from detectors.type3.normalizer import normalize_tokens
 from detectors.type3.lcs_comparator import lcs_similarity, get_matching_blocks
 from detectors.type3.clone_clusterer import CloneClusterer
+from detectors.type3.fragment_index import FragmentIndex, LSH_MIN_SIMILARITY
 
 
 
@@ -72,7 +76,6 @@ class StructuralDetector:
         Detect clones with student identification.
         """
         t0 = time.time()
-        all_pairs = []
         student_fragments = {}
         for submission in student_submissions:
             student_id = submission.get('student_id')
@@ -88,40 +91,42 @@ class StructuralDetector:
                 'name': student_name,
                 'fragments': fragments
             }
-        clone_results = []
         student_ids = list(student_fragments.keys())
-        for i in range(len(student_ids)):
-            sid_a = student_ids[i]
-            data_a = student_fragments[sid_a]
-            for j in range(i + 1, len(student_ids)):
-                sid_b = student_ids[j]
-                data_b = student_fragments[sid_b]
-                best_score = 0.0
-                best_pairs = []
-                for fa in data_a['fragments']:
-                    for fb in data_b['fragments']:
-                        result = compare_fragments(fa, fb)
-                        if result.is_type3 and result.type3_score >= self.threshold:
-                            best_pairs.append({
-                                'frag_a': fa,
-                                'frag_b': fb,
-                                'similarity': result.type3_score,
-                                'clone_band': result.clone_band,
-                            })
-                            best_score = max(best_score, result.type3_score)
-                if best_score >= self.threshold:
-                    clone_results.append({
-                        'student_a_id': sid_a,
-                        'student_a_name': data_a['name'],
-                        'student_b_id': sid_b,
-                        'student_b_name': data_b['name'],
-                        'best_score': best_score,
-                        'clone_pairs': best_pairs[:5],
-                        'clone_bands': list(set(p['clone_band'] for p in best_pairs)),
-                    })
+        order = {sid: i for i, sid in enumerate(student_ids)}
+        # The LSH stage loses MT3 pairs below 0.70 — compare exactly there
+        index = FragmentIndex(group_of=lambda f: f.student_id,
+                              exhaustive=self.threshold < LSH_MIN_SIMILARITY).build(
+            [f for data in student_fragments.values() for f in data['fragments']]
+        )
+        by_students: Dict[Tuple, List[Dict]] = {}
+        for p in index.pairs:
+            if p['clone_type'] != 'type3' or p['similarity'] < self.threshold:
+                continue
+            fa, fb = p['frag_a'], p['frag_b']
+            if order[fa.student_id] > order[fb.student_id]:
+                fa, fb = fb, fa
+            by_students.setdefault((fa.student_id, fb.student_id), []).append({
+                'frag_a': fa,
+                'frag_b': fb,
+                'similarity': p['similarity'],
+                'clone_band': p['clone_band'],
+            })
+        clone_results = []
+        for (sid_a, sid_b), best_pairs in sorted(by_students.items(),
+                                                 key=lambda kv: (order[kv[0][0]], order[kv[0][1]])):
+            clone_results.append({
+                'student_a_id': sid_a,
+                'student_a_name': student_fragments[sid_a]['name'],
+                'student_b_id': sid_b,
+                'student_b_name': student_fragments[sid_b]['name'],
+                'best_score': max(p['similarity'] for p in best_pairs),
+                'clone_pairs': best_pairs[:5],
+                'clone_bands': list(set(p['clone_band'] for p in best_pairs)),
+            })
         return {
             'total_students': len(student_ids),
             'clone_pairs': clone_results,
+            'fragment_index': index.diagnostics(),
             'processing_time': time.time() - t0
         }
 
@@ -228,43 +233,24 @@ class StructuralDetector:
         file_paths: List[str],
     ) -> Dict:
         """
-        Full batch run: extract → compare all pairs → cluster.
-        Used for intra-project / single-zip analysis.
+        Full batch run: extract → fragment index → cluster.
+        Used for intra-project / single-zip analysis. file_pair_scores
+        holds the best Type-3 fragment similarity of every file pair
+        that shares a fragment clone.
         """
         t0 = time.time()
         self.prepare_batch(file_paths)
 
-        n = len(file_paths)
-        all_fragment_pairs: List[Dict] = []
-        file_pair_scores:   Dict[Tuple, float] = {}
-        processed_pairs = set()  # Track processed pairs to avoid duplicates
-
-        for i in range(n):
-            frags_i = self._get_fragments(file_paths[i])
-            for j in range(i + 1, n):
-                frags_j = self._get_fragments(file_paths[j])
-                best = 0.0
-                pair_key = (Path(file_paths[i]).name, Path(file_paths[j]).name)
-                if pair_key in processed_pairs:
-                    continue
-                processed_pairs.add(pair_key)
-                for fa in frags_i:
-                    for fb in frags_j:
-                        result = compare_fragments(fa, fb)
-                        # Only cluster genuine Type-3 pairs
-                        if result.is_type3:
-                            all_fragment_pairs.append({
-                                "frag_a":     fa,
-                                "frag_b":     fb,
-                                "similarity": result.type3_score,
-                            })
-                            if result.type3_score > best:
-                                best = result.type3_score
-                file_pair_scores[(i, j)] = best
-
-        clone_classes = self.clusterer.cluster(
-            all_fragment_pairs, min_similarity=self.threshold
+        index = FragmentIndex(exhaustive=self.threshold < LSH_MIN_SIMILARITY).build(
+            [f for fp in file_paths for f in self._get_fragments(fp)]
         )
+        position = {fp: i for i, fp in enumerate(file_paths)}
+        file_pair_scores: Dict[Tuple, float] = {
+            (position[a], position[b]) if position[a] < position[b] else (position[b], position[a]):
+                score["best_type3_sim"]
+            for (a, b), score in index.file_pair_scores().items()
+        }
+        clone_classes = index.clone_classes(self.clusterer, min_similarity=self.threshold)
 
         return {
             "file_pair_scores":  file_pair_scores,
@@ -272,7 +258,8 @@ class StructuralDetector:
             "total_fragments":   sum(
                 len(self._get_fragments(fp)) for fp in file_paths
             ),
-            "total_clone_pairs": len(all_fragment_pairs),
+            "total_clone_pairs": len(index.pairs),
+            "fragment_index":    index.diagnostics(),
             "processing_ms":     round((time.time() - t0) * 1000, 1),
         }
 
@@ -287,9 +274,7 @@ class StructuralDetector:
         best_pair = max(result["clone_pairs"], key=lambda p: p["similarity"])
         fa = best_pair["frag_a"]
         fb = best_pair["frag_b"]
-        norm_a = normalize_tokens(fa.tokens)
-        norm_b = normalize_tokens(fb.tokens)
-        blocks = get_matching_blocks(norm_a, norm_b)
+        blocks = get_matching_blocks(fa.norm_ids, fb.norm_ids)
         return [
             {"i": i, "j": j, "n": n}
             for i, j, n in blocks if n > 0
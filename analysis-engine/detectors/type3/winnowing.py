@@ -6,19 +6,98 @@ Implements the Winnowing algorithm (Schleimer, Wilkerson & Aiken, 2003)
 for document fingerprinting.
 
 Pipeline:
-  1. Hash every k-gram (contiguous k-token window) using MD5
-  2. Slide a window of size w over the hash list
-  3. Keep the minimum hash in each window → fingerprint set
+  1. Intern every token to a stable integer id
+  2. Hash every k-gram (contiguous k-token window) with a Rabin–Karp
+     rolling hash — O(1) per k-gram instead of joining and MD5-ing strings
+  3. Slide a window of size w over the hash list and keep the rightmost
+     minimum of each window (robust winnowing), tracked with a monotonic
+     deque so each hash is pushed and popped once — O(n), not O(n·w)
   4. Compare fingerprint sets via Jaccard similarity
 
-This gives a position-independent measure of shared code fragments.
+This gives a position-independent measure of shared code fragments;
+winnow() also reports the token position of every selected fingerprint.
+
+The k-gram hash list is computed once per file and shared: the batch
+frequency filter trains on the set of all k-gram hashes
+(BatchFrequencyFilter.train_on_hashes) and the fingerprint is winnowed
+from the same list.
+
+For a whole batch, jaccard_matrix() maps every fingerprint set to a row
+of a binary CSR matrix X; one sparse product X·Xᵀ yields all pairwise
+intersection counts, and Jaccard follows from the row sums.
 """
 
-import hashlib
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
 
 WINNOWING_K = 7
 WINNOWING_W = 4
 
+# Rabin–Karp parameters: Mersenne-prime modulus, fixed odd base
+_MOD  = (1 << 61) - 1
+_BASE = 1_000_003
+
+# token → id. Ids come from crc32 rather than a running counter so they are
+# identical in every process (forked pair workers build artifacts too). That
+# also makes the memo safe to drop at any time, which bounds it.
+_TOKEN_IDS: Dict[str, int] = {}
+_TOKEN_IDS_MAX = 200_000
+
+
+def _token_id(token: str) -> int:
+    tid = _TOKEN_IDS.get(token)
+    if tid is None:
+        if len(_TOKEN_IDS) >= _TOKEN_IDS_MAX:
+            _TOKEN_IDS.clear()
+        tid = _TOKEN_IDS[token] = zlib.crc32(token.encode("utf-8")) + 1
+    return tid
+
+
+def kgram_hashes(tokens: Sequence[str], k: int = WINNOWING_K) -> List[int]:
+    """Rolling hash of every k-gram in the token stream, in order."""
+    n = len(tokens)
+    if n < k:
+        return []
+    ids = [_token_id(t) for t in tokens]
+    top = pow(_BASE, k - 1, _MOD)
+
+    h = 0
+    for x in ids[:k]:
+        h = (h * _BASE + x) % _MOD
+    hashes = [h]
+    for i in range(k, n):
+        h = ((h - ids[i - k] * top) * _BASE + ids[i]) % _MOD
+        hashes.append(h)
+    return hashes
+
+
+def winnow(hashes: Sequence[int], w: int = WINNOWING_W) -> List[Tuple[int, int]]:
+    """
+    Robust winnowing: (hash, k-gram position) of each window's rightmost
+    minimum, recorded once per selection.
+    """
+    selected: List[Tuple[int, int]] = []
+    window: deque = deque()     # positions; their hashes increase front → back
+    last = -1
+    for i, h in enumerate(hashes):
+        while window and hashes[window[-1]] >= h:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - w:
+            window.popleft()
+        if i >= w - 1 and window[0] != last:
+            last = window[0]
+            selected.append((hashes[last], last))
+    return selected
+
 
 class WinnowingDetector:
     def __init__(self, k: int = WINNOWING_K, window_size: int = WINNOWING_W):
@@ -27,12 +106,7 @@ class WinnowingDetector:
 
     def _get_hashes(self, tokens: list) -> list:
         """Hash every k-gram in the token stream."""
-        hashes = []
-        for i in range(len(tokens) - self.k + 1):
-            gram = "|".join(tokens[i : i + self.k])
-            h = int(hashlib.md5(gram.encode("utf-8")).hexdigest(), 16)
-            hashes.append(h)
-        return hashes
+        return kgram_hashes(tokens, self.k)
 
     def get_fingerprint(self, tokens: list) -> set:
         """
@@ -40,12 +114,15 @@ class WinnowingDetector:
         keep the minimum hash in each window (robust minimum selection).
         Returns a set of fingerprint hashes.
         """
-        hashes = self._get_hashes(tokens)
-        fingerprints = set()
-        for i in range(len(hashes) - self.w + 1):
-            frame = hashes[i : i + self.w]
-            fingerprints.add(min(frame))
-        return fingerprints
+        return self.fingerprint_from_hashes(self._get_hashes(tokens))
+
+    def fingerprint_from_hashes(self, hashes: Sequence[int]) -> set:
+        """get_fingerprint() for a k-gram hash list that is already computed."""
+        return {h for h, _ in winnow(hashes, self.w)}
+
+    def fingerprint_positions(self, tokens: list) -> List[Tuple[int, int]]:
+        """Selected (hash, token position) pairs, in source order."""
+        return winnow(self._get_hashes(tokens), self.w)
 
     def calculate_similarity(self, set_a: set, set_b: set) -> float:
         """Jaccard similarity between two fingerprint sets."""
@@ -53,4 +130,34 @@ class WinnowingDetector:
             return 0.0
         intersection = set_a & set_b
         union = set_a | set_b
-        return len(intersection) / len(union)
\ No newline at end of file
+        return len(intersection) / len(union)
+
+    @staticmethod
+    def jaccard_matrix(sets: List[set]) -> Optional[Any]:
+        """
+        calculate_similarity() for every pair of sets at once.
+
+        Returns an n×n scipy CSR matrix holding the Jaccard similarity of
+        every pair that shares at least one fingerprint (all other pairs
+        are implicit zeros, exactly what calculate_similarity returns for
+        them), or None when SciPy is not installed.
+        """
+        if sparse is None:
+            return None
+        n = len(sets)
+        vocab: dict = {}
+        indptr, indices = [0], []
+        for s in sets:
+            indices.extend(vocab.setdefault(h, len(vocab)) for h in s)
+            indptr.append(len(indices))
+        x = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(n, max(len(vocab), 1)),
+        )
+
+        inter = (x @ x.T).tocoo()
+        sizes = np.diff(x.indptr)
+        union = sizes[inter.row] + sizes[inter.col] - inter.data
+        jaccard = inter.data / union
+        return sparse.csr_matrix((jaccard, (inter.row, inter.col)), shape=(n, n))
+
@@ -0,0 +1,129 @@
+# detectors/type3/winnowing_index.py
+"""
+Winnowing Inverted Index — Candidate Pair Generation
+====================================================
+Every file already carries a winnowing fingerprint set and the batch
+frequency filter already knows which hashes are class-wide boilerplate.
+Instead of sending all n·(n-1)/2 pairs through T1–T4, the index maps
+
+    fingerprint  →  posting list of files containing it
+
+and counts, per pair, how many non-common fingerprints the two files
+share. Because the fingerprint set sizes are known, that count gives the
+*exact* winnowing Jaccard of the pair without touching it individually.
+
+A pair is a candidate for full analysis when it shares at least
+`min_shared` fingerprints or its Jaccard reaches `min_jaccard`. Files
+with fewer than `min_shared` usable fingerprints (tiny or all-boilerplate
+files) carry too little signal to prune on, so every pair involving one
+of them stays a candidate.
+
+Pair counting costs Σ posting², so fingerprints that are frequent but
+still below the frequency filter's 70% cutoff (shared helpers, common
+loop shapes) would dominate it. Like the frequency filter, the index
+drops any fingerprint found in more than `max_posting_ratio` of the files
+or more than `max_posting` files before counting; the Jaccard is then
+taken over the remaining, discriminating fingerprints.
+
+The filter is lossy by design — semantic (Type-4) clones can share no
+text at all — so callers should report recall diagnostics (see
+CloneAnalyzer._pruned_results) rather than trust it blindly.
+"""
+
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class WinnowingIndex:
+    def __init__(self, min_shared: int = 3, min_jaccard: float = 0.05,
+                 max_posting_ratio: float = 0.25, max_posting: int = 256):
+        self.min_shared  = min_shared
+        self.min_jaccard = min_jaccard
+        self.max_posting_ratio = max_posting_ratio
+        self.max_posting = max_posting
+        self._ids:      Dict[str, int]      = {}
+        self._sizes:    List[int]           = []
+        self._postings: Dict[int, List[int]] = {}
+        self._shared:   Counter             = Counter()
+        self._dropped_common = 0
+        self._dropped_frequent = 0
+
+    def build(self, fingerprints: Dict[str, Set[int]], common: Set[int] = frozenset()) -> None:
+        """Index path → raw fingerprint set, ignoring batch-common hashes."""
+        self._ids = {}
+        self._sizes = []
+        postings: Dict[int, List[int]] = defaultdict(list)
+        dropped = 0
+        for fid, (path, fp) in enumerate(fingerprints.items()):
+            self._ids[str(path)] = fid
+            kept = fp - common if common else fp
+            dropped += len(fp) - len(kept)
+            self._sizes.append(len(kept))
+            for h in kept:
+                postings[h].append(fid)
+        self._dropped_common = dropped
+
+        # Too-frequent fingerprints carry little signal and cost posting² pairs
+        cap = min(self.max_posting, max(8, int(len(self._sizes) * self.max_posting_ratio)))
+        frequent = 0
+        for h in [h for h, posting in postings.items() if len(posting) > cap]:
+            for fid in postings.pop(h):
+                self._sizes[fid] -= 1
+            frequent += 1
+        self._postings = dict(postings)
+        self._dropped_frequent = frequent
+
+        # Posting lists are built in file-id order, so every (a, b) has a < b
+        shared: Counter = Counter()
+        for posting in self._postings.values():
+            if len(posting) > 1:
+                shared.update(combinations(posting, 2))
+        self._shared = shared
+
+    # ── per-pair queries ────────────────────────────────────────────────────
+
+    def _key(self, path_a: str, path_b: str) -> Tuple[int, int]:
+        i, j = self._ids[str(path_a)], self._ids[str(path_b)]
+        return (i, j) if i < j else (j, i)
+
+    def overlap(self, path_a: str, path_b: str) -> Tuple[int, float]:
+        """(shared non-common fingerprints, winnowing Jaccard) for a pair."""
+        i, j = self._key(path_a, path_b)
+        c = self._shared.get((i, j), 0)
+        union = self._sizes[i] + self._sizes[j] - c
+        return c, (c / union if union else 0.0)
+
+    def is_low_info(self, path: str) -> bool:
+        return self._sizes[self._ids[str(path)]] < self.min_shared
+
+    def is_candidate(self, path_a: str, path_b: str) -> bool:
+        if self.is_low_info(path_a) or self.is_low_info(path_b):
+            return True
+        c, jaccard = self.overlap(path_a, path_b)
+        return c >= self.min_shared or (c > 0 and jaccard >= self.min_jaccard)
+
+    def split(self, pairs: Iterable[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Partition pairs into (candidates, pruned)."""
+        keep, pruned = [], []
+        for a, b in pairs:
+            (keep if self.is_candidate(a, b) else pruned).append((a, b))
+        return keep, pruned
+
+    # ── diagnostics ─────────────────────────────────────────────────────────
+
+    def diagnostics(self) -> Dict:
+        lengths = [len(p) for p in self._postings.values()]
+        return {
+            "index":                   "winnowing",
+            "files":                   len(self._sizes),
+            "fingerprints":            len(self._postings),
+            "common_dropped":          self._dropped_common,
+            "frequent_dropped":        self._dropped_frequent,
+            "max_posting_length":      max(lengths, default=0),
+            "avg_posting_length":      round(sum(lengths) / len(lengths), 2) if lengths else 0.0,
+            "pairs_sharing_any":       len(self._shared),
+            "low_info_files":          sum(1 for s in self._sizes if s < self.min_shared),
+            "min_shared":              self.min_shared,
+            "min_jaccard":             self.min_jaccard,
+        }
@@ -12,6 +12,7 @@ Supported Languages: C++, C, Java, Python
 """
 
 from .pdg_detector import Type4PDGDetector, Type4ResultWrapper
+from .batch_scorer import FeatureMatrix, PDGBatchScorer
 
-__all__ = ['Type4PDGDetector', 'Type4ResultWrapper']
+__all__ = ['Type4PDGDetector', 'Type4ResultWrapper', 'FeatureMatrix', 'PDGBatchScorer']
 __version__ = '1.0.0'
\ No newline at end of file
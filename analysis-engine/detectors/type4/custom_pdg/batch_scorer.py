@@ -0,0 +1,304 @@
+# analysis-engine/detectors/type4/custom_pdg/batch_scorer.py
+
+"""
+Batch (vectorized) PDG Similarity for Type-4 Clone Detection
+
+compute_pair_features() + calculate_similarity() score ONE pair in pure
+Python. For a batch of n files that is n(n-1)/2 round trips through ~20
+dict lookups each. This module extracts every file's SemanticFeatures into
+a FeatureMatrix once and then scores any set of pairs with NumPy:
+
+    matrix = FeatureMatrix.from_features(features)
+    scorer = PDGBatchScorer()
+    overall, categories = scorer.score(matrix, idx_a, idx_b)
+
+The pair features are the same formulas as SemanticFeatureExtractor,
+rounded to the same 4 decimals, and the five category scores come from
+PDGSimilarity's own _calculate_*_score methods (plain arithmetic, so they
+work unchanged on arrays). Rounding goes through _round4(), which
+agrees with Python's round(x, 4), so a batch score equals the per-pair
+score.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .semantic_features import SemanticFeatures
+from .similarity import PDGSimilarity, SimilarityWeights
+
+
+# Count features compared with 1 - |a - b| / (a + b)
+COUNT_COLUMNS = [
+    ('loop_similarity', 'loop_count'),
+    ('condition_similarity', 'condition_count'),
+    ('nesting_similarity', 'max_nesting_depth'),
+    ('variable_similarity', 'variable_count'),
+    ('dependency_similarity', 'data_dependencies'),
+    ('call_count_similarity', 'call_count'),
+    ('unique_call_similarity', 'unique_calls'),
+    ('node_similarity', 'node_count'),
+    ('edge_similarity', 'edge_count'),
+]
+
+# Bucket features: (pair feature, attribute, score when the buckets differ)
+BUCKET_COLUMNS = [
+    ('iteration_bucket_match', 'iteration_bucket', 0.0),
+    ('complexity_bucket_match', 'complexity_bucket', 0.5),
+    ('nesting_bucket_match', 'nesting_bucket', 0.5),
+    ('data_bucket_match', 'data_bucket', 0.5),
+    ('call_bucket_match', 'call_bucket', 0.5),
+    ('return_bucket_match', 'return_bucket', 0.5),
+]
+
+# Pairs scored per NumPy pass (bounds the (pairs x vocabulary) temporaries)
+PAIR_CHUNK = 65_536
+
+
+def _round4(values) -> np.ndarray:
+    """
+    round(x, 4) for arrays.
+    
+    np.round scales by 10^4 before rounding, which can tip a value lying
+    next to a ...5 tie the other way from Python's correctly rounded
+    round(). The few values that close to a tie are rounded by Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.round(values, 4)
+    scaled = values * 1e4
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        out[near_tie] = [round(v, 4) for v in values[near_tie].tolist()]
+    return out
+
+
+# =============================================================================
+# FEATURE MATRIX
+# =============================================================================
+
+@dataclass
+class FeatureMatrix:
+    """
+    SemanticFeatures of a batch of files as NumPy arrays (one row per file).
+
+    Strings and sets are encoded against vocabularies built from the batch:
+    control signatures as character-count histograms, call sequences as
+    call-name incidence rows, buckets and behavioral-hash parts as codes.
+    """
+    counts: np.ndarray                      # (n, len(COUNT_COLUMNS)) int64
+    recursion: np.ndarray                   # (n,) bool
+    def_use_ratio: np.ndarray               # (n,) float64
+    return_count: np.ndarray                # (n,) int64
+    signature_hist: np.ndarray              # (n, chars) int32
+    call_sets: np.ndarray                   # (n, call names) uint8
+    buckets: np.ndarray                     # (n, len(BUCKET_COLUMNS)) int32
+    hash_parts: np.ndarray                  # (n, max parts) int32, -1 = padding
+    hash_len: np.ndarray                    # (n,) int32, 0 = empty hash
+    keys: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.recursion)
+
+    @classmethod
+    def from_features(
+        cls,
+        features: Sequence[SemanticFeatures],
+        keys: Optional[Sequence[str]] = None
+    ) -> 'FeatureMatrix':
+        """
+        Encode a list of SemanticFeatures.
+
+        Args:
+            features: One SemanticFeatures per file
+            keys: Optional identifier per row (e.g. the file path)
+        """
+        n = len(features)
+
+        counts = np.array(
+            [[getattr(f, attr) for _, attr in COUNT_COLUMNS] for f in features],
+            dtype=np.int64,
+        ).reshape(n, len(COUNT_COLUMNS))
+
+        chars = sorted({c for f in features for c in f.control_signature})
+        char_index = {c: i for i, c in enumerate(chars)}
+        signature_hist = np.zeros((n, len(chars)), dtype=np.int32)
+
+        calls = sorted({c for f in features for c in f.call_sequence})
+        call_index = {c: i for i, c in enumerate(calls)}
+        call_sets = np.zeros((n, len(calls)), dtype=np.uint8)
+
+        bucket_codes: Dict[str, int] = {}
+        buckets = np.zeros((n, len(BUCKET_COLUMNS)), dtype=np.int32)
+
+        split_hashes = [f.behavioral_hash.split('|') if f.behavioral_hash else [] for f in features]
+        hash_len = np.array([len(p) for p in split_hashes], dtype=np.int32)
+        hash_parts = np.full((n, int(hash_len.max(initial=0))), -1, dtype=np.int32)
+
+        for row, f in enumerate(features):
+            for c in f.control_signature:
+                signature_hist[row, char_index[c]] += 1
+            for c in f.call_sequence:
+                call_sets[row, call_index[c]] = 1
+            for col, (_, attr, _) in enumerate(BUCKET_COLUMNS):
+                buckets[row, col] = bucket_codes.setdefault(getattr(f, attr), len(bucket_codes))
+            for col, part in enumerate(split_hashes[row]):
+                hash_parts[row, col] = bucket_codes.setdefault(part, len(bucket_codes))
+
+        return cls(
+            counts=counts,
+            recursion=np.array([f.has_recursion for f in features], dtype=bool),
+            def_use_ratio=np.array([f.def_use_ratio for f in features], dtype=np.float64),
+            return_count=np.array([f.return_count for f in features], dtype=np.int64),
+            signature_hist=signature_hist,
+            call_sets=call_sets,
+            buckets=buckets,
+            hash_parts=hash_parts,
+            hash_len=hash_len,
+            keys=list(keys) if keys is not None else [],
+        )
+
+
+# =============================================================================
+# BATCH SCORER
+# =============================================================================
+
+class PDGBatchScorer:
+    """
+    Scores many file pairs of a FeatureMatrix at once.
+
+    Usage:
+        scorer = PDGBatchScorer()
+        a, b = scorer.all_pairs(len(matrix))
+        overall, categories = scorer.score(matrix, a, b)
+    """
+
+    def __init__(self, weights: SimilarityWeights = None):
+        self.similarity = PDGSimilarity(weights=weights)
+
+    @staticmethod
+    def all_pairs(n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices (i, j) of every pair i < j."""
+        return np.triu_indices(n, k=1)
+
+    def score(
+        self,
+        matrix: FeatureMatrix,
+        idx_a: np.ndarray,
+        idx_b: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Semantic score and category scores for the pairs (idx_a[k], idx_b[k]).
+
+        Returns:
+            Tuple of (overall scores, {category: scores}), one entry per pair
+        """
+        idx_a = np.asarray(idx_a, dtype=np.intp)
+        idx_b = np.asarray(idx_b, dtype=np.intp)
+
+        overall_parts: List[np.ndarray] = []
+        category_parts: Dict[str, List[np.ndarray]] = {}
+        for start in range(0, max(len(idx_a), 1), PAIR_CHUNK):
+            a = idx_a[start:start + PAIR_CHUNK]
+            b = idx_b[start:start + PAIR_CHUNK]
+            overall, categories = self._combine(self.pair_features(matrix, a, b))
+            overall_parts.append(overall)
+            for name, values in categories.items():
+                category_parts.setdefault(name, []).append(values)
+
+        return (
+            np.concatenate(overall_parts),
+            {name: np.concatenate(parts) for name, parts in category_parts.items()},
+        )
+
+    def _combine(
+        self,
+        pf: Dict[str, np.ndarray]
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Vectorized PDGSimilarity.calculate_similarity()."""
+        sim, w = self.similarity, self.similarity.weights
+        raw = {
+            'control_flow': sim._calculate_control_flow_score(pf),
+            'data_flow': sim._calculate_data_flow_score(pf),
+            'call_pattern': sim._calculate_call_pattern_score(pf),
+            'structural': sim._calculate_structural_score(pf),
+            'behavioral': sim._calculate_behavioral_score(pf),
+        }
+        overall = (
+            raw['control_flow'] * w.control_flow +
+            raw['data_flow'] * w.data_flow +
+            raw['call_pattern'] * w.call_pattern +
+            raw['structural'] * w.structural +
+            raw['behavioral'] * w.behavioral
+        )
+        return (
+            _round4(overall),
+            {name: _round4(v) for name, v in raw.items()},
+        )
+    
+    def pair_features(
+        self,
+        matrix: FeatureMatrix,
+        a: np.ndarray,
+        b: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized SemanticFeatureExtractor.compute_pair_features().
+
+        Same keys and formulas; every value is an array with one entry per pair.
+        """
+        pf: Dict[str, np.ndarray] = {}
+
+        # === Count similarities ===
+        ca, cb = matrix.counts[a], matrix.counts[b]
+        total = ca + cb
+        count_sim = np.where(
+            total > 0, 1.0 - np.abs(ca - cb) / np.maximum(total, 1), 1.0
+        )
+        for col, (name, _) in enumerate(COUNT_COLUMNS):
+            pf[name] = _round4(count_sim[:, col])
+
+        pf['recursion_match'] = (matrix.recursion[a] == matrix.recursion[b]).astype(np.float64)
+
+        # === Control signature (character multiset Jaccard) ===
+        ha, hb = matrix.signature_hist[a], matrix.signature_hist[b]
+        common = np.minimum(ha, hb).sum(axis=1)
+        union = np.maximum(ha, hb).sum(axis=1)
+        empty_a, empty_b = ha.sum(axis=1) == 0, hb.sum(axis=1) == 0
+        sig_sim = np.where(union > 0, common / np.maximum(union, 1), 0.0)
+        sig_sim = np.where(empty_a & empty_b, 1.0, np.where(empty_a | empty_b, 0.0, sig_sim))
+        pf['control_signature_similarity'] = _round4(sig_sim)
+
+        # === Def/use ratio ===
+        ra, rb = matrix.def_use_ratio[a], matrix.def_use_ratio[b]
+        def_use = 1.0 - np.abs(ra - rb) / np.maximum(ra + rb, 0.01)
+        pf['def_use_similarity'] = _round4(np.clip(def_use, 0.0, 1.0))
+
+        # === Call overlap (set Jaccard) ===
+        sa, sb = matrix.call_sets[a], matrix.call_sets[b]
+        inter = (sa & sb).sum(axis=1)
+        size_a, size_b = sa.sum(axis=1), sb.sum(axis=1)
+        call_union = size_a + size_b - inter
+        overlap = np.where(call_union > 0, inter / np.maximum(call_union, 1), 0.0)
+        overlap = np.where((size_a == 0) & (size_b == 0), 1.0,
+                           np.where((size_a == 0) | (size_b == 0), 0.0, overlap))
+        pf['call_overlap_similarity'] = _round4(overlap)
+
+        # === Returns ===
+        ret_diff = np.abs(matrix.return_count[a] - matrix.return_count[b])
+        pf['return_similarity'] = np.where(ret_diff == 0, 1.0, np.where(ret_diff <= 1, 0.5, 0.0))
+
+        # === Behavioral hash (fraction of matching parts) ===
+        la, lb = matrix.hash_len[a], matrix.hash_len[b]
+        matches = (matrix.hash_parts[a] == matrix.hash_parts[b]) & (matrix.hash_parts[a] >= 0)
+        hash_sim = np.where(
+            (la > 0) & (lb > 0) & (la == lb), matches.sum(axis=1) / np.maximum(la, 1), 0.0
+        )
+        pf['behavioral_hash_similarity'] = _round4(hash_sim)
+
+        # === Bucket matches ===
+        same = matrix.buckets[a] == matrix.buckets[b]
+        for col, (name, _, mismatch) in enumerate(BUCKET_COLUMNS):
+            pf[name] = np.where(same[:, col], 1.0, mismatch)
+
+        return pf
@@ -15,13 +15,21 @@ Usage:
     
     # Or for batch detection:
     results = detector.detect_batch(["file1.cpp", "file2.cpp", "file3.cpp"])
+
+    # Or score a batch once and look pairs up (vectorized, see batch_scorer.py):
+    detector.prepare_batch(["file1.cpp", "file2.cpp", "file3.cpp"])
+    score, categories = detector.batch_score("file1.cpp", "file3.cpp")
 """
 
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass, field
 import time
 
+import numpy as np
+
+from .batch_scorer import FeatureMatrix, PDGBatchScorer
 from .pdg_builder import PDGBuilder, SimplifiedPDG
 from .semantic_features import SemanticFeatureExtractor, SemanticFeatures
 from .similarity import PDGSimilarity, SimilarityResult, SimilarityWeights
@@ -135,6 +143,9 @@ class Type4PDGDetector:
     # Default threshold for semantic clone detection
     DEFAULT_THRESHOLD = 0.60
     
+    # Path-keyed PDG / feature caches hold at most this many files (LRU)
+    CACHE_FILES = 2048
+    
     def __init__(
         self, 
         threshold: float = DEFAULT_THRESHOLD,
@@ -153,10 +164,18 @@ class Type4PDGDetector:
         self.pdg_builder = PDGBuilder()
         self.feature_extractor = SemanticFeatureExtractor()
         self.similarity_calculator = PDGSimilarity(weights=weights)
+        self.batch_scorer = PDGBatchScorer(weights=weights)
         
-        # Caches for performance
-        self._pdg_cache: Dict[str, SimplifiedPDG] = {}
-        self._feature_cache: Dict[str, SemanticFeatures] = {}
+        # Caches for performance (LRU, emptied by clear_batch)
+        self._pdg_cache: "OrderedDict[str, SimplifiedPDG]" = OrderedDict()
+        self._feature_cache: "OrderedDict[str, SemanticFeatures]" = OrderedDict()
+        
+        # Batch scores from prepare_batch(): one entry per scored pair
+        self._batch_matrix: Optional[FeatureMatrix] = None
+        self._batch_index: Dict[str, int] = {}
+        self._batch_pairs: Optional[Dict[Tuple[int, int], int]] = None
+        self._batch_overall: Optional[np.ndarray] = None
+        self._batch_categories: Dict[str, np.ndarray] = {}
         
         print(f"✅ Type-4 PDG Detector initialized (threshold: {threshold})")
     
@@ -254,28 +273,30 @@ class Type4PDGDetector:
         
         print(f"🔍 Comparing {n} files ({total_comparisons} pairs)...")
         
-        # Compare all pairs
-        for i in range(n):
-            for j in range(i + 1, n):
-                detection = self.detect(
-                    file_paths[i], 
-                    file_paths[j],
-                    include_features=False  # Don't include for batch (too much data)
+        # Score all pairs at once
+        self.prepare_batch(file_paths)
+        rows_a, rows_b = self.batch_scorer.all_pairs(n)
+        names = [Path(p).name for p in file_paths]
+        per_pair_ms = (time.time() - start_time) * 1000 / max(total_comparisons, 1)
+        
+        for k, (i, j) in enumerate(zip(rows_a.tolist(), rows_b.tolist())):
+            score = float(self._batch_overall[k])
+            confidence = self.similarity_calculator.get_confidence_level(score)
+            
+            # Filter based on confidence
+            if include_unlikely or confidence != 'UNLIKELY':
+                result = Type4DetectionResult(
+                    file_a=names[i],
+                    file_b=names[j],
+                    semantic_score=score,
+                    is_semantic_clone=score >= self.threshold,
+                    confidence=confidence,
+                    category_scores={
+                        name: float(scores[k]) for name, scores in self._batch_categories.items()
+                    },
+                    processing_time_ms=round(per_pair_ms, 2),
                 )
-                
-                # Filter based on confidence
-                confidence = detection['confidence']
-                if include_unlikely or confidence != 'UNLIKELY':
-                    result = Type4DetectionResult(
-                        file_a=detection['file_a'],
-                        file_b=detection['file_b'],
-                        semantic_score=detection['semantic_score'],
-                        is_semantic_clone=detection['is_semantic_clone'],
-                        confidence=confidence,
-                        category_scores=detection['category_scores'],
-                        processing_time_ms=detection['processing_time_ms'],
-                    )
-                    results.append(result)
+                results.append(result)
         
         # Sort by semantic score (highest first)
         results.sort(key=lambda x: x.semantic_score, reverse=True)
@@ -338,15 +359,109 @@ class Type4PDGDetector:
             'analysis': analysis,
         }
     
+    # =========================================================================
+    # BATCH SCORING
+    # =========================================================================
+    
+    def prepare_batch(
+        self,
+        file_paths: List[str],
+        pairs: Optional[List[Tuple[str, str]]] = None
+    ) -> None:
+        """
+        Extract features for every file once and score pairs with NumPy.
+        
+        Args:
+            file_paths: Files of the batch
+            pairs: Candidate pairs to score (default: every pair)
+        
+        Afterwards batch_score() answers the scored pairs by lookup.
+        """
+        paths = [str(p) for p in file_paths]
+        features = [self._get_features(p) for p in paths]
+        self._batch_matrix = FeatureMatrix.from_features(features, keys=paths)
+        self._batch_index = {p: i for i, p in enumerate(paths)}
+        
+        if pairs is None:
+            rows_a, rows_b = self.batch_scorer.all_pairs(len(paths))
+            self._batch_pairs = None
+        else:
+            ordered = {
+                tuple(sorted((self._batch_index[str(a)], self._batch_index[str(b)])))
+                for a, b in pairs
+            }
+            ordered = sorted(ij for ij in ordered if ij[0] != ij[1])
+            rows_a = np.array([i for i, _ in ordered], dtype=np.intp)
+            rows_b = np.array([j for _, j in ordered], dtype=np.intp)
+            self._batch_pairs = {ij: k for k, ij in enumerate(ordered)}
+        
+        self._batch_overall, self._batch_categories = self.batch_scorer.score(
+            self._batch_matrix, rows_a, rows_b
+        )
+    
+    def batch_score(
+        self,
+        file_path_a: str,
+        file_path_b: str
+    ) -> Tuple[float, Dict[str, float]]:
+        """
+        (semantic_score, category_scores) for a pair.
+        
+        Looked up when prepare_batch() scored the pair; otherwise scored on
+        demand with the same vectorized scorer, leaving the batch in place.
+        """
+        i = self._batch_index.get(str(file_path_a))
+        j = self._batch_index.get(str(file_path_b))
+        if i is None or j is None:
+            matrix = FeatureMatrix.from_features(
+                [self._get_features(str(file_path_a)), self._get_features(str(file_path_b))]
+            )
+            return self._scores_at(*self.batch_scorer.score(matrix, [0], [1]), 0)
+        
+        k = self._batch_position(min(i, j), max(i, j))
+        if k is None:
+            return self._scores_at(*self.batch_scorer.score(self._batch_matrix, [i], [j]), 0)
+        return self._scores_at(self._batch_overall, self._batch_categories, k)
+    
+    @staticmethod
+    def _scores_at(
+        overall: np.ndarray,
+        categories: Dict[str, np.ndarray],
+        k: int
+    ) -> Tuple[float, Dict[str, float]]:
+        return float(overall[k]), {name: float(scores[k]) for name, scores in categories.items()}
+    
+    def _batch_position(self, i: int, j: int) -> Optional[int]:
+        """Position of pair i < j in the batch score arrays"""
+        if i == j:
+            return None
+        if self._batch_pairs is not None:
+            return self._batch_pairs.get((i, j))
+        # Row-major upper triangle (same order as np.triu_indices)
+        n = len(self._batch_index)
+        return i * n - i * (i + 1) // 2 + (j - i - 1)
+    
+    def clear_batch(self) -> None:
+        """Drop the prepared batch scores and the job's path-keyed caches"""
+        self._pdg_cache.clear()
+        self._feature_cache.clear()
+        self._batch_matrix = None
+        self._batch_index = {}
+        self._batch_pairs = None
+        self._batch_overall = None
+        self._batch_categories = {}
+    
     # =========================================================================
     # CACHE MANAGEMENT
     # =========================================================================
     
     def _get_pdg(self, file_path: str) -> SimplifiedPDG:
         """Get PDG from cache or build it"""
-        if file_path not in self._pdg_cache:
-            self._pdg_cache[file_path] = self.pdg_builder.build_from_file(file_path)
-        return self._pdg_cache[file_path]
+        pdg = self._pdg_cache.get(file_path)
+        if pdg is None:
+            pdg = self.pdg_builder.build_from_file(file_path)
+        self._remember(self._pdg_cache, file_path, pdg)
+        return pdg
     
     def _get_features(
         self, 
@@ -354,16 +469,23 @@ class Type4PDGDetector:
         pdg: SimplifiedPDG = None
     ) -> SemanticFeatures:
         """Get features from cache or extract them"""
-        if file_path not in self._feature_cache:
+        features = self._feature_cache.get(file_path)
+        if features is None:
             if pdg is None:
                 pdg = self._get_pdg(file_path)
-            self._feature_cache[file_path] = self.feature_extractor.extract(pdg)
-        return self._feature_cache[file_path]
+            features = self.feature_extractor.extract(pdg)
+        self._remember(self._feature_cache, file_path, features)
+        return features
+    
+    def _remember(self, cache: "OrderedDict[str, Any]", key: str, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.CACHE_FILES:
+            cache.popitem(last=False)
     
     def clear_cache(self):
         """Clear PDG and feature caches"""
-        self._pdg_cache.clear()
-        self._feature_cache.clear()
+        self.clear_batch()
     
     def get_cache_stats(self) -> Dict[str, int]:
         """Get cache statistics"""
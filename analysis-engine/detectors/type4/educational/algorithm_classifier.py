@@ -24,10 +24,16 @@ Outputs:
 from __future__ import annotations
 
 import logging
+import os
 import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from .signal_scanner import SourceSignals, scan_source
 
 logger = logging.getLogger(__name__)
 
@@ -68,9 +74,11 @@ class ClassificationResult:
 # Regex patterns
 # ─────────────────────────────────────────────────────────────────────────────
 
-# C++ void function that takes (int[], int) — typical sort signature
-_CPP_SORT_FUNC = re.compile(
-    r'\bvoid\s+(\w+)\s*\('
+# Parameter lists, matched right after the '(' of a declaration the scanner
+# found (`void name(`, `int name(`, ...)
+
+# (int[], int) / (int*, int) — typical sort signature
+_SORT_PARAMS = re.compile(
     r'(?:'
     r'\s*int\s+\w+\s*\[\s*\]'       # int arr[]
     r'|'
@@ -79,9 +87,8 @@ _CPP_SORT_FUNC = re.compile(
     r'\s*,\s*int\s+\w+\s*\)',
 )
 
-# C++ function that takes (int[], int, int) — search typically
-_CPP_SEARCH_FUNC = re.compile(
-    r'\bint\s+(\w+)\s*\('
+# (int[], int, int) — search typically
+_SEARCH_PARAMS = re.compile(
     r'(?:'
     r'\s*int\s+\w+\s*\[\s*\]'
     r'|'
@@ -90,16 +97,14 @@ _CPP_SEARCH_FUNC = re.compile(
     r'\s*,\s*int\s+\w+\s*,\s*int\s+\w+\s*\)',
 )
 
-# C++ long-returning function (single int arg) — fibonacci / factorial
-_CPP_SINGLE_INT_FUNC = re.compile(
-    r'\b(?:long\s+long|long|int)\s+(\w+)\s*\(\s*int\s+\w+\s*\)'
-)
+# (int n) — fibonacci / factorial / gcd helpers returning long or int
+_SINGLE_INT_PARAM = re.compile(r'\s*int\s+\w+\s*\)')
 
-# C++ class definition
-_CPP_CLASS = re.compile(r'\bclass\s+(\w+)\s*\{')
+_INT_PARAM = re.compile(r'\s*int\b')      # (int ...
+_NO_PARAMS = re.compile(r'\s*\)')         # ()
 
-# C++ struct definition
-_CPP_STRUCT = re.compile(r'\bstruct\s+(\w+)\s*\{')
+# After "Node" / "Element": a pointer type
+_POINTER = re.compile(r'\s*\*')
 
 # Python def
 _PY_DEF = re.compile(r'^def\s+(\w+)\s*\(', re.MULTILINE)
@@ -171,72 +176,104 @@ _REVERSE_KEYWORDS = {
 # Algorithm family detection (within a category)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _detect_sort_family(source: str) -> Tuple[str, float]:
+# Anchored tails of the family rules, matched at positions from the scan
+_ADJACENT_CMP   = re.compile(r'\s*\]\s*>\s*\[\s*j\s*\+\s*1\s*\]')   # after "[j" of [j] > [j + 1]
+_PLUS_ONE_INDEX = re.compile(r'\s*\+\s*1\]')                        # after "arr[j" of arr[j + 1]
+_MIN_INDEX      = re.compile(r'\s+(?:index|idx|i|pos)\b', re.IGNORECASE)
+_KEY_ASSIGN     = re.compile(r'\s*=\s*(?:arr|data|numbers)')
+_N_MINUS_ONE    = re.compile(r'\s*n\s*-\s*1\s*\)', re.IGNORECASE)
+_N_MINUS_ONE_ON_LINE = re.compile(r'.*n\s*-\s*1\s*\)', re.IGNORECASE)
+_CALL_STMT      = re.compile(r'.*\)\s*;')
+
+
+def _indexed_twice(scan: SourceSignals, array: str, index: str) -> bool:
+    r"""Same as re.search(r'array\[index\].*array\[index\s*\+\s*1\]', source)."""
+    source, opener = scan.source, array + "["
+    sites = [p for p in scan.positions(index)
+             if p >= len(opener) and source.startswith(opener, p - len(opener))]
+    seconds = [q for q in sites if _PLUS_ONE_INDEX.match(source, q + len(index))]
+    for p in sites:
+        if not source.startswith("]", p + len(index)):
+            continue
+        i = bisect_right(seconds, p)
+        if i < len(seconds) and source.find("\n", p, seconds[i] - len(opener)) < 0:
+            return True
+    return False
+
+
+def _detect_sort_family(scan: SourceSignals) -> Tuple[str, float]:
     """
     Detect which sorting algorithm is used.
     Returns (family_name, confidence).
     """
-    s = source.lower()
+    source = scan.source
 
     # Bubble sort: adjacent comparison in nested loops
-    has_adjacent_cmp = bool(re.search(r'\[\s*j\s*\]\s*>\s*\[\s*j\s*\+\s*1\s*\]', source)
-                            or re.search(r'arr\[j\].*arr\[j\s*\+\s*1\]', source)
-                            or re.search(r'data\[idx\].*data\[idx\s*\+\s*1\]', source))
-    has_bubble_name = 'bubble' in s or 'bubblesort' in s or 'sortbubble' in s
-    if has_adjacent_cmp or (has_bubble_name and 'for' in s):
+    has_adjacent_cmp = bool(
+        any(scan.char_before(p) == "[" and _ADJACENT_CMP.match(source, p + 1)
+            for p in scan.positions("j"))
+        or _indexed_twice(scan, "arr", "j")
+        or _indexed_twice(scan, "data", "idx")
+    )
+    has_bubble_name = scan.contains('bubble') or scan.contains('bubblesort') or scan.contains('sortbubble')
+    if has_adjacent_cmp or (has_bubble_name and scan.contains('for')):
         conf = 0.9 if has_adjacent_cmp else 0.7
         # Early-exit optimization (swap flag) = Usman's version
-        if re.search(r'\bswapped\b|\bswap_flag\b|\bflag\b', s):
+        if scan.has_word('swapped', 'swap_flag', 'flag'):
             return "BUBBLE_SORT_OPTIMIZED", conf
         return "BUBBLE_SORT", conf
 
     # Selection sort: find minimum index in inner loop
-    has_min_idx = bool(re.search(r'\bmin\s*(?:index|idx|i|pos)\b', s, re.IGNORECASE)
-                       or re.search(r'minIndex|minIdx|min_pos|min_j', source))
-    has_selection_name = 'selection' in s or 'selectsort' in s or 'sortselect' in s
+    has_min_idx = bool(scan.has_word('minindex', 'minidx', 'mini', 'minpos')
+                       or scan.followed_by('min', _MIN_INDEX, ignore_case=True)
+                       or any(scan.contains_cased(n) for n in ('minIndex', 'minIdx', 'min_pos', 'min_j')))
+    has_selection_name = scan.contains('selection') or scan.contains('selectsort') or scan.contains('sortselect')
     if has_min_idx or has_selection_name:
         conf = 0.9 if has_min_idx else 0.7
         return "SELECTION_SORT", conf
 
     # Insertion sort: key variable, shift elements right
-    has_key = bool(re.search(r'\bkey\s*=\s*(?:arr|data|numbers)', source))
-    has_insertion_name = 'insertion' in s or 'insertsort' in s
+    has_key = bool(scan.followed_by('key', _KEY_ASSIGN))
+    has_insertion_name = scan.contains('insertion') or scan.contains('insertsort')
     if has_key or has_insertion_name:
         conf = 0.85 if has_key else 0.65
         return "INSERTION_SORT", conf
 
     # Merge sort: recursive, merge function
-    has_merge = bool(re.search(r'\bmerge\s*\(', source) and re.search(r'\bmergeSort\b|\bmerge_sort\b', source, re.IGNORECASE))
+    has_merge = bool(scan.call_sites('merge') and scan.has_word('mergesort', 'merge_sort'))
     if has_merge:
         return "MERGE_SORT", 0.9
 
     # Quick sort: pivot
-    has_pivot = 'pivot' in s and 'partition' in s
+    has_pivot = scan.contains('pivot') and scan.contains('partition')
     if has_pivot:
         return "QUICK_SORT", 0.9
 
     return "SORT_UNKNOWN", 0.4
 
 
-def _detect_search_family(source: str) -> Tuple[str, float]:
+def _detect_search_family(scan: SourceSignals) -> Tuple[str, float]:
     """Detect linear vs binary search."""
-    s = source.lower()
-    has_mid = bool(re.search(r'\bmid\b|\bmiddle\b', s))
-    has_lo_hi = bool(re.search(r'\blow\b.*\bhigh\b|\bleft\b.*\bright\b', s))
+    has_mid = scan.has_word('mid', 'middle')
+    has_lo_hi = scan.on_same_line('low', 'high') or scan.on_same_line('left', 'right')
     if has_mid or has_lo_hi:
-        recursive = bool(re.search(r'\b(?:binarySearch|binary_search)\b.*\brecursive\b'
-                                   r'|calls itself', s))
+        recursive = scan.on_same_line('binary_search', 'recursive') or scan.contains('calls itself')
         return ("BINARY_SEARCH_RECURSIVE" if recursive else "BINARY_SEARCH_ITERATIVE"), 0.85
     return "LINEAR_SEARCH", 0.75
 
 
-def _detect_fibonacci_family(source: str) -> Tuple[str, float]:
-    s = source.lower()
+def _calls_with(scan: SourceSignals, names: Tuple[str, ...], args: Pattern,
+                ignore_case: bool = True) -> bool:
+    """True if some `name(` call, for name in names, is followed by args."""
+    return any(args.match(scan.source, q + 1)
+               for name in names for q in scan.call_sites(name, ignore_case))
+
+
+def _detect_fibonacci_family(scan: SourceSignals) -> Tuple[str, float]:
     # Recursive: function calls itself
-    has_recursion = bool(re.search(r'\bfib\s*\(\s*n\s*-\s*1\s*\)', s)
-                         or re.search(r'\bfibonacci\s*\(\s*n\s*-\s*1\s*\)', s))
-    has_loop = bool(re.search(r'\bfor\b|\bwhile\b', s))
-    has_dp = bool(re.search(r'\bdp\b|\bmemo\b|\bcache\b|\btable\b', s))
+    has_recursion = _calls_with(scan, ('fib', 'fibonacci'), _N_MINUS_ONE)
+    has_loop = scan.has_word('for', 'while')
+    has_dp = scan.has_word('dp', 'memo', 'cache', 'table')
     if has_dp:
         return "FIBONACCI_DP", 0.9
     if has_recursion:
@@ -246,11 +283,10 @@ def _detect_fibonacci_family(source: str) -> Tuple[str, float]:
     return "FIBONACCI_UNKNOWN", 0.4
 
 
-def _detect_gcd_family(source: str) -> Tuple[str, float]:
-    s = source.lower()
-    has_recursion = bool(re.search(r'\bgcd\s*\(.*\)\s*;', source))
-    has_modulo = '%' in source
-    has_while = 'while' in s
+def _detect_gcd_family(scan: SourceSignals) -> Tuple[str, float]:
+    has_recursion = _calls_with(scan, ('gcd',), _CALL_STMT, ignore_case=False)
+    has_modulo = '%' in scan.source
+    has_while = scan.contains('while')
     if has_modulo and has_while:
         return "GCD_EUCLIDEAN_ITERATIVE", 0.9
     if has_modulo and has_recursion:
@@ -262,45 +298,37 @@ def _detect_gcd_family(source: str) -> Tuple[str, float]:
 # OOP / Procedural detection helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _find_class_name(source: str) -> str:
+def _find_class_name(scan: SourceSignals) -> str:
     """Return first class name found, or '' if none."""
-    m = _CPP_CLASS.search(source)
-    return m.group(1) if m else ""
+    names = scan.definitions("class")
+    return names[0] if names else ""
 
 
-def _find_struct_name(source: str) -> str:
+def _find_struct_name(scan: SourceSignals) -> str:
     """Return first struct name found (excluding Node/Element/etc.), or ''."""
     skip = {"node", "element", "item"}
-    for m in _CPP_STRUCT.finditer(source):
-        name = m.group(1).lower()
-        if name not in skip:
-            return m.group(1)
+    for name in scan.definitions("struct"):
+        if name.lower() not in skip:
+            return name
     return ""
 
 
-def _detect_stack_methods(source: str) -> Dict[str, str]:
+def _detect_stack_methods(scan: SourceSignals) -> Dict[str, str]:
     """
     Detect push/pop/peek/isEmpty/size method/function names.
     Returns mapping: logical_role → actual_name_in_source.
     """
     roles: Dict[str, str] = {}
-    s = source.lower()
-
-    # Push: insert/push, modifies top
-    push_candidates = re.findall(
-        r'\bbool\s+(\w+)\s*\(\s*int\b'  # bool funcName(int
-        r'|\bvoid\s+(\w+)\s*\(\s*int\b'  # void funcName(int
-        r'|\bint\s+(\w+)\s*\(\s*int\b',  # int funcName(int
-        source,
-    )
-    for groups in push_candidates:
-        name = next(g for g in groups if g).lower()
-        if any(kw in name for kw in ('push', 'insert', 'add', 'enqueue')):
-            roles['push'] = next(g for g in groups if g)
+
+    # Push: insert/push, modifies top — bool/void/int funcName(int ...
+    push_candidates = scan.declared(('bool', 'void', 'int'), _INT_PARAM)
+    for name in push_candidates:
+        if any(kw in name.lower() for kw in ('push', 'insert', 'add', 'enqueue')):
+            roles['push'] = name
             break
 
     # Pop: returns value, removes top
-    pop_candidates = re.findall(r'\bint\s+(\w+)\s*\(\s*\)', source)
+    pop_candidates = scan.declared(('int',), _NO_PARAMS)
     for name in pop_candidates:
         lname = name.lower()
         if any(kw in lname for kw in ('pop', 'remove', 'delete', 'dequeue', 'extract')):
@@ -322,7 +350,7 @@ def _detect_stack_methods(source: str) -> Dict[str, str]:
             break
 
     # IsEmpty: returns bool
-    bool_funcs = re.findall(r'\bbool\s+(\w+)\s*\(\s*\)', source)
+    bool_funcs = scan.declared(('bool',), _NO_PARAMS)
     for name in bool_funcs:
         lname = name.lower()
         if 'empty' in lname or 'isempty' in lname:
@@ -332,13 +360,13 @@ def _detect_stack_methods(source: str) -> Dict[str, str]:
     return roles
 
 
-def _detect_linked_list_methods(source: str) -> Dict[str, str]:
+def _detect_linked_list_methods(scan: SourceSignals) -> Dict[str, str]:
     """Detect insert/delete/search/length/display method names."""
     roles: Dict[str, str] = {}
 
-    void_funcs = re.findall(r'\bvoid\s+(\w+)\s*\(', source)
-    int_funcs  = re.findall(r'\bint\s+(\w+)\s*\(', source)
-    bool_funcs = re.findall(r'\bbool\s+(\w+)\s*\(', source)
+    void_funcs = scan.declared(('void',))
+    int_funcs  = scan.declared(('int',))
+    bool_funcs = scan.declared(('bool',))
 
     for name in void_funcs:
         lname = name.lower()
@@ -374,9 +402,9 @@ def _detect_linked_list_methods(source: str) -> Dict[str, str]:
 # Main classifier
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _keyword_score(source_lower: str, keywords: set) -> float:
+def _keyword_score(scan: SourceSignals, keywords: set) -> float:
     """Return fraction of keywords present in source (0.0–1.0)."""
-    hits = sum(1 for kw in keywords if kw in source_lower)
+    hits = sum(1 for kw in keywords if scan.contains(kw))
     return hits / len(keywords) if keywords else 0.0
 
 
@@ -385,8 +413,19 @@ class AlgorithmClassifier:
     Classifies a source file into a problem category and algorithm family.
 
     All classification is purely static — no compilation or execution.
+
+    Results are memoised per file (path, mtime, size), so the I/O tester,
+    the signature signal and the batch pre-pass (classify_batch) share one
+    classification per submission. Results are shared — treat them as
+    read-only.
     """
 
+    MEMO_FILES = 4096
+
+    def __init__(self) -> None:
+        self._memo: "OrderedDict[Tuple[str, int, int], ClassificationResult]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
     # ── supported file extensions ─────────────────────────────────────────────
     _EXT_LANG: Dict[str, str] = {
         ".cpp": "cpp", ".cc": "cpp", ".cxx": "cpp",
@@ -409,13 +448,36 @@ class AlgorithmClassifier:
             On failure, result.is_known == False and signals contains error info.
         """
         path = Path(file_path)
-        logger.debug("[Classifier] Classifying: %s", path.name)
 
         # ── safety: existence check ────────────────────────────────────────
-        if not path.exists():
+        try:
+            st = os.stat(path)
+        except OSError:
             logger.warning("[Classifier] File not found: %s", file_path)
             return ClassificationResult(signals={"error": "file_not_found"})
 
+        memo_key = (str(path), st.st_mtime_ns, st.st_size)
+        with self._memo_lock:
+            cached = self._memo.get(memo_key)
+            if cached is not None:
+                self._memo.move_to_end(memo_key)
+                return cached
+
+        result = self._classify_path(path)
+        with self._memo_lock:
+            self._memo[memo_key] = result
+            if len(self._memo) > self.MEMO_FILES:
+                self._memo.popitem(last=False)
+        return result
+
+    def classify_batch(self, file_paths: List[str]) -> Dict[str, ClassificationResult]:
+        """Classify every file once (batch pre-pass); path → ClassificationResult."""
+        return {str(p): self.classify_file(str(p)) for p in file_paths}
+
+    def _classify_path(self, path: Path) -> ClassificationResult:
+        logger.debug("[Classifier] Classifying: %s", path.name)
+        file_path = str(path)
+
         # ── read source ────────────────────────────────────────────────────
         try:
             source = path.read_text(encoding="utf-8", errors="ignore")
@@ -434,31 +496,31 @@ class AlgorithmClassifier:
         self, source: str, lang: str, filename: str
     ) -> ClassificationResult:
         """Run all category-detection heuristics and pick the best match."""
-        s = source.lower()
+        scan = scan_source(source)
         signals: Dict[str, Any] = {"lang": lang, "filename": filename}
 
         # ── collect keyword scores ─────────────────────────────────────────
         scores = {
-            "SORT":        _keyword_score(s, _SORT_KEYWORDS),
-            "STACK":       _keyword_score(s, _STACK_KEYWORDS),
-            "QUEUE":       _keyword_score(s, _QUEUE_KEYWORDS),
-            "LINKED_LIST": _keyword_score(s, _LINKED_LIST_KEYWORDS),
-            "SEARCH":      _keyword_score(s, _SEARCH_KEYWORDS),
-            "FIBONACCI":   _keyword_score(s, _FIBONACCI_KEYWORDS),
-            "FACTORIAL":   _keyword_score(s, _FACTORIAL_KEYWORDS),
-            "GCD":         _keyword_score(s, _GCD_KEYWORDS),
-            "PALINDROME":  _keyword_score(s, _PALINDROME_KEYWORDS),
-            "REVERSE":     _keyword_score(s, _REVERSE_KEYWORDS),
+            "SORT":        _keyword_score(scan, _SORT_KEYWORDS),
+            "STACK":       _keyword_score(scan, _STACK_KEYWORDS),
+            "QUEUE":       _keyword_score(scan, _QUEUE_KEYWORDS),
+            "LINKED_LIST": _keyword_score(scan, _LINKED_LIST_KEYWORDS),
+            "SEARCH":      _keyword_score(scan, _SEARCH_KEYWORDS),
+            "FIBONACCI":   _keyword_score(scan, _FIBONACCI_KEYWORDS),
+            "FACTORIAL":   _keyword_score(scan, _FACTORIAL_KEYWORDS),
+            "GCD":         _keyword_score(scan, _GCD_KEYWORDS),
+            "PALINDROME":  _keyword_score(scan, _PALINDROME_KEYWORDS),
+            "REVERSE":     _keyword_score(scan, _REVERSE_KEYWORDS),
         }
         signals["keyword_scores"] = {k: round(v, 3) for k, v in scores.items()}
 
     
         # ── structural signals ─────────────────────────────────────────────
-        has_nested_loops = bool(re.search(r'for\s*\(.*\)\s*\{[^}]*for\s*\(', source, re.DOTALL))
-        has_class        = bool(_CPP_CLASS.search(source)) if lang in ("cpp",) else False
-        has_struct       = bool(_CPP_STRUCT.search(source)) if lang in ("cpp",) else False
+        has_nested_loops = scan.has_nested_loops
+        has_class        = bool(scan.definitions("class")) if lang in ("cpp",) else False
+        has_struct       = bool(scan.definitions("struct")) if lang in ("cpp",) else False
         
-        has_recursion = bool(re.search(r'(\w+)\s*\([^)]*\)\s*;.*\breturn\b.*\1\s*\(', source, re.DOTALL))
+        has_recursion = scan.has_recursion
         
         signals.update({
             "has_nested_loops": has_nested_loops,
@@ -469,7 +531,7 @@ class AlgorithmClassifier:
 
 
         # ── sort detection ─────────────────────────────────────────────────
-        sort_funcs = [m.group(1) for m in _CPP_SORT_FUNC.finditer(source)]
+        sort_funcs = scan.declared(('void',), _SORT_PARAMS)
         sort_confidence = scores["SORT"]
         if sort_funcs:
             sort_confidence = max(sort_confidence, 0.75)
@@ -477,13 +539,13 @@ class AlgorithmClassifier:
             sort_confidence = max(sort_confidence, 0.70)
 
         # ── search detection ───────────────────────────────────────────────
-        search_funcs = [m.group(1) for m in _CPP_SEARCH_FUNC.finditer(source)]
+        search_funcs = scan.declared(('int',), _SEARCH_PARAMS)
         search_confidence = scores["SEARCH"]
         if search_funcs:
             search_confidence = max(search_confidence, 0.70)
 
         # ── fibonacci/factorial detection ──────────────────────────────────
-        single_int_funcs = [m.group(1) for m in _CPP_SINGLE_INT_FUNC.finditer(source)]
+        single_int_funcs = scan.declared(('long', 'int'), _SINGLE_INT_PARAM)
         fib_confidence  = scores["FIBONACCI"]
         fact_confidence = scores["FACTORIAL"]
         for fname in single_int_funcs:
@@ -502,13 +564,13 @@ class AlgorithmClassifier:
         # ── stack vs queue ─────────────────────────────────────────────────
         stack_confidence = scores["STACK"]
         # Distinguish stack from queue (queue has both front AND rear/tail)
-        has_queue_tokens = bool(re.search(r'\bfront\b|\brear\b|\bdequeue\b|\benqueue\b', s))
+        has_queue_tokens = scan.has_word('front', 'rear', 'dequeue', 'enqueue')
         if has_queue_tokens:
             stack_confidence *= 0.5  # queue is more likely
 
         # ── linked list detection ──────────────────────────────────────────
         ll_confidence = scores["LINKED_LIST"]
-        has_node_ptr  = bool(re.search(r'\bNode\s*\*|\bElement\s*\*', source))
+        has_node_ptr  = bool(scan.followed_by('Node', _POINTER) or scan.followed_by('Element', _POINTER))
         if has_node_ptr:
             ll_confidence = max(ll_confidence, 0.75)
 
@@ -542,15 +604,14 @@ class AlgorithmClassifier:
 
         # ── resolve into specific category and algorithm family ───────────
         return self._resolve(
-            source, s, best_key, best_conf,
+            scan, best_key, best_conf,
             sort_funcs, search_funcs, single_int_funcs,
             has_class, has_struct, signals,
         )
 
     def _resolve(
         self,
-        source: str,
-        s: str,         # source.lower()
+        scan: SourceSignals,
         category_key: str,
         confidence: float,
         sort_funcs: List[str],
@@ -564,7 +625,7 @@ class AlgorithmClassifier:
 
         # ── SORT ──────────────────────────────────────────────────────────
         if category_key == "SORT":
-            family, family_conf = _detect_sort_family(source)
+            family, family_conf = _detect_sort_family(scan)
             merged_conf = (confidence + family_conf) / 2
             return ClassificationResult(
                 category="SORT_ARRAY",
@@ -576,7 +637,7 @@ class AlgorithmClassifier:
 
         # ── SEARCH ────────────────────────────────────────────────────────
         if category_key == "SEARCH":
-            family, family_conf = _detect_search_family(source)
+            family, family_conf = _detect_search_family(scan)
             cat = "BINARY_SEARCH" if "BINARY" in family else "LINEAR_SEARCH"
             return ClassificationResult(
                 category=cat,
@@ -588,9 +649,9 @@ class AlgorithmClassifier:
 
         # ── STACK ─────────────────────────────────────────────────────────
         if category_key == "STACK":
-            methods = _detect_stack_methods(source)
+            methods = _detect_stack_methods(scan)
             oop = has_class
-            class_name = _find_class_name(source) if oop else _find_struct_name(source)
+            class_name = _find_class_name(scan) if oop else _find_struct_name(scan)
             cat = "STACK_OOP" if oop else "STACK_PROCEDURAL"
             return ClassificationResult(
                 category=cat,
@@ -604,9 +665,9 @@ class AlgorithmClassifier:
 
         # ── LINKED LIST ───────────────────────────────────────────────────
         if category_key == "LINKED_LIST":
-            methods = _detect_linked_list_methods(source)
+            methods = _detect_linked_list_methods(scan)
             oop = has_class
-            class_name = _find_class_name(source) if oop else ""
+            class_name = _find_class_name(scan) if oop else ""
             return ClassificationResult(
                 category="LINKED_LIST",
                 algorithm_family="LINKED_LIST_OOP" if oop else "LINKED_LIST_PROCEDURAL",
@@ -619,7 +680,7 @@ class AlgorithmClassifier:
 
         # ── FIBONACCI ─────────────────────────────────────────────────────
         if category_key == "FIBONACCI":
-            family, family_conf = _detect_fibonacci_family(source)
+            family, family_conf = _detect_fibonacci_family(scan)
             return ClassificationResult(
                 category="FIBONACCI",
                 algorithm_family=family,
@@ -630,7 +691,7 @@ class AlgorithmClassifier:
 
         # ── FACTORIAL ─────────────────────────────────────────────────────
         if category_key == "FACTORIAL":
-            recursive = bool(re.search(r'\bfact(?:orial)?\s*\(.*n\s*-\s*1\s*\)', s))
+            recursive = _calls_with(scan, ('fact', 'factorial'), _N_MINUS_ONE_ON_LINE)
             return ClassificationResult(
                 category="FACTORIAL",
                 algorithm_family="FACTORIAL_RECURSIVE" if recursive else "FACTORIAL_ITERATIVE",
@@ -641,7 +702,7 @@ class AlgorithmClassifier:
 
         # ── GCD ───────────────────────────────────────────────────────────
         if category_key == "GCD":
-            family, family_conf = _detect_gcd_family(source)
+            family, family_conf = _detect_gcd_family(scan)
             return ClassificationResult(
                 category="GCD",
                 algorithm_family=family,
@@ -0,0 +1,106 @@
+# detectors/type4/educational/category_buckets.py
+"""
+Per-file classification buckets for gating Type-4 by problem category.
+
+The algorithm signature signal only depends on each file's own
+classification, and two files classified into DIFFERENT problem categories
+always get the fixed 0.1 signature result: they solve different problems,
+so the I/O tester scores them 0.0 without compiling anything.
+
+CategoryBuckets classifies every file of a batch once and groups the files
+by (category, algorithm_family). Pairs across two known categories get
+their signature and I/O result straight from the buckets; only pairs
+inside a category (or involving an unclassified file) reach I/O testing.
+The PDG signal is taken for every pair.
+
+Usage:
+    buckets = CategoryBuckets.build(file_paths)
+    if buckets.is_cross_category(a, b):
+        ...fixed result...
+    for a, b in buckets.candidate_pairs():
+        ...full Type-4 pipeline...
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .algorithm_classifier import AlgorithmClassifier, ClassificationResult, get_classifier
+
+# Signature score of a pair from two different known categories
+CROSS_CATEGORY_SIGNATURE = 0.1
+
+
+def signature_score(cls_a: ClassificationResult, cls_b: ClassificationResult) -> float:
+    """Algorithm-signature signal of a pair from the two files' classifications."""
+    if cls_a.is_known and cls_b.is_known:
+        if cls_a.category == cls_b.category:
+            # Same problem: same algorithm variant is a strong clone signal,
+            # a different variant (e.g. bubble vs selection sort) a weaker one
+            return 1.0 if cls_a.algorithm_family == cls_b.algorithm_family else 0.7
+        # Different problems entirely — very unlikely to be a clone
+        return CROSS_CATEGORY_SIGNATURE
+    if cls_a.is_known or cls_b.is_known:
+        # One file classified, the other unknown — weak signal
+        return 0.3
+    # Neither file classified — neutral (classifier ran but found nothing)
+    return 0.5
+
+
+@dataclass
+class CategoryBuckets:
+    """Classification of every file in a batch, grouped by (category, algorithm_family)."""
+    classifications: Dict[str, ClassificationResult] = field(default_factory=dict)
+    buckets: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+    unclassified: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, file_paths: List[str],
+              classifier: Optional[AlgorithmClassifier] = None) -> "CategoryBuckets":
+        classifications = (classifier or get_classifier()).classify_batch(file_paths)
+        out = cls(classifications=classifications)
+        for path, result in classifications.items():
+            if result.is_known:
+                out.buckets.setdefault((result.category, result.algorithm_family), []).append(path)
+            else:
+                out.unclassified.append(path)
+        return out
+
+    def __contains__(self, path: str) -> bool:
+        return str(path) in self.classifications
+
+    def get(self, path: str) -> Optional[ClassificationResult]:
+        return self.classifications.get(str(path))
+
+    def category_sizes(self) -> Dict[str, int]:
+        sizes: Dict[str, int] = {}
+        for (category, _), paths in self.buckets.items():
+            sizes[category] = sizes.get(category, 0) + len(paths)
+        return sizes
+
+    def is_cross_category(self, file_a: str, file_b: str) -> bool:
+        """True when both files are classified, into different categories."""
+        cls_a, cls_b = self.get(file_a), self.get(file_b)
+        return (cls_a is not None and cls_b is not None
+                and cls_a.is_known and cls_b.is_known
+                and cls_a.category != cls_b.category)
+
+    def io_files(self) -> List[str]:
+        """Files that share their category with another file — the only ones I/O testing compares."""
+        sizes = self.category_sizes()
+        return [p for (category, _), paths in self.buckets.items()
+                if sizes[category] > 1 for p in paths]
+
+    def candidate_pairs(self) -> Iterator[Tuple[str, str]]:
+        """Every pair that is not cross-category (same category, or an unclassified file)."""
+        by_category: Dict[str, List[str]] = {}
+        for (category, _), paths in self.buckets.items():
+            by_category.setdefault(category, []).extend(paths)
+        for paths in by_category.values():
+            yield from combinations(paths, 2)
+        known = [p for paths in by_category.values() for p in paths]
+        for i, path in enumerate(self.unclassified):
+            for other in self.unclassified[i + 1:] + known:
+                yield path, other
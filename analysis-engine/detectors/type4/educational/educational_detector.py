@@ -7,15 +7,15 @@ from __future__ import annotations
 
 import logging
 import time
-import hashlib
-import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 from .algorithm_classifier import get_classifier, ClassificationResult
+from .category_buckets import CROSS_CATEGORY_SIGNATURE, CategoryBuckets, signature_score
 from .io_behavioral_tester import get_tester, IOBehavioralResult
 from .score_fusion import FusionInput, FusionResult, fuse_scores
+from ..result_cache import content_hash, get_result_cache
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +45,9 @@ class EducationalType4Detector:
         self._classifier = get_classifier()
         self._io_tester = get_tester()
         self._cache_dir = Path(cache_dir)
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._results = get_result_cache(str(self._cache_dir / "results.db"))
+        # Batch classification pre-pass (classify_batch / prepare_batch)
+        self._buckets: Optional[CategoryBuckets] = None
         
         # Research-based weights (BigCloneBench + NiCad)
         self.WEIGHTS = {
@@ -66,6 +68,7 @@ class EducationalType4Detector:
         file_a: str,
         file_b: str,
         include_features: bool = False,
+        content_hashes: Optional[Tuple[str, str]] = None,
     ) -> Dict[str, Any]:
         """
         Detect semantic clones with caching.
@@ -74,37 +77,75 @@ class EducationalType4Detector:
             file_a: Path to first source file
             file_b: Path to second source file
             include_features: Include detailed diagnostic info
+            content_hashes: Precomputed sha256 of both files' bytes
+                (from FileArtifacts); skips re-reading them for the cache key
             
         Returns:
             Detection result dict
         """
         # Check cache
-        cache_key = self._get_cache_key(file_a, file_b)
+        cache_key = self._get_cache_key(file_a, file_b, content_hashes)
         cached = self._get_cached(cache_key)
-        if cached:
+        if cached is not None:
             logger.info("[EduDetector] Cache hit for %s vs %s", 
                        Path(file_a).name, Path(file_b).name)
             return cached
         
         # Run detection
-        result = self._detect_internal(file_a, file_b, include_features)
+        result = self._detect_internal(file_a, file_b, include_features, content_hashes)
         
         # Cache result
         self._cache_result(cache_key, result)
         
         return result
 
-    def prepare_batch(self, file_paths: List[Any]) -> None:
-        """No-op for API compatibility"""
-        pass
+    def classify_batch(self, file_paths: List[Any]) -> CategoryBuckets:
+        """Classify every file once and bucket the batch by (category, algorithm_family)."""
+        self._buckets = CategoryBuckets.build([str(p) for p in file_paths], self._classifier)
+        logger.info(
+            "[EduDetector] Classified %d files into %d bucket(s), %d unclassified",
+            len(self._buckets.classifications), len(self._buckets.buckets),
+            len(self._buckets.unclassified),
+        )
+        return self._buckets
+
+    def prepare_batch(self, file_paths: List[Any],
+                      content_hashes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Batch stage: classify every file, one Joern PDG extraction for every
+        file (cross-category pairs keep their PDG signal), and every harness
+        compiled and run once — only for files that appear in a pair that is
+        not cross-category.
+        """
+        buckets = self.classify_batch(file_paths)
+        self.prepare_pdgs(file_paths)
+        if self._enable_io:
+            self._io_tester.profile_batch(buckets.io_files(), content_hashes)
+
+    def prepare_pdgs(self, file_paths: List[Any]) -> None:
+        """One Joern PDG extraction for every file (replaces the previous batch)"""
+        if self._enable_joern and hasattr(self._joern, 'prepare_batch'):
+            try:
+                self._joern.prepare_batch([str(p) for p in file_paths])
+            except Exception as e:
+                logger.warning(f"[EduDetector] Batch PDG extraction failed: {e}")
+
+    def clear_batch(self) -> None:
+        """Forget the last job's classification buckets and batch PDGs"""
+        self._buckets = None
+        if self._joern is not None and hasattr(self._joern, 'clear_batch'):
+            self._joern.clear_batch()
+
+    def attach_store(self, store: Any) -> None:
+        """Persist per-file I/O profiles (and Joern PDGs) in a content-addressed ArtifactStore."""
+        self._io_tester.attach_store(store)
+        if self._joern is not None and hasattr(self._joern, 'attach_store'):
+            self._joern.attach_store(store)
 
     def clear_cache(self) -> None:
-        """Clear the cache directory"""
-        import shutil
-        if self._cache_dir.exists():
-            shutil.rmtree(self._cache_dir)
-            self._cache_dir.mkdir(parents=True, exist_ok=True)
-            logger.info("[EduDetector] Cache cleared")
+        """Clear the result cache"""
+        self._results.clear()
+        logger.info("[EduDetector] Cache cleared")
 
     # ─── Internal Detection ──────────────────────────────────────────────────
 
@@ -112,7 +153,8 @@ class EducationalType4Detector:
         self, 
         file_a: str, 
         file_b: str, 
-        include_features: bool
+        include_features: bool,
+        content_hashes: Optional[Tuple[str, str]] = None,
     ) -> Dict[str, Any]:
         """Internal detection logic"""
         t_start = time.time()
@@ -121,8 +163,12 @@ class EducationalType4Detector:
         logger.info("[EduDetector] Detecting: %s vs %s", name_a, name_b)
         
         try:
-            # Collect all signals
-            signals = self._collect_signals(file_a, file_b)
+            # Collect all signals (cross-category pairs straight from the classifications)
+            cls_a, cls_b = self._classify(file_a), self._classify(file_b)
+            if cls_a.is_known and cls_b.is_known and cls_a.category != cls_b.category:
+                signals = self._cross_category_signals(file_a, file_b, cls_a, cls_b)
+            else:
+                signals = self._collect_signals(file_a, file_b, content_hashes)
             
             # Fuse signals
             final_score = self._fuse_signals(signals)
@@ -165,7 +211,8 @@ class EducationalType4Detector:
 
     # ─── Signal Collection ───────────────────────────────────────────────────
 
-    def _collect_signals(self, file_a: str, file_b: str) -> Dict:
+    def _collect_signals(self, file_a: str, file_b: str,
+                         content_hashes: Optional[Tuple[str, str]] = None) -> Dict:
         """Collect all signals with graceful degradation"""
         signals = {
             # Use 0.0 as the "no evidence" default, not 0.5.
@@ -179,20 +226,12 @@ class EducationalType4Detector:
         }
         
         # Signal 1: PDG (if available)
-        if self._enable_joern and self._joern:
-            try:
-                if hasattr(self._joern, 'detect'):
-                    pdg_score, _ = self._joern.detect(file_a, file_b)
-                    signals['pdg_score'] = pdg_score
-                    signals['pdg_available'] = True
-                    logger.debug(f"[EduDetector] PDG score: {pdg_score:.3f}")
-            except Exception as e:
-                logger.warning(f"[EduDetector] PDG failed: {e}")
+        self._pdg_signal(signals, file_a, file_b)
         
         # Signal 2: I/O behavioral
         if self._enable_io:
             try:
-                io_result = self._io_tester.test(file_a, file_b)
+                io_result = self._io_tester.test(file_a, file_b, content_hashes)
                 if io_result.succeeded and io_result.io_match_score is not None:
                     signals['io_score'] = io_result.io_match_score
                     signals['io_available'] = True
@@ -207,31 +246,10 @@ class EducationalType4Detector:
         
         # Signal 3: Algorithm signature
         try:
-            cls_a = self._classifier.classify_file(file_a)
-            cls_b = self._classifier.classify_file(file_b)
-            
-            if cls_a.is_known and cls_b.is_known:
-                if cls_a.category == cls_b.category:
-                    if cls_a.algorithm_family == cls_b.algorithm_family:
-                        # Same problem, same algorithm variant— strong clone signal
-                        signals['signature_score'] = 1.0
-                        logger.debug("[EduDetector] Same algorithm family")
-                    else:
-                        # Same problem, different variant (e.g. bubble vs selection sort)
-                        signals['signature_score'] = 0.7
-                        logger.debug("[EduDetector] Same category, different algorithm")
-                else:
-                    # Different problems entirely — very unlikely to be a clone
-                    signals['signature_score'] = 0.1
-                    logger.debug("[EduDetector] Different categories")
-            elif cls_a.is_known or cls_b.is_known:
-                # One file classified, the other unknown — weak signal
-                signals['signature_score'] = 0.3
-                logger.debug("[EduDetector] Partial classification")
-            else:
-                # Neither file classified — neutral (classifier ran but found nothing)
-                signals['signature_score'] = 0.5
-                logger.debug("[EduDetector] Unknown category (both files unclassified)")
+            cls_a = self._classify(file_a)
+            cls_b = self._classify(file_b)
+            signals['signature_score'] = signature_score(cls_a, cls_b)
+            logger.debug(f"[EduDetector] Signature score: {signals['signature_score']:.1f}")
             
             if not signals['category'] and cls_a.is_known:
                 signals['category'] = cls_a.category
@@ -241,6 +259,54 @@ class EducationalType4Detector:
         
         return signals
 
+    def _pdg_signal(self, signals: Dict, file_a: str, file_b: str) -> None:
+        """PDG score into signals, when Joern is enabled"""
+        if self._enable_joern and self._joern:
+            try:
+                if hasattr(self._joern, 'detect'):
+                    pdg_score, _ = self._joern.detect(file_a, file_b)
+                    signals['pdg_score'] = pdg_score
+                    signals['pdg_available'] = True
+                    logger.debug(f"[EduDetector] PDG score: {pdg_score:.3f}")
+            except Exception as e:
+                logger.warning(f"[EduDetector] PDG failed: {e}")
+
+    def _classify(self, file_path: str) -> ClassificationResult:
+        """Classification from the batch pre-pass, or the (memoised) classifier"""
+        if self._buckets is not None:
+            cls = self._buckets.get(file_path)
+            if cls is not None:
+                return cls
+        return self._classifier.classify_file(file_path)
+
+    def _cross_category_signals(self, file_a: str, file_b: str, cls_a: ClassificationResult,
+                                cls_b: ClassificationResult) -> Dict:
+        """
+        Signals of a pair from two different known categories, without
+        compiling or running anything: the I/O tester scores such pairs 0.0,
+        and the signature signal is the fixed cross-category value. The PDG
+        signal is still taken (from the batch PDGs when prepared), so the
+        reported score is the same as a full run.
+        """
+        signals = {
+            'pdg_score': 0.0,
+            'pdg_available': False,
+            'signature_score': CROSS_CATEGORY_SIGNATURE,
+            'io_available': False,
+            'category': cls_a.category,
+        }
+        self._pdg_signal(signals, file_a, file_b)
+        if self._enable_io:
+            signals.update(
+                io_score=0.0,
+                io_available=True,
+                mutual_correctness=0.0,
+                category=f"{cls_a.category} / {cls_b.category}",
+            )
+        logger.debug("[EduDetector] Different categories (%s vs %s) — no I/O work",
+                     cls_a.category, cls_b.category)
+        return signals
+
     # ─── Score Fusion ────────────────────────────────────────────────────────
 
     def _fuse_signals(self, signals: Dict) -> float:
@@ -331,48 +397,26 @@ class EducationalType4Detector:
 
     # ─── Caching ────────────────────────────────────────────────────────────
 
-    def _get_cache_key(self, file_a: str, file_b: str) -> str:
-        """Generate cache key from file contents"""
-        def get_hash(path: str) -> str:
-            path = Path(path)
-            if not path.exists():
-                return ""
-            try:
-                content = path.read_text(encoding='utf-8', errors='ignore')
-                return hashlib.md5(content.encode()).hexdigest()[:16]
-            except Exception:
-                return ""
-        
-        hash_a = get_hash(file_a)
-        hash_b = get_hash(file_b)
-        combined = f"{hash_a}_{hash_b}_{self._threshold}"
-        return hashlib.md5(combined.encode()).hexdigest()[:16]
+    def _get_cache_key(
+        self,
+        file_a: str,
+        file_b: str,
+        content_hashes: Optional[Tuple[str, str]] = None,
+    ) -> str:
+        """Result-cache key from both files' content hashes"""
+        if content_hashes is not None:
+            hash_a, hash_b = content_hashes
+        else:
+            hash_a, hash_b = content_hash(file_a), content_hash(file_b)
+        return self._results.key(hash_a, hash_b, self._threshold, "edu")
 
     def _get_cached(self, key: str) -> Optional[Dict]:
         """Get cached result"""
-        cache_file = self._cache_dir / f"{key}.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    cached = json.load(f)
-                    age = time.time() - cached.get('timestamp', 0)
-                    if age < 86400:  # 24 hours
-                        return cached.get('result')
-            except Exception as e:
-                logger.debug(f"[EduDetector] Cache read failed: {e}")
-        return None
+        return self._results.get(key)
 
     def _cache_result(self, key: str, result: Dict) -> None:
-        """Cache result"""
-        cache_file = self._cache_dir / f"{key}.json"
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'timestamp': time.time(),
-                    'result': result
-                }, f)
-        except Exception as e:
-            logger.debug(f"[EduDetector] Cache write failed: {e}")
+        """Cache result (buffered; committed in batches)"""
+        self._results.put(key, result)
 
     # ─── Fallback ───────────────────────────────────────────────────────────
 
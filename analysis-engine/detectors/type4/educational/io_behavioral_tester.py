@@ -2,18 +2,20 @@
 """
 I/O Behavioral Tester — orchestrates test runs for a student file pair.
 
-Workflow for one (file_a, file_b) pair:
-  1. Classify both files → determine problem category.
-  2. Retrieve the test bank for that category.
-  3. For each file:
-       a. Generate a merged source (student code + harness).
-       b. Compile once.
-       c. Run all test cases; collect (output_a, output_b, expected) triples.
-  4. Compare normalized output_a vs normalized output_b for each test case.
-  5. Compute:
+Workflow:
+  Per file, once per content hash (IOProfile):
+    1. Classify → problem category.
+    2. Generate a merged source (student code + harness).
+    3. Compile once, run the category's whole test bank once.
+    4. Keep the normalized output per test case, whether it matches the
+       expected output, and a hash over all outputs.
+  Per (file_a, file_b) pair:
+    5. Check both files map to the same category with a test bank.
+    6. Compare output_a vs output_b for each test case — no compiling.
+    7. Compute:
        io_match_score = matched_cases / total_runnable_cases
        mutual_correctness = cases where BOTH match expected / total_runnable_cases
-  6. Return IOBehavioralResult.
+    8. Return IOBehavioralResult.
 
 Result interpretation:
   io_match_score:
@@ -27,8 +29,9 @@ Result interpretation:
     low  → one might be wrong, or they solve different versions of the problem
 
 Design notes:
-  - Compiled binaries are cached per-file within one tester run to avoid
-    recompiling for every test case.
+  - A job compiles each submission once (O(n)), not once per pair (O(n²)).
+    Files whose output hashes are equal behave identically on the bank;
+    group_by_outputs() buckets them without any pairwise work.
   - All temp directories are cleaned up in a finally block, even on exception.
   - The tester never raises — on any failure it returns a result with
     succeeded=False and a descriptive error_message.
@@ -36,12 +39,14 @@ Design notes:
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import re
-import shutil
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from .algorithm_classifier import (
     AlgorithmClassifier,
@@ -50,14 +55,13 @@ from .algorithm_classifier import (
 )
 from .io_executor import (
     CompileResult,
-    ExecutionResult,
     IOExecutor,
     cleanup_work_dir,
     get_executor,
     make_work_dir,
 )
-from .problem_bank.harness_templates import get_harness_template
-from .problem_bank.registry import ProblemCategory, get_registry
+from .problem_bank.harness_templates import HARNESS_INCLUDES, get_harness_template, to_multi_case
+from .problem_bank.registry import get_registry
 
 logger = logging.getLogger(__name__)
 
@@ -202,8 +206,7 @@ def _build_cpp_harness(
 
     # Prepend necessary includes that the harness uses (safe to add, won't duplicate
     # includes already in student code because C++ include guards handle duplicates)
-    extra_includes = "#include <iostream>\n#include <string>\n#include <sstream>\n#include <vector>\n"
-    merged = extra_includes + merged + "\n" + harness
+    merged = HARNESS_INCLUDES + merged + "\n" + harness
     return merged
 
 
@@ -277,6 +280,36 @@ class IOBehavioralResult:
         )
 
 
+@dataclass
+class IOProfile:
+    """
+    One file's behaviour on its category's test bank, computed once per
+    content hash and reused for every pair the file appears in.
+
+    stage records how far profiling got:
+        classified  category known, harness not run yet
+        unknown     classifier found no category
+        no_bank     no (or an empty) test bank for the category
+        lang        unsupported language
+        read        source could not be read
+        harness     harness could not be built
+        compile     harness did not compile
+        ran         outputs holds one entry per test case
+    """
+    category:         str = ""
+    algorithm_family: str = ""
+    lang:             Optional[str] = None
+    stage:            str = "classified"
+    error_message:    str = ""
+    # Per test case: normalized output (None when the run failed), the
+    # failure message, and whether the output equals the expected one
+    outputs:          Tuple[Optional[str], ...] = ()
+    errors:           Tuple[str, ...]           = ()
+    correct:          Tuple[bool, ...]          = ()
+    # sha256 over outputs — equal hashes mean identical behaviour on the bank
+    output_hash:      str = ""
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Main tester
 # ─────────────────────────────────────────────────────────────────────────────
@@ -288,8 +321,15 @@ class IOBehavioralTester:
     Usage:
         tester = IOBehavioralTester()
         result = tester.test(file_a, file_b)
+
+    Each file is profiled once (classify, build harness, compile, run the
+    test bank) and test() only compares the two output vectors, so a job
+    compiles every submission once instead of once per pair. Profiles are
+    keyed by content hash and can be persisted with attach_store().
     """
 
+    PROFILE_CACHE_FILES = 4096
+
     def __init__(
         self,
         classifier: Optional[AlgorithmClassifier] = None,
@@ -300,8 +340,164 @@ class IOBehavioralTester:
         self._executor      = executor   or get_executor()
         self._max_tc        = max_test_cases
         self._registry      = get_registry()
+        self._profiles: "OrderedDict[str, IOProfile]" = OrderedDict()
+        self._profiles_lock = threading.Lock()
+        self._store         = None
+
+    def attach_store(self, store: Any) -> None:
+        """Persist finished profiles in an ArtifactStore (engine/artifact_store.py)."""
+        self._store = store
 
-    def test(self, file_a: str, file_b: str) -> IOBehavioralResult:
+    # ── Per-file profiles ────────────────────────────────────────────────────
+
+    def profile(self, file_path: str, content_hash: Optional[str] = None,
+                run: bool = True) -> IOProfile:
+        """
+        The file's IOProfile. With run=False only the classification is
+        guaranteed (stage "classified" or a terminal stage), so callers can
+        reject a pair before anything is compiled.
+        """
+        digest = content_hash or self._content_hash(file_path)
+        kind   = f"io_profile{Path(file_path).suffix.lower()}:{self._max_tc}"
+        key    = f"{digest}:{kind}"
+
+        with self._profiles_lock:
+            prof = self._profiles.get(key)
+        if prof is None and self._store is not None and digest:
+            prof = self._store.get(digest, kind)
+        if prof is None:
+            prof = self._classify_profile(file_path)
+        self._remember(key, prof)
+
+        if run and prof.stage == "classified":
+            if self._execute_profile(file_path, prof):
+                if self._store is not None and digest:
+                    self._store.put(digest, kind, prof)
+            else:
+                # Transient failure: this caller gets it, later ones retry
+                self._forget(key)
+        return prof
+
+    def profile_batch(self, file_paths: List[str],
+                      content_hashes: Optional[Dict[str, str]] = None) -> Dict[str, IOProfile]:
+        """
+        Profile every file once (the batch I/O stage); path → IOProfile.
+        Files are independent, so they compile and run on the executor's
+        worker threads.
+        """
+        content_hashes = content_hashes or {}
+        paths = [str(p) for p in file_paths]
+        profiles = self._executor.map(lambda p: self.profile(p, content_hashes.get(p)), paths)
+        return dict(zip(paths, profiles))
+
+    @staticmethod
+    def group_by_outputs(profiles: Dict[str, IOProfile]) -> List[List[str]]:
+        """Groups (≥ 2 files) that produced identical outputs on the whole bank."""
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for path, prof in profiles.items():
+            if prof.stage == "ran" and prof.output_hash:
+                groups.setdefault((prof.category, prof.output_hash), []).append(path)
+        return [sorted(g) for g in groups.values() if len(g) > 1]
+
+    def _remember(self, key: str, prof: IOProfile) -> None:
+        with self._profiles_lock:
+            self._profiles[key] = prof
+            self._profiles.move_to_end(key)
+            if len(self._profiles) > self.PROFILE_CACHE_FILES:
+                self._profiles.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._profiles_lock:
+            self._profiles.pop(key, None)
+
+    @staticmethod
+    def _content_hash(file_path: str) -> str:
+        try:
+            return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+        except OSError:
+            return ""
+
+    def _classify_profile(self, file_path: str) -> IOProfile:
+        cls = self._classifier.classify_file(file_path)
+        prof = IOProfile(category=cls.category, algorithm_family=cls.algorithm_family)
+        if not cls.is_known:
+            prof.stage = "unknown"
+            return prof
+        prob_cat = self._registry.get(cls.category)
+        if prob_cat is None or not prob_cat.test_cases:
+            prof.stage = "no_bank"
+        return prof
+
+    def _execute_profile(self, file_path: str, prof: IOProfile) -> bool:
+        """
+        Build the harness, compile once and run the whole test bank.
+        Returns False when the outcome depends on the machine rather than
+        the source (compiler timeout or missing, a test case timing out,
+        an unexpected error), so the profile must not be cached.
+        """
+        prof.lang = self._detect_lang(file_path)
+        if not prof.lang:
+            prof.stage = "lang"
+            return True
+        source = self._read_source(file_path)
+        if source is None:
+            prof.stage = "read"
+            return False
+        cls = self._classifier.classify_file(file_path)
+        merged = self._build_harness(source, prof.lang, prof.category, cls)
+        if not merged:
+            prof.stage = "harness"
+            return True
+
+        test_cases = self._registry.get(prof.category).test_cases[:self._max_tc]
+        multi = to_multi_case(merged, prof.lang) if self._executor.multi_case else None
+        work_dir = make_work_dir("cs_io_")
+        try:
+            compiled = self._compile(multi or merged, prof.lang, work_dir, "main")
+            if not compiled.success and multi:
+                # The driver needs POSIX fork(); fall back to one run per case
+                multi = None
+                compiled = self._compile(merged, prof.lang, work_dir, "main")
+            if not compiled.success:
+                prof.stage = "compile"
+                prof.error_message = compiled.error_message
+                return not compiled.transient
+
+            runs = self._executor.run_cases(compiled.binary_path, prof.lang,
+                                            [stdin_in for stdin_in, _ in test_cases],
+                                            work_dir, multi_case=multi is not None)
+            outputs, errors, correct = [], [], []
+            for run, (_, expected) in zip(runs, test_cases):
+                if run.succeeded:
+                    outputs.append(run.normalized_output)
+                    errors.append("")
+                    correct.append(run.normalized_output == _normalize_expected(expected))
+                else:
+                    outputs.append(None)
+                    errors.append(run.error_message)
+                    correct.append(False)
+            prof.outputs, prof.errors, prof.correct = tuple(outputs), tuple(errors), tuple(correct)
+            prof.output_hash = hashlib.sha256(
+                "\x1e".join("\x00" if o is None else o for o in outputs).encode()
+            ).hexdigest()
+            prof.stage = "ran"
+            logger.info("[IOTester] Profiled %s: %s, %d/%d cases ran",
+                        Path(file_path).name, prof.category,
+                        sum(o is not None for o in outputs), len(outputs))
+            # A timeout may only mean the machine was loaded
+            return not any(r.timed_out for r in runs)
+        except Exception as exc:
+            logger.exception("[IOTester] Profiling failed for %s: %s", file_path, exc)
+            prof.stage = "compile"
+            prof.error_message = f"unexpected error: {exc}"
+            return False
+        finally:
+            cleanup_work_dir(work_dir)
+
+    # ── Pairwise comparison ──────────────────────────────────────────────────
+
+    def test(self, file_a: str, file_b: str,
+             content_hashes: Optional[Tuple[str, str]] = None) -> IOBehavioralResult:
         """
         Run I/O behavioral testing for the given file pair.
 
@@ -310,6 +506,7 @@ class IOBehavioralTester:
         Args:
             file_a: Absolute path to student A's source file.
             file_b: Absolute path to student B's source file.
+            content_hashes: Precomputed sha256 of both files' bytes (profile keys)
 
         Returns:
             IOBehavioralResult
@@ -320,46 +517,43 @@ class IOBehavioralTester:
         )
 
         result = IOBehavioralResult()
-        work_dir_a: Optional[str] = None
-        work_dir_b: Optional[str] = None
+        hash_a, hash_b = content_hashes or (None, None)
 
         try:
             # ── Step 1: classify both files ────────────────────────────────
-            cls_a = self._classifier.classify_file(file_a)
-            cls_b = self._classifier.classify_file(file_b)
-            logger.debug("[IOTester] Classification A: %s", cls_a)
-            logger.debug("[IOTester] Classification B: %s", cls_b)
+            prof_a = self.profile(file_a, hash_a, run=False)
+            prof_b = self.profile(file_b, hash_b, run=False)
 
-            result.algorithm_a = cls_a.algorithm_family
-            result.algorithm_b = cls_b.algorithm_family
+            result.algorithm_a = prof_a.algorithm_family
+            result.algorithm_b = prof_b.algorithm_family
             result.same_algorithm_family = (
-                bool(cls_a.algorithm_family)
-                and cls_a.algorithm_family == cls_b.algorithm_family
+                bool(prof_a.algorithm_family)
+                and prof_a.algorithm_family == prof_b.algorithm_family
             )
 
             # Both files must map to the SAME problem category
-            if not cls_a.is_known or not cls_b.is_known:
+            if not prof_a.category or not prof_b.category:
                 result.error_message = (
-                    f"category unknown: A={cls_a.category!r} B={cls_b.category!r}"
+                    f"category unknown: A={prof_a.category!r} B={prof_b.category!r}"
                 )
                 logger.info("[IOTester] %s", result.error_message)
                 result.succeeded = True   # not a failure — just can't test
                 return result
 
-            if cls_a.category != cls_b.category:
+            if prof_a.category != prof_b.category:
                 # Different problem categories — they solve different problems.
                 # I/O matching is meaningless; set score to 0.
-                result.category = f"{cls_a.category} / {cls_b.category}"
+                result.category = f"{prof_a.category} / {prof_b.category}"
                 result.io_match_score = 0.0
                 result.mutual_correctness = 0.0
                 result.succeeded = True
                 logger.info(
                     "[IOTester] Different categories (%s vs %s) — I/O score = 0.0",
-                    cls_a.category, cls_b.category,
+                    prof_a.category, prof_b.category,
                 )
                 return result
 
-            category = cls_a.category
+            category = prof_a.category
             result.category = category
             logger.info("[IOTester] Category: %s", category)
 
@@ -378,95 +572,71 @@ class IOBehavioralTester:
                 result.succeeded = True
                 return result
 
-            # ── Step 3: detect language and build harnesses ────────────────
-            lang_a = self._detect_lang(file_a)
-            lang_b = self._detect_lang(file_b)
+            # ── Step 3: profile both files (compiled and run once each) ────
+            prof_a = self.profile(file_a, hash_a)
+            prof_b = self.profile(file_b, hash_b)
+            stages = {prof_a.stage, prof_b.stage}
 
-            if not lang_a or not lang_b:
-                result.error_message = f"unsupported language: {lang_a!r}/{lang_b!r}"
+            if "lang" in stages:
+                result.error_message = f"unsupported language: {prof_a.lang!r}/{prof_b.lang!r}"
                 result.succeeded = True
                 return result
 
-            # Read source files
-            source_a = self._read_source(file_a)
-            source_b = self._read_source(file_b)
-            if source_a is None or source_b is None:
+            if "read" in stages:
                 result.error_message = "cannot read source files"
                 result.succeeded = True
                 return result
 
-            merged_a = self._build_harness(source_a, lang_a, category, cls_a)
-            merged_b = self._build_harness(source_b, lang_b, category, cls_b)
-
-            if not merged_a or not merged_b:
+            if "harness" in stages:
                 result.error_message = (
                     "harness construction failed "
-                    f"(A={merged_a is not None} B={merged_b is not None})"
+                    f"(A={prof_a.stage != 'harness'} B={prof_b.stage != 'harness'})"
                 )
                 result.succeeded = True
                 logger.info("[IOTester] %s", result.error_message)
                 return result
 
-            # ── Step 4: compile ────────────────────────────────────────────
-            work_dir_a = make_work_dir("cs_a_")
-            work_dir_b = make_work_dir("cs_b_")
-
-            compile_a = self._compile(merged_a, lang_a, work_dir_a, "a")
-            compile_b = self._compile(merged_b, lang_b, work_dir_b, "b")
-
-            if not compile_a.success or not compile_b.success:
-                err_a = "" if compile_a.success else f" A:{compile_a.error_message[:200]}"
-                err_b = "" if compile_b.success else f" B:{compile_b.error_message[:200]}"
+            if "compile" in stages:
+                err_a = f" A:{prof_a.error_message[:200]}" if prof_a.stage == "compile" else ""
+                err_b = f" B:{prof_b.error_message[:200]}" if prof_b.stage == "compile" else ""
                 result.error_message = f"compile failed.{err_a}{err_b}"
                 result.succeeded = True
                 logger.info("[IOTester] Compile failed:%s%s", err_a, err_b)
                 return result
 
-            logger.info("[IOTester] Both files compiled. Running %d test cases…", len(test_cases))
-
-            # ── Step 5: run all test cases ─────────────────────────────────
+            # ── Step 4: compare the output vectors ─────────────────────────
             matched     = 0
             runnable    = 0
             both_correct = 0
             case_details: List[Dict] = []
 
             for i, (stdin_in, expected) in enumerate(test_cases):
-                run_a = self._run(compile_a.binary_path, lang_a, stdin_in, work_dir_a)
-                run_b = self._run(compile_b.binary_path, lang_b, stdin_in, work_dir_b)
-
-                ok_a = run_a.succeeded
-                ok_b = run_b.succeeded
+                out_a, out_b = prof_a.outputs[i], prof_b.outputs[i]
+                ok_a = out_a is not None
+                ok_b = out_b is not None
 
                 detail = {
                     "tc":       i + 1,
                     "stdin":    stdin_in[:80],
                     "expected": expected,
-                    "out_a":    run_a.normalized_output if ok_a else f"[ERR] {run_a.error_message[:80]}",
-                    "out_b":    run_b.normalized_output if ok_b else f"[ERR] {run_b.error_message[:80]}",
+                    "out_a":    out_a if ok_a else f"[ERR] {prof_a.errors[i][:80]}",
+                    "out_b":    out_b if ok_b else f"[ERR] {prof_b.errors[i][:80]}",
                 }
 
                 if ok_a and ok_b:
                     runnable += 1
-                    match = run_a.normalized_output == run_b.normalized_output
+                    match = out_a == out_b
                     if match:
                         matched += 1
                     # Mutual correctness: both must match expected
-                    norm_expected = _normalize_expected(expected)
-                    if (run_a.normalized_output == norm_expected
-                            and run_b.normalized_output == norm_expected):
+                    correct = prof_a.correct[i] and prof_b.correct[i]
+                    if correct:
                         both_correct += 1
                     detail["match"] = match
-                    detail["both_correct"] = (
-                        run_a.normalized_output == norm_expected
-                        and run_b.normalized_output == norm_expected
-                    )
+                    detail["both_correct"] = correct
                 else:
                     detail["match"]        = False
                     detail["both_correct"] = False
-                    if not ok_a:
-                        logger.debug("[IOTester] TC%d: file_a run failed: %s", i+1, run_a.error_message[:100])
-                    if not ok_b:
-                        logger.debug("[IOTester] TC%d: file_b run failed: %s", i+1, run_b.error_message[:100])
 
                 case_details.append(detail)
 
@@ -497,13 +667,6 @@ class IOBehavioralTester:
             result.error_message = f"unexpected error: {exc}"
             result.succeeded     = True   # result is valid (just empty)
 
-        finally:
-            # Always clean up temp directories
-            if work_dir_a:
-                cleanup_work_dir(work_dir_a)
-            if work_dir_b:
-                cleanup_work_dir(work_dir_b)
-
         return result
 
     # ── private helpers ───────────────────────────────────────────────────────
@@ -552,23 +715,6 @@ class IOBehavioralTester:
             return self._executor.compile_python(merged_source, work_dir, f"harness_{label}")
         return CompileResult(error_message=f"compile not implemented for lang={lang}")
 
-    def _run(
-        self,
-        binary_path: str,
-        lang:        str,
-        stdin_in:    str,
-        work_dir:    str,
-    ) -> ExecutionResult:
-        if lang == "cpp":
-            return self._executor.run_cpp(binary_path, stdin_in, work_dir)
-        if lang == "python":
-            return self._executor.run_python(binary_path, stdin_in, work_dir)
-        from .io_executor import ExecutionResult as ER
-        r = ER()
-        r.runtime_error  = True
-        r.error_message  = f"run not implemented for lang={lang}"
-        return r
-
 
 def _normalize_expected(expected: str) -> str:
     """Normalize the expected string the same way we normalize student output."""
@@ -10,8 +10,10 @@ Responsibilities:
   5. Return normalized stdout or an ExecutionError
 
 Safety measures:
-  - All work happens in an isolated temp directory (deleted on exit).
+  - All work happens in an isolated work directory, emptied after use.
   - Hard time limit per run (default 5 seconds).
+  - Every process runs under rlimits set in preexec_fn: CPU seconds,
+    address space (memory_mb), output file size, no core dumps.
   - stdout size capped at 64 KB to prevent memory exhaustion.
   - No shell=True anywhere — subprocess calls use list arguments.
   - Student code cannot write to paths outside the temp dir (it runs with CWD=temp).
@@ -23,19 +25,51 @@ Output normalization (see _normalize_output):
   - Strip leading/trailing whitespace.
   - Collapse multiple spaces.
   This makes comparisons language-style-agnostic.
+
+Throughput:
+  These student programs finish in well under a millisecond, so process
+  spawn dominates. run_cases() therefore prefers a multi-case harness
+  (harness_templates.to_multi_case): ONE invocation runs the whole test
+  bank, fork()ing per case inside the harness with a per-case alarm().
+  Without one, cases run one process each across `workers` threads.
+  map() spreads independent files over the same worker count. Work
+  directories live on /dev/shm when it is a writable, exec-capable tmpfs,
+  and are emptied and reused instead of being created per run.
+
+Compilation (the largest Type-4 cost) is cached at three levels:
+  - CompileCache: binaries AND compile errors keyed by
+    sha256(compiler version + flags + merged source), in a directory shared
+    across jobs (COMPILE_CACHE_DIR, capped at COMPILE_CACHE_MB, LRU by
+    mtime). A resubmitted or duplicated file never reaches g++ again.
+  - Precompiled headers for the harness prelude (HARNESS_INCLUDES) and for
+    <bits/stdc++.h>, built once per flag profile and passed with -include.
+    The headers are include-guarded, so the program is the same; g++ falls
+    back to parsing the header text if a PCH is ever unusable.
+  - COMPILE_PROFILES: "default" (-O1) or "fast" (-O0 -pipe) for quick
+    behavioral runs, chosen with IO_COMPILE_PROFILE.
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
 import re
 import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:          # not on Windows — runs go without rlimits
+    resource = None
+
+from .problem_bank.harness_templates import CASE_BEGIN, CASE_END, HARNESS_INCLUDES
 
 logger = logging.getLogger(__name__)
 
@@ -43,13 +77,26 @@ logger = logging.getLogger(__name__)
 DEFAULT_COMPILE_TIMEOUT: int = 30
 DEFAULT_RUN_TIMEOUT: int = 5
 MAX_STDOUT_BYTES: int = 64 * 1024
-
-CPP_COMPILE_FLAGS: List[str] = [
-    "-O1",
-    "-std=c++17",
-    "-w",
-    "-o",
-]
+DEFAULT_WORKERS: int = int(os.getenv("IO_WORKERS", "1"))
+DEFAULT_MEMORY_MB: int = 256
+MAX_OUTPUT_FILE_BYTES: int = 1024 * 1024
+
+COMPILE_PROFILES: Dict[str, List[str]] = {
+    "default": ["-O1", "-std=c++17", "-w"],
+    "fast":    ["-O0", "-std=c++17", "-w", "-pipe"],
+}
+DEFAULT_COMPILE_PROFILE: str = os.getenv("IO_COMPILE_PROFILE", "default")
+DEFAULT_COMPILE_CACHE_DIR: Optional[str] = os.getenv("COMPILE_CACHE_DIR", ".cache/compile") or None
+DEFAULT_COMPILE_CACHE_MB: int = int(os.getenv("COMPILE_CACHE_MB", "256"))
+
+# Precompiled header variants. "harness" is the prelude every merged source
+# starts with; "stdcpp" is used when the student includes <bits/stdc++.h>.
+PCH_HEADERS: Dict[str, str] = {
+    "harness": HARNESS_INCLUDES,
+    "stdcpp":  "#include <bits/stdc++.h>\n",
+}
+_BITS_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*<bits/stdc\+\+\.h>', re.MULTILINE)
+_DIRECTIVE_RE    = re.compile(r'^\s*#\s*(?!include\b)\w+', re.MULTILINE)
 
 JAVA_COMPILE_FLAGS: List[str] = []
 
@@ -76,6 +123,9 @@ class CompileResult:
     success: bool = False
     binary_path: str = ""
     error_message: str = ""
+    # The failure came from the environment (timeout, missing compiler,
+    # I/O error), not from the source — retry rather than remember it
+    transient: bool = False
 
 
 # Output normalizer
@@ -119,65 +169,352 @@ def _normalize_output(raw: str) -> str:
     return "\n".join(normalized_lines)
 
 
+_CASE_RE = re.compile(
+    re.escape(CASE_BEGIN) + r" (\d+)@@\n(.*?)\n" + re.escape(CASE_END) + r" \1 (-?\d+)@@\n",
+    re.DOTALL,
+)
+# Exit codes the multi-case drivers report for a killed case
+_TIMEOUT_CODES = {-14, -24}      # SIGALRM (harness alarm), SIGXCPU (RLIMIT_CPU)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class CompileCache:
+    """
+    Compile results on disk, shared by every executor and process pointed
+    at the same directory:
+
+        <key>.bin   the binary (copied into the work dir on a hit)
+        <key>.err   the compiler error, so broken submissions fail fast too
+
+    Writes go through a temp file and os.replace, so concurrent writers of
+    the same key are harmless. Hits bump the file mtime; once the total
+    passes max_bytes the oldest files go until it is under 90%.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_COMPILE_CACHE_MB * 1024 * 1024) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evicted = 0
+        self._lock = threading.Lock()
+        self._bytes = sum(f.stat().st_size for f in self._entries())
+
+    @staticmethod
+    def key(compiler_id: str, flags: List[str], source: str) -> str:
+        h = hashlib.sha256(f"{compiler_id}\x00{' '.join(flags)}\x00".encode())
+        h.update(source.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str, dest: Path) -> Optional[CompileResult]:
+        binary, error = self.root / f"{key}.bin", self.root / f"{key}.err"
+        try:
+            if binary.exists():
+                shutil.copyfile(binary, dest)
+                os.chmod(dest, 0o755)
+                os.utime(binary)
+                result = CompileResult(success=True, binary_path=str(dest))
+            elif error.exists():
+                result = CompileResult(error_message=error.read_text(encoding="utf-8"))
+                os.utime(error)
+            else:
+                result = None
+        except OSError:
+            result = None          # evicted by another process mid-read
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, key: str, result: CompileResult) -> None:
+        try:
+            if result.success:
+                target = self.root / f"{key}.bin"
+                tmp = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+                shutil.copyfile(result.binary_path, tmp)
+            else:
+                target = self.root / f"{key}.err"
+                tmp = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+                tmp.write_text(result.error_message, encoding="utf-8")
+            os.replace(tmp, target)
+            size = target.stat().st_size
+        except OSError as exc:
+            logger.debug("[CompileCache] Could not store %s: %s", key[:12], exc)
+            return
+        with self._lock:
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Path]:
+        return [f for f in self.root.iterdir() if f.suffix in (".bin", ".err")]
+
+    def _evict(self) -> None:
+        # Other processes write too — start from the real total
+        entries = []
+        for f in self._entries():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        self._bytes = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries):
+            if self._bytes <= self.max_bytes * 0.9:
+                break
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            self._bytes -= size
+            self.evicted += 1
+
+
 class IOExecutor:
     """Compiles and runs student+harness merged source."""
 
-    def __init__(self, compile_timeout: int = DEFAULT_COMPILE_TIMEOUT, run_timeout: int = DEFAULT_RUN_TIMEOUT) -> None:
+    def __init__(
+        self,
+        compile_timeout: int = DEFAULT_COMPILE_TIMEOUT,
+        run_timeout: int = DEFAULT_RUN_TIMEOUT,
+        workers: int = DEFAULT_WORKERS,
+        memory_mb: int = DEFAULT_MEMORY_MB,
+        multi_case: bool = True,
+        compile_profile: str = DEFAULT_COMPILE_PROFILE,
+        cache_dir: Optional[str] = DEFAULT_COMPILE_CACHE_DIR,
+        cache_mb: int = DEFAULT_COMPILE_CACHE_MB,
+    ) -> None:
         self.compile_timeout = compile_timeout
         self.run_timeout = run_timeout
+        self.workers = max(1, workers)
+        self.memory_mb = memory_mb
+        self.multi_case = multi_case
+        self.compile_flags = COMPILE_PROFILES.get(compile_profile, COMPILE_PROFILES["default"])
+        # Absolute: g++ runs with the work dir as CWD
+        cache_root = Path(cache_dir).resolve() if cache_dir else None
+        self.cache = CompileCache(str(cache_root), cache_mb * 1024 * 1024) if cache_root else None
+        self._pch_root = (cache_root or Path(tempfile.gettempdir())) / "pch"
+        self._pch: Dict[str, Optional[str]] = {}
+        self._pch_lock = threading.Lock()
+        self._compiler: Optional[str] = None
+        self._compiler_id = ""
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    # ── Worker pool ──────────────────────────────────────────────────────────
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """fn over items on the worker threads (in order); serial with workers=1."""
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [fn(x) for x in items]
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cs_io")
+        return list(self._pool.map(fn, items))
+
+    def _limits(self) -> None:
+        """preexec_fn: rlimits for the child, applied between fork() and exec()."""
+        cpu = self.run_timeout + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+        memory = self.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (MAX_OUTPUT_FILE_BYTES, MAX_OUTPUT_FILE_BYTES))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    # ── Compile ──────────────────────────────────────────────────────────────
 
     def compile_cpp(self, merged_source: str, work_dir: str, binary_name: str = "student_harness") -> CompileResult:
         src_path = Path(work_dir) / f"{binary_name}.cpp"
         bin_path = Path(work_dir) / binary_name
 
+        compiler = self._find_compiler()
+        key = None
+        if self.cache is not None:
+            key = CompileCache.key(self._compiler_id, self.compile_flags, merged_source)
+            cached = self.cache.get(key, bin_path)
+            if cached is not None:
+                return cached
+
         try:
             src_path.write_text(merged_source, encoding="utf-8")
         except IOError as exc:
-            return CompileResult(error_message=str(exc))
-
-        compiler = shutil.which("g++") or "g++"
-        cmd = [compiler, *CPP_COMPILE_FLAGS, str(bin_path), str(src_path)]
+            return CompileResult(error_message=str(exc), transient=True)
 
+        pch = self._pch_for(merged_source)
         try:
-            proc = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True, timeout=self.compile_timeout)
+            proc = self._gcc(compiler, src_path, bin_path, work_dir, pch)
+            if proc.returncode != 0 and pch:
+                # Never let a PCH problem become a cached compile error
+                proc = self._gcc(compiler, src_path, bin_path, work_dir, None)
         except subprocess.TimeoutExpired:
-            return CompileResult(error_message="compilation timed out")
+            return CompileResult(error_message="compilation timed out", transient=True)
         except FileNotFoundError:
-            return CompileResult(error_message="g++ not found")
+            return CompileResult(error_message="g++ not found", transient=True)
         except Exception as exc:
-            return CompileResult(error_message=str(exc))
-
-        if proc.returncode != 0:
-            return CompileResult(error_message=proc.stderr[:2000])
+            return CompileResult(error_message=str(exc), transient=True)
+
+        if proc.returncode < 0:
+            # Killed by a signal (OOM killer, rlimit): not the source's fault
+            return CompileResult(error_message=f"g++ killed by signal {-proc.returncode}",
+                                 transient=True)
+        if proc.returncode > 0:
+            result = CompileResult(error_message=proc.stderr[:2000])
+        elif not bin_path.exists():
+            return CompileResult(error_message="binary not created despite zero exit code", transient=True)
+        else:
+            result = CompileResult(success=True, binary_path=str(bin_path))
 
-        if not bin_path.exists():
-            return CompileResult(error_message="binary not created despite zero exit code")
+        if key is not None:
+            self.cache.put(key, result)
+        return result
 
-        return CompileResult(success=True, binary_path=str(bin_path))
+    def _gcc(self, compiler: str, src_path: Path, bin_path: Path, work_dir: str,
+             pch: Optional[str]) -> subprocess.CompletedProcess:
+        cmd = [compiler, *self.compile_flags]
+        if pch:
+            cmd += ["-include", pch]
+        cmd += ["-o", str(bin_path), str(src_path)]
+        return subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True, timeout=self.compile_timeout)
+
+    def _find_compiler(self) -> str:
+        """g++ path, plus its version string (part of every cache key)."""
+        if self._compiler is None:
+            self._compiler = shutil.which("g++") or "g++"
+            try:
+                version = subprocess.run([self._compiler, "-dumpfullversion", "-dumpversion"],
+                                         capture_output=True, text=True, timeout=10).stdout.strip()
+            except Exception:
+                version = "unknown"
+            self._compiler_id = f"{self._compiler}:{version}"
+        return self._compiler
+
+    # ── Precompiled headers ──────────────────────────────────────────────────
+
+    def _pch_for(self, merged_source: str) -> Optional[str]:
+        """
+        Header to -include for this source, or None. "stdcpp" only when
+        nothing but #includes precedes the student's <bits/stdc++.h>, since
+        the PCH moves that include to the very top.
+        """
+        m = _BITS_INCLUDE_RE.search(merged_source)
+        if m and not _DIRECTIVE_RE.search(merged_source, 0, m.start()):
+            return self._build_pch("stdcpp")
+        if merged_source.startswith(HARNESS_INCLUDES):
+            return self._build_pch("harness")
+        return None
+
+    def _build_pch(self, variant: str) -> Optional[str]:
+        """Build (once per process, reused across runs) the variant's PCH."""
+        with self._pch_lock:
+            if variant in self._pch:
+                return self._pch[variant]
+            compiler = self._find_compiler()
+            tag = hashlib.sha256(f"{self._compiler_id}\x00{' '.join(self.compile_flags)}".encode()).hexdigest()[:16]
+            header = self._pch_root / tag / f"cs_{variant}.h"
+            gch = header.with_name(header.name + ".gch")
+            path: Optional[str] = str(header)
+            if not gch.exists():
+                tmp = header.with_name(f".{header.name}.{os.getpid()}.gch")
+                try:
+                    header.parent.mkdir(parents=True, exist_ok=True)
+                    tmp.with_suffix(".h").write_text(PCH_HEADERS[variant], encoding="utf-8")
+                    os.replace(tmp.with_suffix(".h"), header)
+                    proc = subprocess.run(
+                        [compiler, *self.compile_flags, "-x", "c++-header", "-o", str(tmp), str(header)],
+                        capture_output=True, text=True, timeout=self.compile_timeout * 4,
+                    )
+                    if proc.returncode != 0:
+                        raise RuntimeError(proc.stderr[:500])
+                    os.replace(tmp, gch)
+                    logger.info("[IOExecutor] Built precompiled header %s", gch)
+                except Exception as exc:
+                    logger.warning("[IOExecutor] No precompiled header for %s: %s", variant, exc)
+                    path = None
+            self._pch[variant] = path
+            return path
 
     def compile_python(self, merged_source: str, work_dir: str, script_name: str = "student_harness") -> CompileResult:
         src_path = Path(work_dir) / f"{script_name}.py"
         try:
             src_path.write_text(merged_source, encoding="utf-8")
         except IOError as exc:
-            return CompileResult(error_message=str(exc))
+            return CompileResult(error_message=str(exc), transient=True)
 
         return CompileResult(success=True, binary_path=str(src_path))
 
+    # ── Run ──────────────────────────────────────────────────────────────────
+
     def run_cpp(self, binary_path: str, stdin_input: str, work_dir: str) -> ExecutionResult:
         return self._run_process(cmd=[binary_path], stdin_input=stdin_input, work_dir=work_dir)
 
     def run_python(self, script_path: str, stdin_input: str, work_dir: str) -> ExecutionResult:
-        python = shutil.which("python3") or shutil.which("python") or "python3"
-        return self._run_process(cmd=[python, script_path], stdin_input=stdin_input, work_dir=work_dir)
-
-    def _run_process(self, cmd: List[str], stdin_input: str, work_dir: str) -> ExecutionResult:
+        return self._run_process(cmd=[_python(), script_path], stdin_input=stdin_input, work_dir=work_dir)
+
+    def run_cases(
+        self,
+        binary_path: str,
+        lang: str,
+        inputs: List[str],
+        work_dir: str,
+        multi_case: bool = False,
+    ) -> List[ExecutionResult]:
+        """
+        One ExecutionResult per stdin in inputs. multi_case says the binary
+        was built with a multi-case driver: all cases then run in a single
+        invocation. Otherwise each case is its own process, on the pool.
+        """
+        if multi_case:
+            return self._run_multi_case(binary_path, lang, inputs, work_dir)
+        run = self.run_cpp if lang == "cpp" else self.run_python
+        return self.map(lambda stdin_in: run(binary_path, stdin_in, work_dir), inputs)
+
+    def _run_multi_case(self, binary_path: str, lang: str, inputs: List[str],
+                        work_dir: str) -> List[ExecutionResult]:
+        for i, stdin_in in enumerate(inputs):
+            (Path(work_dir) / f"case_{i}.in").write_text(stdin_in, encoding="utf-8")
+        args = [str(len(inputs)), str(self.run_timeout)]
+        cmd = [binary_path, *args] if lang == "cpp" else [_python(), binary_path, *args]
+        whole = self._run_process(cmd=cmd, stdin_input="", work_dir=work_dir,
+                                  timeout=self.run_timeout * len(inputs) + 2,
+                                  max_output=MAX_STDOUT_BYTES * max(len(inputs), 1))
+
+        results: List[ExecutionResult] = []
+        cases = {int(m.group(1)): (m.group(2), int(m.group(3))) for m in _CASE_RE.finditer(whole.raw_output)}
+        for i in range(len(inputs)):
+            r = ExecutionResult()
+            if i not in cases:
+                r.runtime_error = True
+                r.timed_out = whole.timed_out
+                r.error_message = whole.error_message or "harness ended before this case"
+            else:
+                raw, code = cases[i]
+                raw = raw[:MAX_STDOUT_BYTES]
+                r.raw_output, r.return_code = raw, code
+                r.normalized_output = _normalize_output(raw)
+                if code in _TIMEOUT_CODES:
+                    r.timed_out = True
+                    r.error_message = f"timed out after {self.run_timeout}s"
+                elif code != 0:
+                    r.runtime_error = True
+                    r.error_message = f"exit status {code}"
+            results.append(r)
+        return results
+
+    def _run_process(self, cmd: List[str], stdin_input: str, work_dir: str,
+                     timeout: Optional[int] = None,
+                     max_output: int = MAX_STDOUT_BYTES) -> ExecutionResult:
         result = ExecutionResult()
+        timeout = timeout or self.run_timeout
 
         try:
-            proc = subprocess.run(cmd, input=stdin_input, capture_output=True, text=True, timeout=self.run_timeout, cwd=work_dir)
+            proc = subprocess.run(cmd, input=stdin_input, capture_output=True, text=True, timeout=timeout, cwd=work_dir,
+                                  preexec_fn=self._limits if resource is not None else None)
             result.return_code = proc.returncode
-            raw = proc.stdout[:MAX_STDOUT_BYTES]
+            raw = proc.stdout[:max_output]
             result.raw_output = raw
             result.normalized_output = _normalize_output(raw)
 
@@ -187,7 +524,7 @@ class IOExecutor:
 
         except subprocess.TimeoutExpired:
             result.timed_out = True
-            result.error_message = f"timed out after {self.run_timeout}s"
+            result.error_message = f"timed out after {timeout}s"
         except FileNotFoundError as exc:
             result.runtime_error = True
             result.error_message = str(exc)
@@ -198,16 +535,54 @@ class IOExecutor:
         return result
 
 
+def _python() -> str:
+    return shutil.which("python3") or shutil.which("python") or "python3"
+
+
+# ── Work directories ──────────────────────────────────────────────────────────
+
+def _work_root() -> Optional[str]:
+    """/dev/shm when it is a writable tmpfs that allows exec, else the default tmp."""
+    shm = "/dev/shm"
+    try:
+        if os.access(shm, os.W_OK) and not os.statvfs(shm).f_flag & os.ST_NOEXEC:
+            root = os.path.join(shm, "codespectra_io")
+            os.makedirs(root, exist_ok=True)
+            return root
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+_WORK_ROOT = _work_root()
+_MAX_IDLE_DIRS = 32
+_idle_dirs: List[str] = []
+_idle_lock = threading.Lock()
+
+
 def make_work_dir(prefix: str = "cs_io_") -> str:
-    td = tempfile.mkdtemp(prefix=prefix)
-    return td
+    """An empty work directory — a reused one when available."""
+    with _idle_lock:
+        if _idle_dirs:
+            return _idle_dirs.pop()
+    return tempfile.mkdtemp(prefix=prefix, dir=_WORK_ROOT)
 
 
 def cleanup_work_dir(work_dir: str) -> None:
+    """Empty work_dir and keep it for reuse (removed once enough are idle)."""
     try:
-        shutil.rmtree(work_dir, ignore_errors=True)
+        for entry in os.scandir(work_dir):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.unlink(entry.path)
+        with _idle_lock:
+            if len(_idle_dirs) < _MAX_IDLE_DIRS:
+                _idle_dirs.append(work_dir)
+                return
     except Exception:
         pass
+    shutil.rmtree(work_dir, ignore_errors=True)
 
 
 _executor: Optional[IOExecutor] = None
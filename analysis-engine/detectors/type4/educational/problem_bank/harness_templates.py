@@ -16,7 +16,7 @@ The {FUNC_NAME} placeholder is filled in by io_executor.py after the
 algorithm classifier has detected the student's function name.
 """
 
-from typing import Dict
+from typing import Dict, Optional
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -337,6 +337,114 @@ class __CSHarness__ {
 """
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# C++ prelude
+#
+# Prepended to every merged C++ harness source. IOExecutor precompiles exactly
+# these headers (see io_executor.PCH_HEADERS), so keep the two in step.
+# ─────────────────────────────────────────────────────────────────────────────
+
+HARNESS_INCLUDES = "#include <iostream>\n#include <string>\n#include <sstream>\n#include <vector>\n"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Multi-case drivers
+#
+# Run every test case of a category in ONE process invocation. The harness
+# entry point is renamed (C++ main → __cs_case_main__; the Python module-level
+# __cs_main__() call is dropped) and the driver below becomes main. Per case
+# the driver fork()s: the child reads case_<i>.in (written to the work dir by
+# IOExecutor) as stdin, arms alarm(timeout) and runs the harness entry point,
+# so every case still starts from pristine global state and is killed on its
+# own timeout. The parent frames each case's stdout between
+#     @@CS_CASE_BEGIN <i>@@  ...  @@CS_CASE_END <i> <exit code>@@
+# with the exit code negative for a signal (-14 = SIGALRM timeout).
+#
+# argv: <number of cases> <per-case timeout in seconds>
+# ─────────────────────────────────────────────────────────────────────────────
+
+CASE_BEGIN = "@@CS_CASE_BEGIN"
+CASE_END   = "@@CS_CASE_END"
+
+CPP_MULTI_CASE_DRIVER = r"""
+// ── CodeSpectra multi-case driver ───────────────────────────────────────────
+#include <cstdio>
+#include <cstdlib>
+#include <unistd.h>
+#include <sys/wait.h>
+int main(int argc, char** argv) {
+    if (argc < 3) return 2;
+    int n = std::atoi(argv[1]);
+    unsigned timeout = (unsigned)std::atoi(argv[2]);
+    for (int i = 0; i < n; i++) {
+        std::cout.flush();
+        std::printf("\n@@CS_CASE_BEGIN %d@@\n", i);
+        std::fflush(stdout);
+        pid_t pid = fork();
+        if (pid == 0) {
+            char name[32];
+            std::snprintf(name, sizeof name, "case_%d.in", i);
+            if (!std::freopen(name, "r", stdin)) _exit(3);
+            alarm(timeout);
+            int rc = __cs_case_main__();
+            std::cout.flush();
+            std::fflush(stdout);
+            _exit(rc);
+        }
+        int status = 0, code = -1;
+        if (pid > 0 && waitpid(pid, &status, 0) == pid)
+            code = WIFEXITED(status) ? WEXITSTATUS(status) : -WTERMSIG(status);
+        std::printf("\n@@CS_CASE_END %d %d@@\n", i, code);
+        std::fflush(stdout);
+    }
+    return 0;
+}
+"""
+
+PYTHON_MULTI_CASE_DRIVER = r"""
+# ── CodeSpectra multi-case driver ─────────────────────────────────────────────
+def __cs_run_cases__():
+    import os, signal, sys
+    n, timeout = int(sys.argv[1]), int(sys.argv[2])
+    for i in range(n):
+        sys.stdout.write("\n@@CS_CASE_BEGIN %d@@\n" % i)
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            rc = 0
+            try:
+                fd = os.open("case_%d.in" % i, os.O_RDONLY)
+                os.dup2(fd, 0)
+                signal.alarm(timeout)
+                __cs_main__()
+            except SystemExit as e:
+                rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                rc = 1
+            sys.stdout.flush()
+            os._exit(rc)
+        _, status = os.waitpid(pid, 0)
+        sys.stdout.write("\n@@CS_CASE_END %d %d@@\n" % (i, os.waitstatus_to_exitcode(status)))
+        sys.stdout.flush()
+
+__cs_run_cases__()
+"""
+
+
+def to_multi_case(harness: str, language: str) -> Optional[str]:
+    """
+    Turn a filled-in single-case harness into its multi-case form, or None
+    when the language has no driver (callers fall back to one run per case).
+    """
+    if language == "cpp" and "int main() {" in harness:
+        return harness.replace("int main() {", "int __cs_case_main__() {", 1) + CPP_MULTI_CASE_DRIVER
+    if language == "python" and harness.rstrip().endswith("__cs_main__()"):
+        return harness.rstrip()[:-len("__cs_main__()")] + PYTHON_MULTI_CASE_DRIVER
+    return None
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Registry: maps (category, language) → harness template string
 # ─────────────────────────────────────────────────────────────────────────────
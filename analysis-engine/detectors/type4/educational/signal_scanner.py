@@ -0,0 +1,238 @@
+# detectors/type4/educational/signal_scanner.py
+"""
+Single-pass source scanner for the algorithm classifier.
+
+The classifier used to run one regex per signal over the whole file:
+keyword sets, declarations, class/struct names, loops, recursion and the
+per-family rules, about thirty full scans per file. Two of those scans
+backtracked badly. The recursion check (a call statement, then `return`,
+then the same call again) went cubic on files where it did not match,
+and took seconds on 2,000-line submissions.
+
+scan_source() walks the file ONCE. A single regex split cuts the file into
+alternating separator and word runs, and the offsets of all runs follow
+from their lengths. Python only visits the separators that hold a '(',
+'{' or '}'. Those yield:
+  - call openings "name("
+  - declarations "<type> name("
+  - the block braces behind the nested-loop signal
+
+The recursion signal is computed from the calls. Every other question the
+classifier asks (keyword substrings, whole words, two words on one line,
+the parameter list after a declaration) is answered from the runs, plus
+small anchored matches at known positions. Only keywords containing
+punctuation ("f(n-1)", "n!") are looked up in the lowercased text.
+
+Every answer is the same as the regex it replaces on the original text.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+_WORD_SPLIT  = re.compile(r'(\w+)')
+_ASCII_SPLIT = re.compile(r'([A-Za-z0-9_]+)')   # same runs on ASCII text, faster
+_WORD_ONLY   = re.compile(r'\w+')
+_STMT_END    = re.compile(r'\s*;')
+_BLOCK_AFTER_PAREN = re.compile(r'\)\s*\{')
+_NAMED_BLOCK = re.compile(r'\s+(\w+)\s*\{')      # after "class" / "struct"
+
+# Return types that make `<type> name(` a declaration
+_DECL_TYPES = frozenset({"void", "int", "bool", "long"})
+
+
+@dataclass
+class SourceSignals:
+    """Everything the classifier needs from one source file, from one scan."""
+    source:           str
+    lower:            str                                   # source.lower()
+    words:            List[str] = field(default_factory=list)   # every word, in order
+    word_starts:      List[int] = field(default_factory=list)   # their start positions
+    calls:            List[Tuple[str, int, int]] = field(default_factory=list)       # (name, start, '(' pos)
+    decls:            List[Tuple[str, str, int, int]] = field(default_factory=list)  # (type, name, start, '(' pos)
+    has_nested_loops: bool = False
+    has_recursion:    bool = False
+    vocabulary:       Set[str] = field(default_factory=set)
+    lower_words:      Set[str] = field(default_factory=set)
+    word_text:        str = ""      # lowercased vocabulary, one word per line
+    cased_text:       str = ""      # vocabulary as written, one word per line
+    _positions:       Dict[str, List[int]] = field(default_factory=dict, repr=False)
+
+    # ── lookups ──────────────────────────────────────────────────────────────
+
+    def contains(self, text: str) -> bool:
+        """Same as `text in source.lower()`."""
+        if _WORD_ONLY.fullmatch(text):
+            # A run of word characters can only occur inside one word
+            return text in self.word_text
+        return text in self.lower
+
+    def contains_cased(self, text: str) -> bool:
+        """Same as `text in source` for text made of word characters."""
+        return text in self.cased_text
+
+    def has_word(self, *names: str) -> bool:
+        """True if any of the lowercase names is a whole word, ignoring case."""
+        return any(name in self.lower_words for name in names)
+
+    def char_before(self, pos: int) -> str:
+        """Last non-whitespace character before pos ('' if none)."""
+        source = self.source
+        pos -= 1
+        while pos >= 0 and source[pos].isspace():
+            pos -= 1
+        return source[pos] if pos >= 0 else ""
+
+    def positions(self, word: str, ignore_case: bool = False) -> List[int]:
+        """Start positions of the whole word, in source order."""
+        if ignore_case:
+            spellings = {w for w in self.vocabulary if w.lower() == word}
+            return sorted(p for w in spellings for p in self.positions(w))
+        found = self._positions.get(word)
+        if found is None:
+            found = [] if word not in self.vocabulary else [
+                p for w, p in zip(self.words, self.word_starts) if w == word
+            ]
+            self._positions[word] = found
+        return found
+
+    def followed_by(self, word: str, tail: Pattern, ignore_case: bool = False) -> Optional[re.Match]:
+        """First occurrence of the whole word immediately followed by tail."""
+        for p in self.positions(word, ignore_case):
+            m = tail.match(self.source, p + len(word))
+            if m:
+                return m
+        return None
+
+    def on_same_line(self, first: str, second: str) -> bool:
+        r"""Same as re.search(r'\bfirst\b.*\bsecond\b', source.lower())."""
+        later = self.positions(second, ignore_case=True)
+        for p in self.positions(first, ignore_case=True):
+            i = bisect_right(later, p)
+            if i < len(later) and self.source.find("\n", p, later[i]) < 0:
+                return True
+        return False
+
+    def call_sites(self, name: str, ignore_case: bool = False) -> List[int]:
+        """'(' positions of every `name(` where name is a whole word."""
+        if ignore_case:
+            return [q for n, _, q in self.calls if n.lower() == name]
+        return [q for n, _, q in self.calls if n == name]
+
+    def declared(self, return_types: Iterable[str], params: Optional[Pattern] = None) -> List[str]:
+        """
+        Names of `<type> name(` declarations, in source order, whose text after
+        the '(' matches params (when given). Like re.finditer, a declaration
+        starting inside the previous match is skipped.
+        """
+        names: List[str] = []
+        end = 0
+        for rt, name, start, q in self.decls:
+            if rt not in return_types or start < end:
+                continue
+            m = params.match(self.source, q + 1) if params is not None else None
+            if params is None or m:
+                names.append(name)
+                end = m.end() if m else q + 1
+        return names
+
+    def definitions(self, keyword: str) -> List[str]:
+        """Names of `keyword Name {` blocks (class / struct), in source order."""
+        names = []
+        for p in self.positions(keyword):
+            m = _NAMED_BLOCK.match(self.source, p + len(keyword))
+            if m:
+                names.append(m.group(1))
+        return names
+
+
+def scan_source(source: str) -> SourceSignals:
+    """Scan a source file once and collect every classifier signal."""
+    # parts = [separator, word, separator, word, ..., separator]
+    parts  = (_ASCII_SPLIT if source.isascii() else _WORD_SPLIT).split(source)
+    starts = list(accumulate(map(len, parts), initial=0))
+    words  = parts[1::2]
+
+    calls: List[Tuple[str, int, int]] = []
+    decls: List[Tuple[str, str, int, int]] = []
+    # Nested loops: a `for (`, then a `) {` after it, then another `for (`
+    # before that block's first '}'
+    seen_for = armed = nested = False
+
+    events = [i for i, sep in enumerate(parts[0::2]) if "(" in sep or "{" in sep or "}" in sep]
+    for i in events:
+        sep = parts[2 * i]
+        body = sep.lstrip()
+        if i and body.startswith("("):
+            # `name(` — the word before this separator opens a call
+            name, name_start = parts[2 * i - 1], starts[2 * i - 1]
+            q = starts[2 * i] + len(sep) - len(body)
+            calls.append((name, name_start, q))
+            if i > 1 and parts[2 * i - 3] in _DECL_TYPES and parts[2 * i - 2].isspace():
+                decls.append((parts[2 * i - 3], name, starts[2 * i - 3], q))
+            if name.endswith("for"):
+                nested = nested or armed
+                seen_for = True
+        if seen_for and ("{" in sep or "}" in sep):
+            # Only the state after this separator matters: a `for (` can
+            # only come at the start of a later one
+            close = sep.rfind("}")
+            if close >= 0:
+                armed = False
+            armed = armed or bool(_BLOCK_AFTER_PAREN.search(sep, close + 1))
+
+    vocabulary = set(words)
+    lower_words = {w.lower() for w in vocabulary}
+    signals = SourceSignals(
+        source=source,
+        lower=source.lower(),
+        words=words,
+        word_starts=starts[1::2],
+        calls=calls,
+        decls=decls,
+        has_nested_loops=nested,
+        vocabulary=vocabulary,
+        lower_words=lower_words,
+        word_text="\n".join(lower_words),
+        cased_text="\n".join(vocabulary),
+    )
+    signals.has_recursion = _has_recursion(signals)
+    return signals
+
+
+def _has_recursion(scan: SourceSignals) -> bool:
+    r"""
+    Same as re.search(r'(\w+)\s*\([^)]*\)\s*;.*\breturn\b.*\1\s*\(', source,
+    re.DOTALL), in linear time.
+
+    The backreference may match any suffix of the first name, so it is
+    enough to compare last characters. The check is: some call statement
+    `..c(...);`, then a `return` after it, then another `..c(` after that.
+    """
+    source = scan.source
+    stmt_end:  Dict[str, int] = {}    # last name char → end of its first `name(...);`
+    last_call: Dict[str, int] = {}    # last name char → its position in the last `name(`
+    close = 0                         # first ')' after the current '(' (-1: none left)
+    for name, start, q in scan.calls:
+        c = name[-1]
+        last_call[c] = start + len(name) - 1
+        if c in stmt_end or close < 0:
+            continue
+        if close <= q:
+            close = source.find(")", q + 1)
+            if close < 0:
+                continue
+        end = _STMT_END.match(source, close + 1)
+        if end:
+            stmt_end[c] = end.end()
+
+    returns = scan.positions("return") if stmt_end else []
+    for c, end in stmt_end.items():
+        i = bisect_left(returns, end)
+        if i < len(returns) and last_call[c] >= returns[i] + len("return"):
+            return True
+    return False
@@ -5,6 +5,7 @@ from detectors.type4.joern.client.connection import (
     DockerConnectionError,
     get_container_manager,
 )
+from detectors.type4.joern.client.session import JoernSession
 
 __all__ = [
     "JoernClient",
@@ -12,4 +13,5 @@ __all__ = [
     "JoernContainerManager",
     "DockerConnectionError",
     "get_container_manager",
+    "JoernSession",
 ]
\ No newline at end of file
@@ -3,18 +3,30 @@
 """
 Docker connection manager for Joern container
 CORRECTED VERSION - Includes exec_joern_query method
+
+Queries run in one long-lived JoernSession (a joern REPL in the container)
+instead of a fresh `joern --script` JVM per query. Every call parses into
+its own job workspace, /workspace/jobs/<job id>/, so concurrent callers
+never share a cpg.bin. exec_joern_batch parses a whole set of files into
+one CPG and runs one query over it.
 """
 
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
 import logging
-from typing import Optional, Tuple
+import uuid
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 try:
     from ..config import get_config, get_docker_config
+    from .session import JoernSession
 except ImportError:
     from config import get_config, get_docker_config
+    from session import JoernSession
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +46,9 @@ class JoernContainerManager:
         self.docker_config = get_docker_config()
         self.container_name = self.docker_config.container_name
         self.image_name = self.docker_config.image_name
+        self._session: Optional[JoernSession] = None
+        self._session_lock = threading.Lock()
+        self._session_failed_at: Optional[float] = None
         
     def is_docker_available(self) -> bool:
         """Check if Docker is available on the system"""
@@ -141,6 +156,7 @@ class JoernContainerManager:
     
     def stop_container(self) -> bool:
         """Stop the Joern container"""
+        self.close_session()
         if not self.is_container_running():
             logger.info("Container is not running")
             return True
@@ -265,9 +281,23 @@ class JoernContainerManager:
         """
         Execute a Joern PDG extraction query on a file.
 
-        Correct Joern workflow:
-          1. joern-parse <file> --language <lang> → creates cpg.bin
-          2. joern --script <script.sc>          → runs query on cpg.bin
+        Workflow:
+          1. joern-parse <file> --language <lang> → /workspace/jobs/<id>/cpg.bin
+          2. importCpg + query in the shared Joern session
+        """
+        return self.exec_joern_batch([file_path], language, query, timeout)
+
+    def exec_joern_batch(
+        self,
+        file_paths: List[str],
+        language: str,
+        query: str,
+        timeout: int = None,
+    ) -> Optional[str]:
+        """
+        Parse all files into ONE CPG and run query over it (one parse, one
+        query, however many files). Files are staged as f<i><ext>, so the
+        output's file names map back through staged_names().
         """
         if not self.is_container_running():
             if not self.start_container():
@@ -275,49 +305,77 @@ class JoernContainerManager:
                 return None
 
         timeout = timeout or self.docker_config.query_timeout
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = f"{self.docker_config.jobs_path}/{job_id}"
 
-        # Step 1: copy source file into container workspace
-        container_file = f"/workspace/{Path(file_path).name}"
-        if not self.copy_to_container(file_path, container_file):
-            logger.error(f"Failed to copy {file_path} to container")
-            return None
+        # Step 1: stage every file in one local dir, copy it with one docker cp
+        staging = tempfile.mkdtemp(prefix="cs_joern_")
+        try:
+            for staged, original in self.staged_names(file_paths).items():
+                shutil.copyfile(original, Path(staging) / staged)
+            rc, _, stderr = self.execute_command(["mkdir", "-p", job_dir])
+            if rc != 0 or not self.copy_to_container(staging, f"{job_dir}/src"):
+                logger.error(f"Failed to copy {len(file_paths)} file(s) to container: {stderr}")
+                return None
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        try:
+            # Step 2: parse → the job's own cpg.bin
+            parse_cmd = [
+                "joern-parse",
+                f"{job_dir}/src",
+                "--language", language,
+                "--output", f"{job_dir}/cpg.bin",
+            ]
+            rc, _, stderr = self.execute_command(
+                parse_cmd, timeout=self.docker_config.parse_timeout
+            )
+            if rc != 0:
+                logger.error(f"joern-parse failed: {stderr}")
+                return None
 
-        # Step 2: parse → cpg.bin
-        parse_cmd = [
-            "joern-parse",
-            container_file,
-            "--language", language,
-            "--output", "/workspace/cpg.bin",
-        ]
-        rc, _, stderr = self.execute_command(
-            parse_cmd, timeout=self.docker_config.parse_timeout
+            # Step 3: query in the long-lived session
+            return self._run_query(job_dir, job_id, query, timeout)
+        finally:
+            self.execute_command(["rm", "-rf", job_dir])
+
+    @staticmethod
+    def staged_names(file_paths: List[str]) -> Dict[str, str]:
+        """Collision-free names for a batch (students all submit main.cpp)."""
+        return {f"f{i}{Path(p).suffix}": p for i, p in enumerate(file_paths)}
+
+    def _run_query(self, job_dir: str, job_id: str, query: str, timeout: int) -> Optional[str]:
+        code = (
+            f'importCpg("{job_dir}/cpg.bin", "{job_id}")\n'
+            f"{query}\n"
+            f'scala.util.Try(delete("{job_id}"))'
         )
-        if rc != 0:
-            logger.error(f"joern-parse failed: {stderr}")
-            return None
+        session = self.get_session()
+        if session is not None:
+            stdout = session.run(code, timeout)
+            if stdout is not None:
+                return stdout
+            logger.warning("Joern session failed — falling back to joern --script")
 
-        # Step 3: write Joern script to workspace, then execute
-        # The correct Joern script wraps the user query inside @main
+        # Fallback: one-off JVM running the same code as a script
         joern_script = f"""
 @main def exec() = {{
-  importCpg("/workspace/cpg.bin")
+  importCpg("{job_dir}/cpg.bin")
   {query}
 }}
 """.strip()
 
-        # Write script into container
-        import tempfile, os
         with tempfile.NamedTemporaryFile(
             mode="w", suffix=".sc", delete=False
         ) as tmp:
             tmp.write(joern_script)
             tmp_script = tmp.name
 
-        self.copy_to_container(tmp_script, "/workspace/query.sc")
-        os.unlink(tmp_script)
+        self.copy_to_container(tmp_script, f"{job_dir}/query.sc")
+        Path(tmp_script).unlink()
 
-        # Execute
-        run_cmd = ["joern", "--script", "/workspace/query.sc"]
+        run_cmd = ["joern", "--script", f"{job_dir}/query.sc"]
         rc, stdout, stderr = self.execute_command(run_cmd, timeout=timeout)
 
         if rc != 0:
@@ -326,6 +384,38 @@ class JoernContainerManager:
 
         return stdout
 
+    def get_session(self) -> Optional[JoernSession]:
+        """
+        The shared Joern session, started on first use (None if it cannot
+        start). A failed start is remembered for session_retry_cooldown
+        seconds, so queries go straight to the script fallback instead of
+        waiting out the startup timeout again for every file.
+        """
+        with self._session_lock:
+            if self._session is None:
+                if (self._session_failed_at is not None and
+                        time.time() - self._session_failed_at < self.docker_config.session_retry_cooldown):
+                    return None
+                session = JoernSession(
+                    self.container_name,
+                    startup_timeout=self.docker_config.session_startup_timeout,
+                )
+                if not session.start():
+                    self._session_failed_at = time.time()
+                    logger.warning("Joern session could not start — using joern --script for "
+                                   f"{self.docker_config.session_retry_cooldown}s")
+                    return None
+                self._session = session
+                self._session_failed_at = None
+            return self._session
+
+    def close_session(self) -> None:
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            self._session_failed_at = None
+
     def copy_to_container(self, local_path: str, container_path: str) -> bool:
         """Copy file from host to container"""
         try:
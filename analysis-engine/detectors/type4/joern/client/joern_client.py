@@ -7,7 +7,7 @@ FIXED VERSION - Corrects CFG extraction for recursive functions
 
 import logging
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 import tempfile
 
@@ -22,6 +22,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# The batch query tags every method with its file, just before METHOD_START
+_METHOD_START_LINE = '    println(s"METHOD_START:${method.name}")'
+_METHOD_FILE_LINE  = '    println(s"METHOD_FILE:${method.file.name.headOption.getOrElse("")}")'
+
 
 class JoernClient:
     """
@@ -65,25 +69,15 @@ class JoernClient:
             logger.error("Joern container not running")
             return None
         
-        # Create temporary file
+        # Private temporary dir: cleanup() of a concurrent caller only
+        # removes loose files in the workspace
         ext = self._get_file_extension(language)
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix=ext,
-            dir=self.workspace_dir,
-            delete=False
-        ) as tmp:
-            tmp.write(code)
-            tmp_path = Path(tmp.name)
-        
-        try:
+        with tempfile.TemporaryDirectory(dir=self.workspace_dir) as tmp_dir:
+            tmp_path = Path(tmp_dir) / f"snippet{ext}"
+            tmp_path.write_text(code)
+            
             # Extract PDG
-            pdg = self._extract_pdg_from_file(tmp_path, language)
-            return pdg
-        finally:
-            # Cleanup
-            if tmp_path.exists():
-                tmp_path.unlink()
+            return self._extract_pdg_from_file(tmp_path, language)
     
     def _extract_pdg_from_file(
         self,
@@ -123,6 +117,68 @@ class JoernClient:
             logger.error(f"Error extracting PDG: {e}")
             return None
     
+    def extract_pdgs_from_files(
+        self,
+        file_paths: List[str],
+        language: str
+    ) -> Dict[str, PDG]:
+        """
+        Extract PDGs for every method of every file with ONE parse and ONE
+        query over a CPG of the whole batch.
+        
+        Returns:
+            file path → PDG (empty dict if extraction fails)
+        """
+        if not file_paths or not self.ensure_container_running():
+            return {}
+        start_time = time.time()
+        
+        try:
+            staged = self.container_manager.staged_names(file_paths)
+            result = self.container_manager.exec_joern_batch(
+                file_paths=list(file_paths),
+                language=self.config.get_joern_language(language),
+                query=self._get_batch_extraction_query()
+            )
+            if not result:
+                logger.error("Joern batch query returned no result")
+                return {}
+            
+            pdgs = self._parse_batch_output(result, staged)
+            per_file_ms = (time.time() - start_time) * 1000 / len(file_paths)
+            for path, pdg in pdgs.items():
+                pdg.file_path = path
+                pdg.language = language
+                pdg.parse_time_ms = per_file_ms
+            logger.info(f"Extracted PDGs for {len(pdgs)} files in {time.time() - start_time:.1f}s")
+            return pdgs
+            
+        except Exception as e:
+            logger.error(f"Error extracting batch PDGs: {e}")
+            return {}
+    
+    def _get_batch_extraction_query(self) -> str:
+        """The PDG query, with every method tagged by its file"""
+        return self._get_pdg_extraction_query().replace(
+            _METHOD_START_LINE, f"{_METHOD_FILE_LINE}\n{_METHOD_START_LINE}", 1
+        )
+    
+    def _parse_batch_output(self, output: str, staged: Dict[str, str]) -> Dict[str, PDG]:
+        """Split batch output by METHOD_FILE and parse each file's share"""
+        sections: Dict[str, List[str]] = {path: [] for path in staged.values()}
+        current: Optional[List[str]] = None
+        
+        for line in output.split('\n'):
+            stripped = line.strip()
+            if stripped.startswith('METHOD_FILE:'):
+                staged_name = Path(stripped.split(':', 1)[1]).name
+                path = staged.get(staged_name)
+                current = sections[path] if path is not None else None
+            elif current is not None:
+                current.append(line)
+        
+        return {path: self._parse_pdg_output('\n'.join(lines)) for path, lines in sections.items()}
+    
     def _get_pdg_extraction_query(self) -> str:
         """
         Get Joern query for PDG extraction - FIXED VERSION
@@ -0,0 +1,139 @@
+# detectors/type4/joern/client/session.py
+
+"""
+Long-lived Joern REPL session inside the Joern container.
+
+Every `joern --script` call starts a fresh JVM and reloads Joern (~5-10s),
+which used to happen once per file per pair. A session starts ONE
+`joern` REPL through `docker exec -i` and drives it over stdin:
+
+    session.run('importCpg("/workspace/jobs/<id>/cpg.bin", "<id>")\\n<query>')
+
+Each run() sends the code wrapped in a block, followed by a println of a
+per-run sentinel, and collects stdout up to that sentinel. The sentinel is
+split across two string literals in the code we send, so an echo of the
+input can never be mistaken for it. Runs are serialised by a lock (the
+REPL has one active CPG); a run that times out kills the process, and the
+next run starts a new one.
+"""
+
+import logging
+import queue
+import re
+import subprocess
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_ANSI_RE   = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+_PROMPT_RE = re.compile(r'^(?:\s*joern>\s*)+')
+
+
+class JoernSession:
+    """One `joern` REPL process in the container, reused across queries."""
+
+    def __init__(self, container_name: str, startup_timeout: int = 180):
+        self.container_name  = container_name
+        self.startup_timeout = startup_timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> bool:
+        """Start the REPL and wait until it evaluates code."""
+        self.close()
+        try:
+            self._proc = subprocess.Popen(
+                self._command(),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, bufsize=1,
+            )
+        except Exception as e:
+            logger.error(f"Could not start Joern session: {e}")
+            self._proc = None
+            return False
+
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._proc, self._lines), daemon=True).start()
+
+        if self._exchange("()", self.startup_timeout) is None:
+            logger.error("Joern session did not become ready")
+            self.close()
+            return False
+        logger.info("Joern session ready")
+        return True
+
+    def _command(self) -> List[str]:
+        return ["docker", "exec", "-i", self.container_name, "joern", "--nocolors"]
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write("exit\n")
+                proc.stdin.flush()
+                proc.wait(timeout=10)
+        except Exception:
+            proc.kill()
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def run(self, code: str, timeout: int) -> Optional[str]:
+        """Evaluate code; its stdout, or None if the session failed or timed out."""
+        with self._lock:
+            if not self.is_alive() and not self.start():
+                return None
+            return self._exchange(code, timeout)
+
+    def _exchange(self, code: str, timeout: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            self._proc.stdin.write(
+                f"{{\n{code}\n}}\n"
+                f'println("__CS_DONE_" + "{token}__")\n'
+            )
+            self._proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            logger.error(f"Joern session write failed: {e}")
+            self.close()
+            return None
+
+        sentinel = f"__CS_DONE_{token}__"
+        deadline = time.monotonic() + timeout
+        out: List[str] = []
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.error(f"Joern session query timed out after {timeout}s")
+                self._kill()
+                return None
+            if line is None:
+                logger.error("Joern session exited during a query")
+                self._proc = None
+                return None
+            line = _PROMPT_RE.sub("", _ANSI_RE.sub("", line))
+            if line.strip() == sentinel:
+                return "".join(out)
+            out.append(line)
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            proc.kill()
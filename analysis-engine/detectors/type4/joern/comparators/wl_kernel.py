@@ -12,14 +12,31 @@ Algorithm (h iterations):
   3. Similarity = Jaccard of the multisets of all labels seen across h rounds
 
 Reference: Shervashidze et al., "Weisfeiler-Lehman Graph Kernels", JMLR 2011
+
+Batches: kernel_matrix() scores all pairs at once. Each PDG's feature
+multiset is computed once (feature_vector memoises per PDG object) and
+expanded into a binary row: a label seen c times sets the columns of
+"label#1" … "label#c", hashed into a shared 64-bit feature space (each
+PDG's hashed columns are memoised too). Then |A ∩ B| is the dot product
+of two rows — min(count_a, count_b) columns match — and the whole
+intersection matrix is the one sparse product X·Xᵀ, after the batch's
+columns are renumbered densely. Jaccard follows from the row sizes.
+Barring 64-bit hash collisions this equals similarity() exactly.
 """
 
 from __future__ import annotations
 
 import hashlib
-from collections import Counter
+from collections import Counter, OrderedDict
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
 try:
     from ..models.pdg_models import PDG, PDGEdge, PDGNode, EdgeType
 except ImportError:
@@ -61,6 +78,8 @@ class WLKernel:
         similarity = kernel.similarity(pdg_a, pdg_b)
     """
 
+    MEMO_PDGS = 1024
+
     def __init__(self, h: int = 3):
         """
         Args:
@@ -68,6 +87,9 @@ class WLKernel:
                More iterations = deeper neighbourhood comparison.
         """
         self.h = h
+        # id(pdg) → [pdg, features, hashed columns]; holding the PDG keeps
+        # its id unique. PDGs are treated as immutable once extracted.
+        self._memo: "OrderedDict[int, list]" = OrderedDict()
 
     # ── public ────────────────────────────────────────────────────────────────
 
@@ -75,13 +97,61 @@ class WLKernel:
         """
         Return WL kernel similarity between two PDGs in [0, 1].
         """
-        feat_a = self._wl_features(pdg_a)
-        feat_b = self._wl_features(pdg_b)
-        return self._jaccard(feat_a, feat_b)
+        return self._jaccard(self.feature_vector(pdg_a), self.feature_vector(pdg_b))
 
     def feature_vector(self, pdg: PDG) -> Counter:
-        """Return the WL feature multiset for a single PDG."""
-        return self._wl_features(pdg)
+        """Return the WL feature multiset for a single PDG (computed once)."""
+        return self._memo_entry(pdg)[1]
+
+    def hashed_features(self, pdg: PDG) -> np.ndarray:
+        """Sorted uint64 columns of the PDG's binary row (computed once)."""
+        entry = self._memo_entry(pdg)
+        if entry[2] is None:
+            entry[2] = np.unique(np.fromiter(
+                (self._column(f"{label}#{k}")
+                 for label, count in entry[1].items()
+                 for k in range(1, count + 1)),
+                dtype=np.uint64,
+            ))
+        return entry[2]
+
+    def kernel_matrix(self, pdgs: List[PDG]) -> np.ndarray:
+        """
+        n × n matrix of similarity() for every pair of pdgs (diagonal 1.0),
+        from one sparse product over the hashed feature rows.
+        """
+        if sparse is None:
+            return np.array([[self.similarity(a, b) for b in pdgs] for a in pdgs], dtype=np.float64)
+        if not pdgs:
+            return np.zeros((0, 0), dtype=np.float64)
+
+        rows = self.hashed_rows(pdgs)
+        inter = (rows @ rows.T).toarray().astype(np.float64)
+        sizes = np.diag(inter)
+        union = sizes[:, None] + sizes[None, :] - inter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(union > 0, inter / union, 1.0)
+
+    def hashed_rows(self, pdgs: List[PDG]) -> "sparse.csr_matrix":
+        """Binary CSR rows, one per PDG, over the batch's columns renumbered 0…m-1."""
+        per_pdg = [self.hashed_features(pdg) for pdg in pdgs]
+        indptr = np.zeros(len(pdgs) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(c) for c in per_pdg])
+        flat = np.concatenate(per_pdg) if per_pdg else np.zeros(0, dtype=np.uint64)
+        columns, indices = np.unique(flat, return_inverse=True)
+        data = np.ones(len(flat), dtype=np.int32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(pdgs), len(columns)))
+
+    def _memo_entry(self, pdg: PDG) -> list:
+        entry = self._memo.get(id(pdg))
+        if entry is not None and entry[0] is pdg:
+            self._memo.move_to_end(id(pdg))
+            return entry
+        entry = [pdg, self._wl_features(pdg), None]
+        self._memo[id(pdg)] = entry
+        if len(self._memo) > self.MEMO_PDGS:
+            self._memo.popitem(last=False)
+        return entry
 
     # ── internals ─────────────────────────────────────────────────────────────
 
@@ -134,6 +204,11 @@ class WLKernel:
 
         return features
 
+    @staticmethod
+    def _column(feature: str) -> int:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
     @staticmethod
     def _jaccard(a: Counter, b: Counter) -> float:
         """Jaccard similarity of two label multisets."""
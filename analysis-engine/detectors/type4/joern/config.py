@@ -27,6 +27,7 @@ class DockerConfig:
     # Paths inside container
     workspace_path: str = "/workspace"
     output_path: str = "/output"
+    jobs_path: str = "/workspace/jobs"     # one subdirectory per parse job
     
     # Resource limits
     memory_limit: str = "4g"
@@ -35,6 +36,9 @@ class DockerConfig:
     start_timeout: int = 60
     query_timeout: int = 120
     parse_timeout: int = 300
+    session_startup_timeout: int = 180
+    # After a failed REPL start, go straight to `joern --script` this long
+    session_retry_cooldown: int = 600
 
 
 @dataclass
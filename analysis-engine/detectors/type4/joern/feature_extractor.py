@@ -13,7 +13,7 @@ import re
 import logging
 
 try:
-    from ..models import PDG, MethodPDG, PDGNode, PDGEdge, EdgeType
+    from .models import PDG, MethodPDG, PDGNode, PDGEdge, EdgeType
 except ImportError:
     from models import PDG, MethodPDG, PDGNode, PDGEdge, EdgeType
 
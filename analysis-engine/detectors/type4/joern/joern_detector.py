@@ -9,8 +9,11 @@ Uses the full detection pipeline:
 This version properly integrates all sophisticated components.
 """
 
+import copy
+import hashlib
 import logging
 import time
+from collections import OrderedDict
 from typing import Optional, List, Tuple, Dict, Any
 from pathlib import Path
 
@@ -20,6 +23,7 @@ try:
     from .feature_extractor import FeatureExtractor, get_feature_extractor
     from .similarity_metrics import SimilarityMetrics, get_similarity_metrics
     from .comparators.semantic_analyzer import SemanticAnalyzer
+    from .comparators.wl_kernel import WLKernel
     from .models.pdg_models import PDG, PDGNode, PDGEdge, EdgeType, NodeType
     from .models.semantic_result import (
         SemanticCloneResult, SemanticScores,
@@ -32,6 +36,7 @@ except ImportError:
     from feature_extractor import FeatureExtractor, get_feature_extractor
     from similarity_metrics import SimilarityMetrics, get_similarity_metrics
     from comparators.semantic_analyzer import SemanticAnalyzer
+    from comparators.wl_kernel import WLKernel
     from models.pdg_models import PDG, PDGNode, PDGEdge, EdgeType, NodeType
     from models.semantic_result import (
         SemanticCloneResult, SemanticScores,
@@ -50,8 +55,16 @@ class JoernDetector:
     2. FeatureExtractor: Extract multi-level features
     3. SimilarityMetrics: Compute multiple similarity scores
     4. SemanticAnalyzer: Make final decision with confidence
+    
+    PDGs are cached by content hash — in memory and, with attach_store(),
+    in the ArtifactStore as PDG.to_compact() tuples — so only new
+    submissions reach Joern, whether they arrive through prepare_batch()
+    or one pair at a time through detect_from_files(). Per-PDG features
+    of a batch are extracted once instead of once per pair.
     """
     
+    PDG_CACHE_FILES = 2048
+    
     def __init__(self, auto_start: bool = True):
         """Initialize the complete detection pipeline"""
         self.config = get_config()
@@ -63,6 +76,16 @@ class JoernDetector:
         self.similarity_metrics = get_similarity_metrics()  # ✅ NOW USED
         self.analyzer = SemanticAnalyzer()
         
+        self.wl_kernel = WLKernel()
+        
+        # PDGs extracted by prepare_batch(), by file path
+        self._batch_pdgs: Dict[str, PDG] = {}
+        self._batch_features: Dict[str, Tuple[Dict, Dict]] = {}
+        
+        # content digest + extension → PDG (file_path not meaningful)
+        self._pdg_cache: "OrderedDict[str, PDG]" = OrderedDict()
+        self._store = None
+        
         logger.info("JoernDetector initialized with FULL pipeline")
         logger.info(f"Supported languages: {', '.join(self.config.joern.supported_languages)}")
     
@@ -109,64 +132,7 @@ class JoernDetector:
                 result.error_message = "Failed to extract PDG from second code"
                 return result
             
-            result.pdg1_info = self._extract_pdg_info(pdg1)
-            result.pdg2_info = self._extract_pdg_info(pdg2)
-            
-            # ✅ STEP 2: Extract features (NEW - now actually used!)
-            logger.info("Step 2: Extracting features...")
-            features1 = self.feature_extractor.extract_all_features(pdg1, language)
-            features2 = self.feature_extractor.extract_all_features(pdg2, language)
-            
-            # ✅ Check behavioral patterns (Stack vs Queue detection)
-            behavioral1 = self.feature_extractor.extract_behavioral_signature(pdg1)
-            behavioral2 = self.feature_extractor.extract_behavioral_signature(pdg2)
-            
-            # ✅ STEP 3: Compute similarities (NEW - now actually used!)
-            logger.info("Step 3: Computing similarities...")
-            similarities = self.similarity_metrics.compute_all_similarities(
-                features1,
-                features2
-            )
-            
-            # ✅ Apply behavioral penalty (Stack vs Queue)
-            if behavioral1['is_stack_like'] and behavioral2['is_queue_like']:
-                logger.info("Detected Stack vs Queue - applying penalty")
-                similarities['structural_similarity'] *= 0.5
-            elif behavioral1['is_queue_like'] and behavioral2['is_stack_like']:
-                logger.info("Detected Queue vs Stack - applying penalty")
-                similarities['structural_similarity'] *= 0.5
-            
-            # STEP 4: Analyze using SemanticAnalyzer (for backward compatibility)
-            logger.info("Step 4: Final analysis...")
-            scores, confidence = self.analyzer.analyze(pdg1, pdg2, language)
-            
-            # ✅ Override scores with multi-metric computation
-            weighted_sim = self.similarity_metrics.compute_weighted_similarity(similarities)
-            
-            # Blend both approaches (for robustness)
-            final_similarity = (weighted_sim * 0.6) + (scores.overall * 0.4)
-            
-            result.scores = SemanticScores(
-                overall=final_similarity,
-                node_type_similarity=similarities.get('ast_similarity', scores.node_type_similarity),
-                control_flow_similarity=similarities.get('control_flow_similarity', scores.control_flow_similarity),
-                data_flow_similarity=similarities.get('data_flow_similarity', scores.data_flow_similarity),
-                structural_similarity=similarities.get('structural_similarity', scores.structural_similarity)
-            )
-            result.similarity = final_similarity
-            result.confidence = confidence
-            
-            # Determine if semantic clone
-            threshold = self.config.get_threshold_for_language(language)
-            result.is_semantic_clone = final_similarity >= threshold
-            
-            result.status = "success"
-            
-            logger.info(
-                f"Detection complete - Clone: {result.is_semantic_clone}, "
-                f"Similarity: {result.similarity:.1%}, "
-                f"Confidence: {confidence.value}"
-            )
+            self._score_pdgs(pdg1, pdg2, language, result)
             
         except Exception as e:
             logger.error(f"Error during detection: {e}", exc_info=True)
@@ -179,6 +145,195 @@ class JoernDetector:
         
         return result
     
+    def attach_store(self, store: Any) -> None:
+        """Persist extracted PDGs in a content-addressed ArtifactStore"""
+        self._store = store
+    
+    def prepare_batch(self, file_paths: List[str]) -> int:
+        """
+        Extract the PDGs of a whole batch with one parse and one query per
+        language (JoernClient.extract_pdgs_from_files), skipping files whose
+        content already has a cached PDG. detect_from_files() scores pairs
+        of these files without calling Joern again. Replaces the previous
+        batch.
+        
+        Returns:
+            Number of files with a PDG
+        """
+        by_language: Dict[str, List[str]] = {}
+        for path in file_paths:
+            language = self.config.get_language_from_extension(str(path))
+            if language and self.config.is_language_supported(language):
+                by_language.setdefault(language, []).append(str(path))
+        
+        self._batch_pdgs = {}
+        self._batch_features = {}
+        reused = 0
+        for language, paths in by_language.items():
+            digests = {p: self._content_key(p) for p in paths}
+            missing = []
+            for path in paths:
+                pdg = self._cached_pdg(digests[path], path)
+                if pdg is None:
+                    missing.append(path)
+                else:
+                    self._batch_pdgs[path] = pdg
+                    reused += 1
+            if missing:
+                for path, pdg in self.client.extract_pdgs_from_files(missing, language).items():
+                    self._remember_pdg(digests[path], pdg)
+                    self._batch_pdgs[path] = pdg
+        
+        logger.info(f"Batch PDGs ready: {len(self._batch_pdgs)} files ({reused} from cache)")
+        return len(self._batch_pdgs)
+    
+    def clear_batch(self) -> None:
+        self._batch_pdgs.clear()
+        self._batch_features.clear()
+    
+    def _file_pdg(self, path: str, code: str, language: str) -> Optional[PDG]:
+        """PDG of one file: the batch's, else the content-hash cache, else Joern"""
+        pdg = self._batch_pdgs.get(path)
+        if pdg is not None:
+            return pdg
+        key = self._content_key(path)
+        pdg = self._cached_pdg(key, path)
+        if pdg is None:
+            pdg = self.client.extract_pdg_from_code(code, language)
+            if pdg:
+                self._remember_pdg(key, pdg)
+        return pdg
+    
+    def _batch_features_for(self, path: str, language: str) -> Optional[Tuple[Dict, Dict]]:
+        """Features of a batch file, extracted once per batch (None outside the batch)"""
+        if path not in self._batch_pdgs:
+            return None
+        feats = self._batch_features.get(path)
+        if feats is None:
+            pdg = self._batch_pdgs[path]
+            feats = (
+                self.feature_extractor.extract_all_features(pdg, language),
+                self.feature_extractor.extract_behavioral_signature(pdg),
+            )
+            self._batch_features[path] = feats
+        return feats
+    
+    @staticmethod
+    def _content_key(path: str) -> Optional[str]:
+        try:
+            digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        except OSError:
+            return None
+        # Joern picks the frontend by extension, so it is part of the key
+        return f"{digest}{Path(path).suffix.lower()}"
+    
+    def _cached_pdg(self, key: Optional[str], path: str) -> Optional[PDG]:
+        if key is None:
+            return None
+        pdg = self._pdg_cache.get(key)
+        if pdg is not None:
+            self._pdg_cache.move_to_end(key)
+        elif self._store is not None:
+            compact = self._store.get(key, "joern_pdg")
+            if compact is not None:
+                pdg = PDG.from_compact(compact)
+                self._pdg_cache[key] = pdg
+                self._trim_pdg_cache()
+        if pdg is None:
+            return None
+        # Same content, other path: share methods, own the file_path
+        pdg = copy.copy(pdg)
+        pdg.file_path = path
+        return pdg
+    
+    def _remember_pdg(self, key: Optional[str], pdg: PDG) -> None:
+        if key is None:
+            return
+        self._pdg_cache[key] = pdg
+        self._trim_pdg_cache()
+        if self._store is not None:
+            self._store.put(key, "joern_pdg", pdg.to_compact())
+    
+    def _trim_pdg_cache(self) -> None:
+        while len(self._pdg_cache) > self.PDG_CACHE_FILES:
+            self._pdg_cache.popitem(last=False)
+    
+    def _score_pdgs(
+        self,
+        pdg1: PDG,
+        pdg2: PDG,
+        language: str,
+        result: SemanticCloneResult,
+        feats1: Optional[Tuple[Dict, Dict]] = None,
+        feats2: Optional[Tuple[Dict, Dict]] = None
+    ) -> None:
+        """
+        Steps 2-4 of the pipeline on two extracted PDGs; fills result.
+        feats1/feats2 are precomputed (features, behavioral signature).
+        """
+        result.pdg1_info = self._extract_pdg_info(pdg1)
+        result.pdg2_info = self._extract_pdg_info(pdg2)
+        
+        # ✅ STEP 2: Extract features (NEW - now actually used!)
+        logger.info("Step 2: Extracting features...")
+        if feats1 is None:
+            feats1 = (self.feature_extractor.extract_all_features(pdg1, language),
+                      self.feature_extractor.extract_behavioral_signature(pdg1))
+        if feats2 is None:
+            feats2 = (self.feature_extractor.extract_all_features(pdg2, language),
+                      self.feature_extractor.extract_behavioral_signature(pdg2))
+        
+        # ✅ Check behavioral patterns (Stack vs Queue detection)
+        features1, behavioral1 = feats1
+        features2, behavioral2 = feats2
+        
+        # ✅ STEP 3: Compute similarities (NEW - now actually used!)
+        logger.info("Step 3: Computing similarities...")
+        similarities = self.similarity_metrics.compute_all_similarities(
+            features1,
+            features2
+        )
+        
+        # ✅ Apply behavioral penalty (Stack vs Queue)
+        if behavioral1['is_stack_like'] and behavioral2['is_queue_like']:
+            logger.info("Detected Stack vs Queue - applying penalty")
+            similarities['structural_similarity'] *= 0.5
+        elif behavioral1['is_queue_like'] and behavioral2['is_stack_like']:
+            logger.info("Detected Queue vs Stack - applying penalty")
+            similarities['structural_similarity'] *= 0.5
+        
+        # STEP 4: Analyze using SemanticAnalyzer (for backward compatibility)
+        logger.info("Step 4: Final analysis...")
+        scores, confidence = self.analyzer.analyze(pdg1, pdg2, language)
+        
+        # ✅ Override scores with multi-metric computation
+        weighted_sim = self.similarity_metrics.compute_weighted_similarity(similarities)
+        
+        # Blend both approaches (for robustness)
+        final_similarity = (weighted_sim * 0.6) + (scores.overall * 0.4)
+        
+        result.scores = SemanticScores(
+            overall=final_similarity,
+            node_type_similarity=similarities.get('ast_similarity', scores.node_type_similarity),
+            control_flow_similarity=similarities.get('control_flow_similarity', scores.control_flow_similarity),
+            data_flow_similarity=similarities.get('data_flow_similarity', scores.data_flow_similarity),
+            structural_similarity=similarities.get('structural_similarity', scores.structural_similarity)
+        )
+        result.similarity = final_similarity
+        result.confidence = confidence
+        
+        # Determine if semantic clone
+        threshold = self.config.get_threshold_for_language(language)
+        result.is_semantic_clone = final_similarity >= threshold
+        
+        result.status = "success"
+        
+        logger.info(
+            f"Detection complete - Clone: {result.is_semantic_clone}, "
+            f"Similarity: {result.similarity:.1%}, "
+            f"Confidence: {confidence.value}"
+        )
+    
     def detect_from_files(
         self,
         file1_path: str,
@@ -221,8 +376,30 @@ class JoernDetector:
             # Auto-detect language from extension
             language = self.config.get_language_from_extension(file1_path) or "python"
             
-            # Run detection
-            result = self.detect(code1, code2, language)
+            if not self.config.is_language_supported(language):
+                return self.detect(code1, code2, language)
+            
+            # Batch or cached PDGs skip Joern; only unseen content is extracted
+            start_time = time.time()
+            result = SemanticCloneResult(language=language)
+            result.threshold_used = self.config.get_threshold_for_language(language)
+            try:
+                pdg1 = self._file_pdg(str(file1_path), code1, language)
+                pdg2 = self._file_pdg(str(file2_path), code2, language) if pdg1 else None
+            finally:
+                self.client.cleanup()
+            if not pdg1 or not pdg2:
+                result.status = "error"
+                which = "first" if not pdg1 else "second"
+                result.error_message = f"Failed to extract PDG from {which} code"
+                return result
+            self._score_pdgs(
+                pdg1, pdg2, language, result,
+                self._batch_features_for(str(file1_path), language),
+                self._batch_features_for(str(file2_path), language),
+            )
+            result.scores.wl_similarity = self.wl_kernel.similarity(pdg1, pdg2)
+            result.analysis_time_ms = (time.time() - start_time) * 1000
             result.code1_path = str(file1_path)
             result.code2_path = str(file2_path)
             
@@ -214,6 +214,44 @@ class PDG:
     def total_data_edges(self) -> int:
         return sum(m.num_data_edges for m in self.methods)
     
+    def to_compact(self) -> tuple:
+        """
+        Plain nested tuples (no dataclasses or enums) for caching PDGs by
+        content hash; file_path is left out since the same content can
+        sit at many paths. Inverse of from_compact().
+        """
+        return (self.language, self.joern_version, tuple(
+            (
+                m.method_name,
+                m.file_name,
+                tuple((n.id, n.code, n.label, n.line_number, n.column_number,
+                       n.node_type.value, n.properties or None) for n in m.nodes),
+                tuple((e.source_id, e.target_id, e.edge_type.value, e.variable,
+                       e.properties or None) for e in m.edges),
+            )
+            for m in self.methods
+        ))
+    
+    @classmethod
+    def from_compact(cls, data: tuple, file_path: Optional[str] = None) -> "PDG":
+        language, joern_version, methods = data
+        pdg = cls(file_path=file_path, language=language, joern_version=joern_version)
+        for method_name, file_name, nodes, edges in methods:
+            method = MethodPDG(method_name=method_name, file_name=file_name)
+            for nid, code, label, line, column, node_type, props in nodes:
+                method.add_node(PDGNode(
+                    id=nid, code=code, label=label, line_number=line, column_number=column,
+                    node_type=NodeType(node_type), method_name=method_name,
+                    properties=props or {},
+                ))
+            for source, target, edge_type, variable, props in edges:
+                method.add_edge(PDGEdge(
+                    source_id=source, target_id=target, edge_type=EdgeType(edge_type),
+                    variable=variable, properties=props or {},
+                ))
+            pdg.add_method(method)
+        return pdg
+    
     def get_statistics(self) -> Dict[str, Any]:
         return {
             "file_path": self.file_path,
@@ -34,14 +34,20 @@ class SemanticScores:
     data_flow_similarity: float = 0.0      # Similar data dependencies?
     structural_similarity: float = 0.0     # Similar graph shape?
     
+    # WL-kernel similarity, set for pairs scored from a batch kernel matrix
+    wl_similarity: Optional[float] = None
+    
     def to_dict(self) -> Dict[str, float]:
-        return {
+        scores = {
             "overall": round(self.overall, 4),
             "node_type_similarity": round(self.node_type_similarity, 4),
             "control_flow_similarity": round(self.control_flow_similarity, 4),
             "data_flow_similarity": round(self.data_flow_similarity, 4),
             "structural_similarity": round(self.structural_similarity, 4)
         }
+        if self.wl_similarity is not None:
+            scores["wl_similarity"] = round(self.wl_similarity, 4)
+        return scores
     
     def to_percentages(self) -> Dict[str, str]:
         return {
@@ -5,7 +5,7 @@ Robust Joern wrapper with graceful fallback for educational use
 import logging
 import re
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,25 @@ class RobustJoernDetector:
     def is_available(self) -> bool:
         return self._available
     
+    def prepare_batch(self, file_paths: List[str]) -> None:
+        """Extract every file's PDG up front (one Joern batch per language)"""
+        if not self._available:
+            return
+        try:
+            self._joern.prepare_batch(file_paths)
+        except Exception as e:
+            logger.warning(f"Joern batch extraction failed: {e}")
+    
+    def clear_batch(self) -> None:
+        """Drop the PDGs of the last prepare_batch"""
+        if self._joern is not None:
+            self._joern.clear_batch()
+    
+    def attach_store(self, store) -> None:
+        """Cache extracted PDGs by content hash in an ArtifactStore"""
+        if self._joern is not None:
+            self._joern.attach_store(store)
+    
     def detect(self, file_a: str, file_b: str, language: str = "cpp") -> Tuple[float, float]:
         """
         Detect similarity with fallback
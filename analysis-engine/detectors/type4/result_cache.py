@@ -0,0 +1,220 @@
+# detectors/type4/result_cache.py
+
+"""
+Type-4 Result Cache
+===================
+Type4Detector and EducationalType4Detector used to write one JSON file per
+pair into ./.cache/type4. Each lookup re-read and hashed both source
+files, then opened the JSON file to check its age. A 300-student job left
+~45k tiny files behind.
+
+All Type-4 pair results now live in ONE SQLite database
+(./.cache/type4/results.db), on top of the shared ArtifactStore. That
+store provides WAL-mode concurrent access from forked workers, a size cap
+with LRU eviction, and a version namespace. Keys:
+
+    sha256(content hash a : content hash b : threshold : namespace)
+
+under kind "type4_result" and version RESULT_VERSION. Bump RESULT_VERSION
+when Type-4 scoring changes. The namespace separates the callers
+("type4:educational:joern=0,gpp=1,python=1", "type4:pdg", "edu", ...).
+
+  TTL        entries older than ttl seconds (default one day) are misses
+  writes     buffered in memory, committed FLUSH_BATCH at a time (and on
+             flush(); the pair engine flushes at the end of every chunk)
+  prefetch   prefetch(keys) loads all stored entries in a few IN (...)
+             queries, so the pair loop is served from memory. Each call
+             replaces the previous prefetch (at most PREFETCH_MAX keys), so
+             a long-lived server does not keep every past job's results
+  counters   hits / misses / expired, reported by stats()
+
+Content hashes of paths are memoised by (path, mtime, size) in an LRU of
+HASH_MEMO_FILES entries, so repeated lookups for the same file do not
+re-read it.
+
+Env: TYPE4_CACHE_DB (database path), TYPE4_CACHE_MB (size cap, default
+128), TYPE4_CACHE_TTL (seconds, default 86400).
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from engine.artifact_store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+RESULT_VERSION = "type4-results-1"
+RESULT_KIND    = "type4_result"
+
+DEFAULT_DB     = os.environ.get("TYPE4_CACHE_DB", "./.cache/type4/results.db")
+DEFAULT_MB     = int(os.environ.get("TYPE4_CACHE_MB", "128"))
+DEFAULT_TTL    = float(os.environ.get("TYPE4_CACHE_TTL", "86400"))
+
+HASH_MEMO_FILES = 4096
+
+# (path, mtime_ns, size) → sha256 of the file bytes, LRU
+_hash_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+
+def content_hash(path: str) -> str:
+    """sha256 of a file's bytes ("" if unreadable), memoised by (path, mtime, size)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    memo_key = (str(path), st.st_mtime_ns, st.st_size)
+    with _hash_memo_lock:
+        digest = _hash_memo.get(memo_key)
+        if digest is not None:
+            _hash_memo.move_to_end(memo_key)
+            return digest
+    try:
+        digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return ""
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = digest
+        if len(_hash_memo) > HASH_MEMO_FILES:
+            _hash_memo.popitem(last=False)
+    return digest
+
+
+class Type4ResultCache:
+    """Pair results in one TTL'd, size-capped, batch-written SQLite store."""
+
+    FLUSH_BATCH  = 64
+    PREFETCH_MAX = 100_000
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB,
+        ttl: float = DEFAULT_TTL,
+        max_mb: int = DEFAULT_MB,
+        version: str = RESULT_VERSION,
+    ) -> None:
+        self.ttl   = ttl
+        self.store = ArtifactStore(path, version=version, max_bytes=max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._pid  = os.getpid()
+        # key → (timestamp, result): writes not yet committed / entries prefetched
+        self._pending:    Dict[str, Tuple[float, Dict]] = {}
+        self._prefetched: Dict[str, Tuple[float, Dict]] = {}
+        self.hits = self.misses = self.expired = 0
+
+    @staticmethod
+    def key(hash_a: str, hash_b: str, threshold: float, namespace: str) -> str:
+        return hashlib.sha256(f"{hash_a}:{hash_b}:{threshold}:{namespace}".encode()).hexdigest()
+
+    # ── Get / put ────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            self._check_fork()
+            entry = self._pending.get(key) or self._prefetched.get(key)
+        if entry is None:
+            entry = self.store.get(key, RESULT_KIND)
+        if entry is None:
+            self.misses += 1
+            return None
+        stamp, result = entry
+        if time.time() - stamp >= self.ttl:
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        with self._lock:
+            self._check_fork()
+            self._pending[key] = (time.time(), result)
+            self._prefetched.pop(key, None)
+            if len(self._pending) < self.FLUSH_BATCH:
+                return
+            batch, self._pending = self._pending, {}
+        self._write(batch)
+
+    def prefetch(self, keys: List[str]) -> int:
+        """
+        Load every stored entry among keys into memory, dropping what an
+        earlier call prefetched; returns how many were found. Only the
+        first PREFETCH_MAX keys are loaded, the rest are read on demand.
+        """
+        keys = keys[:self.PREFETCH_MAX]
+        with self._lock:
+            self._check_fork()
+            kept = {k: self._prefetched[k] for k in keys if k in self._prefetched}
+            wanted = [k for k in keys if k not in self._pending and k not in kept]
+        found = self.store.get_many(wanted, RESULT_KIND) if wanted else {}
+        with self._lock:
+            kept.update(found)
+            self._prefetched = kept
+        return len(found)
+
+    def flush(self) -> None:
+        """Commit buffered writes."""
+        with self._lock:
+            self._check_fork()
+            batch, self._pending = self._pending, {}
+        self._write(batch)
+
+    def _write(self, batch: Dict[str, Tuple[float, Dict]]) -> None:
+        if batch:
+            self.store.put_many([(k, RESULT_KIND, entry) for k, entry in batch.items()])
+
+    def _check_fork(self) -> None:
+        # A forked worker inherits the parent's buffer; the parent commits those
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pending = {}
+
+    # ── Housekeeping ─────────────────────────────────────────────────────────
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = {}
+            self._prefetched = {}
+        self.store.delete_kind(RESULT_KIND)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "pending": len(self._pending),
+            "prefetched": len(self._prefetched),
+            "store": self.store.stats(),
+        }
+
+
+_caches: Dict[str, Type4ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(path: str = DEFAULT_DB) -> Type4ResultCache:
+    """One cache per database path and process, shared by every Type-4 detector."""
+    resolved = str(Path(path).resolve())
+    with _caches_lock:
+        cache = _caches.get(resolved)
+        if cache is None:
+            cache = _caches[resolved] = Type4ResultCache(resolved)
+        return cache
+
+
+@atexit.register
+def _flush_all() -> None:
+    for cache in list(_caches.values()):
+        try:
+            cache.flush()
+        except Exception as e:
+            logger.debug(f"[Type4ResultCache] Final flush failed: {e}")
@@ -9,18 +9,27 @@ Complete pipeline with:
   3. Algorithm classification for common assignments
   4. Research-based score fusion
   5. Problem-specific detection strategies
+
+Backends (TYPE4_BACKEND=auto|educational|pdg|heuristic, default auto):
+  educational  Joern + I/O testing + algorithm classification
+  pdg          custom regex PDG features, every pair of a batch scored in
+               one vectorized pass (custom_pdg/batch_scorer.py); needs no
+               compiler, Docker or Joern
+  heuristic    signature Jaccard, last resort
+auto picks educational, then pdg when no compiler is installed or the
+educational pipeline fails to load, then heuristic.
 """
 
 from __future__ import annotations
 
 import logging
+import os
 import shutil
-import hashlib
-import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-import time
+
+from detectors.type4.result_cache import content_hash, get_result_cache
 
 logger = logging.getLogger(__name__)
 
@@ -47,30 +56,41 @@ class Type4Detector:
     - Search algorithms (linear, binary)
     """
     
-    def __init__(self, threshold: float = 0.60) -> None:
+    def __init__(self, threshold: float = 0.60, backend: Optional[str] = None) -> None:
         self.threshold = threshold
+        self._backend = (backend or os.environ.get("TYPE4_BACKEND", "auto")).lower()
         self._edu = None
         self._custom = None
         self._mode = "uninitialized"
+        self._tools = ""
         self._cache_dir = Path("./.cache/type4")
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._results = get_result_cache(str(self._cache_dir / "results.db"))
         self._init_backend()
     
     def _init_backend(self) -> None:
         """Initialize with graceful fallbacks"""
-        logger.info("[Type4Detector] Initializing backend…")
+        logger.info("[Type4Detector] Initializing backend (%s)…", self._backend)
+        
+        if self._backend == "pdg" and self._init_pdg():
+            return
+        if self._backend in ("pdg", "heuristic"):
+            self._mode = "heuristic"
+            logger.info("⚠️  [Type4Detector] Using heuristic fallback (no compilation)")
+            return
+        
+        # Check for required tools
+        has_gpp = shutil.which("g++") is not None
+        has_python = shutil.which("python3") or shutil.which("python")
+        
+        if not has_gpp and not has_python:
+            logger.warning("[Type4Detector] No compiler available (g++ or python)")
+            if self._backend == "auto" and self._init_pdg():
+                return
         
         # Try to initialize educational detector
         try:
             from detectors.type4.educational import EducationalType4Detector
             
-            # Check for required tools
-            has_gpp = shutil.which("g++") is not None
-            has_python = shutil.which("python3") or shutil.which("python")
-            
-            if not has_gpp and not has_python:
-                logger.warning("[Type4Detector] No compiler available (g++ or python)")
-            
             # Try to load Joern (optional)
             joern = self._try_load_joern()
             
@@ -83,6 +103,7 @@ class Type4Detector:
                 # caching is handled at the Type4Detector level above.
             )
             self._mode = "educational"
+            self._tools = f"joern={int(joern is not None)},gpp={int(has_gpp)},python={int(bool(has_python))}"
             logger.info(
                 "✅ [Type4Detector] Educational pipeline ready (joern=%s, compiler=%s)",
                 joern is not None,
@@ -95,10 +116,24 @@ class Type4Detector:
         except Exception as e:
             logger.warning("[Type4Detector] Educational detector init error: %s", e)
         
-        # Fallback to heuristic detector
+        # Fallback to the custom PDG backend, then the heuristic detector
+        if self._init_pdg():
+            return
         self._mode = "heuristic"
         logger.info("⚠️  [Type4Detector] Using heuristic fallback (no compilation)")
     
+    def _init_pdg(self) -> bool:
+        """Custom PDG backend (no compiler needed)"""
+        try:
+            from detectors.type4.custom_pdg import Type4PDGDetector
+            self._custom = Type4PDGDetector(threshold=self.threshold)
+        except Exception as e:
+            logger.warning("[Type4Detector] Custom PDG detector init error: %s", e)
+            return False
+        self._mode = "pdg"
+        logger.info("✅ [Type4Detector] Custom PDG pipeline ready (batch-vectorized, no compiler)")
+        return True
+    
     def _try_load_joern(self) -> Optional[Any]:
         """Attempt to load Joern detector (optional)"""
         try:
@@ -133,17 +168,46 @@ class Type4Detector:
         """
         fa, fb = str(file_a), str(file_b)
         logger.info("[Type4Detector] detect(%s, %s)", Path(fa).name, Path(fb).name)
-        
+        # Hashed once here and handed down, so the educational layer never re-reads
+        hashes = (content_hash(fa), content_hash(fb))
+        return self._detect_keyed(fa, fb, self._pair_key(*hashes), include_features, hashes)
+
+    def detect_pair(
+        self,
+        art_a: Any,
+        art_b: Any,
+        include_features: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        detect() on precomputed FileArtifacts. The result-cache key is built
+        from the artifacts' content hashes, so neither file is re-read or
+        re-hashed just to look the pair up.
+        """
+        fa, fb = art_a.path, art_b.path
+        logger.info("[Type4Detector] detect_pair(%s, %s)", art_a.name, art_b.name)
+        hashes = (art_a.content_hash, art_b.content_hash)
+        cache_key = self._pair_key(*hashes)
+        return self._detect_keyed(fa, fb, cache_key, include_features, hashes)
+
+    def _detect_keyed(
+        self,
+        fa: str,
+        fb: str,
+        cache_key: str,
+        include_features: bool,
+        content_hashes: Optional[Tuple[str, str]] = None,
+    ) -> Dict[str, Any]:
         # Check cache
-        cache_key = self._get_cache_key(fa, fb)
         cached = self._get_cached(cache_key)
-        if cached:
+        if cached is not None:
             logger.info("[Type4Detector] Cache hit")
             return cached
         
         # Run detection
         if self._mode == "educational":
-            result = self._detect_educational(fa, fb, include_features)
+            result = self._detect_educational(fa, fb, include_features, content_hashes)
+        elif self._mode == "pdg":
+            result = self._detect_pdg(fa, fb, include_features)
         else:
             result = self._detect_heuristic(fa, fb, include_features)
         
@@ -153,11 +217,19 @@ class Type4Detector:
         return result
     
     def _detect_educational(
-        self, fa: str, fb: str, include_features: bool
+        self,
+        fa: str,
+        fb: str,
+        include_features: bool,
+        content_hashes: Optional[Tuple[str, str]] = None,
     ) -> Dict[str, Any]:
         """Use educational detector with full pipeline"""
         try:
-            result = self._edu.detect(fa, fb, include_features=include_features)
+            result = self._edu.detect(
+                fa, fb,
+                include_features=include_features,
+                content_hashes=content_hashes,
+            )
             
             # Ensure all required fields
             result.setdefault("semantic_score", 0.0)
@@ -175,6 +247,40 @@ class Type4Detector:
             logger.error("[Type4Detector] Educational detect() error: %s", e)
             return self._fallback_result(f"Educational detector failed: {e}")
     
+    def _detect_pdg(
+        self, fa: str, fb: str, include_features: bool
+    ) -> Dict[str, Any]:
+        """Custom PDG scores — looked up from the prepared batch when possible"""
+        try:
+            score, category_scores = self._custom.batch_score(fa, fb)
+            
+            confidence = self._custom.similarity_calculator.get_confidence_level(score)
+            if score >= self.threshold:
+                interpretation = f"⚠️ Possible semantic clone (PDG score={score:.0%})"
+            else:
+                interpretation = f"✅ Low semantic similarity (PDG score={score:.0%})"
+            
+            result = {
+                "semantic_score": score,
+                "is_semantic_clone": score >= self.threshold,
+                "confidence": confidence,
+                "backend": "custom_pdg",
+                "category": "",
+                "interpretation": interpretation,
+                "io_match_score": None,
+                "io_available": False,
+                "category_scores": category_scores,
+            }
+            if include_features:
+                ext = self._custom.feature_extractor
+                result["features_a"] = ext.to_dict(self._custom._get_features(fa))
+                result["features_b"] = ext.to_dict(self._custom._get_features(fb))
+            return result
+            
+        except Exception as e:
+            logger.error("[Type4Detector] Custom PDG detect error: %s", e)
+            return self._fallback_result(f"Custom PDG detection failed: {e}")
+    
     def _detect_heuristic(
         self, fa: str, fb: str, include_features: bool
     ) -> Dict[str, Any]:
@@ -323,46 +429,18 @@ class Type4Detector:
             return "LOW"
         return "UNLIKELY"
     
-    def _get_cache_key(self, file_a: str, file_b: str) -> str:
-        """Generate cache key from file contents"""
-        def get_hash(path: str) -> str:
-            path = Path(path)
-            if not path.exists():
-                return ""
-            content = path.read_text(encoding='utf-8', errors='ignore')
-            return hashlib.md5(content.encode()).hexdigest()[:16]
-        
-        hash_a = get_hash(file_a)
-        hash_b = get_hash(file_b)
-        combined = f"{hash_a}_{hash_b}_{self.threshold}"
-        return hashlib.md5(combined.encode()).hexdigest()[:16]
+    def _pair_key(self, hash_a: str, hash_b: str) -> str:
+        """Result-cache key from two content hashes (sha256 of the file bytes);
+        namespaced by the backend and the tools it found"""
+        return self._results.key(hash_a, hash_b, self.threshold, f"type4:{self.get_backend_key()}")
     
     def _get_cached(self, key: str) -> Optional[Dict]:
         """Get cached result"""
-        cache_file = self._cache_dir / f"{key}.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    cached = json.load(f)
-                    # Check age (1 day)
-                    age = time.time() - cached.get('timestamp', 0)
-                    if age < 86400:
-                        return cached.get('result')
-            except Exception:
-                pass
-        return None
+        return self._results.get(key)
     
     def _cache_result(self, key: str, result: Dict) -> None:
-        """Cache result"""
-        cache_file = self._cache_dir / f"{key}.json"
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'timestamp': time.time(),
-                    'result': result
-                }, f)
-        except Exception:
-            pass
+        """Cache result (buffered; committed in batches)"""
+        self._results.put(key, result)
     
     def _fallback_result(self, error_msg: str = "") -> Dict[str, Any]:
         return {
@@ -382,17 +460,66 @@ class Type4Detector:
             },
         }
     
-    def prepare_batch(self, file_paths: List[Any]) -> None:
-        """Batch preparation"""
-        pass
+    def prepare_batch(self, file_paths: List[Any],
+                      content_hashes: Optional[Dict[str, str]] = None) -> None:
+        """Batch stage — Joern PDGs extracted and every file compiled and run once,
+        or (pdg backend) every pair scored in one vectorized pass"""
+        if self._mode == "educational":
+            self._edu.prepare_batch(file_paths, content_hashes)
+        elif self._mode == "pdg":
+            self._custom.prepare_batch([str(p) for p in file_paths])
+
+    def prepare_job(self, file_paths: List[Any]) -> None:
+        """Cheap per-job stage, nothing compiled: the pdg backend scores every
+        pair; the educational backend classifies every file once and buckets
+        the job by problem category (cross-category pairs need no Type-4 work)"""
+        if self._mode == "educational":
+            self._edu.classify_batch(file_paths)
+        elif self._mode == "pdg":
+            self._custom.prepare_batch([str(p) for p in file_paths])
+    
+    def prepare_pdgs(self, file_paths: List[Any]) -> None:
+        """Joern batch stage (educational backend): every file's PDG extracted
+        once, before the pairs run, instead of two Joern queries per pair"""
+        if self._mode == "educational":
+            self._edu.prepare_pdgs(file_paths)
+
+    def clear_job(self) -> None:
+        """Drop the per-job state of the last prepare_job/prepare_batch"""
+        if self._mode == "educational":
+            self._edu.clear_batch()
+        elif self._mode == "pdg":
+            self._custom.clear_batch()
+    
+    def category_buckets(self) -> Optional[Any]:
+        """CategoryBuckets of the last prepared job (educational backend), or None"""
+        return self._edu._buckets if self._mode == "educational" else None
+    
+    def attach_store(self, store: Any) -> None:
+        """Persist per-file I/O profiles in a content-addressed ArtifactStore"""
+        if self._mode == "educational":
+            self._edu.attach_store(store)
+    
+    def prefetch(self, hash_pairs: List[Tuple[str, str]]) -> int:
+        """Load the cached results of these (content hash a, content hash b) pairs in bulk"""
+        return self._results.prefetch([self._pair_key(ha, hb) for ha, hb in hash_pairs])
+    
+    def flush_cache(self) -> None:
+        """Commit buffered result-cache writes"""
+        self._results.flush()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Result-cache hit/miss counters"""
+        return self._results.stats()
     
     def clear_cache(self) -> None:
         """Clear result cache"""
-        import shutil
-        if self._cache_dir.exists():
-            shutil.rmtree(self._cache_dir)
-            self._cache_dir.mkdir(parents=True, exist_ok=True)
-            logger.info("[Type4Detector] Cache cleared")
+        self._results.clear()
+        logger.info("[Type4Detector] Cache cleared")
     
     def get_mode(self) -> str:
-        return self._mode
\ No newline at end of file
+        return self._mode
+
+    def get_backend_key(self) -> str:
+        """Mode plus the tools it found (Joern, compilers) — what a score depends on"""
+        return f"{self._mode}:{self._tools}" if self._tools else self._mode
\ No newline at end of file
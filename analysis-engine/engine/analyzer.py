@@ -22,6 +22,7 @@ v3.0 changes (on top of v2.4):
   4. type4 threshold set to 0.60 (educational calibrated)
 """
 
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass, field
@@ -29,6 +30,7 @@ import time
 import sys
 import math
 import gc
+import random
 
 try:
     import psutil
@@ -37,6 +39,9 @@ except ImportError:
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from engine.cascade import CascadeScheduler, PairState, Stage
+from engine.incremental import IncrementalReport
+
 # Cross-layer / IoT detector — the new addition in v3.1.
 # We import lazily inside methods so a missing dependency never breaks
 # the regular student-assignment flow.
@@ -68,6 +73,35 @@ class AnalyzerConfig:
     review_threshold: float = 0.70
     type1_threshold: float = 0.98
     type2_threshold: float = 0.90
+    # Skip the near-exact Type-1 ratio when real_quick_ratio/quick_ratio < 0.98.
+    # Opt-in: skipped pairs report the upper bound as their type1 score
+    type1_bounded: bool = False
+    # Cascade scheduler — skip stages once the clone type is decided or out of
+    # reach. Opt-in: decided pairs report the deciding score as structural
+    cascade: bool = False
+    # Pair execution — 1 keeps everything in-process; >1 forks a worker pool
+    pair_workers: int = 1
+    pair_chunk_size: int = 32
+    # Candidate pre-filter (winnowing inverted index) — only for large jobs,
+    # pairs outside the candidate set get a cheap "no clone" result
+    candidate_min_files: int = 200
+    candidate_min_shared: int = 3
+    candidate_min_jaccard: float = 0.05
+    candidate_recall_sample: int = 50
+    # ZIP jobs, assignments and the DB service drop pruned pairs without the
+    # recall sample analyze_batch takes, so pruning there is opt-in
+    candidate_prune_unsampled: bool = False
+    # MinHash/LSH over Type-2 shingles — 32 bands × 4 rows ≈ 50% hit rate at J≈0.38
+    lsh_bands: int = 32
+    lsh_rows: int = 4
+    # Fragment LCS backend — "difflib" (thresholds tuned on it) or "bitparallel"
+    lcs_backend: str = "difflib"
+    # Lossy fragment MinHash pre-filter (None = exact length/bag bounds only)
+    fragment_minhash_min: Optional[float] = None
+    # Content-hash store of per-file artifacts, fragments and pair results
+    # from earlier runs (None = always recompute everything), LRU-capped
+    incremental_dir: Optional[str] = None
+    artifact_store_mb: int = 512
 
 
 # =============================================================================
@@ -129,6 +163,8 @@ class PairResult:
     primary_clone_type: str = "none"
     # v3.1 — cross-layer result, None when not applicable (student C++/Java/Python, etc.)
     cross_layer: Optional[Any] = None
+    # Stages run/skipped by the cascade scheduler (None when it is off)
+    cascade: Optional[Dict] = None
 
 
 # =============================================================================
@@ -151,6 +187,13 @@ def _get_lang(path: str) -> str:
     return _EXT_LANG.get(Path(path).suffix.lower(), "unknown")
 
 
+def _paired_files(file_paths: List[str]) -> List[str]:
+    """Files with at least one same-language partner — the only ones a pair can reach"""
+    langs = [_get_lang(p) for p in file_paths]
+    counts = Counter(langs)
+    return [p for p, lang in zip(file_paths, langs) if counts[lang] > 1]
+
+
 def build_same_language_pairs(file_paths: List[str]) -> List[Tuple[str, str]]:
     pairs = []
     n = len(file_paths)
@@ -191,24 +234,51 @@ class CloneAnalyzer:
         print(f"   Semantic threshold   : {self.config.semantic_threshold}")
         print(f"   Type-4 pre-filter    : T1/T2/T3 < 0.50 required")
         print(f"   Cross-layer (IoT)    : {'enabled' if _CROSS_LAYER_AVAILABLE else 'unavailable'}")
+        print(f"   Pair workers         : {self.config.pair_workers}")
         print(f"{'='*60}\n")
 
     def _init_detectors(self):
         from detectors.type1.type1_detector import Type1Detector
         from detectors.type2.type2_detector import Type2Detector
         from detectors.type3.hybrid_detector import Type3HybridDetector
+        from engine.file_artifacts import ArtifactCache
+        from engine.pair_engine import PairEngine
+        from engine.artifact_store import ArtifactStore
+        from engine.incremental import IncrementalStore, pipeline_version
+        from detectors.type3.lcs_comparator import set_backend
 
+        set_backend(self.config.lcs_backend)
         self._type1 = Type1Detector()
-        self._type2 = Type2Detector()
+        self._type2 = Type2Detector(minhash_perm=self.config.lsh_bands * self.config.lsh_rows)
         self._structural = Type3HybridDetector(
             hybrid_threshold=self.config.structural_threshold,
             ml_threshold=self.config.ml_threshold,
+            fragment_minhash_min=self.config.fragment_minhash_min,
+        )
+        self._store = None
+        if self.config.incremental_dir:
+            artifact_store = ArtifactStore(
+                str(Path(self.config.incremental_dir) / "artifacts.db"),
+                version=pipeline_version(self.config),
+                max_bytes=self.config.artifact_store_mb * 1024 * 1024,
+            )
+            self._store = IncrementalStore(artifact_store)
+            self._structural.attach_store(artifact_store)
+        # Per-file views shared by all four detectors — built once per job
+        self._artifacts = ArtifactCache(self._type1, self._type2, self._structural, store=self._store)
+        self._cascade = self._build_cascade()
+        # Pair loops fan out through here — forked workers inherit the job's artifacts
+        self._pair_engine = PairEngine(
+            self, workers=self.config.pair_workers, chunk_size=self.config.pair_chunk_size,
         )
 
         # Type-4: Educational Pipeline
         try:
             from detectors.type4.type4_detector import Type4Detector
             self._semantic = Type4Detector(threshold=self.config.semantic_threshold)
+            if self._store is not None:
+                # Per-file I/O profiles survive restarts alongside the artifacts
+                self._semantic.attach_store(self._store.store)
             print(f"✅ [Analyzer] Type-4 backend: {self._semantic.get_mode()}")
         except Exception as exc:
             print(f"⚠️  [Analyzer] Type-4 init failed ({exc}) — semantic detection disabled")
@@ -236,142 +306,213 @@ class CloneAnalyzer:
         return scan_batch_for_layers(file_paths)
 
     # =========================================================================
-    # SMART BATCHING METHODS
+    # PER-JOB ARTIFACTS — every file is read and tokenized exactly once
     # =========================================================================
 
-    def analyze_with_smart_batching(self, file_paths: List[str], detailed: bool = False) -> Dict[str, Any]:
-        start_time = time.time()
-        n = len(file_paths)
+    def prepare_job(self, file_paths: List[str]) -> None:
+        """
+        Reset the artifact cache for a new job, build every file's views
+        once, and train the batch frequency filter from the cached tokens.
+        Pairs analyzed afterwards only run the comparison step.
+        """
+        from detectors.type3.normalizer import reset_token_ids
+
+        self._artifacts.clear()
+        # Between jobs: no fragment of this analyzer holds token ids now
+        reset_token_ids()
+        artifacts = self._artifacts.build_all(file_paths)
+        self._structural.prepare_artifacts(artifacts)
+        if self._semantic is not None:
+            # Type-4: files classified and bucketed by problem category once
+            # (or, no-compiler backend, every pair scored in one NumPy pass)
+            self._semantic.prepare_job(file_paths)
+            # Joern PDGs in one batch, here in the parent so forked pair
+            # workers inherit them
+            self._semantic.prepare_pdgs(_paired_files(file_paths))
+
+    def prefetch_pairs(self, file_pairs: List[Tuple[str, str]]) -> None:
+        """
+        Bulk-load cached Type-4 results for the pairs about to run, so
+        the pair loop (and forked workers, copy-on-write) reads them from
+        memory instead of one SQLite lookup per pair.
+        """
+        if self._semantic is None or not file_pairs:
+            return
+        hashes = []
+        for fa, fb in file_pairs:
+            ha, hb = self._artifacts.get(fa).content_hash, self._artifacts.get(fb).content_hash
+            if ha and hb:
+                hashes.append((ha, hb))
+        if hashes:
+            self._semantic.prefetch(hashes)
+
+    def flush_pair_caches(self) -> None:
+        """Commit buffered Type-4 result-cache writes (end of every pair chunk)."""
+        if self._semantic is not None:
+            self._semantic.flush_cache()
+
+    def fragment_clone_index(self, fragments: List[Any]) -> "FragmentIndex":
+        """
+        Batch-wide fragment clone index over the job's cached fragments:
+        exact-normalized buckets for Type-1/2, size-band + LSH buckets for
+        Type-3 candidates, one partition per language. Feeds
+        CloneClusterer directly. Clusters form at structural_threshold;
+        below 0.70 the lossy LSH stage is replaced by exact comparison.
+        """
+        from detectors.type3.fragment_index import FragmentIndex, LSH_MIN_SIMILARITY
+
+        exhaustive = self.config.structural_threshold < LSH_MIN_SIMILARITY
+        return FragmentIndex(
+            exhaustive=exhaustive, partition_of=lambda f: _get_lang(f.file_path)
+        ).build(fragments)
 
+    def _fragment_clones(self, index: "FragmentIndex", detailed: bool) -> Dict[str, Any]:
+        """Response fields (clone_classes, type3_pairs) from one FragmentIndex."""
+        clone_classes = []
+        try:
+            clone_classes = index.clone_classes(
+                self._structural._clusterer, min_similarity=self.config.structural_threshold
+            )
+        except Exception as e:
+            print(f"⚠️ Error clustering: {e}")
+
+        type3_pairs = self._serialize_fragments(index.type3_pairs(), "type3")
+        if not detailed:
+            for p in type3_pairs:
+                del p["source_a"], p["source_b"]
+        return {
+            "clone_classes":  [self._serialize_clone_class(c) for c in clone_classes],
+            "type3_pairs":    type3_pairs,
+            "fragment_index": index.diagnostics(),
+        }
+
+    # =========================================================================
+    # SMART BATCHING METHODS
+    # =========================================================================
+
+    def _probe_block_size(self) -> int:
         try:
             if psutil:
                 available_memory = psutil.virtual_memory().available / (1024 * 1024 * 1024)
                 if available_memory < 2:
-                    batch_size = 20
+                    return 20
                 elif available_memory < 4:
-                    batch_size = 30
-                else:
-                    batch_size = 50
-            else:
-                batch_size = 30
-        except:
-            batch_size = 30
-
-        num_batches = math.ceil(n / batch_size)
-        total_pairs = n * (n - 1) // 2
-        print(f"📊 Smart batching: {n} files → {num_batches} batches of ~{batch_size} files")
-        print(f"📊 Total pairs to process: {total_pairs}")
+                    return 30
+                return 50
+        except Exception:
+            pass
+        return 30
 
-        if n <= batch_size:
-            return self._analyze_original(file_paths, detailed)
-
-        all_pairs_results = []
-        all_clone_classes = []
-        all_fragment_pairs = []
-
-        for batch_idx in range(num_batches):
-            batch_start = batch_idx * batch_size
-            batch_end = min(batch_start + batch_size, n)
-            batch_files = file_paths[batch_start:batch_end]
-
-            print(f"🔄 Processing batch {batch_idx + 1}/{num_batches}: {len(batch_files)} files")
-
-            batch_result = self._analyze_batch(batch_files, detailed)
-
-            if 'all_pairs' in batch_result:
-                all_pairs_results.extend(batch_result.get('all_pairs', []))
-            if 'clone_classes' in batch_result:
-                all_clone_classes.extend(batch_result.get('clone_classes', []))
-            if 'all_fragment_pairs' in batch_result:
-                all_fragment_pairs.extend(batch_result.get('all_fragment_pairs', []))
-
-            gc.collect()
-            print(f"✅ Batch {batch_idx + 1} complete. Found {len(batch_result.get('all_pairs', []))} clone pairs")
+    def analyze_with_smart_batching(self, file_paths: List[str], detailed: bool = False) -> Dict[str, Any]:
+        """
+        Memory-bounded analysis of the *full* pair matrix.
+
+        The file list is cut into blocks sized from available RAM and the
+        upper-triangular pair matrix is walked tile by tile: (i, i) covers
+        pairs inside block i, (i, j>i) covers every pair across the two
+        blocks. Only the artifacts of the two active blocks stay resident;
+        block i is kept while j sweeps to the right, so each file is
+        rebuilt at most once per row. The frequency filter is trained over
+        all files in a streaming pass first, so scores match a one-shot run.
+        """
+        from detectors.type3.normalizer import reset_token_ids
 
-        processing_time = (time.time() - start_time) * 1000
+        start_time = time.time()
+        n = len(file_paths)
+        block_size = self._probe_block_size()
 
-        return {
-            "metadata": {
-                "total_files": n,
-                "total_comparisons": total_pairs,
-                "processing_time_ms": round(processing_time, 2),
-                "analysis_mode": "batched",
-                "batches_processed": num_batches,
-            },
-            "class_analysis": {
-                "is_simple_problem": False,
-                "high_similarity_ratio": 0,
-                "average_structural_similarity": 0,
-                "message": f"Processed {n} files in {num_batches} batches",
-                "outlier_pairs": [],
-            },
-            "statistics": {
-                "structural": {"high": 0, "medium": 0, "low": 0, "similar_count": len(all_pairs_results)},
-                "clone_types": {"type1": 0, "type2": 0, "type3": len(all_pairs_results), "type4": 0, "none": 0},
-                "overall": {"high_similarity": 0, "medium_similarity": len(all_pairs_results), "needs_review": 0},
-            },
-            "pairs_needing_review": [],
-            "all_pairs": all_pairs_results,
-            "clone_classes": all_clone_classes,
-        }
+        if n <= block_size:
+            return self._analyze_original(file_paths, detailed)
 
-    def _analyze_batch(self, file_paths: List[str], detailed: bool) -> Dict:
-        n = len(file_paths)
-        if n < 2:
-            return {"all_pairs": [], "clone_classes": [], "file_pair_scores": {}}
+        blocks = [file_paths[s:s + block_size] for s in range(0, n, block_size)]
+        num_blocks = len(blocks)
+        total_tiles = num_blocks * (num_blocks + 1) // 2
+        print(f"📊 Tiled scheduling: {n} files → {num_blocks} blocks of ~{block_size} files, {total_tiles} tiles")
 
-        # Scan the batch once for cross-layer signals — cheap, O(n) file reads
         layer_context = self._get_layer_context(file_paths)
         if layer_context.is_multi_layer:
             print(f"🌐 [Cross-Layer] {layer_context.reason}")
 
-        self._structural.prepare_batch([Path(p) for p in file_paths])
+        self._artifacts.clear()
+        reset_token_ids()
+        if self._semantic is not None:
+            # No whole-job Type-4 pass here (pdg would hold n² scores), but
+            # the previous job's buckets/batch scores must not be reused
+            self._semantic.clear_job()
+        fingerprints, signatures, type1_hashes = self._stream_sketches(file_paths)
+        exact_groups = self._exact_clone_groups(type1_hashes)
+        index = None if layer_context.is_multi_layer else self._candidate_index(fingerprints, signatures)
 
-        all_fragment_pairs = []
-        file_pair_scores = {}
-        pair_results = []
+        pairs: List[PairResult] = []
+        same_lang_pairs: List[Tuple[str, str]] = []
+        pruned: List[Tuple[str, str]] = []
+        fragments: List[Any] = []
+        tiles_processed = 0
+
+        for bi in range(num_blocks):
+            for bj in range(bi, num_blocks):
+                block_a, block_b = blocks[bi], blocks[bj]
+                tile_files = block_a + block_b if bi != bj else block_a
+                self._artifacts.retain(tile_files)
+                self._structural.index_artifacts(self._artifacts.build_all(tile_files))
+                if self._semantic is not None:
+                    # Per tile; PDGs of the kept block come from the PDG cache
+                    self._semantic.prepare_pdgs(_paired_files(tile_files))
+
+                if bi == bj:
+                    # Every block has exactly one diagonal tile: collect its
+                    # fragments there for the batch-wide fragment index
+                    fragments.extend(f for p in block_a for f in self._artifacts.get(p).fragments)
+                    tile_pairs = build_same_language_pairs(block_a)
+                else:
+                    tile_pairs = [(fa, fb) for fa in block_a for fb in block_b
+                                  if _get_lang(fa) == _get_lang(fb)]
 
-        for i in range(n):
-            for j in range(i + 1, n):
-                try:
-                    result = self._analyze_pair(
-                        file_paths[i], file_paths[j],
-                        include_details=detailed,
-                        layer_context=layer_context,
-                    )
-                    pair_results.append(result)
-
-                    if hasattr(result.structural, 'all_type3_pairs') and result.structural.all_type3_pairs:
-                        for fp in result.structural.all_type3_pairs:
-                            all_fragment_pairs.append({
-                                "frag_a": fp.get("frag_a"),
-                                "frag_b": fp.get("frag_b"),
-                                "similarity": fp.get("similarity", 0),
-                            })
-
-                    file_pair_scores[(i, j)] = max(result.structural.score, result.semantic.score)
-
-                except Exception as e:
-                    print(f"⚠️ Error analyzing pair ({i},{j}): {e}")
-                    continue
+                same_lang_pairs.extend(tile_pairs)
+                if index is not None:
+                    tile_pairs, tile_pruned = index.split(tile_pairs)
+                    pruned.extend(tile_pruned)
+                pairs.extend(self._run_pairs(tile_pairs, layer_context, detailed))
 
-        clone_classes = []
-        if all_fragment_pairs:
-            try:
-                clone_classes = self._structural.clusterer.cluster(
-                    all_fragment_pairs, min_similarity=self.config.structural_threshold
-                )
-            except Exception as e:
-                print(f"⚠️ Error clustering: {e}")
+                tiles_processed += 1
+            gc.collect()
+            print(f"✅ Block row {bi + 1}/{num_blocks} complete ({len(pairs)} pairs so far)")
 
-        all_pairs = [self._pair_to_dict(p, detailed) for p in pair_results]
+        candidate_report = None
+        if index is not None:
+            extra, candidate_report = self._pruned_results(pruned, pairs, index, layer_context, detailed)
+            pairs.extend(extra)
+        self._artifacts.clear()
+        self._structural.index_artifacts([])
+        pairs.extend(self._cross_layer_stubs(file_paths, same_lang_pairs, layer_context))
 
-        return {
-            "all_pairs": all_pairs,
-            "clone_classes": clone_classes,
-            "file_pair_scores": file_pair_scores,
-            "all_fragment_pairs": all_fragment_pairs
-        }
+        class_analysis = self._analyze_class(pairs)
+        stats = self._calculate_stats(pairs)
+        review_pairs = self._get_review_pairs(pairs, class_analysis)
+
+        pairs.sort(key=lambda x: x.structural.score, reverse=True)
+
+        processing_time = (time.time() - start_time) * 1000
+        response = self._build_response(
+            pairs=pairs,
+            class_analysis=class_analysis,
+            stats=stats,
+            review_pairs=review_pairs,
+            total_files=n,
+            total_comparisons=len(same_lang_pairs),
+            processing_time=processing_time,
+            detailed=detailed,
+        )
+        response["metadata"].update({
+            "analysis_mode":   "tiled",
+            "block_size":      block_size,
+            "tiles_processed": tiles_processed,
+        })
+        if candidate_report:
+            response["metadata"]["candidate_filter"] = candidate_report
+        response["exact_clone_groups"] = exact_groups
+        response.update(self._fragment_clones(self.fragment_clone_index(fragments), detailed))
+        return response
 
     def _analyze_original(self, file_paths: List[str], detailed: bool = False) -> Dict[str, Any]:
         start_time = time.time()
@@ -386,25 +527,30 @@ class CloneAnalyzer:
         if layer_context.is_multi_layer:
             print(f"🌐 [Cross-Layer] {layer_context.reason}")
 
-        self._structural.prepare_batch([Path(p) for p in file_paths])
+        self.prepare_job(file_paths)
+        exact_groups = self._exact_clone_groups(
+            {p: self._artifacts.get(p).type1_hash for p in file_paths}
+        )
+        # Built before the pairs run, so their fragment loops reuse its comparisons
+        fragment_index = self.fragment_clone_index(
+            [f for p in file_paths for f in self._artifacts.get(p).fragments]
+        )
+        self._structural.use_fragment_index(fragment_index)
+
+        index = None
+        if not layer_context.is_multi_layer:
+            index = self._candidate_index(*self._artifact_sketches(file_paths))
+
+        candidate_report = None
+        if index is not None:
+            candidates, pruned = index.split(same_lang_pairs)
+            pairs: List[PairResult] = self._run_pairs(candidates, layer_context, detailed)
+            extra, candidate_report = self._pruned_results(pruned, pairs, index, layer_context, detailed)
+            pairs.extend(extra)
+        else:
+            pairs = self._run_pairs(same_lang_pairs, layer_context, detailed)
 
-        pairs: List[PairResult] = []
-        for file_a, file_b in same_lang_pairs:
-            pair = self._analyze_pair(file_a, file_b, include_details=detailed, layer_context=layer_context)
-            pairs.append(pair)
-
-        # For cross-layer codebases, also analyze cross-language pairs
-        # (e.g. the JS watch file paired with the REST spec file —
-        #  these would be skipped by build_same_language_pairs)
-        if layer_context.is_multi_layer and _CROSS_LAYER_AVAILABLE:
-            all_pair_keys = {(a, b) for a, b in same_lang_pairs}
-            for file_a, file_b in _build_all_pairs(file_paths):
-                if (file_a, file_b) not in all_pair_keys:
-                    cl_result = analyze_cross_layer_pair(file_a, file_b, layer_context)
-                    if cl_result and cl_result.matches:
-                        # Emit a minimal PairResult so the frontend sees the cross-layer hit
-                        stub = self._make_cross_layer_stub(file_a, file_b, cl_result)
-                        pairs.append(stub)
+        pairs.extend(self._cross_layer_stubs(file_paths, same_lang_pairs, layer_context))
 
         class_analysis = self._analyze_class(pairs)
         stats = self._calculate_stats(pairs)
@@ -413,7 +559,7 @@ class CloneAnalyzer:
         pairs.sort(key=lambda x: x.structural.score, reverse=True)
 
         processing_time = (time.time() - start_time) * 1000
-        return self._build_response(
+        response = self._build_response(
             pairs=pairs,
             class_analysis=class_analysis,
             stats=stats,
@@ -423,6 +569,11 @@ class CloneAnalyzer:
             processing_time=processing_time,
             detailed=detailed,
         )
+        if candidate_report:
+            response["metadata"]["candidate_filter"] = candidate_report
+        response["exact_clone_groups"] = exact_groups
+        response.update(self._fragment_clones(fragment_index, detailed))
+        return response
 
     # =========================================================================
     # PUBLIC API
@@ -456,62 +607,314 @@ class CloneAnalyzer:
         if layer_context.is_multi_layer:
             print(f"🌐 [Assignment Cross-Layer] {layer_context.reason}")
 
-        self._structural.prepare_batch([Path(p) for p in all_files])
-        clone_pairs = []
-        remaining_pairs = []
+        self.prepare_job([fp for fp in all_files if Path(fp).exists()])
+        # Flatten student pairs into file pairs, remembering which students they belong to
+        owners, file_pairs = [], []
         for i in range(n):
             for j in range(i + 1, n):
                 if (i, j) in skip_pairs:
                     continue
-                sub_a = student_submissions[i]
-                sub_b = student_submissions[j]
-                try:
-                    for fa in sub_a.get("files", []):
-                        for fb in sub_b.get("files", []):
-                            if not Path(fa).exists() or not Path(fb).exists():
-                                continue
-                            if _get_lang(fa) != _get_lang(fb):
-                                continue
-                            pair = self._analyze_pair(
-                                fa, fb,
-                                include_details=False,
-                                enable_type1=enable_type1, enable_type2=enable_type2,
-                                enable_type3=enable_type3, enable_type4=enable_type4,
-                                layer_context=layer_context,
-                            )
-                            t1, t2, t3, t4 = pair.type1_score, pair.type2_score, pair.structural.score, pair.semantic.score
-                            effective_score = max(t1, t2, t3, t4)
-                            if effective_score < 0.25:
-                                continue
-                            pair_dict = {
-                                "student_a_id": sub_a.get("student_id"), "student_b_id": sub_b.get("student_id"),
-                                "submission_a_id": sub_a.get("submission_id"), "submission_b_id": sub_b.get("submission_id"),
-                                "file_a": pair.file_a, "file_b": pair.file_b,
-                                "type1_score": t1, "type2_score": t2, "structural_score": t3, "semantic_score": t4,
-                                "effective_score": round(effective_score, 4),
-                                "primary_clone_type": pair.primary_clone_type, "similarity_level": pair.similarity_level,
-                                "needs_review": pair.needs_review, "summary": pair.summary,
-                            }
-                            # Attach cross-layer info if found (rare for assignments, but possible)
-                            if pair.cross_layer:
-                                pair_dict["cross_layer"] = pair.cross_layer.to_dict()
-                            clone_pairs.append(pair_dict)
-                except Exception as e:
-                    print(f"⚠️ Pair ({i},{j}) error: {e}")
+                for fa in student_submissions[i].get("files", []):
+                    for fb in student_submissions[j].get("files", []):
+                        if not Path(fa).exists() or not Path(fb).exists():
+                            continue
+                        if _get_lang(fa) != _get_lang(fb):
+                            continue
+                        owners.append((i, j))
+                        file_pairs.append((fa, fb))
+
+        if not layer_context.is_multi_layer and self.config.candidate_prune_unsampled:
+            index = self._candidate_index(
+                *self._artifact_sketches(p for pair in file_pairs for p in pair)
+            )
+            if index is not None:
+                # Lossy: pruned pairs are dropped unanalyzed, including real
+                # clones the filter misses (no recall sample on this path)
+                kept = [k for k, (fa, fb) in enumerate(file_pairs) if index.is_candidate(fa, fb)]
+                print(f"🔎 [Candidates] {len(kept)}/{len(file_pairs)} file pairs kept by winnowing index "
+                      f"— {index.diagnostics()}")
+                owners     = [owners[k] for k in kept]
+                file_pairs = [file_pairs[k] for k in kept]
+
+        clone_pairs = []
+        remaining_pairs = []
+        report = IncrementalReport()
+        for idx, pair, err in self.run_incremental(
+            file_pairs, layer_context, report,
+            enable_type1=enable_type1, enable_type2=enable_type2,
+            enable_type3=enable_type3, enable_type4=enable_type4,
+        ):
+            i, j = owners[idx]
+            if err:
+                print(f"⚠️ Pair ({i},{j}) error: {err}")
+                if [i, j] not in remaining_pairs:
                     remaining_pairs.append([i, j])
-        return {"clone_pairs": clone_pairs, "remaining_pairs": remaining_pairs, "class_analysis": {}}
+                continue
+            sub_a = student_submissions[i]
+            sub_b = student_submissions[j]
+            t1, t2, t3, t4 = pair.type1_score, pair.type2_score, pair.structural.score, pair.semantic.score
+            effective_score = max(t1, t2, t3, t4)
+            if effective_score < 0.25:
+                continue
+            pair_dict = {
+                "student_a_id": sub_a.get("student_id"), "student_b_id": sub_b.get("student_id"),
+                "submission_a_id": sub_a.get("submission_id"), "submission_b_id": sub_b.get("submission_id"),
+                "file_a": pair.file_a, "file_b": pair.file_b,
+                "type1_score": t1, "type2_score": t2, "structural_score": t3, "semantic_score": t4,
+                "effective_score": round(effective_score, 4),
+                "primary_clone_type": pair.primary_clone_type, "similarity_level": pair.similarity_level,
+                "needs_review": pair.needs_review, "summary": pair.summary,
+            }
+            # Attach cross-layer info if found (rare for assignments, but possible)
+            if pair.cross_layer:
+                pair_dict["cross_layer"] = pair.cross_layer.to_dict()
+            clone_pairs.append(pair_dict)
+        return {"clone_pairs": clone_pairs, "remaining_pairs": remaining_pairs, "class_analysis": {},
+                "incremental": report.to_dict()}
 
     def get_pair_details(self, file_path_a: str, file_path_b: str) -> Dict[str, Any]:
-        self._structural.prepare_batch([Path(file_path_a), Path(file_path_b)])
+        self.prepare_job([file_path_a, file_path_b])
         # Scan the two-file context — might be a direct repo comparison
         layer_context = self._get_layer_context([file_path_a, file_path_b])
-        pair = self._analyze_pair(file_path_a, file_path_b, include_details=True, layer_context=layer_context)
+        # The detail view shows every detector's score, so no short-circuiting
+        pair = self._analyze_pair(file_path_a, file_path_b, include_details=True,
+                                  layer_context=layer_context, cascade=False)
         return self._pair_to_dict(pair, detailed=True)
 
+    # =========================================================================
+    # CANDIDATE PRE-FILTER — winnowing inverted index for large jobs
+    # =========================================================================
+
+    def _candidate_index(self, fingerprints: Dict[str, set],
+                         signatures: Dict[str, Any]) -> Optional["CandidateIndex"]:
+        """
+        Build the winnowing inverted index and the Type-2 MinHash LSH index
+        over the job's per-file sketches, or return None when the job is too
+        small for pruning to be worth the recall risk.
+        """
+        if len(fingerprints) < self.config.candidate_min_files:
+            return None
+        from detectors.type2.minhash_lsh import LSHIndex
+        from detectors.type3.winnowing_index import WinnowingIndex
+        from engine.candidate_index import CandidateIndex
+
+        winnowing = WinnowingIndex(
+            min_shared=self.config.candidate_min_shared,
+            min_jaccard=self.config.candidate_min_jaccard,
+        )
+        winnowing.build(fingerprints, self._structural.freq_filter.common_hashes)
+
+        lsh = LSHIndex(bands=self.config.lsh_bands, rows=self.config.lsh_rows)
+        empty = None
+        for path, sig in signatures.items():
+            if sig is None:     # unreadable file — never collides
+                empty = empty if empty is not None else self._type2.build_signature([])
+                sig = empty
+            lsh.add(path, sig)
+        return CandidateIndex(winnowing, lsh)
+
+    def _artifact_sketches(self, paths) -> Tuple[Dict[str, set], Dict[str, Any]]:
+        """(fingerprints, MinHash signatures) for cached files, deduplicated in order."""
+        fingerprints, signatures = {}, {}
+        for p in paths:
+            if p not in fingerprints:
+                art = self._artifacts.get(p)
+                fingerprints[p] = art.fingerprint
+                signatures[p]   = art.type2_minhash
+        return fingerprints, signatures
+
+    def _stream_sketches(
+        self, file_paths: List[str]
+    ) -> Tuple[Dict[str, set], Dict[str, Any], Dict[str, str]]:
+        """
+        One streaming pass over the job for the tile scheduler: reads each
+        file once, trains the frequency filter and returns the per-file
+        sketches (fingerprints, MinHash signatures, Type-1 hashes) without
+        keeping tokens or text.
+        """
+        signatures: Dict[str, Any] = {}
+        type1_hashes: Dict[str, str] = {}
+
+        def _sources():
+            for p in file_paths:
+                try:
+                    code = Path(p).read_bytes().decode("utf-8", errors="ignore")
+                except Exception:
+                    signatures[str(p)] = None
+                    yield str(p), None
+                    continue
+                signatures[str(p)] = self._type2.build_signature(self._type2.build_view(code))
+                type1_hashes[str(p)] = self._type1.build_view(code)[1]
+                yield str(p), code
+
+        fingerprints = self._structural.prepare_streaming(_sources())
+        return fingerprints, signatures, type1_hashes
+
+    def _exact_clone_groups(self, type1_hashes: Dict[str, str]) -> List[Dict]:
+        """
+        Identical-after-normalization groups, straight from the O(n) Type-1
+        hash buckets — no pairwise comparison involved.
+        """
+        groups = self._type1.group_identical(type1_hashes)
+        if groups:
+            print(f"⚡ [Type-1] {len(groups)} identical group(s) covering "
+                  f"{sum(len(g) for g in groups)} files")
+        return [
+            {
+                "type1_hash": type1_hashes[g[0]][:16],
+                "size":       len(g),
+                "files":      [Path(p).name for p in g],
+            }
+            for g in groups
+        ]
+
+    def select_candidates(
+        self, file_pairs: List[Tuple[str, str]]
+    ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]], Optional[Dict]]:
+        """
+        Split file_pairs into (candidates, pruned, diagnostics) for callers
+        outside the analyzer (ZIP jobs, the DB service). Must run after
+        prepare_job(). Small jobs, and every job unless
+        config.candidate_prune_unsampled is set, come back unpruned with
+        diagnostics None. Pruning is lossy: callers drop pruned pairs
+        without a recall sample, so they should log the diagnostics.
+        """
+        if not self.config.candidate_prune_unsampled:
+            return list(file_pairs), [], None
+        index = self._candidate_index(
+            *self._artifact_sketches(p for pair in file_pairs for p in pair)
+        )
+        if index is None:
+            return list(file_pairs), [], None
+        candidates, pruned = index.split(file_pairs)
+        report = index.diagnostics()
+        report.update(candidate_pairs=len(candidates), pruned_pairs=len(pruned))
+        return candidates, pruned, report
+
+    def _pruned_results(
+        self, pruned: List[Tuple[str, str]], analyzed: List[PairResult],
+        index: "CandidateIndex", layer_context, detailed: bool,
+    ) -> Tuple[List[PairResult], Dict]:
+        """
+        Results for the pairs the index pruned, plus recall diagnostics.
+
+        A fixed-seed random sample of pruned pairs is still fully analyzed:
+        the clone rate in that sample estimates how many clones the filter
+        missed, giving estimated_recall = found / (found + est. missed).
+        Every other pruned pair gets a cheap "no clone" stub.
+        """
+        k = min(self.config.candidate_recall_sample, len(pruned))
+        sample_ids = set(random.Random(0).sample(range(len(pruned)), k)) if k else set()
+        sampled = self._run_pairs([pruned[i] for i in sorted(sample_ids)], layer_context, detailed)
+
+        found  = sum(1 for p in analyzed if p.primary_clone_type != "none")
+        missed = sum(1 for p in sampled if p.primary_clone_type != "none")
+        est_missed = missed / len(sampled) * len(pruned) if sampled else 0.0
+        recall = found / (found + est_missed) if (found + est_missed) else 1.0
+
+        stubs = [
+            self._make_pruned_stub(a, b, index)
+            for i, (a, b) in enumerate(pruned) if i not in sample_ids
+        ]
+
+        total = len(analyzed) + len(pruned)
+        report = index.diagnostics()
+        report.update({
+            "total_pairs":           total,
+            "candidate_pairs":       len(analyzed),
+            "pruned_pairs":          len(pruned),
+            "reduction":             round(len(pruned) / total, 4) if total else 0.0,
+            "recall_sample":         len(sampled),
+            "sampled_clones_missed": missed,
+            "estimated_recall":      round(recall, 4),
+        })
+        print(f"🔎 [Candidates] {len(analyzed)}/{total} pairs analyzed, "
+              f"estimated recall {recall:.1%} ({missed}/{len(sampled)} sampled pruned pairs were clones)")
+        return sampled + stubs, report
+
+    def _make_pruned_stub(self, file_a: str, file_b: str, index: "CandidateIndex") -> PairResult:
+        """Cheap "no clone" PairResult for a pair outside the candidate set."""
+        structural = StructuralResult(
+            score=0.0, is_similar=False, confidence="UNLIKELY",
+            discrimination={"pruned_by": "candidate_index", **index.pre_scores(file_a, file_b)},
+        )
+        semantic = SemanticResult(score=0.0, is_similar=False, confidence="UNLIKELY")
+        return PairResult(
+            file_a=Path(file_a).name,
+            file_b=Path(file_b).name,
+            structural=structural,
+            semantic=semantic,
+            similarity_level="NONE",
+            needs_review=False,
+            summary="✅ No significant similarity detected.",
+        )
+
+    # =========================================================================
+    # INCREMENTAL — reuse pair results whose two files are unchanged
+    # =========================================================================
+
+    def run_incremental(self, file_pairs: List[Tuple[str, str]], layer_context,
+                        report: "IncrementalReport", **flags: bool) -> List[Tuple[int, Any, Optional[str]]]:
+        """
+        pair_engine.run_all() for summary-mode jobs, backed by the
+        incremental store: pairs whose content hashes were analyzed before
+        (with the same detector flags) are merged in, only the rest are
+        computed and then stored. Fills report in place. Must run after
+        prepare_job(). Without a store every pair is recomputed.
+        """
+        report.reused_files = self._artifacts.reused
+        report.new_files    = self._artifacts.built
+        if self._store is None:
+            report.recomputed_pairs += len(file_pairs)
+            return self._pair_engine.run_all(file_pairs, layer_context, include_details=False, **flags)
+
+        key_flags = {
+            **{f"enable_{t}": flags.get(f"enable_{t}", True) for t in ("type1", "type2", "type3", "type4")},
+            "multi_layer": bool(getattr(layer_context, "is_multi_layer", False)),
+            # Type-4 scores depend on the backend that came up (Joern, g++, ...)
+            "type4_backend": self._semantic.get_backend_key() if self._semantic is not None else "off",
+        }
+        items, todo, keys = [], [], []
+        for idx, (fa, fb) in enumerate(file_pairs):
+            ha, hb = self._artifacts.get(fa).content_hash, self._artifacts.get(fb).content_hash
+            key = self._store.pair_key(ha, hb, key_flags) if ha and hb else None
+            stored = self._store.load_pair(key, fa, fb) if key else None
+            if stored is not None:
+                items.append((idx, stored, None))
+            else:
+                todo.append(idx)
+                keys.append(key)
+
+        for sub_idx, pair, err in self._pair_engine.run_all(
+            [file_pairs[i] for i in todo], layer_context, include_details=False, **flags
+        ):
+            if not err and keys[sub_idx]:
+                self._store.save_pair(keys[sub_idx], pair)
+            items.append((todo[sub_idx], pair, err))
+
+        report.reused_pairs     += len(file_pairs) - len(todo)
+        report.recomputed_pairs += len(todo)
+        print(f"♻️ [Incremental] {report.reused_pairs} pair(s) reused, "
+              f"{report.recomputed_pairs} recomputed ({report.new_files} new/changed file(s))")
+        items.sort(key=lambda x: x[0])
+        return items
+
     # =========================================================================
     # PAIR ANALYSIS
     # =========================================================================
 
+    def _run_pairs(self, file_pairs: List[Tuple[str, str]], layer_context,
+                   detailed: bool) -> List[PairResult]:
+        """Analyze file_pairs through the pair engine, in input order; failed pairs are logged and dropped."""
+        results: List[PairResult] = []
+        for idx, pair, err in self._pair_engine.run_all(file_pairs, layer_context, include_details=detailed):
+            if err:
+                file_a, file_b = file_pairs[idx]
+                print(f"⚠️ Error analyzing pair ({Path(file_a).name}, {Path(file_b).name}): {err}")
+                continue
+            results.append(pair)
+        return results
+
     def _analyze_pair(
         self,
         file_a: str,
@@ -522,23 +925,38 @@ class CloneAnalyzer:
         enable_type3=True,
         enable_type4=True,
         layer_context=None,         # v3.1 — pass in pre-scanned context
+        cascade: Optional[bool] = None,
     ) -> PairResult:
         path_a = Path(file_a)
         path_b = Path(file_b)
-        t1_score = t2_score = 0.0
-        if enable_type1:
-            t1_score = self._type1.detect(file_a, file_b).get("type1_score", 0.0)
-        if enable_type2:
-            t2_score = self._type2.detect(file_a, file_b).get("type2_score", 0.0)
-        structural = (
-            self._run_structural(path_a, path_b, include_details)
-            if enable_type3
-            else StructuralResult(score=0.0, is_similar=False, confidence="UNLIKELY")
+        short_circuit = self.config.cascade if cascade is None else cascade
+        state = self._cascade.run(
+            PairState(self._artifacts.get(file_a), self._artifacts.get(file_b), include_details),
+            enabled={
+                "type1": enable_type1, "type2": enable_type2,
+                "type3_hybrid": enable_type3, "type3_ml": enable_type3,
+                "type4": enable_type4,
+            },
+            short_circuit=short_circuit,
         )
-        semantic = (
-            self._run_semantic(path_a, path_b, t1_score, t2_score, structural.score, include_details)
-            if enable_type4
-            else SemanticResult(score=0.0, is_similar=False, confidence="UNLIKELY")
+        # A bound-skipped stage reports its upper bound, not a 0.0 it never computed
+        t1_score = state.score_or_bound("type1")
+        t2_score = state.score_or_bound("type2")
+
+        if "type3_raw" in state.results:
+            structural = self._structural_from_raw(state.results["type3_raw"], include_details)
+        elif state.decided in ("type1", "type2"):
+            # Type-3 was skipped because the pair is already an exact/renamed
+            # clone — carry the deciding score so level/review stay meaningful
+            decided_score = state.scores[state.decided]
+            structural = StructuralResult(
+                score=round(decided_score, 4), is_similar=True,
+                confidence=self._get_confidence(decided_score, "structural"),
+            )
+        else:
+            structural = StructuralResult(score=0.0, is_similar=False, confidence="UNLIKELY")
+        semantic = state.results.get("type4") or SemanticResult(
+            score=0.0, is_similar=False, confidence="UNLIKELY"
         )
 
         # v3.1 — run cross-layer analysis if the batch context says it's relevant.
@@ -567,8 +985,28 @@ class CloneAnalyzer:
             type2_score=round(t2_score, 4),
             primary_clone_type=primary_clone_type,
             cross_layer=cross_layer_result,      # None when not applicable
+            cascade=state.report() if short_circuit else None,
         )
 
+    def _cross_layer_stubs(self, file_paths: List[str], same_lang_pairs: List[Tuple[str, str]],
+                           layer_context) -> List[PairResult]:
+        """
+        For cross-layer codebases, also analyze cross-language pairs
+        (e.g. the JS watch file paired with the REST spec file —
+        these would be skipped by build_same_language_pairs).
+        """
+        stubs: List[PairResult] = []
+        if not (layer_context.is_multi_layer and _CROSS_LAYER_AVAILABLE):
+            return stubs
+        all_pair_keys = {(a, b) for a, b in same_lang_pairs}
+        for file_a, file_b in _build_all_pairs(file_paths):
+            if (file_a, file_b) not in all_pair_keys:
+                cl_result = analyze_cross_layer_pair(file_a, file_b, layer_context)
+                if cl_result and cl_result.matches:
+                    # Emit a minimal PairResult so the frontend sees the cross-layer hit
+                    stubs.append(self._make_cross_layer_stub(file_a, file_b, cl_result))
+        return stubs
+
     def _make_cross_layer_stub(self, file_a: str, file_b: str, cl_result) -> PairResult:
         """
         Creates a minimal PairResult for a cross-layer pair that had no
@@ -596,8 +1034,106 @@ class CloneAnalyzer:
         if t4 >= 0.60: return "type4"
         return "none"
 
-    def _run_structural(self, file_a: Path, file_b: Path, include_details: bool) -> StructuralResult:
-        raw = self._structural.detect(file_a, file_b)
+    # =========================================================================
+    # CASCADE STAGES — declared cheapest first; see engine/cascade.py
+    # =========================================================================
+
+    def _build_cascade(self) -> CascadeScheduler:
+        cfg = self.config
+        return CascadeScheduler([
+            Stage("type1", cost=1, run=self._stage_type1,
+                  floor=lambda st: cfg.type1_threshold,
+                  upper_bound=lambda st: self._length_bound(st.art_a.type1_text, st.art_b.type1_text),
+                  decides=("type1", "type1", cfg.type1_threshold)),
+            Stage("type2", cost=5, run=self._stage_type2,
+                  # t2 matters for the Type-2 verdict, and for the Type-4
+                  # gate (0.50) unless Type-1 already closed it
+                  floor=lambda st: cfg.type2_threshold
+                  if self._semantic is None or self._type1_for_gates(st) >= 0.50 else 0.50,
+                  upper_bound=lambda st: self._length_bound(st.art_a.type2_tokens, st.art_b.type2_tokens),
+                  decides=("type2", "type2", cfg.type2_threshold)),
+            Stage("type3_hybrid", cost=20, run=self._stage_type3_hybrid,
+                  floor=lambda st: 0.50),
+            Stage("type3_ml", cost=100, run=self._stage_type3_ml,
+                  floor=self._floor_type3_ml,
+                  upper_bound=self._bound_type3_ml,
+                  decides=("type3", "type3", 0.50)),
+            Stage("type4", cost=1000, run=self._stage_type4,
+                  floor=self._floor_type4,
+                  decides=("type4", "type4", 0.60)),
+        ])
+
+    @staticmethod
+    def _length_bound(seq_a, seq_b) -> float:
+        """SequenceMatcher.ratio() ≤ 2·min(len_a, len_b) / (len_a + len_b)."""
+        total = len(seq_a) + len(seq_b)
+        return round(2.0 * min(len(seq_a), len(seq_b)) / total, 4) if total else 0.0
+
+    def _stage_type1(self, st: PairState) -> None:
+        raw = self._type1.detect_pair(st.art_a, st.art_b, bounded=self.config.type1_bounded)
+        if raw.get("bounded"):
+            st.bounds["type1"] = raw["upper_bound"]
+        else:
+            st.scores["type1"] = raw.get("type1_score", 0.0)
+
+    def _type1_for_gates(self, st: PairState) -> float:
+        """
+        Type-1 score for the Type-2 floor and the Type-4 gate (both 0.50).
+        A bound-skipped Type-1 has no score: a bound below 0.50 settles both
+        gates, a higher one is replaced by the real ratio.
+        """
+        if "type1" not in st.scores:
+            bound = st.bounds.get("type1", 0.0)
+            if bound < 0.50:
+                return bound
+            st.scores["type1"] = self._type1.detect_pair(st.art_a, st.art_b).get("type1_score", 0.0)
+        return st.scores["type1"]
+
+    def _stage_type2(self, st: PairState) -> None:
+        st.scores["type2"] = self._type2.detect_pair(st.art_a, st.art_b).get("type2_score", 0.0)
+
+    def _stage_type3_hybrid(self, st: PairState) -> None:
+        h = self._structural.hybrid_pair(st.art_a, st.art_b)
+        raw = self._structural.build_pair_result(st.art_a, st.art_b, h, None)
+        st.results["type3_hybrid"] = h
+        st.results["type3_raw"] = raw
+        st.scores["type3"] = self._structural_from_raw(raw, False).score
+
+    def _floor_type3_ml(self, st: PairState) -> Optional[float]:
+        if "type3_raw" not in st.results or not self._structural.ml_enabled or self._structural.clf is None:
+            return None
+        return 0.50
+
+    def _bound_type3_ml(self, st: PairState) -> float:
+        # score = hybrid·0.6 + ml·0.4, and the weighted ML score is ≤ ext_weight
+        raw = st.results["type3_raw"]
+        return round(raw["hybrid"]["score"] * 0.6 + raw["extension_weight"] * 0.4, 4)
+
+    def _stage_type3_ml(self, st: PairState) -> None:
+        raw_ml = self._structural.ml_pair(st.art_a, st.art_b)
+        if raw_ml is None:
+            return
+        raw = self._structural.build_pair_result(st.art_a, st.art_b, st.results["type3_hybrid"], raw_ml)
+        st.results["type3_raw"] = raw
+        st.scores["type3"] = self._structural_from_raw(raw, False).score
+
+    def _floor_type4(self, st: PairState) -> Optional[float]:
+        # Type-4 pre-filter: only when T1/T2/T3 all stay below 0.50
+        s = st.scores
+        if self._semantic is None or max(self._type1_for_gates(st), s.get("type2", 0.0), s.get("type3", 0.0)) >= 0.50:
+            return None
+        return self.config.semantic_threshold
+
+    def _stage_type4(self, st: PairState) -> None:
+        s = st.scores
+        semantic = self._run_semantic(
+            st.art_a, st.art_b, self._type1_for_gates(st), s.get("type2", 0.0), s.get("type3", 0.0),
+            st.include_details,
+        )
+        st.results["type4"] = semantic
+        st.scores["type4"] = semantic.score
+
+    def _structural_from_raw(self, raw: Dict[str, Any], include_details: bool) -> StructuralResult:
         hybrid = raw["hybrid"]
         ml = raw.get("ml")
         hybrid_score = hybrid["score"]
@@ -627,12 +1163,12 @@ class CloneAnalyzer:
         return StructuralResult(score=round(score, 4), is_similar=is_similar, confidence=confidence,
                                 details=details, discrimination=discrimination, all_type3_pairs=all_type3_pairs)
 
-    def _run_semantic(self, file_a: Path, file_b: Path, t1: float, t2: float, t3: float,
+    def _run_semantic(self, art_a, art_b, t1: float, t2: float, t3: float,
                       include_details: bool = False) -> SemanticResult:
         if max(t1, t2, t3) >= 0.50 or self._semantic is None:
             return SemanticResult(score=0.0, is_similar=False, confidence="UNLIKELY", details=None)
         try:
-            raw = self._semantic.detect(file_a, file_b, include_features=include_details)
+            raw = self._semantic.detect_pair(art_a, art_b, include_features=include_details)
             score = float(raw.get("semantic_score", 0.0))
             is_similar = bool(raw.get("is_semantic_clone", False))
             conf_raw = raw.get("confidence", "UNLIKELY")
@@ -852,6 +1388,9 @@ class CloneAnalyzer:
         if pair.structural.discrimination:
             result["clone_type_discrimination"] = pair.structural.discrimination
 
+        if pair.cascade:
+            result["cascade"] = pair.cascade
+
         if detailed and pair.structural.details:
             result["structural"]["details"] = {
                 "winnowing_score": pair.structural.details.winnowing_score,
@@ -869,6 +1408,20 @@ class CloneAnalyzer:
 
         return result
 
+    @staticmethod
+    def _serialize_clone_class(clone_class: Any) -> Dict:
+        """CloneClass.to_dict() with file paths reduced to basenames."""
+        def _frag(d: Dict) -> Dict:
+            return {**d, "file_path": Path(d.get("file_path", "") or "").name}
+
+        out = clone_class.to_dict()
+        out["members"] = [_frag(m) for m in out["members"]]
+        out["pairs"] = [
+            {**p, "frag_a": _frag(p["frag_a"]), "frag_b": _frag(p["frag_b"])}
+            for p in out["pairs"]
+        ]
+        return out
+
     @staticmethod
     def _serialize_fragments(all_type3_pairs: List, clone_type: str) -> List[Dict]:
         """
@@ -0,0 +1,278 @@
+# analysis-engine/engine/artifact_store.py
+
+"""
+Content-Addressed Artifact Store
+================================
+
+One on-disk store for everything the engine derives from file content,
+keyed by
+
+    (digest, kind, version)
+
+digest   sha256 of the file bytes, or a hash of several of them for
+         results that involve more than one file
+kind     what was derived ("file_artifacts", "fragments", "pair", ...)
+version  pipeline version; a scoring change is a new namespace, and the
+         old entries simply age out
+
+Before this, the caches were scattered and unbounded: an in-memory
+fragment dict, per-unit JSON files in feature_cache/, and one pickle per
+entry in the incremental directory.
+
+Backend: a single SQLite database in WAL mode. Readers never block the
+writer, and several worker processes can open the same file. Every
+process opens its own connection (a connection inherited through fork()
+is dropped and reopened), and writers wait on busy_timeout instead of
+failing. Reads go through SQLite's memory-mapped I/O (PRAGMA mmap_size),
+so page data is not copied through read() syscalls. Values are pickled
+with protocol 5, which stores numpy arrays as raw buffers. LMDB would
+allow true zero-copy reads but is not a dependency here.
+
+get_many() and put_many() read or write a whole batch of entries in one
+query / one transaction, for callers that know their keys up front.
+
+Size cap: every entry records its size and last-use time. When the total
+passes max_bytes, the least recently used entries are deleted until the
+store is under 90% of the cap. Last-use updates are batched, so a read
+costs no write most of the time.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    digest    TEXT    NOT NULL,
+    kind      TEXT    NOT NULL,
+    version   TEXT    NOT NULL,
+    value     BLOB    NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL    NOT NULL,
+    PRIMARY KEY (digest, kind, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (last_used);
+"""
+
+Key = Tuple[str, str, str]
+
+
+class ArtifactStore:
+    TOUCH_BATCH = 256
+    QUERY_BATCH = 500       # digests per IN (...) lookup, under SQLite's variable limit
+
+    def __init__(self, path: str, version: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path      = Path(path)
+        self.version   = version
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock    = threading.Lock()
+        self._lock_pid = os.getpid()
+        self._conn:   Optional[sqlite3.Connection] = None
+        self._pid     = None
+        self._touched: Dict[Key, float] = {}
+        self._bytes   = 0
+        self.hits = self.misses = self.evicted = 0
+        self._connect()
+
+    # ── Connection (one per process) ─────────────────────────────────────────
+
+    def _process_lock(self) -> threading.Lock:
+        # fork() copies the lock in whatever state another thread left it
+        # (a second job thread may hold it); the child gets a fresh one
+        if self._lock_pid != os.getpid():
+            self._lock, self._lock_pid = threading.Lock(), os.getpid()
+        return self._lock
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        # Inherited through fork(): the parent owns that handle, never reuse it
+        self._touched = {}
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.max_bytes)}")
+        conn.executescript(_SCHEMA)
+        self._conn, self._pid = conn, os.getpid()
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        return conn
+
+    # ── Get / put ────────────────────────────────────────────────────────────
+
+    def get(self, digest: str, kind: str) -> Optional[Any]:
+        key = (digest, kind, self.version)
+        with self._process_lock():
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM artifacts WHERE digest=? AND kind=? AND version=?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touches(conn)
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            print(f"⚠️ [ArtifactStore] Dropping unreadable {kind} entry {digest[:12]}: {e}")
+            self.delete(digest, kind)
+            return None
+
+    def get_many(self, digests: List[str], kind: str) -> Dict[str, Any]:
+        """{digest: value} for every digest of this kind that is stored (one query per 500)."""
+        found: Dict[str, bytes] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._process_lock():
+            conn = self._connect()
+            for start in range(0, len(unique), self.QUERY_BATCH):
+                chunk = unique[start:start + self.QUERY_BATCH]
+                marks = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT digest, value FROM artifacts "
+                    f"WHERE kind=? AND version=? AND digest IN ({marks})",
+                    (kind, self.version, *chunk),
+                ).fetchall())
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+            now = time.time()
+            for digest in found:
+                self._touched[(digest, kind, self.version)] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touches(conn)
+
+        values: Dict[str, Any] = {}
+        for digest, blob in found.items():
+            try:
+                values[digest] = pickle.loads(blob)
+            except Exception as e:
+                print(f"⚠️ [ArtifactStore] Dropping unreadable {kind} entry {digest[:12]}: {e}")
+                self.delete(digest, kind)
+        return values
+
+    def put(self, digest: str, kind: str, value: Any) -> None:
+        self.put_many([(digest, kind, value)])
+
+    def put_many(self, items: List[Tuple[str, str, Any]]) -> None:
+        """Store (digest, kind, value) entries in one transaction."""
+        rows = []
+        now = time.time()
+        for digest, kind, value in items:
+            try:
+                blob = pickle.dumps(value, protocol=5)
+            except Exception as e:
+                print(f"⚠️ [ArtifactStore] Could not pack {kind} entry {digest[:12]}: {e}")
+                continue
+            rows.append((digest, kind, self.version, blob, len(blob), now))
+        if not rows:
+            return
+        with self._process_lock():
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._flush_touches(conn)
+                conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"⚠️ [ArtifactStore] Could not store {len(rows)} entries: {e}")
+                return
+            self._bytes += sum(row[4] for row in rows)
+            if self._bytes > self.max_bytes:
+                self._evict(conn)
+
+    def delete(self, digest: str, kind: str) -> None:
+        with self._process_lock():
+            self._connect().execute(
+                "DELETE FROM artifacts WHERE digest=? AND kind=? AND version=?",
+                (digest, kind, self.version),
+            )
+
+    def delete_kind(self, kind: str) -> None:
+        """Drop every entry of one kind (all versions)."""
+        with self._process_lock():
+            conn = self._connect()
+            self._touched = {k: t for k, t in self._touched.items() if k[1] != kind}
+            conn.execute("DELETE FROM artifacts WHERE kind=?", (kind,))
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+
+    # ── LRU bookkeeping ──────────────────────────────────────────────────────
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        if not self._touched:
+            return
+        rows = [(t, *key) for key, t in self._touched.items()]
+        self._touched = {}
+        own_txn = not conn.in_transaction
+        try:
+            if own_txn:
+                conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "UPDATE artifacts SET last_used=? WHERE digest=? AND kind=? AND version=?", rows,
+            )
+            if own_txn:
+                conn.execute("COMMIT")
+        except sqlite3.Error:
+            # Last-use times are a hint; losing a batch only skews eviction order
+            if own_txn and conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete least recently used entries until under 90% of max_bytes."""
+        self._flush_touches(conn)
+        # Other processes write too — start from the real total
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        excess = self._bytes - int(self.max_bytes * 0.9)
+        if excess <= 0:
+            return
+        victims: List[Key] = []
+        freed = 0
+        for digest, kind, version, size in conn.execute(
+            "SELECT digest, kind, version, size FROM artifacts ORDER BY last_used"
+        ):
+            victims.append((digest, kind, version))
+            freed += size
+            if freed >= excess:
+                break
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM artifacts WHERE digest=? AND kind=? AND version=?", victims)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"⚠️ [ArtifactStore] Eviction failed: {e}")
+            return
+        self._bytes -= freed
+        self.evicted += len(victims)
+
+    # ── Housekeeping ─────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, int]:
+        with self._process_lock():
+            conn = self._connect()
+            entries = conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+        return {
+            "entries": entries, "bytes": self._bytes, "max_bytes": self.max_bytes,
+            "hits": self.hits, "misses": self.misses, "evicted": self.evicted,
+        }
+
+    def flush(self) -> None:
+        with self._process_lock():
+            self._flush_touches(self._connect())
+
+    def close(self) -> None:
+        with self._process_lock():
+            if self._conn is not None and self._pid == os.getpid():
+                self._flush_touches(self._conn)
+                self._conn.close()
+            self._conn = None
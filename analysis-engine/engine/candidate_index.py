@@ -0,0 +1,70 @@
+# analysis-engine/engine/candidate_index.py
+
+"""
+Batch Candidate Index
+=====================
+
+Large jobs only send *candidate* pairs through the full T1–T4 pipeline.
+A pair is a candidate when either batch-level index proposes it:
+
+  WinnowingIndex  (detectors/type3/winnowing_index.py)
+      shares ≥ N non-common winnowing fingerprints / Jaccard lower bound —
+      catches copied text and small edits.
+
+  LSHIndex        (detectors/type2/minhash_lsh.py)
+      MinHash bands over identifier-blind Type-2 shingles collide —
+      catches renamed-variable clones whose raw text differs.
+
+Both are built once per job in roughly linear time; their union replaces
+the n·(n-1)/2 sweep. Per-pair overlap numbers (shared fingerprints, exact
+winnowing Jaccard, estimated Type-2 Jaccard) are kept as cheap pre-scores
+for the pairs that are pruned.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from detectors.type2.minhash_lsh import LSHIndex
+from detectors.type3.winnowing_index import WinnowingIndex
+
+
+class CandidateIndex:
+    def __init__(self, winnowing: WinnowingIndex, lsh: Optional[LSHIndex] = None):
+        self.winnowing  = winnowing
+        self.lsh        = lsh
+        self._lsh_pairs = lsh.candidate_pairs() if lsh is not None else set()
+
+    def _lsh_hit(self, path_a: str, path_b: str) -> bool:
+        return (path_a, path_b) in self._lsh_pairs or (path_b, path_a) in self._lsh_pairs
+
+    def is_candidate(self, path_a: str, path_b: str) -> bool:
+        return self.winnowing.is_candidate(path_a, path_b) or self._lsh_hit(path_a, path_b)
+
+    def split(self, pairs: Iterable[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Partition pairs into (candidates, pruned)."""
+        keep, pruned = [], []
+        for a, b in pairs:
+            (keep if self.is_candidate(a, b) else pruned).append((a, b))
+        return keep, pruned
+
+    def pre_scores(self, path_a: str, path_b: str) -> Dict:
+        shared, jaccard = self.winnowing.overlap(path_a, path_b)
+        scores = {
+            "shared_fingerprints": shared,
+            "winnowing_jaccard":   round(jaccard, 4),
+        }
+        if self.lsh is not None:
+            scores["type2_jaccard_estimate"] = round(self.lsh.estimate(str(path_a), str(path_b)), 4)
+        return scores
+
+    def diagnostics(self) -> Dict:
+        report = self.winnowing.diagnostics()
+        report["index"] = "winnowing+minhash_lsh" if self.lsh is not None else "winnowing"
+        if self.lsh is not None:
+            lsh = self.lsh.diagnostics()
+            report.update({
+                "lsh_bands":           lsh["bands"],
+                "lsh_rows":            lsh["rows"],
+                "lsh_max_bucket_size": lsh["max_bucket_size"],
+                "lsh_candidate_pairs": len(self._lsh_pairs),
+            })
+        return report
@@ -0,0 +1,107 @@
+# analysis-engine/engine/cascade.py
+
+"""
+Cascading Detector Scheduler
+============================
+
+A pair used to go through every detector: Type-1, Type-2 and the full
+Type-3 hybrid (fragments + RF model), and Type-4 whenever all three
+stayed below 0.50. This happened even when Type-1 had already returned
+1.0, or when simple lengths proved a threshold out of reach.
+
+Each stage is declared once, in the analyzer, with:
+
+  cost         relative price, used for ordering (cheapest first)
+  floor        the lowest score of this stage that can still change the
+               outcome, given what earlier stages found. None means
+               nothing it returns can matter, so the stage is skipped.
+  upper_bound  optional cheap bound on the stage's score, e.g. for a
+               SequenceMatcher ratio: 2·min(len_a, len_b) / (len_a + len_b)
+  decides      (clone_type, threshold). Once the stage's score reaches the
+               threshold, the primary clone type is settled and every
+               later stage is skipped.
+
+CascadeScheduler walks the stages in cost order. It skips a stage when
+the type is already decided, when the stage is not needed, or when its
+upper bound is below its floor. Every skip is recorded on the
+PairState with its reason, and a bound-skipped stage keeps its upper
+bound in PairState.bounds so callers can report it instead of a 0.0
+the stage never computed.
+
+Skipping is not free of output changes: a pair decided by Type-1/Type-2
+carries the deciding score instead of the Type-3 score, and a bounded
+Type-3 ML stage leaves the hybrid-only score. The scheduler is therefore
+opt-in (AnalyzerConfig.cascade).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class PairState:
+    art_a: Any
+    art_b: Any
+    include_details: bool = False
+    scores:  Dict[str, float] = field(default_factory=dict)
+    results: Dict[str, Any]   = field(default_factory=dict)
+    decided: Optional[str]    = None
+    ran:     List[str]        = field(default_factory=list)
+    skipped: Dict[str, str]   = field(default_factory=dict)
+    bounds:  Dict[str, float] = field(default_factory=dict)
+
+    def score_or_bound(self, key: str) -> float:
+        """The stage's score, its upper bound when the bound skipped it, else 0.0."""
+        if key in self.scores:
+            return self.scores[key]
+        return self.bounds.get(key, 0.0)
+
+    def report(self) -> Dict[str, Any]:
+        return {"decided_by": self.decided, "ran": list(self.ran),
+                "skipped": dict(self.skipped), "bounds": dict(self.bounds)}
+
+
+@dataclass(frozen=True)
+class Stage:
+    name:        str
+    cost:        float
+    run:         Callable[[PairState], None]
+    floor:       Callable[[PairState], Optional[float]]
+    upper_bound: Optional[Callable[[PairState], float]] = None
+    decides:     Optional[Tuple[str, str, float]] = None     # (clone type, score key, threshold)
+
+
+class CascadeScheduler:
+    def __init__(self, stages: List[Stage]):
+        self.stages = sorted(stages, key=lambda s: s.cost)
+
+    def run(self, state: PairState, enabled: Dict[str, bool] = None,
+            short_circuit: bool = True) -> PairState:
+        """
+        Run the stages on one pair. With short_circuit=False only disabled
+        and not-needed stages are skipped — the pre-cascade behaviour, used
+        when every score is wanted (single-pair detail view).
+        """
+        enabled = enabled or {}
+        for stage in self.stages:
+            if not enabled.get(stage.name, True):
+                state.skipped[stage.name] = "disabled"
+            elif short_circuit and state.decided:
+                state.skipped[stage.name] = f"decided:{state.decided}"
+            else:
+                floor = stage.floor(state)
+                bound = stage.upper_bound(state) if (short_circuit and stage.upper_bound) else None
+                if floor is None:
+                    state.skipped[stage.name] = "not_needed"
+                elif bound is not None and bound < floor:
+                    state.skipped[stage.name] = f"bound:{bound:.3f}<{floor:.2f}"
+                    state.bounds[stage.name] = bound
+                else:
+                    stage.run(state)
+                    state.ran.append(stage.name)
+
+            if stage.decides and not state.decided:
+                clone_type, key, threshold = stage.decides
+                if state.scores.get(key, 0.0) >= threshold:
+                    state.decided = clone_type
+        return state
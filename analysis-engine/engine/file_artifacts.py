@@ -0,0 +1,146 @@
+# analysis-engine/engine/file_artifacts.py
+
+"""
+Per-File Artifact Layer
+=======================
+
+Every detector used to re-read both files of a pair from disk and redo its
+per-file work from scratch: comment stripping, regex tokenization, pygments
+lexing, lizard metrics, the AST structure sequence, fragment extraction and
+the Type-4 cache-key hashing. None of that depends on the *other* file, so
+for a 200-file class it was ~20k pairs × 8 reads/tokenizations of content
+that never changes.
+
+FileArtifacts holds every per-file view the detectors need. ArtifactCache
+builds them exactly once per job (one disk read per file) and the detectors'
+detect_pair() methods run only the pairwise comparison step on them.
+
+Views:
+  type1_text / type1_hash   — comment/whitespace-normalized text + SHA-256
+  type2_tokens              — identifier-blind token stream (ID/NUM/STR)
+  type2_minhash             — MinHash signature of type2_tokens shingles (LSH)
+  lexer_tokens              — pygments token stream (CodeTokenizer)
+  kgram_hashes              — rolling hashes of every k-gram (frequency filter)
+  fingerprint               — raw winnowing fingerprint (pre frequency filter)
+  metrics                   — 8-feature metric vector (lizard + source scan)
+  structure                 — AST control-flow skeleton
+  fragments                 — function-level Fragments for Type-3
+  ml_unit                   — prepared primary unit for the Type-3 RF model
+  content_hash              — sha256 of the raw bytes (Type-4 cache key)
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+@dataclass
+class FileArtifacts:
+    path:          str
+    name:          str
+    content_hash:  str
+    type1_text:    str              = ""
+    type1_hash:    str              = ""
+    type2_tokens:  List[str]        = field(default_factory=list)
+    type2_minhash: Any              = None
+    lexer_tokens:  List[str]        = field(default_factory=list)
+    kgram_hashes:  Set[int]         = field(default_factory=set)
+    fingerprint:   Set[int]         = field(default_factory=set)
+    metrics:       List[float]      = field(default_factory=lambda: [0.0] * 8)
+    structure:     str              = ""
+    fragments:     List[Any]        = field(default_factory=list)
+    ml_unit:       Any              = None
+    error:         Optional[str]    = None
+
+
+class ArtifactCache:
+    """
+    Path-keyed FileArtifacts cache, scoped to one analysis job.
+
+    The cache borrows the detectors' own view builders (build_view) so the
+    normalization logic stays in exactly one place per clone type.
+
+    With a store (engine.incremental.IncrementalStore) a file whose content
+    hash was built in an earlier job is loaded instead of rebuilt;
+    reused/built count both outcomes since the last clear().
+    """
+
+    def __init__(self, type1, type2, structural, store=None):
+        self._type1      = type1
+        self._type2      = type2
+        self._structural = structural
+        self._store      = store
+        self._items: Dict[str, FileArtifacts] = {}
+        self.reused = 0
+        self.built  = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, path: str) -> bool:
+        return str(path) in self._items
+
+    def get(self, path: str) -> FileArtifacts:
+        """Return the artifacts for path, building them on first use."""
+        key = str(path)
+        art = self._items.get(key)
+        if art is None:
+            art = self._build(key)
+            self._items[key] = art
+        return art
+
+    def build_all(self, paths: Iterable[str]) -> List[FileArtifacts]:
+        return [self.get(p) for p in paths]
+
+    def retain(self, paths: Iterable[str]) -> None:
+        """Evict every cached file not in paths (tile scheduler working set)."""
+        keep = {str(p) for p in paths}
+        for key in [k for k in self._items if k not in keep]:
+            del self._items[key]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.reused = self.built = 0
+
+    def _build(self, path: str) -> FileArtifacts:
+        p = Path(path)
+        try:
+            raw = p.read_bytes()
+        except Exception as e:
+            return FileArtifacts(path=path, name=p.name, content_hash="", error=str(e))
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if self._store is not None:
+            stored = self._store.load_artifacts(content_hash, path)
+            if stored is not None:
+                self.reused += 1
+                return stored
+
+        code = raw.decode("utf-8", errors="ignore")
+        type1_text, type1_hash = self._type1.build_view(code)
+        views = self._structural.build_view(path, code, raw)
+        type2_tokens = self._type2.build_view(code)
+
+        art = FileArtifacts(
+            path          = path,
+            name          = p.name,
+            content_hash  = content_hash,
+            type1_text    = type1_text,
+            type1_hash    = type1_hash,
+            type2_tokens  = type2_tokens,
+            type2_minhash = self._type2.build_signature(type2_tokens),
+            lexer_tokens  = views["lexer_tokens"],
+            kgram_hashes  = views["kgram_hashes"],
+            fingerprint   = views["fingerprint"],
+            metrics       = views["metrics"],
+            structure     = views["structure"],
+            fragments     = views["fragments"],
+            ml_unit       = views["ml_unit"],
+        )
+        self.built += 1
+        if self._store is not None:
+            self._store.save_artifacts(art)
+        return art
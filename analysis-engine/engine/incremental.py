@@ -0,0 +1,110 @@
+# analysis-engine/engine/incremental.py
+
+"""
+Incremental Analysis Store
+==========================
+
+Re-running an assignment used to recompute every pair from scratch, even
+when a single student had resubmitted. Nothing a pair result depends on
+changes unless one of its two files does, so results can be keyed by
+content instead of by path:
+
+  artifacts   (sha256(file bytes), extension)         → FileArtifacts
+  pairs       (sha256 a, sha256 b, detector flags,
+               Type-4 backend)                        → PairResult
+
+Both kinds live in the shared content-addressed ArtifactStore
+(engine/artifact_store.py), under a version that hashes PIPELINE_VERSION
+and every AnalyzerConfig field that changes a score. Tuning a threshold
+or switching the LCS backend therefore starts a fresh namespace instead
+of serving stale results, and the old entries age out through the
+store's LRU cap. Bump PIPELINE_VERSION when a detector's scoring changes
+in code. The Type-4 score also depends on which backend came up at
+runtime (educational with or without Joern/compilers, pdg, heuristic), so
+that is part of every pair key.
+
+A new run looks up every pair first. Pairs whose two files were seen
+before are merged in from the store, and only the pairs that involve a
+new or changed file go through the pair engine. IncrementalReport counts
+both sides.
+
+Caveat: the winnowing frequency filter is trained on the whole batch, so
+a reused pair keeps the scores it got in the batch it was computed in.
+Reuse is therefore not exact, and the store is off unless incremental_dir
+is set (INCREMENTAL_DIR for the API and the DB service).
+"""
+
+import hashlib
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from engine.artifact_store import ArtifactStore
+
+# 3.2: Type-4 I/O harness output (user-018), pdg backend (user-022) and
+# cross-category gating (user-024) changed Type-4 scores
+PIPELINE_VERSION = "3.2"
+
+# Config fields that only change how the work is scheduled, never a score
+_EXECUTION_FIELDS = {"pair_workers", "pair_chunk_size", "incremental_dir", "artifact_store_mb"}
+
+
+def pipeline_version(config) -> str:
+    """Short hash of PIPELINE_VERSION plus every score-relevant config field."""
+    fields = {k: v for k, v in sorted(asdict(config).items()) if k not in _EXECUTION_FIELDS}
+    return hashlib.sha256(f"{PIPELINE_VERSION}:{fields!r}".encode()).hexdigest()[:16]
+
+
+@dataclass
+class IncrementalReport:
+    reused_pairs:     int = 0
+    recomputed_pairs: int = 0
+    reused_files:     int = 0
+    new_files:        int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class IncrementalStore:
+    def __init__(self, store: ArtifactStore):
+        self.store = store
+
+    # ── Per-file artifacts ────────────────────────────────────────────────────
+
+    def load_artifacts(self, content_hash: str, path: str) -> Optional[Any]:
+        """Stored FileArtifacts for this content, rebound to path (or None)."""
+        art = self.store.get(content_hash, self._artifact_kind(path))
+        if art is None:
+            return None
+        art.path = path
+        art.name = Path(path).name
+        for frag in art.fragments:
+            frag.file_path = path
+        return art
+
+    def save_artifacts(self, art) -> None:
+        if art.content_hash and not art.error:
+            self.store.put(art.content_hash, self._artifact_kind(art.path), art)
+
+    @staticmethod
+    def _artifact_kind(path: str) -> str:
+        # Language detection and header skipping go by extension
+        return f"file_artifacts{Path(path).suffix.lower()}"
+
+    # ── Pair results ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def pair_key(hash_a: str, hash_b: str, flags: Dict[str, Any]) -> str:
+        flag_str = ",".join(f"{k}={v}" for k, v in sorted(flags.items()))
+        return hashlib.sha256(f"{hash_a}:{hash_b}:{flag_str}".encode()).hexdigest()
+
+    def load_pair(self, key: str, file_a: str, file_b: str) -> Optional[Any]:
+        """Stored PairResult under key, renamed to the current files (or None)."""
+        pair = self.store.get(key, "pair")
+        if pair is None:
+            return None
+        return replace(pair, file_a=Path(file_a).name, file_b=Path(file_b).name)
+
+    def save_pair(self, key: str, pair) -> None:
+        self.store.put(key, "pair", pair)
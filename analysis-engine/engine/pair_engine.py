@@ -0,0 +1,141 @@
+# analysis-engine/engine/pair_engine.py
+
+"""
+Parallel Pair Execution Engine
+==============================
+
+Every pair loop in the engine (one-shot analysis, tiles, assignments, ZIP
+jobs, the DB service) used to call CloneAnalyzer._analyze_pair() serially
+in one Python thread. The work is CPU-bound pure Python (difflib, lexing,
+the RF model), so threads do not help — the GIL serializes them.
+
+PairEngine fans pair chunks out to a ProcessPoolExecutor using the *fork*
+start method. The pool is created after CloneAnalyzer.prepare_job(), so
+each worker starts with its own copy-on-write copy of the analyzer: its
+own detector instances, its own artifact cache (pre-populated with the
+job's views) and the trained frequency filter. Nothing is pickled on the
+way in except (index, file_a, file_b) triples; PairResults come back per
+chunk in completion order, tagged with the caller's pair index.
+
+workers <= 1, tiny jobs, or platforms without fork run the same chunk
+function in-process, so callers have a single code path.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# (pair index, PairResult or None, error message or None)
+ChunkItem = Tuple[int, Any, Optional[str]]
+
+# Set in each worker by _init_worker — inherited through fork, never pickled
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(analyzer, layer_context, include_details: bool, flags: Dict[str, bool]) -> None:
+    _WORKER.update(
+        analyzer=analyzer,
+        layer_context=layer_context,
+        include_details=include_details,
+        flags=flags,
+    )
+
+
+def _analyze_chunk(chunk: Sequence[Tuple[int, str, str]]) -> List[ChunkItem]:
+    return _run_chunk(
+        _WORKER["analyzer"], chunk, _WORKER["layer_context"],
+        _WORKER["include_details"], _WORKER["flags"],
+    )
+
+
+def _run_chunk(analyzer, chunk, layer_context, include_details, flags) -> List[ChunkItem]:
+    out: List[ChunkItem] = []
+    for idx, file_a, file_b in chunk:
+        try:
+            pair = analyzer._analyze_pair(
+                file_a, file_b,
+                include_details=include_details,
+                layer_context=layer_context,
+                **flags,
+            )
+            out.append((idx, pair, None))
+        except Exception as e:
+            out.append((idx, None, str(e)))
+    # Forked workers exit without atexit hooks — commit buffered cache writes per chunk
+    analyzer.flush_pair_caches()
+    return out
+
+
+def _fork_available() -> bool:
+    return "fork" in mp.get_all_start_methods()
+
+
+class PairEngine:
+    """
+    Runs CloneAnalyzer._analyze_pair over a list of (file_a, file_b) pairs,
+    serially or across a forked process pool.
+    """
+
+    def __init__(self, analyzer, workers: int = 1, chunk_size: int = 32, min_parallel_pairs: int = 64):
+        self.analyzer           = analyzer
+        self.workers            = max(1, int(workers or 1))
+        self.chunk_size         = max(1, chunk_size)
+        self.min_parallel_pairs = min_parallel_pairs
+
+    def run(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        layer_context=None,
+        include_details: bool = False,
+        **flags: bool,
+    ) -> Iterator[List[ChunkItem]]:
+        """
+        Yield lists of (index, PairResult | None, error | None) as chunks
+        finish. index is the position of the pair in `pairs`; chunk order
+        is not guaranteed when running in parallel.
+        """
+        if not pairs:
+            return
+        chunks = self._chunk(pairs)
+        # Before the fork, so every worker starts with the cached results in memory
+        self.analyzer.prefetch_pairs(pairs)
+
+        if self.workers <= 1 or len(pairs) < self.min_parallel_pairs or not _fork_available():
+            for chunk in chunks:
+                yield _run_chunk(self.analyzer, chunk, layer_context, include_details, flags)
+            return
+
+        workers = min(self.workers, len(chunks))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self.analyzer, layer_context, include_details, flags),
+        ) as pool:
+            futures = [pool.submit(_analyze_chunk, chunk) for chunk in chunks]
+            for fut in as_completed(futures):
+                try:
+                    yield fut.result()
+                except Exception as e:
+                    # A worker died (OOM-kill, segfault in a native lib) —
+                    # report every pair of the lost chunk as failed
+                    chunk = chunks[futures.index(fut)]
+                    yield [(idx, None, f"worker failed: {e}") for idx, _, _ in chunk]
+
+    def run_all(self, pairs, layer_context=None, include_details: bool = False,
+                **flags: bool) -> List[ChunkItem]:
+        """run(), collected and restored to input order."""
+        items = [item for chunk in self.run(pairs, layer_context, include_details, **flags)
+                 for item in chunk]
+        items.sort(key=lambda x: x[0])
+        return items
+
+    def _chunk(self, pairs: Sequence[Tuple[str, str]]) -> List[List[Tuple[int, str, str]]]:
+        # Several chunks per worker so a slow chunk (Type-4 compiles) does
+        # not leave the other workers idle at the tail of the job
+        size = min(self.chunk_size, max(1, math.ceil(len(pairs) / (self.workers * 4))))
+        indexed = [(i, a, b) for i, (a, b) in enumerate(pairs)]
+        return [indexed[s:s + size] for s in range(0, len(indexed), size)]
@@ -8,6 +8,7 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 import asyncio
+import os
 import shutil
 import time
 import uuid
@@ -52,7 +53,18 @@ app.add_middleware(
 UPLOAD_DIR = Path("./data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-analyzer = CloneAnalyzer(AnalyzerConfig())
+# ANALYSIS_WORKERS > 1 forks a process pool per job for the pair loops;
+# LCS_BACKEND=bitparallel swaps difflib for exact bit-parallel fragment LCS;
+# INCREMENTAL_DIR (off by default) stores per-file artifacts and pair results
+# by content hash so re-analysis only computes pairs with a new/changed file
+# — reused pairs keep the frequency filter of the batch they came from;
+# ARTIFACT_STORE_MB caps that store (least recently used entries go first)
+analyzer = CloneAnalyzer(AnalyzerConfig(
+    pair_workers=int(os.getenv("ANALYSIS_WORKERS", "1")),
+    lcs_backend=os.getenv("LCS_BACKEND", "difflib"),
+    incremental_dir=os.getenv("INCREMENTAL_DIR", "") or None,
+    artifact_store_mb=int(os.getenv("ARTIFACT_STORE_MB", "512")),
+))
 executor = ThreadPoolExecutor(max_workers=2)
 
 try:
@@ -231,6 +243,9 @@ def _process_zip_job(job_id: str, mode: str, data: Any) -> None:
         except ImportError:
             layer_context = None
 
+        # Per-file artifacts are built once here and reused for every pair
+        analyzer.prepare_job(all_files)
+
         clone_pairs = []
         done = 0
 
@@ -250,75 +265,95 @@ def _process_zip_job(job_id: str, mode: str, data: Any) -> None:
                         for fb in files_j:
                             pairs.append((fa, fb, i + 1, name_i, j + 1, name_j))
 
-        for pair in pairs:
-            try:
-                if mode == "project":
-                    fa, fb, _, _ = pair
-                    pr = analyzer._analyze_pair(fa, fb, include_details=False, layer_context=layer_context)
-                    sid_a = sid_b = None
-                    name_a = name_b = None
-                else:
-                    fa, fb, sid_a, name_a, sid_b, name_b = pair
-                    pr = analyzer._analyze_pair(fa, fb, include_details=False, layer_context=layer_context)
-
-                effective = max(pr.type1_score, pr.type2_score, pr.structural.score, pr.semantic.score)
-
-                # A cross-layer pair (e.g. cloud.js vs device.cpp) scores 0 on the
-                # traditional Type1-4 detectors because they only operate within the
-                # same language.  We must check pr.cross_layer separately so these
-                # inter-language IoT pairs still surface in the results.
-                has_cross_layer = bool(
-                    pr.cross_layer
-                    and pr.cross_layer.is_cross_layer
-                    and pr.cross_layer.matches
-                )
-
-                if (effective >= 0.25 and pr.primary_clone_type != "none") or has_cross_layer:
-                    # For pure cross-layer pairs the traditional effective_score is 0
-                    # and primary_clone_type would be "none" — override both so the
-                    # frontend renders something meaningful instead of a blank card.
-                    display_clone_type = pr.primary_clone_type
-                    display_effective  = effective
-                    if has_cross_layer and pr.primary_clone_type == "none":
-                        display_clone_type = "cross_layer"
-                        display_effective  = round(pr.cross_layer.cross_layer_score, 4)
-
-                    entry = {
-                        "file_a":             pr.file_a,
-                        "file_b":             pr.file_b,
-                        "type1_score":        pr.type1_score,
-                        "type2_score":        pr.type2_score,
-                        "structural_score":   pr.structural.score,
-                        "semantic_score":     pr.semantic.score,
-                        "effective_score":    display_effective,
-                        "primary_clone_type": display_clone_type,
-                        "similarity_level":   pr.similarity_level,
-                        "needs_review":       pr.needs_review,
-                        "summary":            pr.summary,
-                    }
-                    if mode != "project":
-                        entry.update({
-                            "student_a_id": sid_a,
-                            "student_b_id": sid_b,
-                            "student_a_name": name_a,
-                            "student_b_name": name_b,
-                        })
-                    # Attach cross-layer info if present
-                    if pr.cross_layer:
-                        entry["cross_layer"] = pr.cross_layer.to_dict()
-                    clone_pairs.append(entry)
-            except Exception as e:
-                logger.warning(f"[Job {job_id}] Pair error {fa} vs {fb}: {e}")
-            finally:
-                done += 1
-                if done % 50 == 0 or done == total_pairs:
-                    job = get_job(job_id)
-                    job["analyzed_count"] = done
-                    job["progress"] = round(done / max(total_pairs, 1) * 100, 1)
-                    job["clone_pairs"] = clone_pairs
-                    job["results"] = clone_pairs
-                    job["updated_at"] = time.time()
-                    save_job(job_id, job)
+        # Large jobs with candidate_prune_unsampled: only pairs that share
+        # winnowing fingerprints get the full pipeline. Lossy — pruned pairs
+        # are not analyzed at all, so the index diagnostics are logged
+        if not (layer_context and layer_context.is_multi_layer):
+            candidates, pruned, report = analyzer.select_candidates([(p[0], p[1]) for p in pairs])
+            if report:
+                keep = set(candidates)
+                pairs = [p for p in pairs if (p[0], p[1]) in keep]
+                done = len(pruned)
+                logger.info(f"[Job {job_id}] 🔎 {len(candidates)} candidate pairs, {len(pruned)} pruned by winnowing index")
+                logger.info(f"[Job {job_id}] 🔎 Candidate filter diagnostics: {report}")
+
+        # Pairs stream back from the pair engine chunk by chunk (worker
+        # processes when pair_workers > 1), in completion order.
+        file_pairs = [(pair[0], pair[1]) for pair in pairs]
+        for chunk in analyzer._pair_engine.run(file_pairs, layer_context, include_details=False):
+            for idx, pr, err in chunk:
+                pair = pairs[idx]
+                fa, fb = pair[0], pair[1]
+                if err:
+                    logger.warning(f"[Job {job_id}] Pair error {fa} vs {fb}: {err}")
+                    continue
+                try:
+                    if mode == "project":
+                        sid_a = sid_b = None
+                        name_a = name_b = None
+                    else:
+                        _, _, sid_a, name_a, sid_b, name_b = pair
+
+                    effective = max(pr.type1_score, pr.type2_score, pr.structural.score, pr.semantic.score)
+
+                    # A cross-layer pair (e.g. cloud.js vs device.cpp) scores 0 on the
+                    # traditional Type1-4 detectors because they only operate within the
+                    # same language.  We must check pr.cross_layer separately so these
+                    # inter-language IoT pairs still surface in the results.
+                    has_cross_layer = bool(
+                        pr.cross_layer
+                        and pr.cross_layer.is_cross_layer
+                        and pr.cross_layer.matches
+                    )
+
+                    if (effective >= 0.25 and pr.primary_clone_type != "none") or has_cross_layer:
+                        # For pure cross-layer pairs the traditional effective_score is 0
+                        # and primary_clone_type would be "none" — override both so the
+                        # frontend renders something meaningful instead of a blank card.
+                        display_clone_type = pr.primary_clone_type
+                        display_effective  = effective
+                        if has_cross_layer and pr.primary_clone_type == "none":
+                            display_clone_type = "cross_layer"
+                            display_effective  = round(pr.cross_layer.cross_layer_score, 4)
+
+                        entry = {
+                            "file_a":             pr.file_a,
+                            "file_b":             pr.file_b,
+                            "type1_score":        pr.type1_score,
+                            "type2_score":        pr.type2_score,
+                            "structural_score":   pr.structural.score,
+                            "semantic_score":     pr.semantic.score,
+                            "effective_score":    display_effective,
+                            "primary_clone_type": display_clone_type,
+                            "similarity_level":   pr.similarity_level,
+                            "needs_review":       pr.needs_review,
+                            "summary":            pr.summary,
+                        }
+                        if mode != "project":
+                            entry.update({
+                                "student_a_id": sid_a,
+                                "student_b_id": sid_b,
+                                "student_a_name": name_a,
+                                "student_b_name": name_b,
+                            })
+                        # Attach cross-layer info if present
+                        if pr.cross_layer:
+                            entry["cross_layer"] = pr.cross_layer.to_dict()
+                        clone_pairs.append(entry)
+                except Exception as e:
+                    logger.warning(f"[Job {job_id}] Pair error {fa} vs {fb}: {e}")
+
+            # Progress is saved every ~50 pairs, checked at chunk boundaries
+            prev_done = done
+            done += len(chunk)
+            if done // 50 > prev_done // 50 or done == total_pairs:
+                job = get_job(job_id)
+                job["analyzed_count"] = done
+                job["progress"] = round(done / max(total_pairs, 1) * 100, 1)
+                job["clone_pairs"] = clone_pairs
+                job["results"] = clone_pairs
+                job["updated_at"] = time.time()
+                save_job(job_id, job)
 
         job = get_job(job_id)
         job.update({
@@ -429,6 +464,7 @@ def _run_assignment_analysis(job_id: str, request: AssignmentAnalysisRequest) ->
 
     all_clone_pairs: List[Dict] = []
     skip_pairs    = set()
+    incremental   = {"reused_pairs": 0, "recomputed_pairs": 0}
     all_pair_indices = {(i, j) for i in range(n) for j in range(i + 1, n)}
 
     for round_num in range(1, MAX_ROUNDS + 1):
@@ -461,6 +497,10 @@ def _run_assignment_analysis(job_id: str, request: AssignmentAnalysisRequest) ->
                 cp["student_a_name"] = student_names.get(str(cp.get("student_a_id")), "")
                 cp["student_b_name"] = student_names.get(str(cp.get("student_b_id")), "")
         all_clone_pairs.extend(new_pairs)
+        round_report = result.get("incremental", {})
+        for key in ("reused_pairs", "recomputed_pairs"):
+            incremental[key] += round_report.get(key, 0)
+        incremental["new_files"] = round_report.get("new_files", 0)
 
         timed_out  = {tuple(p) for p in result.get("remaining_pairs", [])}
         attempted  = all_pair_indices - skip_pairs
@@ -473,6 +513,7 @@ def _run_assignment_analysis(job_id: str, request: AssignmentAnalysisRequest) ->
             "clone_pairs":     all_clone_pairs,
             "results":         all_clone_pairs,
             "class_analysis":  result.get("class_analysis", {}),
+            "incremental":     incremental,
             "status":          "partial" if timed_out else "completed",
             "progress":        round(len(skip_pairs) / max(total_pairs, 1) * 100, 1),
         })
@@ -485,7 +526,8 @@ def _run_assignment_analysis(job_id: str, request: AssignmentAnalysisRequest) ->
     job_state["status"] = "completed"
     save_job(job_id, job_state)
     logger.info(f"[Job {job_id}] done — {job_state['analyzed_count']}/{total_pairs} pairs, "
-                f"{len(all_clone_pairs)} clone pairs")
+                f"{len(all_clone_pairs)} clone pairs ({incremental['reused_pairs']} file pairs reused, "
+                f"{incremental['recomputed_pairs']} recomputed)")
 
 
 @app.post("/api/analyze/assignment")
@@ -556,6 +598,7 @@ def get_job_results(job_id: str):
         "clone_pairs":     clone_pairs_val,
         "results":         clone_pairs_val,
         "class_analysis":  job.get("class_analysis", {}),
+        "incremental":     job.get("incremental"),
         "error":           job.get("error"),
         "mode":            job.get("mode", "unknown"),
         "student_names":   job.get("student_names", {}),
@@ -17,6 +17,7 @@ from pathlib import Path
 # Use the full CloneAnalyzer rather than hitting Type3 directly.
 # This gives us all four detection types plus cross-layer for free.
 from engine.analyzer import CloneAnalyzer, AnalyzerConfig
+from engine.incremental import IncrementalReport
 
 
 class AnalysisService:
@@ -25,7 +26,14 @@ class AnalysisService:
         # CloneAnalyzer is the single source of truth for all detection logic.
         # Instantiating it here means the service shares the same thresholds
         # and detector setup as every other code path in the engine.
-        self.analyzer = CloneAnalyzer(AnalyzerConfig())
+        self.analyzer = CloneAnalyzer(
+            AnalyzerConfig(
+                pair_workers=int(os.getenv("ANALYSIS_WORKERS", "1")),
+                lcs_backend=os.getenv("LCS_BACKEND", "difflib"),
+                incremental_dir=os.getenv("INCREMENTAL_DIR", "") or None,
+                artifact_store_mb=int(os.getenv("ARTIFACT_STORE_MB", "512")),
+            )
+        )
         self.db_url   = os.getenv("DATABASE_URL")
 
     def run_analysis(self, assignment_id: int) -> None:
@@ -63,10 +71,12 @@ class AnalysisService:
             if layer_context.is_multi_layer:
                 print(f"[AnalysisService] 🌐 Cross-layer codebase detected: {layer_context.reason}")
 
-            # Prepare the structural detector batch cache
-            from pathlib import Path as _Path
-            self.analyzer._structural.prepare_batch([_Path(p) for p in all_paths])
+            # Build every file's artifacts once and train the batch filter
+            self.analyzer.prepare_job(all_paths)
 
+            # Collect the cross-student pairs first so the pair engine can
+            # fan them out to worker processes; results are written as they arrive
+            sub_pairs = []
             for i in range(len(submissions)):
                 for j in range(i + 1, len(submissions)):
                     sub_a = submissions[i]   # (id, student_id, path)
@@ -80,59 +90,74 @@ class AnalysisService:
                     if not Path(path_a).exists() or not Path(path_b).exists():
                         print(f"[AnalysisService] Missing file: {path_a} or {path_b}")
                         continue
-
-                    # Run the full analysis pair — same code path as the API
-                    pair = self.analyzer._analyze_pair(
-                        path_a, path_b,
-                        include_details=False,
-                        layer_context=layer_context,
-                    )
-
-                    effective_score = max(
-                        pair.type1_score,
-                        pair.type2_score,
-                        pair.structural.score,
-                        pair.semantic.score,
-                    )
-
-                    # Log cross-layer hits even if the traditional score is low —
-                    # these are architecturally interesting regardless of plagiarism risk
-                    if pair.cross_layer and pair.cross_layer.is_cross_layer and pair.cross_layer.matches:
-                        n_matches = len(pair.cross_layer.matches)
-                        names     = ", ".join(m.canonical for m in pair.cross_layer.matches[:3])
-                        print(
-                            f"[AnalysisService] 🌐 Cross-layer: {sub_a[0]} vs {sub_b[0]} — "
-                            f"{n_matches} shared function(s): {names} "
-                            f"(score: {pair.cross_layer.cross_layer_score:.2f})"
-                        )
-                        # TODO: persist to a cross_layer_results table once the migration is ready
-
-                    # Only write to clone_results when the traditional detectors fire
-                    if effective_score < 0.25 or pair.primary_clone_type == "none":
-                        continue
-
+                    sub_pairs.append((sub_a, sub_b))
+
+            # Large assignments with candidate_prune_unsampled: drop pairs that
+            # share too few winnowing fingerprints (lossy, no recall sample)
+            if not layer_context.is_multi_layer:
+                candidates, pruned, report = self.analyzer.select_candidates(
+                    [(sub_a[2], sub_b[2]) for sub_a, sub_b in sub_pairs]
+                )
+                if report:
+                    keep = set(candidates)
+                    sub_pairs = [(a, b) for a, b in sub_pairs if (a[2], b[2]) in keep]
+                    print(f"[AnalysisService] 🔎 {len(candidates)} candidate pairs, {len(pruned)} pruned — {report}")
+
+            # Run the full analysis pair — same code path as the API. Pairs
+            # whose files are unchanged since the last run come from the store
+            file_pairs = [(sub_a[2], sub_b[2]) for sub_a, sub_b in sub_pairs]
+            report = IncrementalReport()
+            for idx, pair, err in self.analyzer.run_incremental(file_pairs, layer_context, report):
+                sub_a, sub_b = sub_pairs[idx]
+                if err:
+                    raise RuntimeError(f"pair {sub_a[0]} vs {sub_b[0]}: {err}")
+
+                effective_score = max(
+                    pair.type1_score,
+                    pair.type2_score,
+                    pair.structural.score,
+                    pair.semantic.score,
+                )
+
+                # Log cross-layer hits even if the traditional score is low —
+                # these are architecturally interesting regardless of plagiarism risk
+                if pair.cross_layer and pair.cross_layer.is_cross_layer and pair.cross_layer.matches:
+                    n_matches = len(pair.cross_layer.matches)
+                    names     = ", ".join(m.canonical for m in pair.cross_layer.matches[:3])
                     print(
-                        f"[AnalysisService] Clone: {sub_a[0]} vs {sub_b[0]} — "
-                        f"{pair.primary_clone_type} (score: {effective_score:.2f})"
+                        f"[AnalysisService] 🌐 Cross-layer: {sub_a[0]} vs {sub_b[0]} — "
+                        f"{n_matches} shared function(s): {names} "
+                        f"(score: {pair.cross_layer.cross_layer_score:.2f})"
                     )
-
-                    cursor.execute("""
-                        INSERT INTO clone_results
-                            (assignment_id, submission1_id, submission2_id,
-                             similarity_score, clone_type, is_plagiarism, detected_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                        ON CONFLICT DO NOTHING
-                    """, (
-                        assignment_id,
-                        sub_a[0],
-                        sub_b[0],
-                        round(effective_score * 100, 2),   # store as percentage
-                        pair.primary_clone_type,
-                        effective_score >= 0.70,
-                    ))
+                    # TODO: persist to a cross_layer_results table once the migration is ready
+
+                # Only write to clone_results when the traditional detectors fire
+                if effective_score < 0.25 or pair.primary_clone_type == "none":
+                    continue
+
+                print(
+                    f"[AnalysisService] Clone: {sub_a[0]} vs {sub_b[0]} — "
+                    f"{pair.primary_clone_type} (score: {effective_score:.2f})"
+                )
+
+                cursor.execute("""
+                    INSERT INTO clone_results
+                        (assignment_id, submission1_id, submission2_id,
+                         similarity_score, clone_type, is_plagiarism, detected_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT DO NOTHING
+                """, (
+                    assignment_id,
+                    sub_a[0],
+                    sub_b[0],
+                    round(effective_score * 100, 2),   # store as percentage
+                    pair.primary_clone_type,
+                    effective_score >= 0.70,
+                ))
 
             conn.commit()
-            print(f"[AnalysisService] ✅ Analysis complete for assignment {assignment_id}")
+            print(f"[AnalysisService] ✅ Analysis complete for assignment {assignment_id} "
+                  f"({report.reused_pairs} pairs reused, {report.recomputed_pairs} recomputed)")
 
         except Exception as e:
             print(f"[AnalysisService] ❌ Analysis failed: {e}")
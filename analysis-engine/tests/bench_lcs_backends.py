@@ -0,0 +1,75 @@
+# analysis-engine/tests/bench_lcs_backends.py
+
+"""
+LCS backend benchmark
+=====================
+Times lcs_similarity() on every fragment pair of the sample uploads,
+once with each backend, on the three token views compare_fragments uses
+(raw, normalized, structural). It then reports how closely
+"bitparallel" tracks "difflib": score deltas and how often the fragment
+clone verdict (compare_fragments().clone_type) is the same.
+
+Not collected by pytest (file name does not start with test_). Run:
+    cd analysis-engine
+    python tests/bench_lcs_backends.py [upload_dir ...]
+"""
+
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type3 import lcs_comparator as lcs
+from detectors.type3.fragment_comparator import compare_fragments
+from detectors.type3.fragment_extractor import FragmentExtractor
+
+UPLOADS = Path(__file__).resolve().parents[1] / "data" / "uploads"
+
+
+def _fragments(dirs):
+    extractor = FragmentExtractor(min_lines=5, min_tokens=15)
+    frags = []
+    for d in dirs:
+        for p in sorted(Path(d).rglob("*")):
+            if p.suffix in (".cpp", ".c", ".java", ".py", ".js"):
+                frags.extend(extractor.extract(str(p)))
+    return frags
+
+
+def _timed(views):
+    start = time.perf_counter()
+    scores = [lcs.lcs_similarity(a, b) for a, b in views]
+    return time.perf_counter() - start, scores
+
+
+def main(dirs):
+    frags = _fragments(dirs)
+    pairs = list(combinations(frags, 2))
+    views = []
+    for fa, fb in pairs:
+        views += [(fa.raw_ids, fb.raw_ids), (fa.norm_ids, fb.norm_ids), (fa.deep_ids, fb.deep_ids)]
+    print(f"📊 {len(frags)} fragments, {len(pairs)} fragment pairs, {len(views)} LCS calls")
+
+    results = {}
+    for backend in lcs.BACKENDS:
+        lcs.set_backend(backend)
+        elapsed, scores = _timed(views)
+        verdicts = [compare_fragments(fa, fb).clone_type for fa, fb in pairs]
+        results[backend] = (elapsed, scores, verdicts)
+        print(f"   {backend:<12} {elapsed * 1000:8.1f} ms  ({elapsed / max(len(views), 1) * 1e6:.1f} µs/call)")
+    lcs.set_backend("difflib")
+
+    base_t, base_s, base_v = results["difflib"]
+    fast_t, fast_s, fast_v = results["bitparallel"]
+    deltas = [f - b for f, b in zip(fast_s, base_s)]
+    same_score   = sum(1 for d in deltas if d == 0) / max(len(deltas), 1)
+    same_verdict = sum(1 for a, b in zip(base_v, fast_v) if a == b) / max(len(pairs), 1)
+    print(f"   speed-up          {base_t / max(fast_t, 1e-9):.1f}×")
+    print(f"   identical scores  {same_score:.1%}  (max delta {max(deltas, default=0):.4f}, never negative: {min(deltas, default=0) >= 0})")
+    print(f"   same verdict      {same_verdict:.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or [UPLOADS])
@@ -0,0 +1,89 @@
+# analysis-engine/tests/test_artifact_store.py
+
+"""
+Artifact store tests
+====================
+Entries are keyed by (digest, kind, version), survive a reopen, stay under
+the size cap by evicting the least recently used, can be written from
+several processes at once, and stay usable in a child forked while the
+lock was held.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_artifact_store.py -v
+"""
+
+import multiprocessing as mp
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from engine.artifact_store import ArtifactStore
+
+
+def _writer(store, worker):
+    # store's connection was opened by the parent; the first call reconnects
+    for i in range(20):
+        store.put(f"w{worker}-{i}", "blob", {"worker": worker, "i": i})
+    store.close()
+
+
+def _reader(store):
+    assert store.get("abc", "blob") == {"x": 1}
+
+
+class TestArtifactStore:
+    def test_roundtrip_and_versions(self, tmp_path):
+        db = str(tmp_path / "a.db")
+        store = ArtifactStore(db, version="v1")
+        store.put("abc", "metrics", np.arange(8, dtype=np.float64))
+        store.close()
+
+        reopened = ArtifactStore(db, version="v1")
+        assert np.array_equal(reopened.get("abc", "metrics"), np.arange(8))
+        assert reopened.get("abc", "fragments") is None
+        assert ArtifactStore(db, version="v2").get("abc", "metrics") is None
+
+    def test_lru_eviction_keeps_recent(self, tmp_path):
+        store = ArtifactStore(str(tmp_path / "a.db"), version="v1", max_bytes=20_000)
+        payload = b"x" * 1_000
+        for i in range(10):
+            store.put(f"d{i}", "blob", payload)
+        store.get("d0", "blob")                    # d0 is now the most recent
+        for i in range(10, 25):
+            store.put(f"d{i}", "blob", payload)
+
+        stats = store.stats()
+        assert stats["bytes"] <= 20_000 and stats["evicted"] > 0
+        assert store.get("d0", "blob") == payload
+        assert store.get("d1", "blob") is None
+
+    @pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+    def test_concurrent_writers(self, tmp_path):
+        db = str(tmp_path / "a.db")
+        parent = ArtifactStore(db, version="v1")
+        procs = [mp.get_context("fork").Process(target=_writer, args=(parent, w)) for w in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert parent.stats()["entries"] == 80
+        assert parent.get("w3-19", "blob") == {"worker": 3, "i": 19}
+
+    @pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+    def test_fork_while_locked(self, tmp_path):
+        parent = ArtifactStore(str(tmp_path / "a.db"), version="v1")
+        parent.put("abc", "blob", {"x": 1})
+        # Another job thread holds the lock at the moment the pair engine forks
+        with parent._process_lock():
+            child = mp.get_context("fork").Process(target=_reader, args=(parent,))
+            child.start()
+            child.join(timeout=20)
+        if child.is_alive():
+            child.kill()
+        assert child.exitcode == 0
@@ -0,0 +1,74 @@
+# analysis-engine/tests/test_batch_signals.py
+
+"""
+Batch file-level signal tests
+=============================
+The job-wide metric and winnowing matrices must reproduce the per-pair
+calculate_similarity() values exactly.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_batch_signals.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type3.winnowing import WinnowingDetector, sparse
+from utils.metrics_calculator import MetricsCalculator
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads" / "batch_1769356634"
+
+
+def _random_metrics(n: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    # Deliberately exceed the normalization ranges for some rows so clipping is exercised
+    return rng.random((n, 8)) * [300, 60, 25, 12, 40, 40, 4, 40]
+
+
+class TestMetricsMatrix:
+    def test_full_matrix_matches_pairwise(self):
+        calc = MetricsCalculator()
+        m = _random_metrics(40)
+        sim = calc.similarity_matrix(m, chunk_rows=7)
+        assert sim.shape == (40, 40)
+        assert np.allclose(np.diag(sim), 1.0)
+        assert np.array_equal(sim, sim.T)
+        for i in range(40):
+            for j in range(40):
+                assert round(float(sim[i, j]), 4) == calc.calculate_similarity(m[i], m[j])
+
+    def test_sparse_subset(self):
+        calc = MetricsCalculator()
+        m = _random_metrics(25)
+        rows, cols = np.array([0, 3, 24, 5]), np.array([1, 3, 2, 20])
+        subset = calc.similarity_matrix(m, pairs=(rows, cols))
+        assert np.array_equal(subset, calc.similarity_matrix(m)[rows, cols])
+
+    def test_metrics_matrix_runs_once_per_file(self):
+        files = sorted(str(p) for p in SAMPLE_DIR.glob("*.cpp"))[:4]
+        if len(files) < 2:
+            return
+        calc = MetricsCalculator()
+        m = calc.metrics_matrix(files)
+        assert m.shape == (len(files), 8)
+        assert m[1].tolist() == calc.calculate_file_metrics(files[1])
+
+
+@pytest.mark.skipif(sparse is None, reason="scipy not installed")
+class TestWinnowingMatrix:
+    def test_jaccard_matches_sets(self):
+        rng = np.random.default_rng(3)
+        sets = [set(rng.choice(80, size=rng.integers(0, 25), replace=False).tolist())
+                for _ in range(30)]
+        sets[4] = set()
+        jac = WinnowingDetector.jaccard_matrix(sets)
+        w = WinnowingDetector()
+        for i in range(30):
+            for j in range(30):
+                assert jac[i, j] == w.calculate_similarity(sets[i], sets[j])
@@ -0,0 +1,69 @@
+# analysis-engine/tests/test_candidate_index.py
+
+"""
+Winnowing inverted index tests
+==============================
+The index must reproduce the pairwise winnowing Jaccard exactly and only
+prune pairs that share too few non-common fingerprints.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_candidate_index.py -v
+"""
+
+import sys
+from itertools import combinations
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type3.winnowing import WinnowingDetector
+from detectors.type3.winnowing_index import WinnowingIndex
+
+FINGERPRINTS = {
+    "a.cpp": {1, 2, 3, 4, 5, 6, 99},
+    "b.cpp": {1, 2, 3, 4, 7, 8, 99},     # shares 4 non-common with a
+    "c.cpp": {10, 11, 12, 13, 99},       # shares nothing but boilerplate
+    "d.cpp": {5, 99},                    # too small to prune on
+}
+COMMON = {99}
+
+
+def _index():
+    index = WinnowingIndex(min_shared=3, min_jaccard=0.05)
+    index.build(FINGERPRINTS, COMMON)
+    return index
+
+
+class TestWinnowingIndex:
+    def test_overlap_matches_pairwise_jaccard(self):
+        index = _index()
+        w = WinnowingDetector()
+        for a, b in combinations(FINGERPRINTS, 2):
+            shared, jaccard = index.overlap(a, b)
+            fa, fb = FINGERPRINTS[a] - COMMON, FINGERPRINTS[b] - COMMON
+            assert shared == len(fa & fb)
+            assert jaccard == w.calculate_similarity(fa, fb)
+
+    def test_split(self):
+        keep, pruned = _index().split(combinations(FINGERPRINTS, 2))
+        assert ("a.cpp", "b.cpp") in keep
+        assert ("a.cpp", "c.cpp") in pruned
+        assert ("b.cpp", "c.cpp") in pruned
+        # low-information files are never pruned
+        assert all(("d.cpp" in p) for p in keep if p != ("a.cpp", "b.cpp"))
+        assert len(keep) + len(pruned) == 6
+
+    def test_diagnostics(self):
+        diag = _index().diagnostics()
+        assert diag["files"] == 4
+        assert diag["common_dropped"] == 4
+        assert diag["low_info_files"] == 1
+        assert diag["frequent_dropped"] == 0
+
+    def test_frequent_fingerprints_capped(self):
+        index = WinnowingIndex(min_shared=3, min_jaccard=0.05, max_posting=1)
+        index.build(FINGERPRINTS, COMMON)
+        # every shared fingerprint is over the cap, so no pair overlaps
+        assert index.overlap("a.cpp", "b.cpp") == (0, 0.0)
+        assert index.diagnostics()["frequent_dropped"] == 5
@@ -0,0 +1,134 @@
+# analysis-engine/tests/test_cascade.py
+
+"""
+Cascade scheduler tests
+=======================
+The default (cascade off) must match the unscheduled run exactly.
+With the cascade on, the primary clone type must not change, scores of
+stages that ran must match, a bound-skipped stage must report its upper
+bound, the Type-4 gate must see the real Type-1 score when the bound
+could reach 0.50, and every skipped stage must be recorded with its
+reason.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_cascade.py -v
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from engine.analyzer import CloneAnalyzer, build_same_language_pairs
+from engine.cascade import PairState
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads" / "batch_1769356634"
+SAMPLES    = sorted(str(p) for p in SAMPLE_DIR.glob("*.cpp"))[:8]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    if len(SAMPLES) < 2:
+        pytest.skip("sample uploads not present")
+    a = CloneAnalyzer()
+    a._semantic = None          # Type-4 compiles code — irrelevant to scheduling
+    return a
+
+
+class FakeSemantic:
+    def __init__(self):
+        self.calls = 0
+
+    def detect_pair(self, art_a, art_b, include_features=False):
+        self.calls += 1
+        return {"semantic_score": 0.0, "is_semantic_clone": False, "confidence": "UNLIKELY"}
+
+
+def _scores(pair):
+    return (pair.type1_score, pair.type2_score, pair.structural.score, pair.semantic.score,
+            pair.similarity_level, pair.needs_review, pair.primary_clone_type)
+
+
+class TestCascade:
+    def test_default_matches_unscheduled(self, analyzer):
+        assert analyzer.config.cascade is False
+        analyzer.prepare_job(SAMPLES)
+        for a, b in build_same_language_pairs(SAMPLES):
+            default = analyzer._analyze_pair(a, b)
+            full = analyzer._analyze_pair(a, b, cascade=False)
+            assert _scores(default) == _scores(full)
+            assert default.cascade is None
+
+    def test_scheduled_scores_match(self, analyzer):
+        analyzer.prepare_job(SAMPLES)
+        for a, b in build_same_language_pairs(SAMPLES):
+            full = analyzer._analyze_pair(a, b, cascade=False)
+            fast = analyzer._analyze_pair(a, b, cascade=True)
+            report = fast.cascade
+            assert fast.primary_clone_type == full.primary_clone_type
+            assert set(report["ran"]) | set(report["skipped"]) == {
+                "type1", "type2", "type3_hybrid", "type3_ml", "type4"}
+
+            for stage, score, real in (("type1", fast.type1_score, full.type1_score),
+                                       ("type2", fast.type2_score, full.type2_score)):
+                if stage in report["ran"]:
+                    assert score == real
+                elif stage in report["bounds"]:
+                    assert score == round(report["bounds"][stage], 4)
+                    assert score >= real
+
+            # Structural score, level and review flag only move when Type-3
+            # itself was skipped by a decision or bound
+            if {"type3_hybrid", "type3_ml"} <= set(report["ran"]):
+                assert fast.structural.score == full.structural.score
+                assert fast.similarity_level == full.similarity_level
+                assert fast.needs_review == full.needs_review
+
+    def test_identical_pair_skips_type3(self, analyzer, tmp_path):
+        copy = tmp_path / "copy.cpp"
+        shutil.copy(SAMPLES[0], copy)
+        analyzer.prepare_job([SAMPLES[0], str(copy)])
+        pair = analyzer._analyze_pair(SAMPLES[0], str(copy), cascade=True)
+        assert pair.primary_clone_type == "type1"
+        assert pair.cascade["decided_by"] == "type1"
+        assert pair.cascade["skipped"]["type3_hybrid"] == "decided:type1"
+        assert pair.structural.score == 1.0
+        assert pair.needs_review
+
+    def test_disabled_stage_recorded(self, analyzer):
+        analyzer.prepare_job(SAMPLES[:2])
+        pair = analyzer._analyze_pair(SAMPLES[0], SAMPLES[1], enable_type3=False, cascade=True)
+        assert pair.cascade["skipped"]["type3_hybrid"] == "disabled"
+        assert pair.structural.score == 0.0
+
+    def test_type1_bound_resolved_for_gates(self, analyzer):
+        analyzer.prepare_job(SAMPLES[:2])
+        art_a, art_b = analyzer._artifacts.get(SAMPLES[0]), analyzer._artifacts.get(SAMPLES[1])
+        real = analyzer._type1.detect_pair(art_a, art_b)["type1_score"]
+
+        high = PairState(art_a, art_b, bounds={"type1": 0.95})
+        assert analyzer._type1_for_gates(high) == real
+        assert high.scores["type1"] == real
+
+        low = PairState(art_a, art_b, bounds={"type1": 0.30})
+        assert analyzer._type1_for_gates(low) == 0.30
+        assert "type1" not in low.scores
+
+    def test_type4_gate_sees_real_type1(self, analyzer, tmp_path):
+        longer = tmp_path / "longer.cpp"
+        text = Path(SAMPLES[0]).read_text()
+        longer.write_text(text + "\n// appended notes\n" * 20)
+        analyzer.prepare_job([SAMPLES[0], str(longer)])
+        art_a, art_b = analyzer._artifacts.get(SAMPLES[0]), analyzer._artifacts.get(str(longer))
+        st = PairState(art_a, art_b, scores={"type2": 0.10, "type3": 0.10}, bounds={"type1": 0.90})
+        analyzer._semantic = FakeSemantic()
+        try:
+            # Type-1 was bound-skipped, but its real score closes the gate
+            assert analyzer._floor_type4(st) is None
+            assert st.scores["type1"] >= 0.50
+        finally:
+            analyzer._semantic = None
@@ -0,0 +1,140 @@
+# analysis-engine/tests/test_category_buckets.py
+
+"""
+Category bucket tests
+=====================
+Every file of a batch is classified once, files are grouped by
+(category, algorithm_family), and pairs across two known categories get
+their fixed signature result without any I/O work, keeping their PDG
+signal.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_category_buckets.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.educational import AlgorithmClassifier, EducationalType4Detector
+from detectors.type4.educational.algorithm_classifier import ClassificationResult
+from detectors.type4.educational.category_buckets import CategoryBuckets, signature_score
+
+SOURCES = {
+    "gcd_rec.cpp": """// greatest common divisor using the euclidean algorithm
+#include <iostream>
+int gcd(int a, int b) { if (b == 0) return a; return gcd(b, a % b); }
+int main() { int a, b; std::cin >> a >> b; std::cout << gcd(a, b); }
+""",
+    "gcd_loop.cpp": """// greatest common divisor using the euclidean algorithm
+#include <iostream>
+int gcd(int a, int b) { while (b != 0) { int t = b; b = a % b; a = t; } return a; }
+int main() { int a, b; std::cin >> a >> b; std::cout << gcd(a, b); }
+""",
+    "fact.cpp": """// factorial
+#include <iostream>
+long long factorial(int n) { long long r = 1; for (int i = 2; i <= n; i++) r = r * i; return r; }
+int main() { int n; std::cin >> n; std::cout << factorial(n); }
+""",
+    "hello.cpp": """#include <iostream>
+int main() { std::cout << "hi"; }
+""",
+}
+
+
+class CountingClassifier(AlgorithmClassifier):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def _classify_path(self, path):
+        self.reads += 1
+        return super()._classify_path(path)
+
+
+class FixedPDG:
+    def detect(self, file_a, file_b):
+        return 0.9, {}
+
+
+class NoIOTester:
+    def test(self, *args, **kwargs):
+        raise AssertionError("I/O tester ran on a cross-category pair")
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {}
+    for name, code in SOURCES.items():
+        paths[name] = str(tmp_path / name)
+        Path(paths[name]).write_text(code)
+    return paths
+
+
+class TestCategoryBuckets:
+    def test_buckets_and_candidate_pairs(self, files):
+        buckets = CategoryBuckets.build(list(files.values()), CountingClassifier())
+        assert buckets.get(files["gcd_rec.cpp"]).category == "GCD"
+        assert buckets.get(files["fact.cpp"]).category == "FACTORIAL"
+        assert buckets.unclassified == [files["hello.cpp"]]
+
+        assert buckets.is_cross_category(files["gcd_rec.cpp"], files["fact.cpp"])
+        assert not buckets.is_cross_category(files["gcd_rec.cpp"], files["gcd_loop.cpp"])
+        assert not buckets.is_cross_category(files["gcd_rec.cpp"], files["hello.cpp"])
+
+        pairs = {frozenset(p) for p in buckets.candidate_pairs()}
+        assert frozenset((files["gcd_rec.cpp"], files["fact.cpp"])) not in pairs
+        assert len(pairs) == 6 - 2      # both GCD x FACTORIAL pairs dropped
+        assert sorted(buckets.io_files()) == sorted([files["gcd_rec.cpp"], files["gcd_loop.cpp"]])
+
+    def test_classified_once(self, files):
+        classifier = CountingClassifier()
+        classifier.classify_batch(list(files.values()))
+        classifier.classify_batch(list(files.values()))
+        classifier.classify_file(files["fact.cpp"])
+        assert classifier.reads == len(files)
+
+        Path(files["fact.cpp"]).write_text(SOURCES["fact.cpp"] + "\n// edited\n")
+        classifier.classify_file(files["fact.cpp"])
+        assert classifier.reads == len(files) + 1
+
+    def test_signature_score_rules(self):
+        gcd_a = ClassificationResult(category="GCD", algorithm_family="GCD_EUCLIDEAN_ITERATIVE")
+        gcd_b = ClassificationResult(category="GCD", algorithm_family="GCD_EUCLIDEAN_RECURSIVE")
+        fact = ClassificationResult(category="FACTORIAL", algorithm_family="FACTORIAL_ITERATIVE")
+        unknown = ClassificationResult()
+        assert signature_score(gcd_a, gcd_a) == 1.0
+        assert signature_score(gcd_a, gcd_b) == 0.7
+        assert signature_score(gcd_a, fact) == 0.1
+        assert signature_score(gcd_a, unknown) == 0.3
+        assert signature_score(unknown, unknown) == 0.5
+
+
+class TestCrossCategoryGate:
+    def test_cross_category_pair_skips_io(self, files, tmp_path):
+        detector = EducationalType4Detector(enable_joern=False, cache_dir=str(tmp_path / "cache"))
+        detector.classify_batch(list(files.values()))
+        detector._io_tester = NoIOTester()
+
+        result = detector.detect(files["gcd_rec.cpp"], files["fact.cpp"])
+        assert result["category"] == "GCD / FACTORIAL"
+        assert result["io_available"] and result["io_match_score"] == 0.0
+        assert result["category_scores"]["structural"] == 0.1
+        assert result["semantic_score"] == round(0.1 * detector.WEIGHTS['signature'], 4)
+        assert not result["is_semantic_clone"] and result["confidence"] == "UNLIKELY"
+
+    def test_cross_category_pair_keeps_pdg(self, files, tmp_path):
+        detector = EducationalType4Detector(joern_detector=FixedPDG(), enable_joern=True,
+                                            cache_dir=str(tmp_path / "cache"))
+        detector.classify_batch(list(files.values()))
+        detector._io_tester = NoIOTester()
+
+        result = detector.detect(files["gcd_rec.cpp"], files["fact.cpp"])
+        assert result["io_match_score"] == 0.0
+        assert result["category_scores"]["control_flow"] == 0.9
+        assert result["semantic_score"] > round(0.1 * detector.WEIGHTS['signature'], 4)
+        assert not result["is_semantic_clone"]
@@ -0,0 +1,94 @@
+# analysis-engine/tests/test_compile_cache.py
+
+"""
+Compile cache tests
+===================
+A source compiled once — successfully or not — is served from the shared
+cache directory by any later executor without invoking g++, a compiler
+killed by a signal is not cached as an error, the cache stays under its
+size cap, and a harness compiled against the precompiled prelude
+behaves exactly like one compiled from scratch.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_compile_cache.py -v
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.educational.io_executor import (
+    CompileCache,
+    CompileResult,
+    IOExecutor,
+    cleanup_work_dir,
+    make_work_dir,
+)
+from detectors.type4.educational.problem_bank.harness_templates import HARNESS_INCLUDES
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+
+DOUBLE = HARNESS_INCLUDES + """
+int main() { int x; std::cin >> x; std::cout << 2 * x << std::endl; return 0; }
+"""
+BROKEN = HARNESS_INCLUDES + "int main() { return undeclared; }\n"
+
+
+def _no_gcc(*args, **kwargs):
+    raise AssertionError("g++ was invoked on a cached source")
+
+
+@pytest.fixture
+def work_dir():
+    d = make_work_dir()
+    yield d
+    cleanup_work_dir(d)
+
+
+class TestCompileCache:
+    def test_later_executor_reuses_binaries_and_errors(self, tmp_path, work_dir):
+        first = IOExecutor(cache_dir=str(tmp_path / "cc"))
+        ok = first.compile_cpp(DOUBLE, work_dir, "a")
+        bad = first.compile_cpp(BROKEN, work_dir, "b")
+        assert ok.success and not bad.success
+
+        second = IOExecutor(cache_dir=str(tmp_path / "cc"))
+        second._gcc = _no_gcc
+        again = second.compile_cpp(DOUBLE, work_dir, "c")
+        assert again.success and second.cache.hits == 1
+        assert second.run_cpp(again.binary_path, "21", work_dir).normalized_output == "42"
+        assert second.compile_cpp(BROKEN, work_dir, "d").error_message == bad.error_message
+
+    def test_signal_is_not_cached(self, tmp_path, work_dir):
+        executor = IOExecutor(cache_dir=str(tmp_path / "cc"))
+        executor._gcc = lambda *a, **k: subprocess.CompletedProcess([], -9, "", "")
+        killed = executor.compile_cpp(DOUBLE, work_dir, "a")
+        assert not killed.success and killed.transient
+        assert list((tmp_path / "cc").glob("*.err")) == []
+
+    def test_size_cap_evicts_oldest(self, tmp_path, work_dir):
+        cache = CompileCache(str(tmp_path / "cc"), max_bytes=5_000)
+        for i in range(10):
+            cache.put(f"k{i}", CompileResult(error_message="e" * 1_000))
+        assert cache.evicted > 0
+        assert sum(f.stat().st_size for f in (tmp_path / "cc").glob("*.err")) <= 5_000
+        assert cache.get("k9", Path(work_dir) / "x") is not None
+        assert cache.get("k0", Path(work_dir) / "x") is None
+
+    def test_precompiled_prelude_is_transparent(self, work_dir):
+        executor = IOExecutor(cache_dir=None)
+        assert executor._pch_for(DOUBLE) is not None
+        with_pch = executor.compile_cpp(DOUBLE, work_dir, "pch")
+
+        executor._pch_for = lambda source: None
+        without = executor.compile_cpp(DOUBLE, work_dir, "plain")
+        assert with_pch.success and without.success
+        for stdin_in in ("0", "-7", "123456"):
+            assert (executor.run_cpp(with_pch.binary_path, stdin_in, work_dir).raw_output
+                    == executor.run_cpp(without.binary_path, stdin_in, work_dir).raw_output)
@@ -0,0 +1,103 @@
+# analysis-engine/tests/test_fragment_index.py
+
+"""
+Fragment clone index tests
+==========================
+Exact-normalized buckets must find every Type-1/2 fragment clone, the
+LSH stage must keep the clusterable (≥ 0.70) Type-3 pairs of the sample
+uploads, the exhaustive mode must find every Type-3 pair, only Type-3
+pairs may be clustered, fragments of different partitions must never
+pair, and the index must compare fewer pairs than the cartesian product.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_fragment_index.py -v
+"""
+
+import sys
+from itertools import combinations
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type3.clone_clusterer import CloneClusterer
+from detectors.type3.fragment_comparator import compare_fragments
+from detectors.type3.fragment_extractor import FragmentExtractor
+from detectors.type3.fragment_index import FragmentIndex
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads"
+
+
+@pytest.fixture(scope="module")
+def fragments():
+    extractor = FragmentExtractor(min_lines=5, min_tokens=15)
+    frags = [f for p in sorted(SAMPLE_DIR.rglob("*.cpp")) for f in extractor.extract(str(p))]
+    if len(frags) < 10:
+        pytest.skip("sample uploads not present")
+    return frags
+
+
+def _key(fa, fb):
+    return frozenset((id(fa), id(fb)))
+
+
+class TestFragmentIndex:
+    def test_matches_cartesian_where_it_matters(self, fragments):
+        index = FragmentIndex().build(fragments)
+        found = {_key(p["frag_a"], p["frag_b"]) for p in index.pairs}
+        exact_pairs = {frozenset(pair) for g in index._exact_groups for pair in combinations(g, 2)}
+        file_pairs = {frozenset(k) for k in index.file_pair_scores()}
+        type12_pairs = {frozenset((p["group_a"], p["group_b"])) for p in index.pairs
+                        if p["clone_type"] in ("type1", "type2")}
+
+        for fa, fb in combinations(fragments, 2):
+            if fa.file_path == fb.file_path:
+                continue
+            result = compare_fragments(fa, fb)
+            if result.clone_type in ("type1", "type2"):
+                # Exact buckets are compared as a star — every file pair with a
+                # Type-1/2 fragment clone is still reported
+                key = frozenset((fa.file_path, fb.file_path))
+                assert key in exact_pairs or key in file_pairs or key in type12_pairs
+            elif result.is_type3 and result.type3_score >= 0.70:
+                assert _key(fa, fb) in found
+
+        stats = index.diagnostics()
+        assert stats["exact_compared"] + stats["near_compared"] < stats["cartesian_pairs"] / 2
+
+    def test_exhaustive_matches_cartesian(self, fragments):
+        index = FragmentIndex(exhaustive=True).build(fragments)
+        found = {_key(p["frag_a"], p["frag_b"]) for p in index.pairs}
+        for fa, fb in combinations(fragments, 2):
+            if fa.file_path == fb.file_path:
+                continue
+            result = compare_fragments(fa, fb)
+            if result.is_type3:
+                assert _key(fa, fb) in found
+
+    def test_feeds_clusterer_and_file_scores(self, fragments):
+        index = FragmentIndex().build(fragments)
+        classes = index.clone_classes(min_similarity=0.70)
+        assert classes and all(len(c.members) >= 2 for c in classes)
+        # only Type-3 pairs are clustered
+        clustered = CloneClusterer().cluster(index.type3_pairs(), min_similarity=0.70)
+        assert [c.to_dict() for c in classes] == [c.to_dict() for c in clustered]
+        scores = index.file_pair_scores()
+        assert all(a < b for a, b in scores)
+        assert any(s["best_type3_sim"] >= 0.70 for s in scores.values())
+
+    def test_partitions_never_pair(self, fragments):
+        files = sorted({f.file_path for f in fragments})
+        half = set(files[::2])
+        index = FragmentIndex(exhaustive=True,
+                              partition_of=lambda f: str(f.file_path in half)).build(fragments)
+        assert index.pairs
+        assert all((p["group_a"] in half) == (p["group_b"] in half) for p in index.pairs)
+
+    def test_keeps_comparisons_for_reuse(self, fragments):
+        index = FragmentIndex(exhaustive=True).build(fragments)
+        for p in index.pairs:
+            result = index.comparison(p["frag_a"], p["frag_b"])
+            assert result.clone_type == p["clone_type"]
@@ -0,0 +1,136 @@
+# analysis-engine/tests/test_joern_batch.py
+
+"""
+Joern batch extraction tests
+============================
+Without Docker: the session protocol is exercised against a stand-in REPL,
+a failed session start is not retried on every query, batch output is
+split back into one PDG per original file, and CloneAnalyzer.prepare_job
+runs the Joern batch stage over the files that can form a pair.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_joern_batch.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.joern.client import connection
+from detectors.type4.joern.client.connection import JoernContainerManager
+from detectors.type4.joern.client.joern_client import JoernClient
+from detectors.type4.joern.client.session import JoernSession
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads" / "batch_1769356634"
+
+# Echoes `println("..." + "...")` / `println("...")` lines, prompt included,
+# like the joern REPL does for these statements
+FAKE_REPL = r'''
+import re, sys
+for line in sys.stdin:
+    if line.strip() == "exit":
+        break
+    m = re.match(r'println\((.*)\)\s*$', line.strip())
+    if m:
+        text = "".join(re.findall(r'"([^"]*)"', m.group(1)))
+        sys.stdout.write("joern> " + text + "\n")
+        sys.stdout.flush()
+'''
+
+
+class FakeSession(JoernSession):
+    def _command(self):
+        return [sys.executable, "-c", FAKE_REPL]
+
+
+class DeadSession(JoernSession):
+    starts = 0
+
+    def start(self):
+        DeadSession.starts += 1
+        return False
+
+
+class RecordingJoern:
+    def __init__(self):
+        self.batches = []
+        self.cleared = 0
+
+    def prepare_batch(self, file_paths):
+        self.batches.append(list(file_paths))
+
+    def clear_batch(self):
+        self.cleared += 1
+
+
+BATCH_OUTPUT = """importing...
+METHOD_FILE:/workspace/jobs/abc/src/f1.cpp
+METHOD_START:gcd
+NODE|10|METHOD|int gcd(int a, int b)|3
+NODE|11|RETURN|return a|4
+CFG|10|11
+METHOD_END
+METHOD_FILE:/workspace/jobs/abc/src/f0.cpp
+METHOD_START:main
+NODE|20|METHOD|int main()|1
+METHOD_END
+"""
+
+
+class TestJoernBatch:
+    def test_session_reused_across_queries(self):
+        session = FakeSession("unused", startup_timeout=10)
+        assert session.run('println("first")', timeout=10) == "first\n"
+        proc = session._proc
+        assert session.run('println("sec" + "ond")', timeout=10) == "second\n"
+        assert session._proc is proc
+        session.close()
+
+    def test_batch_output_split_by_file(self):
+        staged = JoernContainerManager.staged_names(["/a/s1/main.cpp", "/a/s2/main.cpp", "/a/s3/main.cpp"])
+        assert staged == {"f0.cpp": "/a/s1/main.cpp", "f1.cpp": "/a/s2/main.cpp", "f2.cpp": "/a/s3/main.cpp"}
+
+        pdgs = JoernClient(auto_start=False)._parse_batch_output(BATCH_OUTPUT, staged)
+        assert [m.method_name for m in pdgs["/a/s2/main.cpp"].methods] == ["gcd"]
+        assert pdgs["/a/s2/main.cpp"].total_edges == 1
+        assert [m.method_name for m in pdgs["/a/s1/main.cpp"].methods] == ["main"]
+        assert pdgs["/a/s3/main.cpp"].methods == []
+
+    def test_failed_session_start_is_remembered(self, monkeypatch):
+        monkeypatch.setattr(connection, "JoernSession", DeadSession)
+        manager = JoernContainerManager()
+        assert manager.get_session() is None
+        assert manager.get_session() is None
+        assert DeadSession.starts == 1
+
+        # Once the cooldown is over, the session is tried again
+        monkeypatch.setattr(manager.docker_config, "session_retry_cooldown", 0)
+        assert manager.get_session() is None
+        assert DeadSession.starts == 2
+
+    def test_prepare_job_runs_batch_stage(self, tmp_path):
+        import pytest
+        from detectors.type4.educational import EducationalType4Detector
+        from detectors.type4.type4_detector import Type4Detector
+        from engine.analyzer import CloneAnalyzer
+
+        samples = sorted(str(p) for p in SAMPLE_DIR.glob("*.cpp"))[:3]
+        if len(samples) < 3:
+            pytest.skip("sample uploads not present")
+        lone = tmp_path / "lone.py"
+        lone.write_text("print(1)\n")
+
+        joern = RecordingJoern()
+        semantic = Type4Detector(backend="heuristic")
+        semantic._edu = EducationalType4Detector(joern_detector=joern, enable_io=False)
+        semantic._mode = "educational"
+        analyzer = CloneAnalyzer()
+        analyzer._semantic = semantic
+
+        analyzer.prepare_job(samples + [str(lone)])
+        # The .py file has no same-language partner, so Type-4 never sees it
+        assert joern.batches == [samples]
+        semantic.clear_job()
+        assert joern.cleared == 1
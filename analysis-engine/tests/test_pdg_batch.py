@@ -0,0 +1,155 @@
+# analysis-engine/tests/test_pdg_batch.py
+
+"""
+Batch PDG scoring tests
+=======================
+Scoring a whole batch of custom-PDG feature rows with NumPy gives exactly
+the scores of compute_pair_features + calculate_similarity run pair by
+pair, for all pairs or a candidate subset, the path-keyed caches stay
+bounded and are emptied with the batch, and Type4Detector serves them as
+its no-compiler backend.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_pdg_batch.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.custom_pdg import FeatureMatrix, PDGBatchScorer, Type4PDGDetector
+from detectors.type4.custom_pdg.batch_scorer import _round4
+from detectors.type4.custom_pdg.semantic_features import SemanticFeatures
+from detectors.type4.type4_detector import Type4Detector
+
+SOURCES = {
+    "sum_loop.cpp": """#include <iostream>
+int sum(int n) { int total = 0; for (int i = 1; i <= n; i++) total += i; return total; }
+int main() { int n; std::cin >> n; std::cout << sum(n) << std::endl; return 0; }
+""",
+    "sum_rec.cpp": """#include <iostream>
+int sum(int n) { if (n <= 0) return 0; return n + sum(n - 1); }
+int main() { int n; std::cin >> n; std::cout << sum(n) << std::endl; return 0; }
+""",
+    "sum_formula.cpp": """#include <iostream>
+int main() { int n; std::cin >> n; std::cout << n * (n + 1) / 2 << std::endl; return 0; }
+""",
+    "bubble.cpp": """#include <iostream>
+#include <algorithm>
+void sort(int* a, int n) {
+    for (int i = 0; i < n; i++)
+        for (int j = 0; j + 1 < n - i; j++)
+            if (a[j] > a[j + 1]) std::swap(a[j], a[j + 1]);
+}
+int main() { int a[5] = {5, 3, 1, 4, 2}; sort(a, 5); for (int x : a) std::cout << x; return 0; }
+""",
+    "fib.py": """def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+def main():
+    n = int(input())
+    print(fib(n))
+""",
+    "empty.py": "",
+}
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name, code in SOURCES.items():
+        path = tmp_path / name
+        path.write_text(code)
+        paths.append(str(path))
+    return paths
+
+
+def _per_pair(detector, a, b):
+    pf = detector.feature_extractor.compute_pair_features(
+        detector._get_features(a), detector._get_features(b)
+    )
+    return detector.similarity_calculator.calculate_similarity(pf)
+
+
+class TestBatchScorer:
+    def test_all_pairs_match_per_pair(self, files):
+        detector = Type4PDGDetector()
+        detector.prepare_batch(files)
+        for i, a in enumerate(files):
+            for b in files[i + 1:]:
+                assert detector.batch_score(a, b) == _per_pair(detector, a, b)
+                assert detector.batch_score(b, a) == _per_pair(detector, a, b)
+
+    def test_pair_features_match(self, files):
+        detector = Type4PDGDetector()
+        features = [detector._get_features(p) for p in files]
+        matrix = FeatureMatrix.from_features(features)
+        a, b = PDGBatchScorer.all_pairs(len(files))
+        batch = PDGBatchScorer().pair_features(matrix, a, b)
+        for k, (i, j) in enumerate(zip(a, b)):
+            expected = detector.feature_extractor.compute_pair_features(features[i], features[j])
+            assert {name: float(v[k]) for name, v in batch.items()} == expected
+
+    def test_candidate_subset_and_on_demand(self, files):
+        detector = Type4PDGDetector()
+        detector.prepare_batch(files, pairs=[(files[1], files[0])])
+        assert detector._batch_overall.shape == (1,)
+        assert detector.batch_score(files[0], files[1]) == _per_pair(detector, files[0], files[1])
+        # Pairs outside the subset, self-pairs and unknown files are scored on demand
+        assert detector.batch_score(files[2], files[3]) == _per_pair(detector, files[2], files[3])
+        assert detector.batch_score(files[4], files[4]) == _per_pair(detector, files[4], files[4])
+        outside = str(Path(files[0]).with_name("sum_loop_copy.cpp"))
+        Path(outside).write_text(SOURCES["sum_loop.cpp"])
+        assert detector.batch_score(files[0], outside)[0] == 1.0
+        assert detector._batch_overall.shape == (1,)
+
+    def test_caches_bounded_and_cleared(self, files, monkeypatch):
+        detector = Type4PDGDetector()
+        monkeypatch.setattr(detector, "CACHE_FILES", 3)
+        detector.prepare_batch(files)
+        assert len(detector._pdg_cache) == len(detector._feature_cache) == 3
+        assert list(detector._feature_cache) == files[-3:]
+        detector.clear_batch()
+        assert detector.get_cache_stats() == {"pdg_cache_size": 0, "feature_cache_size": 0}
+
+    def test_signature_and_call_edge_cases(self):
+        plain = SemanticFeatures()
+        looped = SemanticFeatures(control_signature="LLC", call_sequence=["f", "g"],
+                                  behavioral_hash="A|B")
+        other = SemanticFeatures(control_signature="LC", call_sequence=["g"],
+                                 behavioral_hash="A|C")
+        detector = Type4PDGDetector()
+        rows = [plain, looped, other]
+        matrix = FeatureMatrix.from_features(rows)
+        a, b = PDGBatchScorer.all_pairs(3)
+        overall, _ = PDGBatchScorer().score(matrix, a, b)
+        for k, (i, j) in enumerate(zip(a, b)):
+            pf = detector.feature_extractor.compute_pair_features(rows[i], rows[j])
+            assert overall[k] == detector.similarity_calculator.calculate_similarity(pf)[0]
+
+    def test_round4_matches_python(self):
+        values = np.random.default_rng(0).integers(0, 10**6, 20_000) / 10**5 + 0.00005
+        assert _round4(values).tolist() == [round(v, 4) for v in values.tolist()]
+
+
+class TestType4PDGBackend:
+    def test_detector_serves_batch_scores(self, files, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        detector = Type4Detector(backend="pdg")
+        assert detector.get_mode() == "pdg"
+        detector.prepare_batch(files)
+
+        reference = Type4PDGDetector()
+        result = detector.detect(files[0], files[1])
+        score, categories = _per_pair(reference, files[0], files[1])
+        assert result["backend"] == "custom_pdg"
+        assert result["semantic_score"] == score
+        assert result["category_scores"] == categories
+        assert result["is_semantic_clone"] == (score >= detector.threshold)
@@ -0,0 +1,102 @@
+# analysis-engine/tests/test_signal_scanner.py
+
+"""
+Signal scanner tests
+====================
+scan_source() walks a file once and must give the same answers as the
+per-signal regexes the classifier used to run: recursion, nested loops,
+class/struct names and declarations. It stays linear on large files where
+the old recursion regex backtracked for seconds.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_signal_scanner.py -v
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.educational import AlgorithmClassifier
+from detectors.type4.educational.signal_scanner import scan_source
+
+# The regexes the scanner replaces
+_RECURSION = re.compile(r'(\w+)\s*\([^)]*\)\s*;.*\breturn\b.*\1\s*\(', re.DOTALL)
+_NESTED_LOOPS = re.compile(r'for\s*\(.*\)\s*\{[^}]*for\s*\(', re.DOTALL)
+_CLASS = re.compile(r'\bclass\s+(\w+)\s*\{')
+_STRUCT = re.compile(r'\bstruct\s+(\w+)\s*\{')
+_INT_FUNCS = re.compile(r'\bint\s+(\w+)\s*\(')
+_BOOL_NO_ARGS = re.compile(r'\bbool\s+(\w+)\s*\(\s*\)')
+
+_FRAGMENTS = [
+    "for (int i = 0; i < n; i++)", "for(j=0;j<n;j++)", " {", "{", "}", " }\n",
+    "return ", "return", "f(n - 1);", "gcd(b, a % b)", "(x)", ")", "(", ";",
+    "int ", "int", "void push(int x)", "bool isEmpty()", "bool full( )",
+    "class Stack {", "struct Node{", "class  A\n{", "struct", "\n", "  ",
+    "rfor (", "swap(a, b);", "n", "x = y;", "returned", "// for (",
+]
+
+
+def _random_source(rng, length):
+    return "".join(rng.choice(_FRAGMENTS) for _ in range(length))
+
+
+class TestSignalsMatchRegexes:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_sources(self, seed):
+        rng = random.Random(seed)
+        for _ in range(300):
+            source = _random_source(rng, rng.randint(1, 40))
+            scan = scan_source(source)
+            assert scan.has_recursion == bool(_RECURSION.search(source)), source
+            assert scan.has_nested_loops == bool(_NESTED_LOOPS.search(source)), source
+            assert scan.definitions("class") == _CLASS.findall(source), source
+            assert scan.definitions("struct") == _STRUCT.findall(source), source
+            assert scan.declared(("int",)) == _INT_FUNCS.findall(source), source
+            assert scan.declared(("bool",), re.compile(r'\s*\)')) == _BOOL_NO_ARGS.findall(source), source
+
+    def test_lookups(self):
+        scan = scan_source("int minIndex = 0;\nfor (i) { low = 1; }\nhigh = 2;\n// n! = f(n-1)\n")
+        assert scan.has_word("minindex") and not scan.has_word("min")
+        assert scan.contains("index") and scan.contains("f(n-1)")
+        assert scan.contains_cased("minIndex") and not scan.contains_cased("minindex")
+        assert not scan.on_same_line("low", "high")
+        assert scan.on_same_line("for", "low")
+        assert scan.call_sites("for") == [scan.source.index("(i)")]
+
+
+class TestLargeFiles:
+    def test_no_backtracking_on_2000_lines(self):
+        # Many call statements and no `return`: the old recursion regex
+        # retried every call against the rest of the file
+        source = "\n".join(f"    step{i}(a, b);" for i in range(2_000))
+        start = time.perf_counter()
+        scan = scan_source(source)
+        assert time.perf_counter() - start < 0.5
+        assert not scan.has_recursion and not scan.has_nested_loops
+        assert len(scan.calls) == 2_000
+
+    def test_classify_batch(self, tmp_path):
+        body = "\n".join(f"    total += helper{i}(n);" for i in range(2_000))
+        files = {
+            "fact.cpp": "// factorial\nlong long factorial(int n) {\n"
+                        "    if (n <= 1) return 1;\n    return n * factorial(n - 1);\n}\n",
+            "big.cpp": f"int main() {{\n    int total = 0;\n{body}\n}}\n",
+        }
+        paths = []
+        for name, code in files.items():
+            (tmp_path / name).write_text(code)
+            paths.append(str(tmp_path / name))
+
+        start = time.perf_counter()
+        results = AlgorithmClassifier().classify_batch(paths)
+        assert time.perf_counter() - start < 1.0
+        assert results[paths[0]].category == "FACTORIAL"
+        assert results[paths[0]].algorithm_family == "FACTORIAL_RECURSIVE"
+        assert not results[paths[1]].is_known
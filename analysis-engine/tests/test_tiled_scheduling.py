@@ -0,0 +1,91 @@
+# analysis-engine/tests/test_tiled_scheduling.py
+
+"""
+Tiled pair scheduling tests
+===========================
+analyze_with_smart_batching() must cover the full upper-triangular pair
+matrix (no pairs lost across blocks) and score every pair exactly as the
+one-shot _analyze_original() does, while keeping only two blocks resident.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_tiled_scheduling.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from engine.analyzer import CloneAnalyzer
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads" / "batch_1769356634"
+SAMPLES    = sorted(str(p) for p in SAMPLE_DIR.glob("*.cpp"))[:9]
+BLOCK      = 4
+
+
+def _rows(result):
+    keys = ("file_a", "file_b", "type1_score", "type2_score",
+            "structural_score", "primary_clone_type")
+    return sorted(tuple(p[k] for k in keys) for p in result["all_pairs"])
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    if len(SAMPLES) <= BLOCK:
+        pytest.skip("sample uploads not present")
+    a = CloneAnalyzer()
+    a._semantic = None          # Type-4 compiles code — irrelevant to scheduling
+    a._probe_block_size = lambda: BLOCK
+    return a
+
+
+class TestTiledScheduling:
+    def test_covers_full_pair_matrix(self, analyzer):
+        result = analyzer.analyze_with_smart_batching(SAMPLES)
+        n = len(SAMPLES)
+        assert result["metadata"]["total_comparisons"] == n * (n - 1) // 2
+        assert len(result["all_pairs"]) == n * (n - 1) // 2
+        blocks = -(-n // BLOCK)
+        assert result["metadata"]["tiles_processed"] == blocks * (blocks + 1) // 2
+
+    def test_matches_one_shot_analysis(self, analyzer):
+        tiled = analyzer.analyze_with_smart_batching(SAMPLES)
+        full  = analyzer._analyze_original(SAMPLES)
+        assert _rows(tiled) == _rows(full)
+        assert tiled["statistics"] == full["statistics"]
+        # Fragment clones come from the same batch-wide index in both modes
+        assert tiled["clone_classes"] == full["clone_classes"]
+        assert tiled["type3_pairs"] == full["type3_pairs"]
+
+    def test_only_two_blocks_resident(self, analyzer):
+        peak = []
+        original = analyzer._analyze_pair
+
+        def spy(*args, **kwargs):
+            peak.append(len(analyzer._artifacts))
+            return original(*args, **kwargs)
+
+        analyzer._analyze_pair = spy
+        try:
+            analyzer.analyze_with_smart_batching(SAMPLES)
+        finally:
+            del analyzer._analyze_pair
+        assert max(peak) <= 2 * BLOCK
+
+    def test_clears_previous_type4_job(self, analyzer):
+        from detectors.type4.type4_detector import Type4Detector
+        semantic = Type4Detector(backend="pdg")
+        if semantic.get_mode() != "pdg":
+            pytest.skip("pdg backend unavailable")
+        semantic.prepare_job(SAMPLES[:3])
+        assert semantic._custom._batch_index
+        analyzer._semantic = semantic
+        try:
+            analyzer.analyze_with_smart_batching(SAMPLES)
+        finally:
+            analyzer._semantic = None
+        # Tiled jobs score Type-4 per pair; the earlier job's batch is gone
+        assert semantic._custom._batch_index == {}
@@ -0,0 +1,69 @@
+# analysis-engine/tests/test_type1_methods.py
+
+"""
+Type-1 batch mode tests
+=======================
+Hash bucketing must find identical groups without pairwise work, and the
+bounded near-exact path must never change a Type-1 verdict and must
+report its upper bound, not 0.0, when it skips the ratio.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_type1_methods.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type1.type1_detector import Type1Detector
+
+BASE = """
+int main() {
+    int n; cin >> n;   // read size
+    long long best = 0, cur = 0;
+    for (int i = 0; i < n; i++) { int x; cin >> x; cur = max(0LL, cur + x); best = max(best, cur); }
+    cout << best << endl;
+    return 0;
+}
+"""
+REFORMATTED = BASE.replace("    ", "\t").replace("// read size", "/* size */")
+NEAR        = BASE.replace("return 0;", "return 0; ")          # whitespace only → hash equal
+TWEAKED     = BASE.replace("best = max(best, cur);", "best = max(cur, best);")
+LONGER      = BASE + "\nint helper(int a) { return a * 2 + 1; }\n"
+
+
+def _view(t1, code):
+    return t1.build_view(code)
+
+
+class TestType1Batch:
+    def test_group_identical(self):
+        t1 = Type1Detector()
+        hashes = {name: _view(t1, code)[1] for name, code in
+                  (("a", BASE), ("b", REFORMATTED), ("c", NEAR), ("d", TWEAKED), ("e", ""))}
+        assert Type1Detector.group_identical(hashes) == [["a", "b", "c"]]
+
+    def test_bounded_keeps_verdicts(self):
+        t1 = Type1Detector()
+        codes = [BASE, REFORMATTED, TWEAKED, LONGER]
+        for i, a in enumerate(codes):
+            for b in codes[i + 1:]:
+                va, vb = _view(t1, a), _view(t1, b)
+                full    = t1._compare(*va, *vb)
+                bounded = t1._compare(*va, *vb, bounded=True)
+                assert bounded["is_clone"] == full["is_clone"]
+                if bounded.get("bounded"):
+                    # skipped ratio reports its upper bound, never a fake 0.0
+                    assert bounded["type1_score"] == bounded["upper_bound"]
+                    assert bounded["type1_score"] >= full["type1_score"]
+                else:
+                    assert bounded["type1_score"] == full["type1_score"]
+
+    def test_length_bound_skips_ratio(self):
+        t1 = Type1Detector()
+        result = t1._compare(*_view(t1, BASE), *_view(t1, LONGER), bounded=True)
+        assert result["method"] == "real_quick_ratio"
+        assert result["upper_bound"] < t1.NEAR_EXACT
+        assert result["bounded"] and result["type1_score"] == result["upper_bound"]
@@ -0,0 +1,119 @@
+# analysis-engine/tests/test_type3_methods.py
+
+"""
+Type-3 fragment tests
+=====================
+Fragments carry their token views as interned id arrays and their source
+as offsets into the shared file text. The views must match the string
+normalizers, a pickled fragment must come back comparable, pruned
+fragment pairs must be ones compare_fragments would call "none", and
+the token-id tables must stay bounded.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_type3_methods.py -v
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type3.fragment_comparator import compare_fragments, prune_reason
+from detectors.type3.fragment_extractor import FragmentExtractor
+from detectors.type3 import winnowing
+from detectors.type3.normalizer import (
+    normalize_tokens,
+    reset_token_ids,
+    structurally_normalize_tokens,
+    token_generation,
+    token_texts,
+)
+
+SOURCE = """#include <vector>
+int sumPositive(const std::vector<int>& v) {
+    int total = 0;
+    for (int i = 0; i < (int)v.size(); i++) {
+        if (v[i] > 0) total += v[i];
+    }
+    return total;
+}
+
+int countZeros(const std::vector<int>& v) {
+    int zeros = 0;
+    int k = 0;
+    while (k < (int)v.size()) {
+        if (v[k] == 0) zeros++;
+        k++;
+    }
+    return zeros;
+}
+"""
+
+
+def _fragments():
+    return FragmentExtractor(min_lines=5, min_tokens=15).extract("solution.cpp", SOURCE)
+
+
+class TestFragmentViews:
+    def test_views_match_normalizers(self):
+        frags = _fragments()
+        assert [f.name for f in frags] == ["sumPositive", "countZeros"]
+        for f in frags:
+            norm = normalize_tokens(f.tokens)
+            assert token_texts(f.norm_ids) == norm
+            assert token_texts(f.deep_ids) == structurally_normalize_tokens(norm)
+            assert f.token_count == len(f.raw_ids)
+
+    def test_source_is_a_view_of_the_file(self):
+        first, second = _fragments()
+        assert first.buffer is second.buffer
+        assert first.source_lines[0].startswith("int sumPositive")
+        assert first.source_lines == SOURCE.splitlines()[first.start_line - 1:first.end_line]
+
+    def test_pickle_roundtrip(self):
+        first, second = _fragments()
+        clone = pickle.loads(pickle.dumps(first))
+        assert clone.tokens == first.tokens
+        assert clone.source == first.source
+        assert compare_fragments(clone, second) == compare_fragments(first, second)
+
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "uploads"
+
+
+class TestFragmentPruning:
+    def test_pruned_pairs_are_none(self):
+        extractor = FragmentExtractor(min_lines=5, min_tokens=15)
+        frags = _fragments() + [f for p in sorted(SAMPLE_DIR.rglob("*.cpp"))[:20]
+                                for f in extractor.extract(str(p))]
+        pruned = 0
+        for i, fa in enumerate(frags):
+            for fb in frags[i:]:
+                if prune_reason(fa, fb):
+                    pruned += 1
+                    assert compare_fragments(fa, fb).clone_type == "none"
+        assert prune_reason(frags[0], frags[0]) is None
+        assert pruned > 0
+
+
+class TestTokenIds:
+    def test_reset_only_above_cap(self):
+        _fragments()
+        generation = token_generation()
+        assert not reset_token_ids(cap=10 ** 9)
+        assert token_generation() == generation
+        assert reset_token_ids(cap=0)
+        assert token_generation() == generation + 1
+        # Fragments built after the reset are consistent with each other
+        first, second = _fragments()
+        assert token_texts(first.norm_ids) == normalize_tokens(first.tokens)
+        assert compare_fragments(first, first).clone_type != "none"
+
+    def test_winnowing_ids_bounded(self, monkeypatch):
+        monkeypatch.setattr(winnowing, "_TOKEN_IDS_MAX", 8)
+        ids = [winnowing._token_id(f"tok{i}") for i in range(50)]
+        assert len(winnowing._TOKEN_IDS) <= 8
+        # crc32 ids do not depend on the memo
+        assert ids == [winnowing._token_id(f"tok{i}") for i in range(50)]
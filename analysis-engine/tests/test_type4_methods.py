@@ -0,0 +1,164 @@
+# analysis-engine/tests/test_type4_methods.py
+
+"""
+Type-4 I/O profiling tests
+==========================
+Every file is compiled once per content hash, no matter how many pairs it
+appears in, and pair scores come from comparing the stored output vectors.
+Transient failures (a compiler timeout) are never cached.
+A multi-case harness run gives the same per-case results as one process
+per case.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_type4_methods.py -v
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.educational.io_behavioral_tester import IOBehavioralTester
+from detectors.type4.educational.io_executor import (
+    CompileResult,
+    IOExecutor,
+    cleanup_work_dir,
+    make_work_dir,
+)
+from detectors.type4.educational.problem_bank.harness_templates import to_multi_case
+from engine.artifact_store import ArtifactStore
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+
+GCD_RECURSIVE = """// greatest common divisor using the euclidean algorithm
+#include <iostream>
+using namespace std;
+int gcd(int a, int b) {
+    if (b == 0) return a;
+    return gcd(b, a % b);
+}
+int main() { int a, b; cin >> a >> b; cout << gcd(a, b) << endl; return 0; }
+"""
+GCD_ITERATIVE = """// greatest common divisor using the euclidean algorithm
+#include <iostream>
+using namespace std;
+int gcd(int x, int y) {
+    while (y != 0) { int t = y; y = x % y; x = t; }
+    return x;
+}
+int main() { int p, q; cin >> p >> q; cout << gcd(p, q) << endl; return 0; }
+"""
+GCD_WRONG = GCD_ITERATIVE.replace("return x;", "return x + 1;")
+
+
+class CountingExecutor(IOExecutor):
+    def __init__(self):
+        super().__init__()
+        self.compiles = 0
+
+    def compile_cpp(self, *args, **kwargs):
+        self.compiles += 1
+        return super().compile_cpp(*args, **kwargs)
+
+
+class TimingOutExecutor(CountingExecutor):
+    failing = True
+
+    def compile_cpp(self, *args, **kwargs):
+        if self.failing:
+            return CompileResult(error_message="compilation timed out", transient=True)
+        return super().compile_cpp(*args, **kwargs)
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {}
+    for name, code in (("gcd_a", GCD_RECURSIVE), ("gcd_b", GCD_ITERATIVE), ("gcd_c", GCD_WRONG)):
+        paths[name] = str(tmp_path / f"{name}.cpp")
+        Path(paths[name]).write_text(code)
+    return paths
+
+
+class TestIOProfiles:
+    def test_compile_once_per_file(self, files):
+        executor = CountingExecutor()
+        tester = IOBehavioralTester(executor=executor)
+        same  = tester.test(files["gcd_a"], files["gcd_b"])
+        wrong = tester.test(files["gcd_a"], files["gcd_c"])
+        tester.test(files["gcd_b"], files["gcd_c"])
+        assert executor.compiles == 3
+
+        assert same.io_match_score == 1.0 and same.mutual_correctness == 1.0
+        assert wrong.io_match_score < 1.0 and wrong.mutual_correctness == 0.0
+        assert wrong.runnable_cases == same.runnable_cases > 0
+
+    def test_group_by_outputs(self, files):
+        tester = IOBehavioralTester()
+        profiles = tester.profile_batch(list(files.values()))
+        assert all(p.stage == "ran" for p in profiles.values())
+        assert tester.group_by_outputs(profiles) == [sorted([files["gcd_a"], files["gcd_b"]])]
+
+    def test_store_starts_warm(self, files, tmp_path):
+        store = ArtifactStore(str(tmp_path / "a.db"), version="v1")
+        first = IOBehavioralTester()
+        first.attach_store(store)
+        expected = first.test(files["gcd_a"], files["gcd_b"])
+
+        executor = CountingExecutor()
+        second = IOBehavioralTester(executor=executor)
+        second.attach_store(store)
+        result = second.test(files["gcd_a"], files["gcd_b"])
+        assert executor.compiles == 0
+        assert result.case_details == expected.case_details
+
+    def test_transient_failure_not_cached(self, files, tmp_path):
+        store = ArtifactStore(str(tmp_path / "a.db"), version="v1")
+        executor = TimingOutExecutor()
+        tester = IOBehavioralTester(executor=executor)
+        tester.attach_store(store)
+
+        first = tester.profile(files["gcd_a"])
+        assert first.stage == "compile"
+        assert store.stats()["entries"] == 0
+        executor.failing = False
+        second = tester.profile(files["gcd_a"])
+        assert second.stage == "ran"
+        assert store.stats()["entries"] == 1
+
+
+HALVE_OR_HANG = """#include <iostream>
+#include <cstdlib>
+int main() {
+    int x; std::cin >> x;
+    if (x == 2) while (true) {}
+    if (x == 3) std::abort();
+    std::cout << x / 2 << std::endl;
+    return 0;
+}
+"""
+
+
+class TestMultiCaseRuns:
+    def test_matches_one_process_per_case(self):
+        executor = IOExecutor(run_timeout=1, workers=4)
+        inputs = ["10", "2", "3", "7"]
+        work_dir = make_work_dir()
+        try:
+            single = executor.compile_cpp(HALVE_OR_HANG, work_dir, "single")
+            multi  = executor.compile_cpp(to_multi_case(HALVE_OR_HANG, "cpp"), work_dir, "multi")
+            assert single.success and multi.success
+            per_case = executor.run_cases(single.binary_path, "cpp", inputs, work_dir)
+            batched  = executor.run_cases(multi.binary_path, "cpp", inputs, work_dir, multi_case=True)
+        finally:
+            cleanup_work_dir(work_dir)
+
+        def summary(runs):
+            return [(r.succeeded, r.timed_out, r.normalized_output) for r in runs]
+
+        assert summary(batched) == summary(per_case) == [
+            (True, False, "5"), (False, True, ""), (False, False, ""), (True, False, "3"),
+        ]
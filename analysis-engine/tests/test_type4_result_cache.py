@@ -0,0 +1,157 @@
+# analysis-engine/tests/test_type4_result_cache.py
+
+"""
+Type-4 result cache tests
+=========================
+Pair results go into one SQLite store instead of a JSON file per pair:
+writes are buffered and committed in batches, entries expire after the
+TTL, prefetch() serves a whole job from memory without keeping earlier
+jobs' entries, forked workers can write
+concurrently, hits/misses are counted, the content-hash memo is bounded,
+and keys depend on the tools the backend found.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_type4_result_cache.py -v
+"""
+
+import multiprocessing as mp
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4 import result_cache
+from detectors.type4.result_cache import Type4ResultCache, content_hash
+from detectors.type4.type4_detector import Type4Detector
+
+
+def _writer(cache, worker):
+    for i in range(10):
+        cache.put(f"w{worker}-{i}", {"worker": worker, "i": i})
+    cache.flush()
+
+
+def _no_store_reads(*args, **kwargs):
+    raise AssertionError("store was queried for a prefetched key")
+
+
+class TestResultCache:
+    def test_batched_writes(self, tmp_path):
+        db = str(tmp_path / "r.db")
+        writer = Type4ResultCache(db)
+        writer.put("a", {"semantic_score": 0.7})
+        assert writer.get("a") == {"semantic_score": 0.7}       # visible before commit
+        assert Type4ResultCache(db).get("a") is None
+
+        writer.flush()
+        assert Type4ResultCache(db).get("a") == {"semantic_score": 0.7}
+
+        for i in range(Type4ResultCache.FLUSH_BATCH):
+            writer.put(f"k{i}", {"i": i})
+        assert writer.stats()["pending"] == 0
+        assert Type4ResultCache(db).get("k3") == {"i": 3}
+
+    def test_ttl_and_counters(self, tmp_path):
+        cache = Type4ResultCache(str(tmp_path / "r.db"))
+        cache.put("a", {"x": 1})
+        cache.flush()
+        assert cache.get("a") == {"x": 1}
+        assert cache.get("missing") is None
+
+        cache.ttl = 0
+        assert cache.get("a") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 2, 1)
+        assert stats["hit_rate"] == round(1 / 3, 4)
+
+    def test_prefetch_serves_from_memory(self, tmp_path):
+        db = str(tmp_path / "r.db")
+        writer = Type4ResultCache(db)
+        for i in range(1_200):
+            writer.put(f"k{i}", {"i": i})
+        writer.flush()
+
+        reader = Type4ResultCache(db)
+        assert reader.prefetch([f"k{i}" for i in range(0, 1_500, 2)]) == 600
+        reader.store.get = _no_store_reads
+        assert reader.get("k998") == {"i": 998}
+
+    def test_prefetch_replaces_previous_job(self, tmp_path, monkeypatch):
+        db = str(tmp_path / "r.db")
+        writer = Type4ResultCache(db)
+        for i in range(100):
+            writer.put(f"k{i}", {"i": i})
+        writer.flush()
+
+        reader = Type4ResultCache(db)
+        reader.prefetch([f"k{i}" for i in range(50)])
+        reader.prefetch([f"k{i}" for i in range(40, 100)])
+        assert reader.stats()["prefetched"] == 60
+
+        monkeypatch.setattr(Type4ResultCache, "PREFETCH_MAX", 10)
+        assert reader.prefetch([f"k{i}" for i in range(100)]) == 10
+        assert reader.stats()["prefetched"] == 10
+        assert reader.get("k99") == {"i": 99}      # beyond the cap: read on demand
+
+    def test_clear(self, tmp_path):
+        cache = Type4ResultCache(str(tmp_path / "r.db"))
+        cache.put("a", {"x": 1})
+        cache.flush()
+        cache.clear()
+        assert cache.get("a") is None and cache.store.stats()["entries"] == 0
+
+    @pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+    def test_concurrent_workers(self, tmp_path):
+        db = str(tmp_path / "r.db")
+        parent = Type4ResultCache(db)
+        parent.put("parent", {"x": 0})          # buffered in the parent only
+        procs = [mp.get_context("fork").Process(target=_writer, args=(parent, w)) for w in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+        assert parent.store.stats()["entries"] == 40
+        parent.flush()
+        assert Type4ResultCache(db).get("w2-9") == {"worker": 2, "i": 9}
+        assert parent.store.stats()["entries"] == 41
+
+
+    def test_hash_memo_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(result_cache, "HASH_MEMO_FILES", 3)
+        result_cache._hash_memo.clear()
+        paths = []
+        for i in range(5):
+            path = tmp_path / f"f{i}.py"
+            path.write_text(f"x = {i}\n")
+            paths.append(str(path))
+            content_hash(str(path))
+        assert len(result_cache._hash_memo) == 3
+        assert [k[0] for k in result_cache._hash_memo] == paths[2:]
+
+
+class TestType4DetectorCache:
+    def test_detector_uses_one_store(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        a, b = tmp_path / "a.py", tmp_path / "b.py"
+        a.write_text("def f(n):\n    return n * 2\n")
+        b.write_text("def g(n):\n    total = 0\n    for i in range(n):\n        total += 2\n    return total\n")
+
+        detector = Type4Detector(backend="pdg")
+        first = detector.detect(a, b)
+        assert detector.detect(a, b) == first
+        assert detector.cache_stats()["hits"] == 1
+
+        detector.flush_cache()
+        assert list((tmp_path / ".cache" / "type4").glob("*.json")) == []
+        assert detector.prefetch([(content_hash(str(a)), content_hash(str(b)))]) == 1
+
+    def test_key_includes_found_tools(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        detector = Type4Detector(backend="heuristic")
+        key = detector._pair_key("a" * 64, "b" * 64)
+        detector._tools = "joern=1,gpp=1,python=1"
+        assert detector._pair_key("a" * 64, "b" * 64) != key
@@ -0,0 +1,91 @@
+# analysis-engine/tests/test_wl_kernel.py
+
+"""
+WL kernel matrix tests
+======================
+The batch kernel matrix (one sparse product over hashed WL features) must
+equal pairwise WLKernel.similarity(), PDGs must survive the compact
+form they are cached in, and per-pair detection must reuse cached PDGs.
+
+Run:
+    cd analysis-engine
+    python -m pytest tests/test_wl_kernel.py -v
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from detectors.type4.joern.comparators.wl_kernel import WLKernel
+from detectors.type4.joern.models import PDG, EdgeType, MethodPDG, PDGEdge, PDGNode
+
+LABELS = ["IF", "WHILE", "CALL", "RETURN", "ASSIGNMENT", "LITERAL", "IDENTIFIER", "BLOCK"]
+
+
+def _random_pdg(seed: int) -> PDG:
+    rng = random.Random(seed)
+    pdg = PDG(language="cpp")
+    for m in range(rng.randint(1, 3)):
+        method = MethodPDG(method_name=f"m{m}")
+        n = rng.randint(3, 25)
+        for i in range(n):
+            method.add_node(PDGNode(id=f"{m}_{i}", code=f"x{i}", label=rng.choice(LABELS),
+                                    line_number=i + 1, method_name=method.method_name))
+        for _ in range(2 * n):
+            method.add_edge(PDGEdge(f"{m}_{rng.randrange(n)}", f"{m}_{rng.randrange(n)}",
+                                    rng.choice([EdgeType.CONTROL, EdgeType.DATA])))
+        pdg.add_method(method)
+    return pdg
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_pdg_from_code(self, code, language):
+        self.calls += 1
+        return _random_pdg(len(code))
+
+    def cleanup(self):
+        pass
+
+
+class TestWLKernelMatrix:
+    def test_matrix_matches_pairwise(self):
+        pdgs = [_random_pdg(i) for i in range(40)] + [PDG()]
+        kernel = WLKernel()
+        matrix = kernel.kernel_matrix(pdgs)
+        expected = np.array([[kernel.similarity(a, b) for b in pdgs] for a in pdgs])
+        assert matrix.shape == (41, 41)
+        assert np.allclose(matrix, expected, atol=1e-12)
+        assert np.allclose(np.diag(matrix), 1.0)
+
+    def test_compact_roundtrip(self):
+        pdg = _random_pdg(7)
+        restored = PDG.from_compact(pdg.to_compact(), file_path="x.cpp")
+        assert restored.file_path == "x.cpp"
+        assert restored.to_compact() == pdg.to_compact()
+        assert WLKernel().similarity(pdg, restored) == 1.0
+
+    def test_pair_path_uses_pdg_cache(self, tmp_path):
+        from detectors.type4.joern.joern_detector import JoernDetector
+
+        detector = JoernDetector(auto_start=False)
+        detector.client = CountingClient()
+        a, b, c = (tmp_path / name for name in ("a.cpp", "b.cpp", "c.cpp"))
+        a.write_text("int main() { return 0; }\n")
+        b.write_text("int f(int x) { return x + 1; }\n")
+        c.write_text(a.read_text())
+
+        first = detector.detect_from_files(str(a), str(b))
+        assert first.status == "success"
+        assert detector.client.calls == 2
+        # c has a's content: both PDGs come from the content-hash cache
+        second = detector.detect_from_files(str(c), str(b))
+        assert detector.client.calls == 2
+        assert second.similarity == first.similarity
+        assert second.scores.wl_similarity == first.scores.wl_similarity
@@ -1,4 +1,3 @@
-import hashlib
 from collections import Counter
 
 class BatchFrequencyFilter:
@@ -7,17 +6,25 @@ class BatchFrequencyFilter:
         self.common_hashes = set()
 
     def train_on_batch(self, all_files_tokens, k=5):
-        """Finds hashes that appear in more than 70% of files."""
-        if len(all_files_tokens) < 2: return
-        
+        """Finds hashes that appear in more than 70% of files.
+
+        all_files_tokens may be any iterable (e.g. a generator that lexes
+        one file at a time), so the batch never has to be held in memory.
+        """
+        from detectors.type3.winnowing import kgram_hashes
+        self.train_on_hashes(set(kgram_hashes(tokens, k)) for tokens in all_files_tokens)
+
+    def train_on_hashes(self, all_files_hashes):
+        """train_on_batch() on per-file k-gram hash sets that are already
+        computed (the same rolling hashes the winnowing fingerprint uses),
+        so no file is hashed twice."""
         global_counts = Counter()
-        for tokens in all_files_tokens:
-            file_hashes = set()
-            for i in range(len(tokens) - k + 1):
-                window = "|".join(tokens[i:i+k])
-                h = int(hashlib.md5(window.encode('utf-8')).hexdigest(), 16)
-                file_hashes.add(h)
+        n_files = 0
+        for file_hashes in all_files_hashes:
+            n_files += 1
             global_counts.update(file_hashes)
 
-        cutoff = len(all_files_tokens) * self.threshold
-        self.common_hashes = {h for h, count in global_counts.items() if count >= cutoff}
\ No newline at end of file
+        if n_files < 2: return
+
+        cutoff = n_files * self.threshold
+        self.common_hashes = {h for h, count in global_counts.items() if count >= cutoff}
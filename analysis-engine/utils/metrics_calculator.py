@@ -29,7 +29,7 @@ import re
 import lizard
 import numpy as np
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 
 # ─── Operator patterns ────────────────────────────────────────────────────────
@@ -42,12 +42,50 @@ _NESTING_KEYWORDS = re.compile(
 )
 
 
+# ─── Similarity weighting ─────────────────────────────────────────────────────
+# Per-feature normalization ranges (approximate max values in student code)
+# Prevents large-magnitude features from dominating
+RANGES = np.array([
+    200.0,   # nloc
+    50.0,    # cyclomatic complexity
+    20.0,    # function count
+    10.0,    # max nesting depth
+    30.0,    # total param count
+    30.0,    # return points
+    3.0,     # operator density
+    30.0,    # unique operators
+], dtype=np.float64)
+
+# Feature weights (importance for Type-3 discrimination)
+WEIGHTS = np.array([
+    0.10,   # nloc
+    0.25,   # cyclomatic complexity  ← most discriminative
+    0.10,   # function count
+    0.20,   # max nesting depth      ← second most discriminative
+    0.10,   # total params
+    0.10,   # return points
+    0.10,   # operator density
+    0.05,   # unique operators
+], dtype=np.float64)
+
+_MAX_DIST = float(np.sqrt(np.sum(WEIGHTS ** 2)))   # max possible distance
+
+
+def _distance_to_similarity(diff: np.ndarray) -> np.ndarray:
+    """Weighted differences (last axis = features) → similarity in [0, 1]."""
+    dist = np.sqrt(np.sum(diff ** 2, axis=-1))
+    return np.clip(1.0 - dist / max(_MAX_DIST, 1e-9), 0.0, 1.0)
+
+
 class MetricsCalculator:
 
-    def calculate_file_metrics(self, file_path: str) -> List[float]:
+    def calculate_file_metrics(self, file_path: str, source: Optional[str] = None) -> List[float]:
         """
         Compute the expanded 8-feature metric vector for one file.
 
+        If source is given it is analysed directly instead of re-reading
+        file_path (the path is still used to pick lizard's language reader).
+
         Returns:
           [nloc, cyclomatic_complexity, function_count,
            max_nesting_depth, total_param_count,
@@ -55,7 +93,10 @@ class MetricsCalculator:
         """
         try:
             path_str = str(file_path)
-            analysis = lizard.analyze_file(path_str)
+            if source is None:
+                analysis = lizard.analyze_file(path_str)
+            else:
+                analysis = lizard.analyze_file.analyze_source_code(path_str, source)
 
             # ── Primary lizard metrics ────────────────────────────────
             nloc           = float(analysis.nloc or 0)
@@ -79,7 +120,8 @@ class MetricsCalculator:
 
             # ── Source-level features (need raw source) ───────────────
             try:
-                source = Path(path_str).read_text(encoding="utf-8", errors="ignore")
+                if source is None:
+                    source = Path(path_str).read_text(encoding="utf-8", errors="ignore")
                 return_points   = float(len(_RETURN_RE.findall(source)))
                 all_ops         = _OPERATORS.findall(source)
                 operator_count  = float(len(all_ops))
@@ -123,46 +165,48 @@ class MetricsCalculator:
 
         Returns a similarity in [0, 1] where 1 = identical metrics.
         """
-        a = np.array(metrics_a, dtype=np.float64)
-        b = np.array(metrics_b, dtype=np.float64)
-
-        # Per-feature normalization ranges (approximate max values in student code)
-        # Prevents large-magnitude features from dominating
-        RANGES = np.array([
-            200.0,   # nloc
-            50.0,    # cyclomatic complexity
-            20.0,    # function count
-            10.0,    # max nesting depth
-            30.0,    # total param count
-            30.0,    # return points
-            3.0,     # operator density
-            30.0,    # unique operators
-        ], dtype=np.float64)
-
-        # Feature weights (importance for Type-3 discrimination)
-        WEIGHTS = np.array([
-            0.10,   # nloc
-            0.25,   # cyclomatic complexity  ← most discriminative
-            0.10,   # function count
-            0.20,   # max nesting depth      ← second most discriminative
-            0.10,   # total params
-            0.10,   # return points
-            0.10,   # operator density
-            0.05,   # unique operators
-        ], dtype=np.float64)
-
-        # Normalise each feature to [0,1]
-        a_norm = np.clip(a / RANGES, 0, 1)
-        b_norm = np.clip(b / RANGES, 0, 1)
-
-        # Weighted Euclidean distance, scaled to [0, 1]
-        diff        = (a_norm - b_norm) * WEIGHTS
-        weighted_dist = float(np.sqrt(np.sum(diff ** 2)))
-        max_dist      = float(np.sqrt(np.sum(WEIGHTS ** 2)))  # max possible distance
-
-        # Similarity = 1 - normalized_distance
-        similarity = 1.0 - (weighted_dist / max(max_dist, 1e-9))
-        return round(float(np.clip(similarity, 0.0, 1.0)), 4)
+        matrix = np.array([metrics_a, metrics_b], dtype=np.float64)
+        sim = self.similarity_matrix(matrix, pairs=(np.array([0]), np.array([1])))
+        return round(float(sim[0]), 4)
+
+    # ─── Batch API ────────────────────────────────────────────────────────────
+
+    def metrics_matrix(self, file_paths: List[str],
+                       sources: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """
+        Run lizard once per file and stack the vectors into an n×8 matrix
+        (row i = file_paths[i]). sources, when given, is aligned with
+        file_paths and avoids re-reading the files.
+        """
+        if sources is None:
+            sources = [None] * len(file_paths)
+        rows = [self.calculate_file_metrics(p, s) for p, s in zip(file_paths, sources)]
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(WEIGHTS))
+
+    def similarity_matrix(self, matrix: np.ndarray, pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                          chunk_rows: int = 256) -> np.ndarray:
+        """
+        calculate_similarity() for many files at once.
+
+        matrix is n×8 (see metrics_matrix). Without pairs the full n×n
+        similarity matrix is returned; with pairs=(rows, cols) only those
+        entries are computed and a 1-D array is returned. The full matrix
+        is broadcast in blocks of chunk_rows rows so peak memory stays at
+        chunk_rows·n·8 floats. Values are unrounded — calculate_similarity
+        rounds its single result to 4 places.
+        """
+        scaled = np.clip(np.asarray(matrix, dtype=np.float64) / RANGES, 0, 1) * WEIGHTS
+
+        if pairs is not None:
+            rows, cols = (np.asarray(x, dtype=np.intp) for x in pairs)
+            return _distance_to_similarity(scaled[rows] - scaled[cols])
+
+        n = scaled.shape[0]
+        out = np.empty((n, n), dtype=np.float64)
+        for s in range(0, n, chunk_rows):
+            block = scaled[s:s + chunk_rows]
+            out[s:s + chunk_rows] = _distance_to_similarity(block[:, None, :] - scaled[None, :, :])
+        return out
 
     def feature_names(self) -> List[str]:
         """Return the names of the 8 features, for CSV export."""